@@ -1,9 +1,6 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from app.config import Config
-import logging
-from logging.handlers import RotatingFileHandler
-import os
 
 # 初始化数据库
 db = SQLAlchemy()
@@ -18,30 +15,42 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # 配置日志记录
+    # 配置日志记录：各模块日志经队列由后台线程写入日志文件和控制台
+    from app.utils import log_setup
+    log_setup.configure_logging(app)
     if not app.debug and not app.testing:
-        # 设置日志级别
-        app.logger.setLevel(logging.INFO)
-        
-        # 创建RotatingFileHandler，限制日志文件大小为10MB，保留5个备份
-        file_handler = RotatingFileHandler(
-            Config.LOG_FILE,
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=5
-        )
-        
-        # 设置日志格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        
-        # 添加日志处理器
-        app.logger.addHandler(file_handler)
         app.logger.info('Application startup')
     
-    # 初始化数据库
+    # 初始化数据库：按数据库类型（SQLite/MySQL）生成连接池参数并注册连接事件
+    from app.utils import db_profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_profile.engine_options(app.config)
     db.init_app(app)
+    with app.app_context():
+        db_profile.configure_engine(db.engine, app.config)
+    
+    # 登录记录等审计数据由后台线程批量写入
+    from app.utils import audit_queue
+    audit_queue.init_app(app)
+    
+    # 请求耗时、SQL耗时等性能指标，由 /metrics 输出
+    from app.utils import metrics
+    metrics.init_app(app)
+    
+    # CPU 密集型接口的并发限制，过载时返回503
+    from app.utils import admission
+    admission.init_app(app)
+    
+    # 慢请求剖析（PROFILE_ENABLED 开启时），结果保存到 logs/profiles/
+    from app.utils import request_profiler
+    request_profiler.init_app(app)
+    
+    # 启动预热状态，由 /readyz 输出，预热由 run.py 开始
+    from app.utils import warmup
+    warmup.init_app(app)
+    
+    # 路径优化、全部城市预测等耗时计算的后台任务队列，由 /jobs 提交和查询
+    from app.utils import job_queue
+    job_queue.init_app(app)
     
     # 导入并注册蓝图
     from app.routes.visualizations import bp as visualizations_bp
@@ -56,6 +65,9 @@ def create_app(config_class=Config):
     from app.routes.api import api_bp as api_bp
     from app.routes.path_optimization import path_bp as path_optimization_bp
     from app.routes.tourism_decision_center import tourism_decision_center as tourism_decision_center_bp
+    from app.routes.metrics_view import metrics_view as metrics_bp
+    from app.routes.health import health as health_bp
+    from app.routes.jobs import jobs as jobs_bp
 
     app.register_blueprint(visualizations_bp)
     app.register_blueprint(map_view_bp)
@@ -69,39 +81,20 @@ def create_app(config_class=Config):
     app.register_blueprint(api_bp)
     app.register_blueprint(path_optimization_bp)
     app.register_blueprint(tourism_decision_center_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
     
-    # 创建数据库表（如果不存在）
+    # 创建数据库表（如果不存在），并执行未执行的结构迁移
     with app.app_context():
         db.create_all()
         
-        # 预加载和缓存数据，优化应用性能
-    # 注释掉数据预加载，避免初始化时出错
-    # if not hasattr(app, '_preloaded'):
-    #     print("开始预加载和缓存数据...")
-    #     import sys
-    #     import os
-    #     
-    #     # 将项目根目录添加到Python路径
-    #     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    #     
-    #     try:
-    #         from scripts.optimize_loading import optimize_data_loader, optimize_prediction_models, optimize_recommendation_service
-    #         
-    #         # 预加载所有城市数据
-    #         optimize_data_loader()
-    #         
-    #         # 预训练所有城市的预测模型
-    #         optimize_prediction_models()
-    #         
-    #         # 预加载推荐服务数据
-    #         optimize_recommendation_service()
-    #         
-    #         print("数据预加载和缓存完成！")
-    #         # 标记为已预加载
-    #         app._preloaded = True
-    #     except Exception as e:
-    #         print(f"数据预加载和缓存过程中出现错误: {e}")
-    #         import traceback
-    #         traceback.print_exc()
+        from app.utils import migrations
+        try:
+            migrations.upgrade(db.engine)
+        except Exception:
+            # 迁移失败时数据库结构与模型不一致（如缺少唯一索引），不能继续提供服务
+            app.logger.exception("数据库迁移失败，停止启动")
+            raise
 
     return app
@@ -11,36 +11,124 @@ class Config:
 
     # 数据目录配置
     DATA_DIR = BASE_DIR / 'data'  # 数据目录在项目根目录下
-
-    # 检查数据目录是否存在
-    if not DATA_DIR.exists():
-        raise RuntimeError(f"数据目录不存在: {DATA_DIR}")
-    
-    # 检查是否有天气数据文件
-    weather_data_files = list(DATA_DIR.glob('**/*天气数据.csv'))  # 递归查找所有子目录
-    if not weather_data_files:
-        print(f"警告：数据目录中没有找到天气数据文件: {DATA_DIR}")
-        # 不再抛出异常，改为警告，允许应用继续运行
-        # raise RuntimeError(f"数据目录中没有找到天气数据文件: {DATA_DIR}")
+    # 数据目录的检查见 validate()，不在导入配置时扫描目录
     
     # 数据库配置 - SQLite
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{BASE_DIR}/app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # 数据库连接池配置
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 5,  # 连接池大小
-        'max_overflow': 10,  # 最大溢出连接数
-        'pool_timeout': 30,  # 连接超时时间（秒）
-        'pool_recycle': 3600,  # 连接回收时间（秒）
-    }
+    # 数据库连接池配置，由 app/utils/db_profile.py 按数据库类型生成引擎参数
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # 连接池大小
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))  # 最大溢出连接数
+    DB_POOL_TIMEOUT = 30  # 连接超时时间（秒）
+    DB_POOL_RECYCLE = 3600  # 连接回收时间（秒），仅MySQL等服务端数据库
+    
+    # SQLite文件数据库配置
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') != '0'  # WAL日志模式，读写互不阻塞
+    SQLITE_BUSY_TIMEOUT = 5000  # 等待数据库锁的时间（毫秒）
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 内存映射读取的大小（字节）
+    
+    # 显式指定的引擎参数，优先于上面按数据库类型生成的参数
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    # 审计记录（登录记录）异步批量写入配置
+    AUDIT_FLUSH_INTERVAL_MS = 200  # 最长攒批时间（毫秒）
+    AUDIT_BATCH_SIZE = 100  # 每批最多写入的记录数
+    AUDIT_QUEUE_MAXSIZE = 10000  # 队列长度上限，队列满时在请求中同步写入
+
+    # 登录用户身份缓存的过期时间（秒）
+    IDENTITY_CACHE_TTL = 60
 
     # 日志配置
     LOG_DIR = BASE_DIR / 'logs'
-    LOG_FILE = LOG_DIR / 'app.log'
+    LOG_FILE = Path(os.environ.get('LOG_FILE') or LOG_DIR / 'app.log')
+    LOG_INDEX_ENABLED = True  # 日志查看按级别、时间筛选时在内存中保留块索引
+    LOG_LEVEL = os.environ.get('LOG_LEVEL')  # 总日志级别，默认INFO（调试模式为DEBUG）
+    # 单个模块的日志级别，如 LOG_MODULE_LEVELS="app.services.path_optimization_service=DEBUG"
+    LOG_MODULE_LEVELS = os.environ.get('LOG_MODULE_LEVELS', '')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # text 或 json
+    LOG_CONSOLE = True  # 是否同时输出到控制台
+    LOG_CONSOLE_LEVEL = os.environ.get('LOG_CONSOLE_LEVEL')  # 控制台输出级别，默认同总级别
+    LOG_SAMPLE_EVERY = 100  # 循环中的采样日志每个位置每100次输出一次
+    # 日志文件是否在进程内按大小轮转；预派生部署（PREFORK=1）中多个工作进程写同一文件，
+    # 默认关闭，由 logrotate 等外部工具轮转
+    LOG_ROTATE = os.environ.get('LOG_ROTATE', '0' if os.environ.get('PREFORK') == '1' else '1') != '0'
+    
+    # 性能指标配置
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'  # 记录性能指标并开放 /metrics
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'  # 响应带 Server-Timing 头
+    
+    # 慢请求剖析配置（默认关闭），见 app/utils/request_profiler.py
+    PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', '0') == '1'
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.1))  # 挂上剖析器的请求比例
+    PROFILE_MIN_DURATION_MS = int(os.environ.get('PROFILE_MIN_DURATION_MS', 1000))  # 耗时达到该值才保存（毫秒）
+    PROFILE_DIR = LOG_DIR / 'profiles'
+    PROFILE_MAX_FILES = 50  # 最多保留的剖析份数
+    
+    # 启动预热配置，见 app/utils/warmup.py
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') != '0'
+    WARMUP_TIMEOUT = float(os.environ.get('WARMUP_TIMEOUT', 120))  # 预热时间预算（秒），超出后不再等待，直接就绪
+    WARMUP_WORKERS = 4  # 并行执行预热任务的线程数
+    WARMUP_FORECAST_DAYS = 7  # 预热的天气预测天数
+    
+    # 后台任务队列配置，见 app/utils/job_queue.py
+    JOB_BACKEND = os.environ.get('JOB_BACKEND') or 'memory'  # memory or redis
+    JOB_REDIS_URL = os.environ.get('JOB_REDIS_URL') or 'redis://localhost:6379/0'
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # 执行任务的后台线程数
+    JOB_QUEUE_MAXSIZE = 100  # 排队任务数上限，队列满时提交返回503
+    JOB_RESULT_TTL = 600  # 任务状态和结果的保留时间（秒）
+    JOB_SSE_POLL_INTERVAL = 0.5  # SSE 检查任务状态的间隔（秒）
+    JOB_SSE_TIMEOUT = 120  # SSE 连接的最长时间（秒）
+    
+    # 路径优化遗传算法的默认时间预算（毫秒），0 为固定迭代代数；请求中的 time_budget_ms 优先
+    PATH_TIME_BUDGET_MS = int(os.environ.get('PATH_TIME_BUDGET_MS', 0))
+    # 时间预算上限（毫秒），请求或默认值超过时按上限处理，避免单个请求长时间占用计算线程
+    PATH_TIME_BUDGET_MAX_MS = int(os.environ.get('PATH_TIME_BUDGET_MAX_MS', 2000))
+    
+    # CPU 密集型接口的准入控制，见 app/utils/admission.py
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') != '0'
+    # 执行和排队中的重计算请求总数上限，应小于服务线程数（render.yaml 中 waitress 为 8 个线程）
+    ADMISSION_MAX_HEAVY_REQUESTS = int(os.environ.get('ADMISSION_MAX_HEAVY_REQUESTS', 6))
+    ADMISSION_RETRY_AFTER = 5  # 拒绝时 Retry-After 头的秒数
+    # 资源池：limit 同时执行数，queue 排队数上限，timeout 排队超时（秒）
+    ADMISSION_POOLS = {
+        'path': {'limit': 1, 'queue': 2, 'timeout': 15},  # 遗传算法路径优化
+        'map': {'limit': 1, 'queue': 2, 'timeout': 10},  # folium 地图生成
+        'prediction': {'limit': 1, 'queue': 2, 'timeout': 30},  # 天气预测和模型训练
+    }
+    # 端点 -> 资源池，未列出的端点不受限制；预测页预热后通常命中预测缓存，不限制
+    ADMISSION_ENDPOINTS = {
+        'path_optimization.optimize_path': 'path',
+        'api.optimize_path': 'path',
+        'api.adjust_path_for_weather': 'path',
+        'api.plan_itinerary': 'path',
+        'path_optimization.adjust_path_for_weather': 'map',
+        'path_optimization.generate_map': 'map',
+        'api.generate_map': 'map',
+        'map_view.index': 'map',
+        'prediction.all_cities_prediction': 'prediction',
+        'api.predict_weather': 'prediction',
+        'api.predict_traffic': 'prediction',
+    }
     
     # 预测服务配置
-    PREDICTION_SERVICE_TYPE = os.environ.get('PREDICTION_SERVICE_TYPE') or 'sklearn'  # sklearn or spark
+    PREDICTION_SERVICE_TYPE = os.environ.get('PREDICTION_SERVICE_TYPE') or 'sklearn'  # sklearn, process or spark
+    PREDICTION_WORKERS = int(os.environ.get('PREDICTION_WORKERS', 0)) or None  # process模式的进程数，默认使用CPU核数
+
+    @classmethod
+    def validate(cls):
+        """检查数据目录，数据目录不存在时抛出 RuntimeError，返回警告信息列表
+        
+        由服务启动入口（run.py）显式调用，导入配置和 create_app 时不扫描数据目录
+        """
+        if not cls.DATA_DIR.exists():
+            raise RuntimeError(f"数据目录不存在: {cls.DATA_DIR}")
+        
+        warnings = []
+        # 检查是否有天气数据文件（递归查找所有子目录），缺少时只警告，允许应用继续运行
+        if next(cls.DATA_DIR.glob('**/*天气数据.csv'), None) is None:
+            warnings.append(f"数据目录中没有找到天气数据文件: {cls.DATA_DIR}")
+        return warnings
 
     @classmethod
     def create_dirs(cls):
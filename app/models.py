@@ -15,6 +15,8 @@ class User(db.Model):
     avatar = db.Column(db.String(255), nullable=True, default='')  # 头像URL
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)  # 用户是否激活
+    # 行程修订号，保存或删除行程时加1，用作历史行程缓存的版本（只增不减）
+    itinerary_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def set_password(self, password):
         """设置密码哈希"""
@@ -133,6 +135,13 @@ class Admin(db.Model):
 class Attraction(db.Model):
     """景点模型"""
     __tablename__ = 'attraction'
+    __table_args__ = (
+        # 景点查询几乎都先按城市筛选，再按评分、名称或类型筛选/排序
+        db.Index('ix_attraction_city_rating', 'city', 'rating'),
+        # (城市, 景点名称) 是景点导入的自然键，唯一索引防止并发导入插入重复景点
+        db.Index('ux_attraction_city_name', 'city', 'name', unique=True),
+        db.Index('ix_attraction_city_type', 'city', 'type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -156,6 +165,10 @@ class Attraction(db.Model):
 class TrafficRecord(db.Model):
     """客流量记录模型"""
     __tablename__ = 'traffic_record'
+    __table_args__ = (
+        # 自然键：每个景点每天一条记录，导入时按此 upsert
+        db.Index('ux_traffic_record_attraction_date', 'attraction_id', 'date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     attraction_id = db.Column(db.Integer, db.ForeignKey('attraction.id'), nullable=False)
@@ -176,6 +189,10 @@ class TrafficRecord(db.Model):
 class RiskAssessment(db.Model):
     """风险评估记录模型"""
     __tablename__ = 'risk_assessment'
+    __table_args__ = (
+        # 自然键：每个景点每天一条记录，导入时按此 upsert
+        db.Index('ux_risk_assessment_attraction_date', 'attraction_id', 'date', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     attraction_id = db.Column(db.Integer, db.ForeignKey('attraction.id'), nullable=False)
@@ -195,6 +212,12 @@ class RiskAssessment(db.Model):
 class Itinerary(db.Model):
     """行程模型"""
     __tablename__ = 'itinerary'
+    __table_args__ = (
+        # 历史行程按用户筛选、按创建时间倒序分页
+        db.Index('ix_itinerary_user_created', 'user_id', 'created_at'),
+        # 同一用户的同一幂等键只能保存一次，未提供幂等键（NULL）时不受限制
+        db.Index('ux_itinerary_user_idempotency', 'user_id', 'idempotency_key', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -205,6 +228,7 @@ class Itinerary(db.Model):
     is_closed_loop = db.Column(db.Boolean, default=True)  # 是否为闭环路径
     preferences = db.Column(db.JSON, nullable=True)  # 存储用户偏好
     status = db.Column(db.String(20), default='draft')  # draft, active, completed
+    idempotency_key = db.Column(db.String(64), nullable=True)  # 客户端提供的幂等键，防止重复保存
     
     # 关系
     user = db.relationship('User', backref=db.backref('itineraries', lazy=True))
@@ -219,7 +243,7 @@ class ItineraryDay(db.Model):
     __tablename__ = 'itinerary_day'
     
     id = db.Column(db.Integer, primary_key=True)
-    itinerary_id = db.Column(db.Integer, db.ForeignKey('itinerary.id'), nullable=False)
+    itinerary_id = db.Column(db.Integer, db.ForeignKey('itinerary.id'), nullable=False, index=True)
     day_number = db.Column(db.Integer, nullable=False)
     date = db.Column(db.Date, nullable=False)
     weather = db.Column(db.String(50), nullable=True)
@@ -237,7 +261,7 @@ class ItineraryAttraction(db.Model):
     __tablename__ = 'itinerary_attraction'
     
     id = db.Column(db.Integer, primary_key=True)
-    itinerary_day_id = db.Column(db.Integer, db.ForeignKey('itinerary_day.id'), nullable=False)
+    itinerary_day_id = db.Column(db.Integer, db.ForeignKey('itinerary_day.id'), nullable=False, index=True)
     attraction_id = db.Column(db.Integer, db.ForeignKey('attraction.id'), nullable=False)
     order = db.Column(db.Integer, nullable=False)
     suggested_time = db.Column(db.Time, nullable=True)
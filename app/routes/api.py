@@ -1,20 +1,17 @@
-from flask import Blueprint, request, jsonify
-from app.services.traffic_prediction_service import TrafficPredictionService
-from app.services.risk_assessment_service import RiskAssessmentService
-from app.services.itinerary_planning_service import ItineraryPlanningService
-from app.services.prediction_service import WeatherPredictionService
-from app.services.path_optimization_service import PathOptimizationService
-from app.services.map_service import MapService
-from app.utils.data_loader import load_all_city_data
+import logging
+from flask import Blueprint, current_app, request, jsonify
 import os
 from app.config import Config
 from flask_login import login_required
 
+logger = logging.getLogger(__name__)
+
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
 @api_bp.route('/traffic_prediction/predict', methods=['POST'])
 def predict_traffic():
     """预测景点客流量"""
+    from app.services.traffic_prediction_service import TrafficPredictionService
     try:
         # 获取请求数据
         data = request.get_json()
@@ -56,6 +53,7 @@ def predict_traffic():
 @api_bp.route('/risk_assessment/assess', methods=['POST'])
 def assess_risk():
     """评估出行风险"""
+    from app.services.risk_assessment_service import RiskAssessmentService
     try:
         # 获取请求数据
         data = request.get_json()
@@ -97,6 +95,7 @@ def assess_risk():
 @api_bp.route('/itinerary_planning/plan', methods=['POST'])
 def plan_itinerary():
     """生成个性化行程"""
+    from app.services.itinerary_planning_service import ItineraryPlanningService
     try:
         # 获取请求数据
         data = request.get_json()
@@ -202,7 +201,7 @@ def predict_weather():
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"天气预测详细错误：{error_trace}")
+        logger.error("天气预测详细错误：%s", error_trace)
         return jsonify({
             'success': False,
             'message': f'天气预测失败: {str(e)}',
@@ -259,19 +258,29 @@ def list_cities():
 @api_bp.route('/path/optimize', methods=['POST'])
 def optimize_path():
     """生成闭环旅行路径"""
+    from app.services.path_optimization_service import PathOptimizationService, parse_time_budget_ms
     try:
         # 获取请求数据
         data = request.get_json()
         start_city = data.get('start_city', '沈阳')
         days = int(data.get('days', 3))
         preferences = data.get('preferences', {})
+        try:
+            time_budget_ms = parse_time_budget_ms(
+                data.get('time_budget_ms', current_app.config.get('PATH_TIME_BUDGET_MS')),
+                current_app.config.get('PATH_TIME_BUDGET_MAX_MS'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         # 初始化服务
         path_service = PathOptimizationService()
         
         # 生成闭环路径
         path_result = path_service.generate_closed_loop_path(
-            start_city, days, preferences
+            start_city, days, preferences, time_budget_ms=time_budget_ms
         )
         
         # 提取行程和预算
@@ -307,7 +316,8 @@ def optimize_path():
         return jsonify({
             'success': True,
             'itinerary': serialized_itinerary,
-            'budget': budget
+            'budget': budget,
+            'search': path_result.get('search')
         })
     except Exception as e:
         return jsonify({
@@ -319,6 +329,7 @@ def optimize_path():
 @api_bp.route('/path/adjust_for_weather', methods=['POST'])
 def adjust_path_for_weather():
     """根据天气调整路径"""
+    from app.services.path_optimization_service import PathOptimizationService
     try:
         # 获取请求数据
         data = request.get_json()
@@ -403,6 +414,7 @@ def adjust_path_for_weather():
 @api_bp.route('/map/generate', methods=['POST'])
 def generate_map():
     """生成地图可视化"""
+    from app.services.map_service import MapService
     try:
         # 获取请求数据
         data = request.get_json()
@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
-from app.models import User, Admin
+from app.models import User, Admin, LoginHistory
 from app import db
+from app.utils import audit_queue, identity_cache
+from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 
@@ -15,20 +17,35 @@ login_manager.login_view = 'auth.login'
 def load_user(user_id):
     """根据用户ID加载用户或管理员
     ID格式：user_1 或 admin_1
+
+    返回缓存的只读快照，缓存未命中时才查询数据库，见 app/utils/identity_cache.py
     """
     try:
         if user_id.startswith('admin_'):
             # 加载管理员
-            admin_id = int(user_id.split('_')[1])
-            return Admin.query.get(admin_id)
+            model, account_id = Admin, int(user_id.split('_')[1])
         elif user_id.startswith('user_'):
             # 加载普通用户
-            user_id_num = int(user_id.split('_')[1])
-            return User.query.get(user_id_num)
-        # 处理旧格式ID（兼容原有数据）
-        return User.query.get(int(user_id))
+            model, account_id = User, int(user_id.split('_')[1])
+        else:
+            # 处理旧格式ID（兼容原有数据）
+            model, account_id = User, int(user_id)
     except (ValueError, IndexError):
         return None
+    
+    snapshot = identity_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    account = db.session.get(model, account_id)
+    if account is None:
+        return None
+    return identity_cache.put(user_id, account, ttl=current_app.config.get('IDENTITY_CACHE_TTL', 60))
+
+
+def current_account():
+    """获取当前登录用户的数据库记录，用于修改资料、密码等需要写入数据库的操作"""
+    model = Admin if current_user.is_admin() else User
+    return db.session.get(model, current_user.id)
 
 @bp.record_once
 def on_load(state):
@@ -107,45 +124,28 @@ def login():
             login_user(user)
             flash('用户登录成功！', 'success')
             
-            # 记录用户登录历史
-            from app.models import LoginHistory
-            login_history = LoginHistory(
+            # 记录用户登录历史（后台批量写入，不在请求中提交）
+            audit_queue.record(
+                LoginHistory,
                 user_id=user.id,
+                login_time=datetime.utcnow(),
                 ip_address=ip_address,
                 user_agent=user_agent,
                 login_result=True
             )
-            db.session.add(login_history)
-            db.session.commit()
             
             # 记录用户登录日志
             current_app.logger.info(f"用户登录成功: {email} from {ip_address}")
             return redirect(url_for('visualizations.system_menu'))
         
-        # 分析登录失败原因
-        login_fail_reason = ""
-        
-        # 检查是否为管理员
-        admin = Admin.query.filter_by(email=email).first()
+        # 分析登录失败原因：复用上面已查询的管理员和用户，
+        # 执行到这里说明对应账号的密码校验已经失败，不再重复查询和校验密码
         if admin:
-            if not admin.check_password(password):
-                login_fail_reason = "管理员密码错误"
-            elif not admin.is_active:
-                login_fail_reason = "管理员账号已禁用"
-            else:
-                login_fail_reason = "管理员登录未知错误"
+            login_fail_reason = "管理员密码错误"
+        elif user:
+            login_fail_reason = "用户密码错误"
         else:
-            # 检查是否为普通用户
-            user = User.query.filter_by(email=email).first()
-            if user:
-                if not user.check_password(password):
-                    login_fail_reason = "用户密码错误"
-                elif not user.is_active:
-                    login_fail_reason = "用户账号已禁用"
-                else:
-                    login_fail_reason = "用户登录未知错误"
-            else:
-                login_fail_reason = "邮箱不存在"
+            login_fail_reason = "邮箱不存在"
         
         # 显示登录失败信息
         flash('登录失败: ' + login_fail_reason, 'danger')
@@ -154,18 +154,16 @@ def login():
         current_app.logger.warning(f"登录失败: {email} from {ip_address} - 原因: {login_fail_reason}")
         
         # 记录登录失败历史（如果用户存在）
-        user = User.query.filter_by(email=email).first()
         if user:
-            from app.models import LoginHistory
-            login_history = LoginHistory(
+            audit_queue.record(
+                LoginHistory,
                 user_id=user.id,
+                login_time=datetime.utcnow(),
                 ip_address=ip_address,
                 user_agent=user_agent,
                 login_result=False,
                 fail_reason=login_fail_reason
             )
-            db.session.add(login_history)
-            db.session.commit()
         
         return redirect(url_for('auth.login'))
     
@@ -1,10 +1,10 @@
 from flask import Blueprint, render_template
-from app.services.weather_service import WeatherService
 
 bp = Blueprint('dashboard', __name__)
 
 @bp.route('/')
 def index():
+    from app.services.weather_service import WeatherService
     from app.config import Config
     default_city = '沈阳'
     data_dir = os.path.abspath(Config.DATA_DIR)
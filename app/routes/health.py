@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+
+from app import db
+from app.utils import warmup
+
+health = Blueprint('health', __name__)
+
+
+@health.route('/healthz')
+def healthz():
+    """存活检查：进程能处理请求即返回200"""
+    return jsonify({'status': 'ok'})
+
+
+@health.route('/readyz')
+def readyz():
+    """就绪检查：预热完成（或超出时间预算）且数据库可用时返回200，否则返回503"""
+    status = warmup.get_warmup().get_status()
+    try:
+        db.session.execute(text('SELECT 1'))
+        status['database'] = 'ok'
+    except Exception as e:
+        status['database'] = f'error: {e}'
+        status['ready'] = False
+    finally:
+        db.session.remove()
+
+    if not status['ready']:
+        response = jsonify(dict(status, status='warming_up' if status['database'] == 'ok' else 'unavailable'))
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    return jsonify(dict(status, status='ready'))
@@ -0,0 +1,106 @@
+import json
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
+
+from app.utils import job_queue
+
+jobs = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def _not_found(job_id):
+    return jsonify({'success': False, 'message': f'任务不存在或已过期: {job_id}'}), 404
+
+
+@jobs.route('/<job_type>', methods=['POST'])
+def submit(job_type):
+    """提交后台任务，请求体为任务参数（JSON），返回202和任务ID"""
+    params = request.get_json(silent=True) or {}
+    try:
+        job = job_queue.get_queue().submit(job_type, params)
+    except KeyError:
+        return jsonify({
+            'success': False,
+            'message': f'未知的任务类型: {job_type}',
+            'job_types': job_queue.job_types()
+        }), 404
+    except job_queue.JobQueueFull:
+        response = jsonify({'success': False, 'message': '任务队列已满，请稍后重试'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    response = jsonify(dict(
+        job,
+        success=True,
+        status_url=url_for('jobs.status', job_id=job['id']),
+        result_url=url_for('jobs.result', job_id=job['id']),
+        events_url=url_for('jobs.events', job_id=job['id']),
+    ))
+    response.status_code = 202
+    response.headers['Location'] = url_for('jobs.status', job_id=job['id'])
+    return response
+
+
+@jobs.route('/<job_id>', methods=['GET'])
+def status(job_id):
+    """任务状态"""
+    job = job_queue.get_queue().get(job_id)
+    if job is None:
+        return _not_found(job_id)
+    return jsonify(dict(job, success=True))
+
+
+@jobs.route('/<job_id>/result', methods=['GET'])
+def result(job_id):
+    """任务结果：完成时返回200，执行失败返回500，未完成返回202"""
+    job = job_queue.get_queue().get(job_id, include_result=True)
+    if job is None:
+        return _not_found(job_id)
+    if job['status'] == job_queue.SUCCEEDED:
+        return jsonify(dict(job, success=True))
+    if job['status'] == job_queue.FAILED:
+        return jsonify(dict(job, success=False, message=f"任务执行失败: {job['error']}")), 500
+    response = jsonify(dict(job, success=True))
+    response.status_code = 202
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+@jobs.route('/<job_id>/events', methods=['GET'])
+def events(job_id):
+    """以 Server-Sent Events 推送任务状态变化，任务结束时推送 result 事件后关闭
+
+    连接期间占用一个服务线程，线程数有限时客户端应优先轮询 /jobs/<job_id>
+    """
+    queue = job_queue.get_queue()
+    if queue.get(job_id) is None:
+        return _not_found(job_id)
+    interval = current_app.config.get('JOB_SSE_POLL_INTERVAL', 0.5)
+    timeout = current_app.config.get('JOB_SSE_TIMEOUT', 120)
+
+    def stream():
+        deadline = time.monotonic() + timeout
+        last_status = None
+        while True:
+            job = queue.get(job_id, include_result=True)
+            if job is None:
+                yield _event('error', {'message': f'任务不存在或已过期: {job_id}'})
+                return
+            if job['status'] in job_queue.FINISHED:
+                yield _event('result', job)
+                return
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield _event('status', job)
+            if time.monotonic() >= deadline:
+                yield _event('timeout', job)
+                return
+            time.sleep(interval)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -1,11 +1,15 @@
-from flask import Blueprint, render_template, request, current_app, flash, redirect, url_for
+from flask import Blueprint, render_template, request, current_app, flash, redirect, url_for, send_file, abort
 from app.config import Config
+from app.utils import log_reader, request_profiler
+from datetime import datetime, timedelta
 import os
-import re
 from flask_login import login_required, current_user
 
 log_view = Blueprint('log_view', __name__, url_prefix='/logs')
 
+# 单次最多显示的行数
+MAX_LINES = 5000
+
 @log_view.route('/')
 @login_required
 def index():
@@ -18,33 +22,54 @@ def index():
     # 获取日志文件路径
     log_file = Config.LOG_FILE
     
+    # 慢请求剖析结果
+    profiles = request_profiler.list_profiles(current_app.config['PROFILE_DIR'])
+    profiling_enabled = current_app.config.get('PROFILE_ENABLED', False)
+    
     # 检查日志文件是否存在
     if not os.path.exists(log_file):
-        return render_template('logs.html', logs=[], error="日志文件不存在")
+        return render_template('logs.html', logs=[], error="日志文件不存在",
+                               profiles=profiles, profiling_enabled=profiling_enabled)
     
     # 获取请求参数
-    lines = request.args.get('lines', 100, type=int)
+    lines = min(max(request.args.get('lines', 100, type=int), 1), MAX_LINES)
     search = request.args.get('search', '')
+    level = request.args.get('level', '')
+    hours = request.args.get('hours', 0, type=int)
     
     try:
-        # 读取日志文件的最后N行，使用GBK编码处理中文日志
-        with open(log_file, 'r', encoding='gbk') as f:
-            all_logs = f.readlines()
-        
-        # 如果有搜索关键词，过滤日志
-        if search:
-            search_regex = re.compile(search, re.IGNORECASE)
-            filtered_logs = [log for log in all_logs if search_regex.search(log)]
-        else:
-            filtered_logs = all_logs
+        # 从日志末尾向前流式读取（包括轮转的备份文件），按级别或时间筛选时使用块索引跳过不相关的部分
+        since = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S') if hours > 0 else None
+        recent_logs = log_reader.tail(
+            log_file,
+            lines=lines,
+            search=search or None,
+            level=level if level in log_reader.LEVELS else None,
+            since=since,
+            use_index=current_app.config.get('LOG_INDEX_ENABLED', True)
+        )
         
-        # 只显示最后N行
-        recent_logs = filtered_logs[-lines:]
-        
-        return render_template('logs.html', logs=recent_logs, lines=lines, search=search)
+        return render_template('logs.html', logs=recent_logs, lines=lines, search=search,
+                               level=level, hours=hours, levels=log_reader.LEVELS,
+                               profiles=profiles, profiling_enabled=profiling_enabled)
     except Exception as e:
         current_app.logger.error(f"读取日志文件时出错: {e}")
-        return render_template('logs.html', logs=[], error=f"读取日志文件时出错: {e}")
+        return render_template('logs.html', logs=[], error=f"读取日志文件时出错: {e}",
+                               profiles=profiles, profiling_enabled=profiling_enabled)
+
+@log_view.route('/profiles/<filename>')
+@login_required
+def profile_file(filename):
+    """下载慢请求剖析文件（.folded 折叠调用栈或 .prof）"""
+    if not current_user.is_admin():
+        flash('无权限访问该页面', 'danger')
+        return redirect(url_for('auth.login'))
+    
+    path = request_profiler.profile_path(current_app.config['PROFILE_DIR'], filename)
+    if path is None:
+        abort(404)
+    mimetype = 'text/plain' if filename.endswith('.folded') else 'application/octet-stream'
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
 
 @log_view.route('/clear')
 def clear_logs():
@@ -1,12 +1,8 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
-from app.services.weather_service import WeatherService
-from app.services.analysis_service import AnalysisService
-from app.services.prediction_service import WeatherPredictionServiceFactory
-from app.utils.data_loader import load_all_city_data
+from app.utils import forecast_cache
 from app.config import Config
 import os
 from datetime import datetime
-import pandas as pd
 from flask_login import login_required, current_user
 
 bp = Blueprint('map_view', __name__, url_prefix='/map')
@@ -15,7 +11,10 @@ bp = Blueprint('map_view', __name__, url_prefix='/map')
 @bp.route('/')
 @login_required
 def index():
-        
+    from app.services.analysis_service import AnalysisService
+    from app.services.prediction_service import WeatherPredictionServiceFactory
+    from app.utils.data_loader import load_all_city_data
+    import pandas as pd
     try:
         data_dir = os.path.abspath(Config.DATA_DIR)
         
@@ -39,10 +38,10 @@ def index():
             
             # 初始化预测服务
             from app.services.prediction_service import WeatherPredictionServiceFactory
-            prediction_service = WeatherPredictionServiceFactory.create_service(service_type="sklearn", data_dir=data_dir)
+            prediction_service = WeatherPredictionServiceFactory.create_service(data_dir=data_dir)
             
-            # 预测所有城市的未来天气
-            all_predictions = prediction_service.predict_all_cities(weather_df, days=days)
+            # 预测所有城市的未来天气，优先读取当天的预测缓存
+            all_predictions = forecast_cache.get_all_forecasts(prediction_service, weather_df, days=days)
             
             # 合并所有城市的预测结果
             future_df_list = []
@@ -0,0 +1,13 @@
+from flask import Blueprint, Response, abort, current_app
+
+from app.utils import metrics
+
+metrics_view = Blueprint('metrics_view', __name__)
+
+
+@metrics_view.route('/metrics')
+def export():
+    """以 Prometheus 文本格式输出性能指标"""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        abort(404)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,11 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify
+import logging
+from flask import Blueprint, current_app, render_template, request, jsonify
 from flask_login import login_required, current_user
-from app.services.path_optimization_service import PathOptimizationService
-from app.services.map_service import MapService
-from app.models import Itinerary, ItineraryDay, ItineraryAttraction, Attraction
+from app.models import Itinerary, ItineraryDay, ItineraryAttraction, Attraction, User
 from app import db
+from app.utils import itinerary_cache, job_queue, log_setup
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 path_bp = Blueprint('path_optimization', __name__, url_prefix='/path')
 
 
@@ -19,86 +24,17 @@ def index():
 @path_bp.route('/calculate', methods=['POST'])
 def optimize_path():
     """优化旅行路径"""
-    print("收到路径优化请求")
+    logger.debug("收到路径优化请求")
     
     try:
         data = request.get_json()
     except Exception as e:
-        print(f"获取请求体失败: {str(e)}")
+        logger.error("获取请求体失败: %s", e)
         data = {}
     
     try:
-        start_city = data.get('start_city', '沈阳')
-        days = int(data.get('days', 3))
-        preferences = data.get('preferences', {})
-        target_city = data.get('target_city', start_city)  # 目标城市默认为起点城市
-        selected_attractions = data.get('selected_attractions', [])  # 获取用户选择的景点
-        
-        print(f"处理路径优化请求，参数: start_city={start_city}, days={days}, preferences={preferences}, target_city={target_city}, selected_attractions={len(selected_attractions)}")
-        
-        # 初始化服务
-        path_service = PathOptimizationService()
-        
-        # 生成路径 - 传递用户选择的景点
-        path_result = path_service.generate_closed_loop_path(
-            start_city, days, preferences, target_city, selected_attractions
-        )
-        
-        # 提取行程和预算
-        itinerary = path_result['itinerary']
-        budget = path_result['budget']
-        
-        # 转换为可序列化的格式
-        serialized_itinerary = []
-        for day_plan in itinerary:
-            serialized_day = {
-                'day': day_plan['day'],
-                'weather': day_plan.get('weather'),
-                'adjusted': day_plan.get('adjusted', False),
-                'risk_assessment': day_plan.get('risk_assessment', []),
-                'recommended_hotels': day_plan.get('recommended_hotels', []),
-                'recommended_dining': day_plan.get('recommended_dining', []),
-                'attractions': [
-                    {
-                        'id': attr_info['attraction'].id if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.id,
-                        'name': attr_info['attraction'].name if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.name,
-                        'city': attr_info['attraction'].city if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.city,
-                        'type': attr_info['attraction'].type if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.type,
-                        'rating': attr_info['attraction'].rating if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.rating,
-                        'price': attr_info['attraction'].price if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.price,
-                        'duration': attr_info['attraction'].duration if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.duration,
-                        'longitude': attr_info['attraction'].longitude if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.longitude,
-                        'latitude': attr_info['attraction'].latitude if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.latitude,
-                        'description': attr_info['attraction'].description if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.description,
-                        'visit_time': attr_info.get('visit_time'),
-                        'travel_info': attr_info.get('travel_info')
-                    } for attr_info in day_plan['attractions']
-                ]
-            }
-            serialized_itinerary.append(serialized_day)
-        
-        # 检查行程是否为空
-        is_empty = True
-        for day_plan in serialized_itinerary:
-            if day_plan['attractions']:
-                is_empty = False
-                break
-        
-        if is_empty:
-            # 行程为空，返回明确的提示信息
-            return jsonify({
-                'success': False,
-                'message': '未找到符合您偏好的景点，请尝试调整景点类型偏好或扩大搜索范围',
-                'itinerary': [],
-                'budget': {}
-            })
-        else:
-            # 行程不为空，正常返回
-            return jsonify({
-                'success': True,
-                'itinerary': serialized_itinerary,
-                'budget': budget
-            })
+        payload, status = _optimize_path(data)
+        return jsonify(payload), status
     except Exception as e:
         return jsonify({
             'success': False,
@@ -106,112 +42,120 @@ def optimize_path():
         }), 500
 
 
-@path_bp.route('/adjust_for_weather', methods=['POST'])
-def adjust_path_for_weather():
-    """根据天气调整路径"""
+def _optimize_path(data):
+    """生成闭环路径，返回 (可序列化的结果, 状态码)，同步接口和后台任务（path_optimize）共用"""
+    from app.services.path_optimization_service import PathOptimizationService, parse_time_budget_ms
+    start_city = data.get('start_city', '沈阳')
+    days = int(data.get('days', 3))
+    preferences = data.get('preferences', {})
+    target_city = data.get('target_city', start_city)  # 目标城市默认为起点城市
+    selected_attractions = data.get('selected_attractions', [])  # 获取用户选择的景点
+    # 遗传算法的时间预算（毫秒），到时返回目前为止的最优路径；不超过 PATH_TIME_BUDGET_MAX_MS
     try:
-        data = request.get_json()
-        itinerary = data.get('itinerary')
-        weather_forecast = data.get('weather_forecast')
-        start_city = data.get('start_city')
-        target_city = data.get('target_city')
-        
-        if not itinerary:
-            return jsonify({
-                'success': False,
-                'message': '行程数据不能为空'
-            }), 400
-        
-        if not weather_forecast:
-            return jsonify({
-                'success': False,
-                'message': '天气预报数据不能为空'
-            }), 400
-        
-        # 初始化服务
-        path_service = PathOptimizationService()
-        map_service = MapService()
-        
-        # 从数据库获取景点对象
-        from app.models import Attraction
-        
-        # 转换行程数据为包含景点对象的格式
-        db_itinerary = []
-        for day_plan in itinerary:
-            # 获取景点对象
-            attractions = []
-            for attr_data in day_plan['attractions']:
-                attr = None
-                # 首先尝试通过id查找（兼容数据库id）
-                if isinstance(attr_data['id'], int) or attr_data['id'].isdigit():
-                    attr = Attraction.query.get(int(attr_data['id']))
-                
-                # 如果通过id找不到，尝试通过城市和名称查找
-                if not attr and 'name' in attr_data and 'city' in attr_data:
-                    attr = Attraction.query.filter_by(
-                        name=attr_data['name'],
-                        city=attr_data['city']
-                    ).first()
-                
-                # 如果还是找不到，尝试从attr_data直接构建景点信息
-                if not attr:
-                    # 创建一个简单的景点对象，包含地图生成所需的基本信息
-                    attr = type('SimpleAttraction', (), {
-                        'name': attr_data.get('name', '未知景点'),
-                        'city': attr_data.get('city', '未知城市'),
-                        'type': attr_data.get('type', '未知类型'),
-                        'rating': float(attr_data.get('rating', 0.0)),
-                        'latitude': float(attr_data.get('latitude', 0.0)) if attr_data.get('latitude') else None,
-                        'longitude': float(attr_data.get('longitude', 0.0)) if attr_data.get('longitude') else None
-                    })()
-                
-                attractions.append(attr)
-            
-            db_itinerary.append({
-                'day': day_plan['day'],
-                'attractions': attractions,
-                'weather': day_plan.get('weather'),
-                'adjusted': day_plan.get('adjusted', False)
-            })
-        
-        # 优化路径
-        adjusted_itinerary = path_service.optimize_path_for_weather(
-            db_itinerary, weather_forecast
+        time_budget_ms = parse_time_budget_ms(
+            data.get('time_budget_ms', current_app.config.get('PATH_TIME_BUDGET_MS')),
+            current_app.config.get('PATH_TIME_BUDGET_MAX_MS'))
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}, 400
+    
+    logger.debug("处理路径优化请求，参数: start_city=%s, days=%s, preferences=%s, target_city=%s, selected_attractions=%s", start_city, days, preferences, target_city, len(selected_attractions))
+    
+    # 初始化服务
+    path_service = PathOptimizationService()
+    
+    # 生成路径 - 传递用户选择的景点
+    with log_setup.timed(logger, "路径生成", start_city=start_city, target_city=target_city, days=days):
+        path_result = path_service.generate_closed_loop_path(
+            start_city, days, preferences, target_city, selected_attractions,
+            time_budget_ms=time_budget_ms
         )
+    
+    # 提取行程和预算
+    itinerary = path_result['itinerary']
+    budget = path_result['budget']
+    
+    # 转换为可序列化的格式
+    serialized_itinerary = []
+    for day_plan in itinerary:
+        serialized_day = {
+            'day': day_plan['day'],
+            'weather': day_plan.get('weather'),
+            'adjusted': day_plan.get('adjusted', False),
+            'risk_assessment': day_plan.get('risk_assessment', []),
+            'recommended_hotels': day_plan.get('recommended_hotels', []),
+            'recommended_dining': day_plan.get('recommended_dining', []),
+            'attractions': [
+                {
+                    'id': attr_info['attraction'].id if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.id,
+                    'name': attr_info['attraction'].name if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.name,
+                    'city': attr_info['attraction'].city if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.city,
+                    'type': attr_info['attraction'].type if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.type,
+                    'rating': attr_info['attraction'].rating if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.rating,
+                    'price': attr_info['attraction'].price if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.price,
+                    'duration': attr_info['attraction'].duration if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.duration,
+                    'longitude': attr_info['attraction'].longitude if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.longitude,
+                    'latitude': attr_info['attraction'].latitude if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.latitude,
+                    'description': attr_info['attraction'].description if isinstance(attr_info, dict) and 'attraction' in attr_info else attr_info.description,
+                    'visit_time': attr_info.get('visit_time'),
+                    'travel_info': attr_info.get('travel_info')
+                } for attr_info in day_plan['attractions']
+            ]
+        }
+        serialized_itinerary.append(serialized_day)
+    
+    # 检查行程是否为空
+    is_empty = True
+    for day_plan in serialized_itinerary:
+        if day_plan['attractions']:
+            is_empty = False
+            break
+    
+    if is_empty:
+        # 行程为空，返回明确的提示信息
+        return {
+            'success': False,
+            'message': '未找到符合您偏好的景点，请尝试调整景点类型偏好或扩大搜索范围',
+            'itinerary': [],
+            'budget': {}
+        }, 200
+    else:
+        # 行程不为空，正常返回
+        return {
+            'success': True,
+            'itinerary': serialized_itinerary,
+            'budget': budget,
+            'search': path_result.get('search')
+        }, 200
+
+
+@path_bp.route('/api/suggest', methods=['GET'])
+def suggest_attractions():
+    """景点名称补全，返回景点ID供路径优化按主键查询"""
+    try:
+        prefix = request.args.get('q', '').strip()
+        city = request.args.get('city', '').strip()
+        limit = min(int(request.args.get('limit', 10)), 50)
         
-        # 生成地图 - 传递正确的起点城市和目标城市
-        map_object = map_service.generate_travel_map(adjusted_itinerary, start_city, target_city)
-        
-        # 转换为可序列化的格式
-        serialized_itinerary = []
-        for day_plan in adjusted_itinerary:
-            serialized_day = {
-                'day': day_plan['day'],
-                'weather': day_plan.get('weather'),
-                'adjusted': day_plan.get('adjusted', False),
-                'risk_assessment': day_plan.get('risk_assessment', []),
-                'attractions': [
-                    {
-                        'id': attr.id,
-                        'name': attr.name,
-                        'city': attr.city,
-                        'type': attr.type,
-                        'rating': attr.rating,
-                        'price': attr.price,
-                        'duration': attr.duration,
-                        'longitude': attr.longitude,
-                        'latitude': attr.latitude,
-                        'description': attr.description
-                    } for attr in day_plan['attractions']
-                ]
-            }
-            serialized_itinerary.append(serialized_day)
+        from app.utils import attraction_suggest
+        suggestions = attraction_suggest.suggest(prefix, city=city or None, limit=limit) if prefix else []
         
         return jsonify({
             'success': True,
-            'adjusted_itinerary': serialized_itinerary,
-            'map_html': map_object._repr_html_()
+            'suggestions': suggestions
         })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'景点补全失败: {str(e)}'
+        }), 500
+
+
+@path_bp.route('/adjust_for_weather', methods=['POST'])
+def adjust_path_for_weather():
+    """根据天气调整路径"""
+    try:
+        payload, status = _adjust_path_for_weather(request.get_json())
+        return jsonify(payload), status
     except Exception as e:
         return jsonify({
             'success': False,
@@ -219,9 +163,122 @@ def adjust_path_for_weather():
         }), 500
 
 
+def _adjust_path_for_weather(data):
+    """根据天气调整行程并生成地图，返回 (可序列化的结果, 状态码)，同步接口和后台任务（path_adjust_for_weather）共用"""
+    from app.services.path_optimization_service import PathOptimizationService
+    from app.services.map_service import MapService
+    itinerary = data.get('itinerary')
+    weather_forecast = data.get('weather_forecast')
+    start_city = data.get('start_city')
+    target_city = data.get('target_city')
+    
+    if not itinerary:
+        return {
+            'success': False,
+            'message': '行程数据不能为空'
+        }, 400
+    
+    if not weather_forecast:
+        return {
+            'success': False,
+            'message': '天气预报数据不能为空'
+        }, 400
+    
+    # 初始化服务
+    path_service = PathOptimizationService()
+    map_service = MapService()
+    
+    # 从数据库获取景点对象
+    from app.models import Attraction
+    
+    # 转换行程数据为包含景点对象的格式
+    db_itinerary = []
+    for day_plan in itinerary:
+        # 获取景点对象
+        attractions = []
+        for attr_data in day_plan['attractions']:
+            attr = None
+            # 首先尝试通过id查找（兼容数据库id）
+            if isinstance(attr_data['id'], int) or attr_data['id'].isdigit():
+                attr = Attraction.query.get(int(attr_data['id']))
+            
+            # 如果通过id找不到，尝试通过城市和名称查找
+            if not attr and 'name' in attr_data and 'city' in attr_data:
+                attr = Attraction.query.filter_by(
+                    name=attr_data['name'],
+                    city=attr_data['city']
+                ).first()
+            
+            # 如果还是找不到，尝试从attr_data直接构建景点信息
+            if not attr:
+                # 创建一个简单的景点对象，包含地图生成所需的基本信息
+                attr = type('SimpleAttraction', (), {
+                    'name': attr_data.get('name', '未知景点'),
+                    'city': attr_data.get('city', '未知城市'),
+                    'type': attr_data.get('type', '未知类型'),
+                    'rating': float(attr_data.get('rating', 0.0)),
+                    'latitude': float(attr_data.get('latitude', 0.0)) if attr_data.get('latitude') else None,
+                    'longitude': float(attr_data.get('longitude', 0.0)) if attr_data.get('longitude') else None
+                })()
+            
+            attractions.append(attr)
+        
+        db_itinerary.append({
+            'day': day_plan['day'],
+            'attractions': attractions,
+            'weather': day_plan.get('weather'),
+            'adjusted': day_plan.get('adjusted', False)
+        })
+    
+    # 优化路径
+    adjusted_itinerary = path_service.optimize_path_for_weather(
+        db_itinerary, weather_forecast
+    )
+    
+    # 生成地图 - 传递正确的起点城市和目标城市
+    map_object = map_service.generate_travel_map(adjusted_itinerary, start_city, target_city)
+    
+    # 转换为可序列化的格式
+    serialized_itinerary = []
+    for day_plan in adjusted_itinerary:
+        serialized_day = {
+            'day': day_plan['day'],
+            'weather': day_plan.get('weather'),
+            'adjusted': day_plan.get('adjusted', False),
+            'risk_assessment': day_plan.get('risk_assessment', []),
+            'attractions': [
+                {
+                    'id': attr.id,
+                    'name': attr.name,
+                    'city': attr.city,
+                    'type': attr.type,
+                    'rating': attr.rating,
+                    'price': attr.price,
+                    'duration': attr.duration,
+                    'longitude': attr.longitude,
+                    'latitude': attr.latitude,
+                    'description': attr.description
+                } for attr in day_plan['attractions']
+            ]
+        }
+        serialized_itinerary.append(serialized_day)
+    
+    return {
+        'success': True,
+        'adjusted_itinerary': serialized_itinerary,
+        'map_html': map_object._repr_html_()
+    }, 200
+
+
+# 后台任务（见 app/utils/job_queue.py）：POST /jobs/path_optimize、POST /jobs/path_adjust_for_weather
+job_queue.register_view('path_optimize', _optimize_path)
+job_queue.register_view('path_adjust_for_weather', _adjust_path_for_weather)
+
+
 @path_bp.route('/generate_map', methods=['POST'])
 def generate_map():
     """生成地图"""
+    from app.services.map_service import MapService
     try:
         data = request.get_json()
         itinerary = data.get('itinerary')
@@ -320,10 +377,67 @@ def generate_map():
         }), 500
 
 
+def _find_itinerary_by_idempotency_key(idempotency_key):
+    """查找当前用户用同一幂等键保存过的行程"""
+    if not idempotency_key:
+        return None
+    return Itinerary.query.filter_by(user_id=current_user.id, idempotency_key=idempotency_key).first()
+
+
+def _duplicate_save_response(itinerary):
+    """重复提交同一幂等键时返回已保存的行程"""
+    return jsonify({
+        'success': True,
+        'message': '行程已保存',
+        'itinerary_id': itinerary.id,
+        'duplicate': True
+    })
+
+
+def _insert_itinerary(itinerary, start, itinerary_data):
+    """批量写入行程
+
+    行程主记录flush一次取得ID，每日行程和行程景点各用一条executemany批量插入，
+    中间用一次查询取回每日行程ID。语句数与天数、景点数无关，SQLite和MySQL均适用。
+    """
+    db.session.add(itinerary)
+    db.session.flush()  # 获取itinerary.id
+    
+    db.session.execute(insert(ItineraryDay), [
+        {
+            'itinerary_id': itinerary.id,
+            'day_number': day_plan['day'],
+            'date': start + timedelta(days=day_plan['day']-1),
+            'weather': str(day_plan.get('weather', ''))
+        }
+        for day_plan in itinerary_data
+    ])
+    day_ids = dict(
+        db.session.query(ItineraryDay.day_number, ItineraryDay.id).filter_by(itinerary_id=itinerary.id)
+    )
+    
+    attraction_rows = [
+        {
+            'itinerary_day_id': day_ids[day_plan['day']],
+            'attraction_id': int(attr_data['id']),
+            'order': order
+        }
+        for day_plan in itinerary_data
+        for order, attr_data in enumerate(day_plan['attractions'])
+    ]
+    if attraction_rows:
+        db.session.execute(insert(ItineraryAttraction), attraction_rows)
+
+
 @path_bp.route('/save', methods=['POST'])
 @login_required
 def save_itinerary():
-    """保存行程到数据库"""
+    """保存行程到数据库
+
+    整个行程用固定条数的批量INSERT写入，景点ID用一次IN查询校验。
+    客户端可通过 Idempotency-Key 请求头或 idempotency_key 字段提供幂等键，
+    重复提交同一幂等键时直接返回已保存的行程。
+    """
     try:
         data = request.get_json()
         start_city = data.get('start_city')
@@ -332,6 +446,7 @@ def save_itinerary():
         is_closed_loop = data.get('is_closed_loop', True)
         preferences = data.get('preferences', {})
         itinerary_data = data.get('itinerary')
+        idempotency_key = (request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '').strip() or None
         
         if not all([start_city, days, start_date, itinerary_data]):
             return jsonify({
@@ -339,47 +454,69 @@ def save_itinerary():
                 'message': '缺少必要的行程数据'
             }), 400
         
-        # 创建行程主记录
+        if idempotency_key and len(idempotency_key) > 64:
+            return jsonify({
+                'success': False,
+                'message': '幂等键长度不能超过64个字符'
+            }), 400
+        
+        existing = _find_itinerary_by_idempotency_key(idempotency_key)
+        if existing:
+            return _duplicate_save_response(existing)
+        
+        day_numbers = [day_plan['day'] for day_plan in itinerary_data]
+        if len(set(day_numbers)) != len(day_numbers):
+            return jsonify({
+                'success': False,
+                'message': '每日行程的天数编号重复'
+            }), 400
+        
+        # 一次IN查询校验所有景点ID
+        attraction_ids = {
+            int(attr_data['id'])
+            for day_plan in itinerary_data
+            for attr_data in day_plan['attractions']
+        }
+        if attraction_ids:
+            found_ids = {row[0] for row in db.session.query(Attraction.id).filter(Attraction.id.in_(attraction_ids))}
+            missing_ids = sorted(attraction_ids - found_ids)
+            if missing_ids:
+                return jsonify({
+                    'success': False,
+                    'message': f'景点不存在: {missing_ids}'
+                }), 400
+        
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
         itinerary = Itinerary(
             user_id=current_user.id,
             days=days,
-            start_date=datetime.strptime(start_date, '%Y-%m-%d').date(),
+            start_date=start,
             start_city=start_city,
             is_closed_loop=is_closed_loop,
             preferences=preferences,
-            status='active'
+            status='active',
+            idempotency_key=idempotency_key
         )
-        db.session.add(itinerary)
-        db.session.flush()  # 获取itinerary.id
-        
-        # 保存每日行程
-        for day_plan in itinerary_data:
-            day_number = day_plan['day']
-            itinerary_day = ItineraryDay(
-                itinerary_id=itinerary.id,
-                day_number=day_number,
-                date=datetime.strptime(start_date, '%Y-%m-%d').date() + timedelta(days=day_number-1),
-                weather=str(day_plan.get('weather', ''))
-            )
-            db.session.add(itinerary_day)
-            db.session.flush()  # 获取itinerary_day.id
-            
-            # 保存每个景点
-            for order, attr_data in enumerate(day_plan['attractions']):
-                attraction_id = attr_data['id']
-                itinerary_attraction = ItineraryAttraction(
-                    itinerary_day_id=itinerary_day.id,
-                    attraction_id=attraction_id,
-                    order=order
-                )
-                db.session.add(itinerary_attraction)
         
-        db.session.commit()
+        try:
+            _insert_itinerary(itinerary, start, itinerary_data)
+            _bump_history_revision(current_user.id)
+            # 提交后对象属性会过期，提前取出ID避免提交后再查询
+            itinerary_id, user_id = itinerary.id, current_user.id
+            db.session.commit()
+        except IntegrityError:
+            # 同一幂等键的并发请求已先保存
+            db.session.rollback()
+            existing = _find_itinerary_by_idempotency_key(idempotency_key)
+            if not existing:
+                raise
+            return _duplicate_save_response(existing)
+        itinerary_cache.invalidate(user_id)
         
         return jsonify({
             'success': True,
             'message': '行程保存成功',
-            'itinerary_id': itinerary.id
+            'itinerary_id': itinerary_id
         })
     except Exception as e:
         db.session.rollback()
@@ -389,31 +526,94 @@ def save_itinerary():
         }), 500
 
 
+def _serialize_itinerary_summary(itinerary):
+    """行程列表项"""
+    return {
+        'id': itinerary.id,
+        'start_city': itinerary.start_city,
+        'days': itinerary.days,
+        'start_date': itinerary.start_date.strftime('%Y-%m-%d'),
+        'is_closed_loop': itinerary.is_closed_loop,
+        'status': itinerary.status,
+        'created_at': itinerary.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def _serialize_itinerary_days(itinerary):
+    """行程每日景点，要求已预加载 itinerary_days、itinerary_attractions 和 attraction"""
+    itinerary_data = []
+    for itinerary_day in sorted(itinerary.itinerary_days, key=lambda d: d.day_number):
+        attractions = []
+        for itinerary_attr in sorted(itinerary_day.itinerary_attractions, key=lambda a: a.order):
+            attraction = itinerary_attr.attraction
+            if attraction:
+                attractions.append({
+                    'id': attraction.id,
+                    'name': attraction.name,
+                    'city': attraction.city,
+                    'type': attraction.type,
+                    'rating': attraction.rating,
+                    'price': attraction.price,
+                    'duration': attraction.duration,
+                    'longitude': attraction.longitude,
+                    'latitude': attraction.latitude,
+                    'description': attraction.description
+                })
+        
+        itinerary_data.append({
+            'day': itinerary_day.day_number,
+            'weather': itinerary_day.weather,
+            'attractions': attractions
+        })
+    return itinerary_data
+
+
+def _history_version(user_id):
+    """用户行程的版本：用户的行程修订号
+
+    不用行程数和最大行程ID：行程ID没有 AUTOINCREMENT，删除最大ID的行程后再保存会复用该ID，
+    版本可能与删除前相同。修订号在保存或删除行程的事务中加1，只增不减。
+    """
+    return db.session.query(User.itinerary_revision).filter(User.id == user_id).scalar()
+
+
+def _bump_history_revision(user_id):
+    """在当前事务中把用户的行程修订号加1，与行程的修改一起提交"""
+    db.session.execute(
+        update(User).where(User.id == user_id).values(itinerary_revision=User.itinerary_revision + 1)
+    )
+
+
 @path_bp.route('/history', methods=['GET'])
 @login_required
 def get_history_itineraries():
-    """获取历史行程列表"""
+    """获取历史行程列表（分页）"""
     try:
-        # 获取当前用户的所有行程
-        itineraries = Itinerary.query.filter_by(user_id=current_user.id).order_by(Itinerary.created_at.desc()).all()
-        
-        # 转换为可序列化的格式
-        result = []
-        for itinerary in itineraries:
-            result.append({
-                'id': itinerary.id,
-                'start_city': itinerary.start_city,
-                'days': itinerary.days,
-                'start_date': itinerary.start_date.strftime('%Y-%m-%d'),
-                'is_closed_loop': itinerary.is_closed_loop,
-                'status': itinerary.status,
-                'created_at': itinerary.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+        
+        cache_key = ('history', page, per_page)
+        version = _history_version(current_user.id)
+        payload = itinerary_cache.get(current_user.id, cache_key, version)
+        if payload is None:
+            # 获取当前用户的行程，按创建时间倒序分页
+            pagination = Itinerary.query.filter_by(user_id=current_user.id).order_by(
+                Itinerary.created_at.desc(), Itinerary.id.desc()
+            ).paginate(page=page, per_page=per_page, error_out=False)
+            
+            payload = {
+                'success': True,
+                'itineraries': [_serialize_itinerary_summary(itinerary) for itinerary in pagination.items],
+                'pagination': {
+                    'page': pagination.page,
+                    'per_page': pagination.per_page,
+                    'total': pagination.total,
+                    'pages': pagination.pages
+                }
+            }
+            itinerary_cache.put(current_user.id, cache_key, payload, version)
         
-        return jsonify({
-            'success': True,
-            'itineraries': result
-        })
+        return jsonify(payload)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -426,50 +626,29 @@ def get_history_itineraries():
 def get_itinerary(itinerary_id):
     """获取特定行程详情"""
     try:
-        # 获取行程
-        itinerary = Itinerary.query.filter_by(id=itinerary_id, user_id=current_user.id).first()
-        if not itinerary:
-            return jsonify({
-                'success': False,
-                'message': '行程不存在或无权访问'
-            }), 404
-        
-        # 构建行程数据
-        itinerary_data = []
-        itinerary_days = ItineraryDay.query.filter_by(itinerary_id=itinerary.id).order_by(ItineraryDay.day_number).all()
-        
-        for itinerary_day in itinerary_days:
-            # 获取当日景点
-            itinerary_attractions = ItineraryAttraction.query.filter_by(itinerary_day_id=itinerary_day.id).order_by(ItineraryAttraction.order).all()
+        cache_key = ('detail', itinerary_id)
+        version = _history_version(current_user.id)
+        payload = itinerary_cache.get(current_user.id, cache_key, version)
+        if payload is None:
+            # 两次查询加载完整行程：行程本身，以及每日行程连同景点（JOIN）
+            itinerary = Itinerary.query.filter_by(id=itinerary_id, user_id=current_user.id).options(
+                selectinload(Itinerary.itinerary_days)
+                .joinedload(ItineraryDay.itinerary_attractions)
+                .joinedload(ItineraryAttraction.attraction)
+            ).first()
+            if not itinerary:
+                return jsonify({
+                    'success': False,
+                    'message': '行程不存在或无权访问'
+                }), 404
             
-            # 构建景点数据
-            attractions = []
-            for itinerary_attr in itinerary_attractions:
-                attraction = Attraction.query.get(itinerary_attr.attraction_id)
-                if attraction:
-                    attractions.append({
-                        'id': attraction.id,
-                        'name': attraction.name,
-                        'city': attraction.city,
-                        'type': attraction.type,
-                        'rating': attraction.rating,
-                        'price': attraction.price,
-                        'duration': attraction.duration,
-                        'longitude': attraction.longitude,
-                        'latitude': attraction.latitude,
-                        'description': attraction.description
-                    })
-            
-            itinerary_data.append({
-                'day': itinerary_day.day_number,
-                'weather': itinerary_day.weather,
-                'attractions': attractions
-            })
+            payload = {
+                'success': True,
+                'itinerary': _serialize_itinerary_days(itinerary)
+            }
+            itinerary_cache.put(current_user.id, cache_key, payload, version)
         
-        return jsonify({
-            'success': True,
-            'itinerary': itinerary_data
-        })
+        return jsonify(payload)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -492,7 +671,9 @@ def delete_itinerary(itinerary_id):
         
         # 删除行程（级联删除ItineraryDay和ItineraryAttraction）
         db.session.delete(itinerary)
+        _bump_history_revision(current_user.id)
         db.session.commit()
+        itinerary_cache.invalidate(current_user.id)
         
         return jsonify({
             'success': True,
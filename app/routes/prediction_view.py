@@ -1,7 +1,5 @@
 from flask import Blueprint, render_template, request
-from app.utils.data_loader import load_all_city_data
-from app.services.prediction_service import WeatherPredictionService
-from app.services.recommendation_service import RecommendationService
+from app.utils import forecast_cache, job_queue
 import os
 from app.config import Config
 from flask_login import login_required
@@ -12,22 +10,24 @@ prediction_view = Blueprint("prediction", __name__, url_prefix="/prediction")
 @login_required
 def index():
     """天气预测主页"""
+    from app.utils.data_loader import load_all_city_data
+    from app.services.prediction_service import WeatherPredictionServiceFactory
+    from app.services.recommendation_service import RecommendationService
     try:
         # 加载所有天气数据
         weather_df = load_all_city_data()
         
         # 初始化服务 - 使用工厂模式，便于未来切换到Spark实现
         data_dir = os.path.abspath(Config.DATA_DIR)
-        from app.services.prediction_service import WeatherPredictionServiceFactory
-        prediction_service = WeatherPredictionServiceFactory.create_service(service_type="sklearn", data_dir=data_dir)
+        prediction_service = WeatherPredictionServiceFactory.create_service(data_dir=data_dir)
         recommendation_service = RecommendationService(data_dir)
         
         # 获取请求参数
         city = request.args.get("city", "沈阳")
         days = int(request.args.get("days", 7))
         
-        # 尝试直接预测，避免每次都训练模型
-        predictions = prediction_service.predict_future(weather_df, city, days)
+        # 优先读取当天的预测缓存，避免每次请求都重新预测
+        predictions = forecast_cache.get_city_forecast(prediction_service, weather_df, city, days)
         
         # 如果预测失败（模型不存在），再训练模型并重新预测
         if predictions.empty:
@@ -44,17 +44,16 @@ def index():
         if not predictions.empty:
             # 获取推荐服务
             recommendation_service = RecommendationService(data_dir)
-            # 基于预测天气推荐景点
+            # 基于预测天气推荐景点，优先读取预计算的推荐结果
             future_recommendations = []
             for _, row in predictions.iterrows():
                 # 为每天生成推荐
                 date_str = row['日期'].strftime('%Y-%m-%d')
-                day_recommendations = recommendation_service.recommend_by_weather(
-                    weather_df, city=city, date=date_str, top_n=3
-                )
                 future_recommendations.append({
                     'date': date_str,
-                    'recommendations': day_recommendations.to_dict('records')
+                    'recommendations': recommendation_service.get_daily_recommendations(
+                        weather_df, city=city, date=date_str, top_n=3
+                    )
                 })
         else:
             future_recommendations = []
@@ -75,104 +74,116 @@ def index():
 def all_cities_prediction():
     """所有城市天气预测"""
     try:
-        # 加载所有天气数据
-        weather_df = load_all_city_data()
-        
-        # 初始化预测服务和推荐服务
-        data_dir = os.path.abspath(Config.DATA_DIR)
-        prediction_service = WeatherPredictionService(data_dir)
-        recommendation_service = RecommendationService(data_dir)
-        
         # 获取请求参数
         days = int(request.args.get("days", 7))
         selected_city = request.args.get("city", None)
         
-        # 尝试直接预测所有城市，避免每次都训练模型
-        all_predictions = prediction_service.predict_all_cities(weather_df, days)
-        
-        # 如果预测失败（模型不存在），再训练模型并重新预测
-        if not all_predictions or len(all_predictions) == 0:
-            # 只训练选定城市的模型，而不是所有城市
-            if selected_city:
-                # 只训练选定城市的模型
-                city_weather_df = weather_df[weather_df['城市'] == selected_city]
-                if not city_weather_df.empty:
-                    # 创建临时的单城市天气数据
-                    temp_weather_df = weather_df[weather_df['城市'] == selected_city]
-                    # 训练单城市模型
-                    prediction_service.train_all_models(temp_weather_df)
-                    # 预测单城市
-                    all_predictions = {
-                        selected_city: prediction_service.predict_future(temp_weather_df, selected_city, days)
-                    }
-            else:
-                # 如果没有选择城市，才训练所有城市模型
-                prediction_service.train_all_models(weather_df)
-                all_predictions = prediction_service.predict_all_cities(weather_df, days)
-        
-        # 为每个城市生成景点推荐
-        city_recommendations = {}
-        
-        for city, df in all_predictions.items():
-            # 为每个城市生成景点推荐，优化性能
-            daily_recommendations = []
-            if not df.empty:
-                # 优化：使用缓存机制，避免重复生成推荐
-                import pickle
-                from pathlib import Path
-                cache_dir = Path(Config.DATA_DIR) / 'cache'
-                cache_dir.mkdir(exist_ok=True)
-                
-                # 为该城市的推荐创建缓存文件路径
-                cache_file = cache_dir / f"recommendations_{city}_{days}days.pkl"
-                
-                # 尝试从缓存加载推荐结果
-                if cache_file.exists():
-                    try:
-                        with open(cache_file, 'rb') as f:
-                            daily_recommendations = pickle.load(f)
-                        print(f"从缓存加载{city}的推荐结果")
-                    except Exception as e:
-                        print(f"加载推荐缓存失败: {e}")
-                        daily_recommendations = []
-                
-                # 如果缓存不存在或加载失败，生成新的推荐
-                if not daily_recommendations:
-                    # 为每个城市的每天生成推荐，但限制生成的天数
-                    max_days_to_generate = min(days, 7)  # 最多生成7天的推荐，减少计算量
-                    for i, (_, row) in enumerate(df.iterrows()):
-                        if i >= max_days_to_generate:
-                            # 对于剩余天数，重复使用前7天的推荐或跳过
-                            break
-                        
-                        date_str = row['日期'].strftime('%Y-%m-%d')
-                        recommendations = recommendation_service.recommend_by_weather(
-                            weather_df, city=city, date=date_str, top_n=3
-                        )
-                        daily_recommendations.append({
-                            'date': date_str,
-                            'recommendations': recommendations.to_dict('records')
-                        })
-                    
-                    # 将推荐结果保存到缓存
-                    try:
-                        with open(cache_file, 'wb') as f:
-                            pickle.dump(daily_recommendations, f)
-                        print(f"保存{city}的推荐结果到缓存")
-                    except Exception as e:
-                        print(f"保存推荐缓存失败: {e}")
-            city_recommendations[city] = daily_recommendations
-        
-        # 获取城市列表
-        cities = sorted(weather_df['城市'].unique())
-        
         return render_template(
             "all_cities_prediction.html",
-            all_predictions=all_predictions,
-            city_recommendations=city_recommendations,
             selected_days=days,
-            cities=cities,
-            selected_city=selected_city
+            selected_city=selected_city,
+            **_all_cities_context(days, selected_city)
         )
     except Exception as e:
         return render_template("error.html", message="所有城市预测服务错误", details=str(e))
+
+
+def _all_cities_context(days, selected_city=None):
+    """全部城市的预测结果和景点推荐，页面和后台任务（all_cities_prediction）共用"""
+    from app.utils.data_loader import load_all_city_data
+    from app.services.prediction_service import WeatherPredictionServiceFactory
+    from app.services.recommendation_service import RecommendationService
+    # 加载所有天气数据
+    weather_df = load_all_city_data()
+    
+    # 初始化预测服务和推荐服务
+    data_dir = os.path.abspath(Config.DATA_DIR)
+    prediction_service = WeatherPredictionServiceFactory.create_service(data_dir=data_dir)
+    recommendation_service = RecommendationService(data_dir)
+    
+    # 优先读取当天的预测缓存，避免每次请求都重新预测所有城市
+    all_predictions = forecast_cache.get_all_forecasts(prediction_service, weather_df, days)
+    
+    # 如果预测失败（模型不存在），再训练模型并重新预测
+    if not all_predictions or len(all_predictions) == 0:
+        # 只训练选定城市的模型，而不是所有城市
+        if selected_city:
+            # 只训练选定城市的模型
+            city_weather_df = weather_df[weather_df['城市'] == selected_city]
+            if not city_weather_df.empty:
+                # 创建临时的单城市天气数据
+                temp_weather_df = weather_df[weather_df['城市'] == selected_city]
+                # 训练单城市模型
+                prediction_service.train_all_models(temp_weather_df)
+                # 预测单城市
+                all_predictions = {
+                    selected_city: prediction_service.predict_future(temp_weather_df, selected_city, days)
+                }
+        else:
+            # 如果没有选择城市，才训练所有城市模型
+            prediction_service.train_all_models(weather_df)
+            all_predictions = prediction_service.predict_all_cities(weather_df, days)
+    
+    # 为每个城市生成景点推荐
+    city_recommendations = {}
+    
+    for city, df in all_predictions.items():
+        # 为每个城市生成景点推荐，优化性能
+        daily_recommendations = []
+        if not df.empty:
+            # 优先读取预计算的推荐结果，最多生成7天的推荐，减少计算量
+            max_days_to_generate = min(days, 7)
+            for i, (_, row) in enumerate(df.iterrows()):
+                if i >= max_days_to_generate:
+                    break
+                
+                date_str = row['日期'].strftime('%Y-%m-%d')
+                daily_recommendations.append({
+                    'date': date_str,
+                    'recommendations': recommendation_service.get_daily_recommendations(
+                        weather_df, city=city, date=date_str, top_n=3
+                    )
+                })
+        city_recommendations[city] = daily_recommendations
+    
+    # 获取城市列表
+    cities = sorted(weather_df['城市'].unique())
+    
+    return {
+        'all_predictions': all_predictions,
+        'city_recommendations': city_recommendations,
+        'cities': cities
+    }
+
+
+def _json_safe(value):
+    """把推荐结果中的缺失值（NaN）转换为None，NaN 不是合法的JSON"""
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _all_cities_job(params):
+    """后台任务 all_cities_prediction：预测结果转换为可序列化的记录列表"""
+    import json
+    days = int(params.get('days', 7))
+    context = _all_cities_context(days, params.get('city'))
+    predictions = {
+        city: json.loads(df.to_json(orient='records', date_format='iso', force_ascii=False))
+        for city, df in context['all_predictions'].items()
+    }
+    return {
+        'success': True,
+        'days': days,
+        'predictions': predictions,
+        'recommendations': _json_safe(context['city_recommendations']),
+        'cities': [str(city) for city in context['cities']]
+    }
+
+
+# 后台任务（见 app/utils/job_queue.py）：POST /jobs/all_cities_prediction
+job_queue.register('all_cities_prediction', _all_cities_job)
@@ -1,6 +1,4 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from app.utils.data_loader import load_all_city_data, get_filter_options
-import pandas as pd
 from flask_login import login_required
 
 query_view = Blueprint("query_view", __name__, url_prefix="/query")
@@ -8,6 +6,8 @@ query_view = Blueprint("query_view", __name__, url_prefix="/query")
 @query_view.route("/", methods=["GET"])
 @login_required
 def index():
+    from app.utils.data_loader import load_all_city_data, get_filter_options
+    import pandas as pd
     df = load_all_city_data()
 
     filters = {
@@ -1,6 +1,5 @@
-from flask import Blueprint, render_template, request
-from app.utils.data_loader import load_all_city_data
-from app.services.recommendation_service import RecommendationService
+from flask import Blueprint, render_template, request, jsonify
+from app.utils import search_index
 import os
 from app.config import Config
 from flask_login import login_required
@@ -11,6 +10,8 @@ recommendation_view = Blueprint("recommendation", __name__, url_prefix="/recomme
 @login_required
 def index():
     """旅游推荐主页"""
+    from app.utils.data_loader import load_all_city_data
+    from app.services.recommendation_service import RecommendationService
     try:
         # 加载所有天气数据
         weather_df = load_all_city_data()
@@ -153,6 +154,8 @@ def index():
 @recommendation_view.route("/city/<city_name>")
 def city_recommendation(city_name):
     """城市旅游推荐"""
+    from app.utils.data_loader import load_all_city_data
+    from app.services.recommendation_service import RecommendationService
     try:
         # 加载所有天气数据
         weather_df = load_all_city_data()
@@ -179,3 +182,32 @@ def city_recommendation(city_name):
         )
     except Exception as e:
         return render_template("error.html", message=f"城市推荐错误: {city_name}", details=str(e))
+
+@recommendation_view.route("/api/suggest")
+@login_required
+def suggest():
+    """景点搜索补全（边输入边搜索）"""
+    from app.services.recommendation_service import RecommendationService
+    try:
+        prefix = request.args.get("q", "").strip()
+        city = request.args.get("city", "")
+        limit = min(int(request.args.get("limit", 10)), 50)
+        
+        if not prefix:
+            return jsonify({'success': True, 'suggestions': []})
+        
+        # 索引已构建时直接使用，避免每次输入都重新加载景点数据
+        data_dir = os.path.abspath(Config.DATA_DIR)
+        index = search_index.get_cached_index(data_dir)
+        if index is None:
+            index = RecommendationService(data_dir).get_search_index()
+        
+        return jsonify({
+            'success': True,
+            'suggestions': index.suggest_records(prefix, city=city, limit=limit)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'景点补全失败: {str(e)}'
+        }), 500
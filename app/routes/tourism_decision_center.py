@@ -1,9 +1,4 @@
 from flask import Blueprint, render_template, request
-from app.utils.data_loader import load_all_city_data
-from app.services.recommendation_service import RecommendationService
-from app.services.path_optimization_service import PathOptimizationService
-from app.services.traffic_prediction_service import TrafficPredictionService
-from app.services.risk_assessment_service import RiskAssessmentService
 import os
 from app.config import Config
 from flask_login import login_required
@@ -14,6 +9,11 @@ tourism_decision_center = Blueprint("tourism_decision_center", __name__, url_pre
 @login_required
 def index():
     """旅游决策中心主页"""
+    from app.utils.data_loader import load_all_city_data
+    from app.services.recommendation_service import RecommendationService
+    from app.services.path_optimization_service import PathOptimizationService
+    from app.services.traffic_prediction_service import TrafficPredictionService
+    from app.services.risk_assessment_service import RiskAssessmentService
     try:
         # 加载所有天气数据
         weather_df = load_all_city_data()
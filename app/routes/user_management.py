@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app.models import User, Admin
 from app import db
+from app.utils import identity_cache
 from flask_login import login_required, current_user
 
 user_management = Blueprint('user_management', __name__, url_prefix='/admin')
@@ -32,6 +33,7 @@ def activate_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = True
     db.session.commit()
+    identity_cache.invalidate(user.get_id())
     
     flash(f'用户 {user.username} 已激活', 'success')
     return redirect(url_for('user_management.index'))
@@ -55,6 +57,7 @@ def deactivate_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = False
     db.session.commit()
+    identity_cache.invalidate(user.get_id())
     
     flash(f'用户 {user.username} 已停用', 'success')
     return redirect(url_for('user_management.index'))
@@ -78,6 +81,7 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user.get_id())
     
     flash(f'用户 {user.username} 已删除', 'success')
     return redirect(url_for('user_management.index'))
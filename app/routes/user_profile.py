@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from app.models import User, LoginHistory, Favorite
 from app import db
+from app.routes.auth import current_account
+from app.utils import identity_cache
 from flask_login import login_required, current_user
 import json
 
@@ -36,13 +38,15 @@ def edit_profile():
                 flash('该邮箱已被注册', 'danger')
                 return redirect(url_for('user_profile.edit_profile'))
         
-        # 更新用户资料
-        current_user.nickname = nickname
-        current_user.email = email
+        # 更新用户资料（current_user是只读快照，修改数据库记录）
+        account = current_account()
+        account.nickname = nickname
+        account.email = email
         if avatar:  # 只在提供了新头像时更新
-            current_user.avatar = avatar
+            account.avatar = avatar
         
         db.session.commit()
+        identity_cache.invalidate(current_user.get_id())
         flash('个人资料更新成功', 'success')
         return redirect(url_for('user_profile.profile'))
     
@@ -75,8 +79,9 @@ def change_password():
             return redirect(url_for('user_profile.change_password'))
         
         # 更新密码
-        current_user.set_password(new_password)
+        current_account().set_password(new_password)
         db.session.commit()
+        identity_cache.invalidate(current_user.get_id())
         flash('密码修改成功', 'success')
         return redirect(url_for('user_profile.profile'))
     
@@ -1,12 +1,13 @@
+import logging
 from flask import Blueprint, render_template, request, flash, redirect, url_for
-from app.services.weather_service import WeatherService
-from app.services.analysis_service import AnalysisService
 from app.config import Config
+from app.utils import metrics
 import os
-import pandas as pd
 from datetime import datetime, timedelta
 from flask_login import login_required, current_user
 
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('visualizations', __name__)
 
 def _process_date_range(date_range, df):
@@ -39,7 +40,9 @@ def _get_available_cities(data_dir):
     except FileNotFoundError:
         return []
 
+@metrics.instrument("generate_charts")
 def _generate_all_charts(data, traffic_data=None, risk_data=None, operation_data=None, is_future=False):
+        from app.services.analysis_service import AnalysisService
         # 初始化所有图表键，设置默认值为None，确保模板中所有图表变量都有定义
         charts = {
             # 天气相关图表
@@ -71,41 +74,41 @@ def _generate_all_charts(data, traffic_data=None, risk_data=None, operation_data
             'expected_actual_traffic_comparison': None
         }
         try:
-            print(f"=== 开始生成图表，is_future={is_future} ===")
+            logger.debug("=== 开始生成图表，is_future=%s ===", is_future)
             
             # 生成天气相关图表
-            print("生成气温趋势图...")
+            logger.debug("生成气温趋势图...")
             charts['temp_line'] = AnalysisService.create_temp_line_chart(data)
             
             # 生成天气频率统计图表
-            print("生成天气频率统计图表...")
+            logger.debug("生成天气频率统计图表...")
             charts['weather_bar'] = AnalysisService.create_weather_bar_chart(data)
             
             # 生成风力分布图表
-            print("生成风力分布图表...")
+            logger.debug("生成风力分布图表...")
             charts['wind_scatter'] = AnalysisService.create_wind_scatter_chart(data)
             
             # 生成季节分布饼图
-            print("生成季节分布饼图...")
+            logger.debug("生成季节分布饼图...")
             charts['day_season_pie'] = AnalysisService.create_season_pie_chart(data, is_day=True)
             charts['night_season_pie'] = AnalysisService.create_season_pie_chart(data, is_day=False)
             
             # 生成气温热力图
-            print("生成气温热力图...")
+            logger.debug("生成气温热力图...")
             charts['temp_heatmap'] = AnalysisService.create_temp_heatmap(data)
             
             # 生成天气状况饼图
-            print("生成天气状况饼图...")
+            logger.debug("生成天气状况饼图...")
             charts['weather_day_pie'] = AnalysisService.create_weather_pie_chart(data, is_day=True)
             charts['weather_night_pie'] = AnalysisService.create_weather_pie_chart(data, is_day=False)
             
             # 生成风向玫瑰图
-            print("生成风向玫瑰图...")
+            logger.debug("生成风向玫瑰图...")
             charts['wind_day_rose'] = AnalysisService.create_wind_direction_rose_chart(data, is_day=True)
             charts['wind_night_rose'] = AnalysisService.create_wind_direction_rose_chart(data, is_day=False)
             
             # 生成旅游推荐相关图表
-            print("生成旅游推荐相关图表...")
+            logger.debug("生成旅游推荐相关图表...")
             if is_future and '旅游评分' in data.columns:
                 # 预测数据已经包含旅游评分，直接使用
                 score_df = data[['日期', '旅游评分']].copy()
@@ -118,7 +121,7 @@ def _generate_all_charts(data, traffic_data=None, risk_data=None, operation_data
             
             # 生成客流量相关图表（仅历史数据）
             if not is_future and traffic_data is not None and not traffic_data.empty:
-                print("生成客流量相关图表...")
+                logger.debug("生成客流量相关图表...")
                 charts['traffic_trend'] = AnalysisService.create_traffic_trend_chart(traffic_data)
                 charts['holiday_traffic_comparison'] = AnalysisService.create_holiday_traffic_comparison(traffic_data)
                 charts['weather_traffic_scatter'] = AnalysisService.create_weather_traffic_scatter(traffic_data)
@@ -127,22 +130,20 @@ def _generate_all_charts(data, traffic_data=None, risk_data=None, operation_data
             
             # 生成风险评估相关图表（仅历史数据）
             if not is_future and risk_data is not None and not risk_data.empty:
-                print("生成风险评估相关图表...")
+                logger.debug("生成风险评估相关图表...")
                 charts['risk_level_distribution'] = AnalysisService.create_risk_level_distribution(risk_data)
                 charts['risk_level_time_trend'] = AnalysisService.create_risk_level_time_trend(risk_data)
                 charts['weather_risk_relationship'] = AnalysisService.create_weather_risk_relationship(risk_data)
             
             # 生成景区运营相关图表（仅历史数据）
             if not is_future and operation_data is not None and not operation_data.empty:
-                print("生成景区运营相关图表...")
+                logger.debug("生成景区运营相关图表...")
                 charts['operation_suggestion_distribution'] = AnalysisService.create_operation_suggestion_distribution(operation_data)
                 charts['weather_operation_relationship'] = AnalysisService.create_weather_operation_relationship(operation_data)
             
-            print("=== 图表生成完成 ===")
+            logger.debug("=== 图表生成完成 ===")
         except Exception as e:
-            print(f"图表生成错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("图表生成错误: %s", e)
         return charts
 
 @bp.route('/')
@@ -182,9 +183,9 @@ def test_charts():
         if v:
             try:
                 chart_options[k] = v.dump_options()
-                print(f"✅ {k}: 成功转换为JSON")
+                logger.debug("✅ %s: 成功转换为JSON", k)
             except Exception as e:
-                print(f"❌ {k}: 转换为JSON失败: {str(e)}")
+                logger.error("❌ %s: 转换为JSON失败: %s", k, e)
                 chart_options[k] = None
         else:
             chart_options[k] = None
@@ -206,12 +207,14 @@ def test_charts():
 @bp.route('/dashboard')
 @login_required
 def dashboard():
+    from app.services.weather_service import WeatherService
+    import pandas as pd
     # 所有登录用户都可以访问主界面
         
     # 打印所有请求参数，用于调试
-    print(f"\n=== 请求参数 ===")
+    logger.debug("=== 请求参数 ===")
     for key, value in request.args.items():
-        print(f"{key}: {value}")
+        logger.debug("%s: %s", key, value)
     
     city_name = request.args.get('city', '沈阳')
     # 获取选项卡类型，默认为历史数据
@@ -220,18 +223,18 @@ def dashboard():
     if 'forecast_days' in request.args and data_type == 'history':
         data_type = 'future'
     
-    print(f"=== 处理后的数据类型 ===")
-    print(f"data_type: {data_type}")
-    print(f"请求URL: {request.url}")
+    logger.debug("=== 处理后的数据类型 ===")
+    logger.debug("data_type: %s", data_type)
+    logger.debug("请求URL: %s", request.url)
     
     # 预测天数，默认为7天
     forecast_days = int(request.args.get('forecast_days', 7))
 
     try:
         data_dir = os.path.abspath(Config.DATA_DIR)
-        print(f"加载城市数据: {city_name}")
+        logger.debug("加载城市数据: %s", city_name)
         weather_service = WeatherService(data_dir, city_name)
-        print(f"原始数据行数: {len(weather_service.df)}")
+        logger.debug("原始数据行数: %s", len(weather_service.df))
 
         data = None
         traffic_data = None
@@ -240,10 +243,10 @@ def dashboard():
         
         if data_type == 'future':
             # 未来数据预测
-            print(f"生成未来{forecast_days}天的预测数据")
+            logger.debug("生成未来%s天的预测数据", forecast_days)
             
             # 直接生成模拟数据，确保图表能显示
-            print("为未来预测生成模拟数据，确保图表能显示")
+            logger.debug("为未来预测生成模拟数据，确保图表能显示")
             from datetime import datetime, timedelta
             
             # 创建模拟的未来7天数据，使用pandas datetime对象
@@ -264,8 +267,8 @@ def dashboard():
                 '旅游评分': [85, 88, 75, 90, 92, 95, 93],
                 '推荐指数': ['推荐', '强烈推荐', '一般', '强烈推荐', '强烈推荐', '强烈推荐', '强烈推荐']
             })
-            print(f"生成的模拟数据行数: {len(data)}")
-            print(f"模拟数据列: {list(data.columns)}")
+            logger.debug("生成的模拟数据行数: %s", len(data))
+            logger.debug("模拟数据列: %s", list(data.columns))
         else:
             # 历史数据分析
             # 默认使用2013–2023年全范围数据
@@ -275,28 +278,28 @@ def dashboard():
             user_start = request.args.get('start_date')
             user_end = request.args.get('end_date')
             if user_start and user_end:
-                print(f"用户选择的日期范围: {user_start} 至 {user_end}")
+                logger.debug("用户选择的日期范围: %s 至 %s", user_start, user_end)
                 date_range = _process_date_range([user_start, user_end], weather_service.df)
 
-            print(f"最终日期范围: {date_range}")
+            logger.debug("最终日期范围: %s", date_range)
             data = weather_service.get_filtered_data({
                 'date_range': date_range,
                 'day_weather': request.args.getlist('day_weather'),
                 'night_weather': request.args.getlist('night_weather')
             })
 
-            print(f"筛选后的数据行数: {len(data)}")
+            logger.debug("筛选后的数据行数: %s", len(data))
 
             # 限制过大数据
             if len(data) > 1000:
-                print(f"数据行数超过1000，随机采样1000条")
+                logger.debug("数据行数超过1000，随机采样1000条")
                 data = data.sample(1000, random_state=42)
 
             # 加载交通数据
             traffic_file = os.path.join(data_dir, 'traffic', f'{city_name}_2013-2023_traffic_data.csv')
             if os.path.exists(traffic_file):
                 traffic_data = pd.read_csv(traffic_file, parse_dates=['日期'])
-                print(f"加载交通数据，行数: {len(traffic_data)}")
+                logger.debug("加载交通数据，行数: %s", len(traffic_data))
                 # 限制数据量
                 if len(traffic_data) > 1000:
                     traffic_data = traffic_data.sample(1000, random_state=42)
@@ -305,7 +308,7 @@ def dashboard():
             risk_file = os.path.join(data_dir, 'risk', f'{city_name}2013-2023年风险评估数据.csv')
             if os.path.exists(risk_file):
                 risk_data = pd.read_csv(risk_file, parse_dates=['日期'])
-                print(f"加载风险评估数据，行数: {len(risk_data)}")
+                logger.debug("加载风险评估数据，行数: %s", len(risk_data))
                 # 限制数据量
                 if len(risk_data) > 1000:
                     risk_data = risk_data.sample(1000, random_state=42)
@@ -314,17 +317,17 @@ def dashboard():
             operation_file = os.path.join(data_dir, 'operation', f'{city_name}_operation_data.csv')
             if os.path.exists(operation_file):
                 operation_data = pd.read_csv(operation_file, parse_dates=['日期'])
-                print(f"加载景区运营数据，行数: {len(operation_data)}")
+                logger.debug("加载景区运营数据，行数: %s", len(operation_data))
                 # 限制数据量
                 if len(operation_data) > 1000:
                     operation_data = operation_data.sample(1000, random_state=42)
         
-        print(f"最终用于生成图表的数据行数: {len(data) if data is not None else 0}")
+        logger.debug("最终用于生成图表的数据行数: %s", len(data) if data is not None else 0)
         # 确保如果数据为空，我们不会尝试生成图表
         if data is None or data.empty:
             # 如果是未来预测，生成一些模拟数据以便显示图表
             if data_type == 'future':
-                print("数据为空，生成模拟预测数据")
+                logger.debug("数据为空，生成模拟预测数据")
                 from datetime import datetime, timedelta
                 
                 # 创建模拟的未来7天数据
@@ -345,13 +348,13 @@ def dashboard():
                     '旅游评分': [85, 88, 75, 90, 92, 95, 93],
                     '推荐指数': ['推荐', '强烈推荐', '一般', '强烈推荐', '强烈推荐', '强烈推荐', '强烈推荐']
                 })
-                print(f"生成的模拟数据行数: {len(data)}")
+                logger.debug("生成的模拟数据行数: %s", len(data))
             else:
-                print("数据为空，无法生成图表")
+                logger.warning("数据为空，无法生成图表")
         
         charts = _generate_all_charts(data, traffic_data, risk_data, operation_data, is_future=(data_type == 'future'))
         available_cities = _get_available_cities(data_dir)
-        print(f"可用城市列表: {available_cities}")
+        logger.debug("可用城市列表: %s", available_cities)
 
         # 检查天气选项
         day_weather = []
@@ -359,8 +362,8 @@ def dashboard():
         if data_type == 'history':
             day_weather = weather_service.df['天气状况(白天)'].unique().tolist()
             night_weather = weather_service.df['天气状况(夜间)'].unique().tolist()
-        print(f"白天天气选项: {day_weather}")
-        print(f"夜间天气选项: {night_weather}")
+        logger.debug("白天天气选项: %s", day_weather)
+        logger.debug("夜间天气选项: %s", night_weather)
         
         # 准备筛选参数
         filters = {
@@ -372,12 +375,12 @@ def dashboard():
         }
         
         # 打印图表生成情况，用于调试
-        print(f"=== 图表生成情况 ===")
+        logger.debug("=== 图表生成情况 ===")
         for chart_name, chart_obj in charts.items():
             if chart_obj:
-                print(f"✅ {chart_name}: 图表生成成功")
+                logger.debug("✅ %s: 图表生成成功", chart_name)
             else:
-                print(f"❌ {chart_name}: 图表生成失败")
+                logger.error("❌ %s: 图表生成失败", chart_name)
         
         # 确保所有图表都有值，防止前端渲染错误
         chart_options = {}
@@ -385,9 +388,9 @@ def dashboard():
             if v:
                 try:
                     chart_options[k] = v.dump_options()
-                    print(f"✅ {k}: 成功转换为JSON")
+                    logger.debug("✅ %s: 成功转换为JSON", k)
                 except Exception as e:
-                    print(f"❌ {k}: 转换为JSON失败: {str(e)}")
+                    logger.error("❌ %s: 转换为JSON失败: %s", k, e)
                     chart_options[k] = None
             else:
                 chart_options[k] = None
@@ -400,9 +403,7 @@ def dashboard():
                                forecast_days=forecast_days,
                                filters=filters)
     except Exception as e:
-        print(f"发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("发生错误: %s", e)
         return render_template('error.html', message="数据加载失败", details=str(e)), 500
 
 @bp.route('/system_menu')
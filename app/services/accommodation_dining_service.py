@@ -1,11 +1,16 @@
+import logging
 import pandas as pd
 import os
 from pathlib import Path
 import random
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
 
 class AccommodationDiningService:
     """酒店和餐饮推荐服务"""
     
+    @metrics.instrument("init.AccommodationDiningService")
     def __init__(self, data_dir):
         """初始化服务，加载所有城市的酒店和餐饮数据"""
         self.data_dir = Path(data_dir)
@@ -52,7 +57,7 @@ class AccommodationDiningService:
                 df['平均价格'] = df['价格区间'].apply(lambda x: sum(x) / 2)
                 hotels.append(df)
             except Exception as e:
-                print(f"加载酒店文件 {file_path} 失败: {e}")
+                logger.error("加载酒店文件 %s 失败: %s", file_path, e)
         
         if not hotels:
             return pd.DataFrame()
@@ -72,7 +77,7 @@ class AccommodationDiningService:
                 df['人均价格'] = df['价格区间'].apply(lambda x: sum(x) / 2)
                 dining.append(df)
             except Exception as e:
-                print(f"加载餐饮文件 {file_path} 失败: {e}")
+                logger.error("加载餐饮文件 %s 失败: %s", file_path, e)
         
         if not dining:
             return pd.DataFrame()
@@ -1,3 +1,4 @@
+import logging
 import folium
 from folium.plugins import MarkerCluster
 from app.models import Attraction
@@ -5,6 +6,11 @@ import requests
 import json
 import math
 import random
+from app.utils import log_setup
+
+logger = logging.getLogger(__name__)
+# 逐个景点、逐条路径的日志按调用位置采样输出
+sampled_logger = log_setup.sampled(logger)
 
 
 class MapService:
@@ -99,13 +105,13 @@ class MapService:
                 
                 # 确保景点有有效的坐标（允许0.0值，因为可能是城市中心坐标）
                 if attraction.latitude is None or attraction.longitude is None:
-                    print(f"景点 {attraction.name} 没有有效的坐标，跳过")
+                    sampled_logger.warning("景点 %s 没有有效的坐标，跳过", attraction.name)
                     continue
                 
                 # 辽宁省经纬度范围：放宽范围，确保所有有效的辽宁省景点坐标都能显示
                 # 北纬38°-44°，东经118°-126°
                 if not (38.0 <= attraction.latitude <= 44.0) or not (118.0 <= attraction.longitude <= 126.0):
-                    print(f"景点 {attraction.name} 坐标超出辽宁省范围，跳过: ({attraction.latitude}, {attraction.longitude})")
+                    sampled_logger.warning("景点 %s 坐标超出辽宁省范围，跳过: (%s, %s)", attraction.name, attraction.latitude, attraction.longitude)
                     continue
                 
                 # 记录目标城市
@@ -134,7 +140,7 @@ class MapService:
                     display_lon = original_lon + math.cos(angle) * distance
                     
                     added_coords[coord_key] += 1
-                    print(f"景点 {attraction.name} 坐标重复，添加圆形偏移: ({display_lat}, {display_lon})")
+                    sampled_logger.debug("景点 %s 坐标重复，添加圆形偏移: (%s, %s)", attraction.name, display_lat, display_lon)
                 else:
                     # 第一次添加该坐标
                     added_coords[coord_key] = 1
@@ -166,7 +172,7 @@ class MapService:
                     )
                 )
                 marker.add_to(m)
-                print(f"成功添加景点标记: {attraction.name}，坐标: ({display_lat}, {display_lon})")
+                sampled_logger.debug("成功添加景点标记: %s，坐标: (%s, %s)", attraction.name, display_lat, display_lon)
                 
                 # 保存用于调整地图视图的坐标
                 all_marker_coords.append([display_lat, display_lon])
@@ -187,7 +193,7 @@ class MapService:
             paths.append(path)
         
         # 绘制多条路径
-        print(f"总共有 {len(paths)} 条路径需要绘制")
+        logger.debug("总共有 %s 条路径需要绘制", len(paths))
         
         # 为每条路径生成并绘制路径线
         for path in paths:
@@ -210,7 +216,7 @@ class MapService:
                         # 后续段：跳过第一个坐标（避免重复）
                         path_line_coords.extend(segment_coords[1:])
                 
-                print(f"路径 '{path['name']}' 生成了 {len(path_line_coords)} 个坐标点")
+                sampled_logger.debug("路径 '%s' 生成了 %s 个坐标点", path['name'], len(path_line_coords))
                 
                 # 绘制当前路径线
                 folium.PolyLine(
@@ -223,7 +229,7 @@ class MapService:
                     smooth_factor=1.0,  # 平滑路径
                     z_index=1000  # 确保路径显示在最上层
                 ).add_to(m)
-                print(f"路径 '{path['name']}' 已添加到地图")
+                sampled_logger.debug("路径 '%s' 已添加到地图", path['name'])
         
         # 自动调整地图视图，确保所有景点都能显示在视野内
         if all_marker_coords:
@@ -239,7 +245,7 @@ class MapService:
                 [min_lat - margin, min_lon - margin],  # 西南角
                 [max_lat + margin, max_lon + margin]   # 东北角
             ])
-            print(f"自动调整地图视图，边界: [{min_lat}, {min_lon}] 到 [{max_lat}, {max_lon}]")
+            logger.debug("自动调整地图视图，边界: [%s, %s] 到 [%s, %s]", min_lat, min_lon, max_lat, max_lon)
         else:
             # 如果没有有效的坐标，在地图中心添加提示标记
             # 检查是否有目标城市的坐标
@@ -258,7 +264,7 @@ class MapService:
                         popup=f"<h5>提示</h5><p>当前行程中的景点没有有效的坐标信息。</p><p>目标城市: {city}</p>",
                         icon=folium.Icon(color='orange', icon='info-circle', prefix='fa')
                     ).add_to(m)
-                    print(f"使用目标城市 {city} 的坐标作为地图中心")
+                    logger.debug("使用目标城市 %s 的坐标作为地图中心", city)
                 else:
                     # 使用辽宁省中心作为地图中心
                     folium.Marker(
@@ -266,7 +272,7 @@ class MapService:
                         popup="<h5>提示</h5><p>当前行程中的景点没有有效的坐标信息。</p>",
                         icon=folium.Icon(color='orange', icon='info-circle', prefix='fa')
                     ).add_to(m)
-                    print("没有有效的坐标，添加了提示标记")
+                    logger.debug("没有有效的坐标，添加了提示标记")
             else:
                 # 使用辽宁省中心作为地图中心
                 folium.Marker(
@@ -274,7 +280,7 @@ class MapService:
                     popup="<h5>提示</h5><p>当前行程中的景点没有有效的坐标信息。</p>",
                     icon=folium.Icon(color='orange', icon='info-circle', prefix='fa')
                 ).add_to(m)
-                print("没有有效的坐标，添加了提示标记")
+                logger.debug("没有有效的坐标，添加了提示标记")
         
         # 添加辽宁省边界（如果有GeoJSON数据）
         self._add_liaoning_boundary(m)
@@ -391,7 +397,7 @@ class MapService:
                 # 添加图层控制器
                 folium.LayerControl().add_to(m)
             except Exception as e:
-                print(f"添加辽宁省边界失败: {e}")
+                logger.error("添加辽宁省边界失败: %s", e)
     
     def generate_attraction_map(self, attractions):
         """生成景点分布地图"""
@@ -412,13 +418,13 @@ class MapService:
             
             # 确保景点有有效的坐标（允许0.0值，因为可能是城市中心坐标）
             if attraction.latitude is None or attraction.longitude is None:
-                print(f"景点 {attraction.name} 没有有效的坐标，跳过")
+                sampled_logger.warning("景点 %s 没有有效的坐标，跳过", attraction.name)
                 continue
             
             # 辽宁省经纬度范围：放宽范围，确保所有有效的辽宁省景点坐标都能显示
             # 北纬38°-44°，东经118°-126°
             if not (38.0 <= attraction.latitude <= 44.0) or not (118.0 <= attraction.longitude <= 126.0):
-                print(f"景点 {attraction.name} 坐标超出辽宁省范围，跳过: ({attraction.latitude}, {attraction.longitude})")
+                sampled_logger.warning("景点 %s 坐标超出辽宁省范围，跳过: (%s, %s)", attraction.name, attraction.latitude, attraction.longitude)
                 continue
             
             # 为当前景点获取坐标
@@ -444,7 +450,7 @@ class MapService:
                 display_lon = original_lon + math.cos(angle) * distance
                 
                 added_coords[coord_key] += 1
-                print(f"景点 {attraction.name} 坐标重复，添加圆形偏移: ({display_lat}, {display_lon})")
+                sampled_logger.debug("景点 %s 坐标重复，添加圆形偏移: (%s, %s)", attraction.name, display_lat, display_lon)
             else:
                 # 第一次添加该坐标
                 added_coords[coord_key] = 1
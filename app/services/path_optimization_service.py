@@ -1,5 +1,6 @@
-import networkx as nx
+import logging
 import random
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -10,9 +11,40 @@ from app.services.weather_service import WeatherService
 from app.services.risk_assessment_service import RiskAssessmentService
 from app.services.recommendation_service import RecommendationService
 from app.services.accommodation_dining_service import AccommodationDiningService
+from app.utils import log_setup, metrics
+
+logger = logging.getLogger(__name__)
+# 适应度计算、路径校验等循环中的日志按调用位置采样输出
+sampled_logger = log_setup.sampled(logger)
+
+# 限时模式下遗传算法的迭代上限，以及判定收敛的连续无提高代数
+ANYTIME_MAX_GENERATIONS = 500
+CONVERGENCE_GENERATIONS = 20
+
+metrics.describe('app_path_search_total', 'counter', "遗传算法路径搜索次数，按停止原因区分")
+
+
+def parse_time_budget_ms(value, max_ms):
+    """解析请求中的 time_budget_ms：须为非负整数（毫秒），None 按0（固定迭代代数）处理，
+    超过 max_ms（PATH_TIME_BUDGET_MAX_MS）时按 max_ms 处理；格式不正确时抛出 ValueError
+    """
+    if value is None:
+        return 0
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"time_budget_ms 必须为非负整数（毫秒）: {value!r}")
+    try:
+        budget = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"time_budget_ms 必须为非负整数（毫秒）: {value!r}") from None
+    if budget < 0:
+        raise ValueError(f"time_budget_ms 必须为非负整数（毫秒）: {value!r}")
+    if max_ms:
+        budget = min(budget, int(max_ms))
+    return budget
 
 
 class PathOptimizationService:
+    @metrics.instrument("init.PathOptimizationService")
     def __init__(self):
         # 延迟初始化，只在需要时构建图
         self.graph = None
@@ -29,6 +61,8 @@ class PathOptimizationService:
         self.recommendation_service = None
         # 初始化住宿餐饮服务
         self.accommodation_dining_service = None
+        # 最近一次遗传算法搜索的代数、适应度和耗时
+        self.last_search = None
         
         # 城市中心点坐标数据
         self.city_coords = {
@@ -57,6 +91,7 @@ class PathOptimizationService:
     
     def _build_attraction_graph(self):
         """构建景点图模型，只在需要时调用"""
+        import networkx as nx
         if self.graph is not None:
             return self.graph
         
@@ -162,7 +197,7 @@ class PathOptimizationService:
         
         # 获取所有满足基本条件的景点
         attractions = query.all()
-        print(f"_filter_attractions返回景点数量: {len(attractions)}")
+        logger.debug("_filter_attractions返回景点数量: %s", len(attractions))
         
         # 如果没有景点，直接返回
         if not attractions:
@@ -226,11 +261,11 @@ class PathOptimizationService:
                         if match:
                             filtered_by_type.append(attr)
                     
-                    print(f"根据类型{all_target_types}过滤后景点数量: {len(filtered_by_type)}")
+                    logger.debug("根据类型%s过滤后景点数量: %s", all_target_types, len(filtered_by_type))
                     
                     # 如果过滤后没有景点，直接返回空列表
                     if not filtered_by_type:
-                        print("没有找到符合类型条件的景点，返回空列表")
+                        logger.warning("没有找到符合类型条件的景点，返回空列表")
                         return []
                     
                     # 使用推荐服务根据景点类型排序
@@ -243,7 +278,7 @@ class PathOptimizationService:
                         min_rating=min_rating
                     )
                     
-                    print(f"推荐服务返回结果数量: {len(recommended_df)}")
+                    logger.debug("推荐服务返回结果数量: %s", len(recommended_df))
                     
                     if not recommended_df.empty:
                         # 根据推荐结果重新排序景点列表
@@ -274,16 +309,14 @@ class PathOptimizationService:
                         # 只有在排序后的景点列表不为空时才使用排序结果
                         if sorted_attractions:
                             attractions = sorted_attractions
-                            print(f"排序后景点数量: {len(attractions)}")
+                            logger.debug("排序后景点数量: %s", len(attractions))
                     else:
                         # 如果推荐服务没有返回结果，使用过滤后的景点列表
                         attractions = filtered_by_type
-                        print(f"使用过滤后的景点列表，数量: {len(attractions)}")
+                        logger.debug("使用过滤后的景点列表，数量: %s", len(attractions))
                 except Exception as e:
                     # 如果推荐服务出现任何错误，使用原始的景点列表
-                    print(f"推荐服务出现错误: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("推荐服务出现错误: %s", e)
         
         return attractions
     
@@ -340,7 +373,7 @@ class PathOptimizationService:
             
             # 确保attr1和attr2是景点对象，而不是字典
             if not hasattr(attr1, 'latitude') or not hasattr(attr2, 'latitude'):
-                print(f"警告：跳过非景点对象: attr1={type(attr1)}, attr2={type(attr2)}")
+                sampled_logger.warning("跳过非景点对象: attr1=%s, attr2=%s", type(attr1), type(attr2))
                 continue
             
             # 直接使用距离计算，不再依赖图的边，提高性能
@@ -416,7 +449,7 @@ class PathOptimizationService:
                         total_traffic_score += traffic_score
                 except Exception as e:
                     # 遇到错误时跳过该景点的客流量计算，避免影响整体性能
-                    print(f"客流量计算错误: {str(e)}")
+                    sampled_logger.error("客流量计算错误: %s", e)
                     # 继续使用默认得分
                     total_traffic_score += 0.8
                     continue
@@ -450,7 +483,7 @@ class PathOptimizationService:
             
             # 确保attr1和attr2是景点对象，而不是字典
             if not hasattr(attr1, 'latitude') or not hasattr(attr2, 'latitude'):
-                print(f"警告：跳过非景点对象: attr1={type(attr1)}, attr2={type(attr2)}")
+                sampled_logger.warning("跳过非景点对象: attr1=%s, attr2=%s", type(attr1), type(attr2))
                 continue
             
             # 直接使用距离计算，不再依赖图的边，提高性能
@@ -488,7 +521,7 @@ class PathOptimizationService:
             )
             # 跳过模型训练，直接使用预测服务，避免训练时间过长
             self.traffic_models_trained = True
-            print("客流量预测服务初始化，跳过模型训练")
+            logger.debug("客流量预测服务初始化，跳过模型训练")
     
     def _init_weather_service(self):
         """初始化天气服务"""
@@ -498,9 +531,9 @@ class PathOptimizationService:
                     data_dir="data",
                     city_name="沈阳"  # 默认城市，后续可以根据需要动态设置
                 )
-                print("天气服务初始化成功")
+                logger.debug("天气服务初始化成功")
             except Exception as e:
-                print(f"天气服务初始化失败: {str(e)}")
+                logger.error("天气服务初始化失败: %s", e)
                 self.weather_service = None
     
     def _init_risk_service(self):
@@ -510,9 +543,9 @@ class PathOptimizationService:
                 self.risk_service = RiskAssessmentService(
                     data_dir="data"
                 )
-                print("风险评估服务初始化成功")
+                logger.debug("风险评估服务初始化成功")
             except Exception as e:
-                print(f"风险评估服务初始化失败: {str(e)}")
+                logger.error("风险评估服务初始化失败: %s", e)
                 self.risk_service = None
     
     def _init_recommendation_service(self):
@@ -522,9 +555,9 @@ class PathOptimizationService:
                 self.recommendation_service = RecommendationService(
                     data_dir="data"
                 )
-                print("推荐服务初始化成功")
+                logger.debug("推荐服务初始化成功")
             except Exception as e:
-                print(f"推荐服务初始化失败: {str(e)}")
+                logger.error("推荐服务初始化失败: %s", e)
                 self.recommendation_service = None
     
     def _init_accommodation_dining_service(self):
@@ -534,9 +567,9 @@ class PathOptimizationService:
                 self.accommodation_dining_service = AccommodationDiningService(
                     data_dir="data"
                 )
-                print("住宿餐饮服务初始化成功")
+                logger.debug("住宿餐饮服务初始化成功")
             except Exception as e:
-                print(f"住宿餐饮服务初始化失败: {str(e)}")
+                logger.error("住宿餐饮服务初始化失败: %s", e)
                 self.accommodation_dining_service = None
     
     def _crossover(self, parent1, parent2):
@@ -584,24 +617,55 @@ class PathOptimizationService:
         
         return path
     
-    def _genetic_algorithm(self, population, days, generations=8, mutation_rate=0.1, weather_forecast=None, day_index=None, target_city=None):
-        """遗传算法优化路径，包含交叉和变异操作"""
+    @metrics.instrument("genetic_algorithm")
+    def _genetic_algorithm(self, population, days, generations=8, mutation_rate=0.1, weather_forecast=None, day_index=None, target_city=None, time_budget_ms=None):
+        """遗传算法优化路径，包含交叉和变异操作
+
+        未指定 time_budget_ms 时固定迭代 generations 代。指定时为限时（anytime）模式：
+        一直迭代到时间用完、连续 CONVERGENCE_GENERATIONS 代最优适应度没有提高或达到 ANYTIME_MAX_GENERATIONS 代，
+        时间在一代的适应度计算中途用完时立即停止，返回目前为止的最优路径。
+        迭代代数、最优适应度、耗时和停止原因记录在 self.last_search 中。
+        """
+        self.last_search = None
         # 如果种群为空，直接返回空列表
         if not population:
             return []
         
         population_size = len(population)
-        
-        for generation in range(generations):
-            # 计算适应度
+        started = time.perf_counter()
+        deadline = started + float(time_budget_ms) / 1000 if time_budget_ms else None
+        max_generations = generations if deadline is None else ANYTIME_MAX_GENERATIONS
+        
+        best_score, best_path = None, None
+        completed = 0  # 已完成的代数
+        stale = 0  # 最优适应度连续没有提高的代数
+        while True:
+            # 计算适应度，时间用完时停止（至少保留一个已评估的个体）
             fitness_scores = []
             for path in population:
+                if deadline is not None and (fitness_scores or best_path is not None) and time.perf_counter() >= deadline:
+                    break
                 # 简化适应度计算，跳过客流量计算以提高性能
                 score = self._fitness_simple(path, target_city)
                 fitness_scores.append((score, path))
             
-            # 按适应度排序
+            # 按适应度排序，记录目前为止的最优个体
             fitness_scores.sort(reverse=True, key=lambda x: x[0])
+            if fitness_scores and (best_path is None or fitness_scores[0][0] > best_score + 1e-9):
+                best_score, best_path = fitness_scores[0]
+                stale = 0
+            else:
+                stale += 1
+            
+            if len(fitness_scores) < population_size or (deadline is not None and time.perf_counter() >= deadline):
+                stopped = 'deadline'
+                break
+            if completed >= max_generations:
+                stopped = 'generations'
+                break
+            if deadline is not None and stale >= CONVERGENCE_GENERATIONS:
+                stopped = 'converged'
+                break
             
             # 选择最佳个体保留到下一代（精英保留）
             elite_size = max(1, population_size // 10)  # 保留10%的精英
@@ -610,11 +674,14 @@ class PathOptimizationService:
             # 创建新一代
             new_population = elite.copy()
             
+            # 轮盘赌选择，个体与适应度按排序后的顺序对应
+            ranked = [path for _, path in fitness_scores]
+            weights = [score for score, _ in fitness_scores]
+            
             # 生成剩余个体
             while len(new_population) < population_size:
-                # 选择父母，使用轮盘赌选择，简化选择逻辑
-                parent1 = random.choices(population, weights=[score for score, _ in fitness_scores], k=1)[0]
-                parent2 = random.choices(population, weights=[score for score, _ in fitness_scores], k=1)[0]
+                parent1 = random.choices(ranked, weights=weights, k=1)[0]
+                parent2 = random.choices(ranked, weights=weights, k=1)[0]
                 
                 # 交叉生成后代
                 child1, child2 = self._crossover(parent1, parent2)
@@ -630,9 +697,17 @@ class PathOptimizationService:
             
             # 只保留前population_size个个体
             population = new_population[:population_size]
-        
-        # 返回最佳路径，只使用简化适应度计算以提高性能
-        best_path = max(population, key=lambda x: self._fitness_simple(x, target_city))
+            completed += 1
+        
+        self.last_search = {
+            'generations': completed,
+            'fitness': round(float(best_score), 6),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'time_budget_ms': time_budget_ms or None,
+            'stopped': stopped,
+        }
+        metrics.inc('app_path_search_total', stopped=stopped)
+        logger.debug("遗传算法结束: %s", self.last_search)
         return best_path
     
     def _ensure_closed_loop(self, path, start_city):
@@ -774,24 +849,95 @@ class PathOptimizationService:
         
         return itinerary
     
-    def generate_closed_loop_path(self, start_city, days, preferences, target_city=None, selected_attractions=None):
+    def _resolve_selected_attractions(self, selected_attractions):
+        """将用户选择的景点解析为数据库景点对象，保持选择顺序
+        
+        带景点ID（补全接口返回的 attraction_id 或数字 id）的按主键一次性查询；
+        其余按城市和名称批量精确匹配，仍未找到的再通过名称索引做包含匹配，
+        不再为每个景点单独执行 LIKE 查询。
+        """
+        from app.utils import attraction_suggest
+        
+        def parse_id(selected_attr):
+            for key in ('attraction_id', 'id'):
+                value = selected_attr.get(key)
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return value
+                if isinstance(value, str) and value.isdigit():
+                    return int(value)
+            return None
+        
+        selections = []
+        for selected_attr in selected_attractions:
+            if not isinstance(selected_attr, dict):
+                continue
+            attr_name = selected_attr.get('name')
+            attr_city = selected_attr.get('city')
+            # 移除城市名称中的"市"后缀，确保与数据库中的格式一致
+            attr_city = attr_city.replace("市", "") if attr_city else attr_city
+            selections.append((parse_id(selected_attr), attr_name, attr_city))
+        
+        # 1. 按主键一次性查询
+        ids = {attr_id for attr_id, _, _ in selections if attr_id is not None}
+        by_id = {}
+        if ids:
+            by_id = {attr.id: attr for attr in Attraction.query.filter(Attraction.id.in_(ids)).all()}
+        
+        # 2. 没有ID或ID无效的，按城市和名称批量精确匹配
+        pending = [(name, city) for attr_id, name, city in selections
+                   if attr_id not in by_id and name and city]
+        by_name = {}
+        if pending:
+            exact = Attraction.query.filter(
+                Attraction.name.in_({name for name, _ in pending}),
+                Attraction.city.in_({city for _, city in pending})
+            ).all()
+            for attr in exact:
+                by_name.setdefault((attr.name, attr.city), attr)
+        
+        # 3. 仍未找到的，通过名称索引查找名称包含该关键词的景点
+        fuzzy_ids = {}
+        missing = [key for key in pending if key not in by_name]
+        if missing:
+            index = attraction_suggest.get_index()
+            for name, city in missing:
+                matches = index.suggest(name, city=city, limit=1)
+                if matches:
+                    fuzzy_ids[(name, city)] = matches[0]['id']
+                else:
+                    logger.warning("未找到对应景点: %s - %s", city, name)
+            extra_ids = set(fuzzy_ids.values()) - set(by_id)
+            if extra_ids:
+                by_id.update({attr.id: attr for attr in Attraction.query.filter(Attraction.id.in_(extra_ids)).all()})
+        
+        resolved = []
+        for attr_id, name, city in selections:
+            attr = by_id.get(attr_id) or by_name.get((name, city)) or by_id.get(fuzzy_ids.get((name, city)))
+            if attr:
+                resolved.append(attr)
+        return resolved
+    
+    def generate_closed_loop_path(self, start_city, days, preferences, target_city=None, selected_attractions=None, time_budget_ms=None):
         """生成旅行路径，结构：
         - 当起点城市和目标城市相同时：起点城市 → 目标城市景点 → 起点城市（闭环）
         - 当起点城市和目标城市不同时：起点城市 → 目标城市景点（单向路径）
+        
+        time_budget_ms 为遗传算法搜索的时间预算（毫秒），不含查询景点和生成行程的时间；
+        搜索的代数和适应度在结果的 search 中返回
         """
-        print(f"开始生成路径，起点城市: {start_city}, 目标城市: {target_city}, 天数: {days}, selected_attractions: {len(selected_attractions) if selected_attractions else 0}")
+        logger.debug("开始生成路径，起点城市: %s, 目标城市: %s, 天数: %s, selected_attractions: %s", start_city, target_city, days, len(selected_attractions) if selected_attractions else 0)
         
         # 目标城市默认为起点城市（纯闭环）
         if not target_city:
             target_city = start_city
-            print(f"目标城市未指定，使用起点城市: {target_city}")
+            logger.debug("目标城市未指定，使用起点城市: %s", target_city)
         
         try:
             # 获取起点城市的景点（用于起点和终点）
             start_city_query = start_city + "市" if "市" not in start_city else start_city
-            print(f"查询起点城市景点，查询条件: {start_city_query}")
+            logger.debug("查询起点城市景点，查询条件: %s", start_city_query)
             start_attractions = Attraction.query.filter(Attraction.city == start_city_query).limit(5).all()
-            print(f"找到起点城市景点数量: {len(start_attractions)}")
+            logger.debug("找到起点城市景点数量: %s", len(start_attractions))
             
             # 验证起点城市景点
             valid_start_attractions = []
@@ -799,58 +945,33 @@ class PathOptimizationService:
                 if hasattr(attr, 'id'):
                     valid_start_attractions.append(attr)
                 else:
-                    print(f"警告：起点城市景点中包含非景点对象: {type(attr)}")
+                    sampled_logger.warning("起点城市景点中包含非景点对象: %s", type(attr))
             start_attractions = valid_start_attractions
             
             if not start_attractions:
-                print("没有找到起点城市的景点，使用第一个景点作为起点和终点")
+                logger.warning("没有找到起点城市的景点，使用第一个景点作为起点和终点")
                 first_attr = Attraction.query.first()
                 if first_attr and hasattr(first_attr, 'id'):
                     start_attractions = [first_attr]
                 else:
-                    print("没有找到任何景点，无法生成路径")
+                    logger.warning("没有找到任何景点，无法生成路径")
                     return {'itinerary': [{"day": 1, "attractions": [], "weather": None, "adjusted": False}], 'budget': {}}
             
             if not start_attractions:
-                print("没有找到任何景点，无法生成路径")
+                logger.warning("没有找到任何景点，无法生成路径")
                 return {'itinerary': [{"day": 1, "attractions": [], "weather": None, "adjusted": False}], 'budget': {}}
             
             # 1. 优先使用用户选择的景点
             suitable_attractions = []
             if selected_attractions and len(selected_attractions) > 0:
-                print(f"使用用户选择的景点，数量: {len(selected_attractions)}")
-                # 从用户选择的景点中获取景点名称和城市，然后从数据库中查询对应的景点对象
-                for selected_attr in selected_attractions:
-                    attr_name = selected_attr.get('name')
-                    attr_city = selected_attr.get('city')
-                    if attr_name and attr_city:
-                        # 查询对应的景点对象，移除城市名称中的"市"后缀，确保与数据库中的格式一致
-                        attr_city_query = attr_city.replace("市", "")
-                        # 先尝试精确匹配
-                        attr = Attraction.query.filter(
-                            Attraction.name == attr_name,
-                            Attraction.city == attr_city_query
-                        ).first()
-                        if attr:
-                            suitable_attractions.append(attr)
-                        else:
-                            # 如果精确匹配失败，尝试模糊匹配景点名称
-                            print(f"尝试精确匹配未找到对应景点: {attr_city} - {attr_name}")
-                            attr = Attraction.query.filter(
-                                Attraction.name.like(f"%{attr_name}%"),
-                                Attraction.city == attr_city_query
-                            ).first()
-                            if attr:
-                                suitable_attractions.append(attr)
-                                print(f"模糊匹配找到对应景点: {attr.city} - {attr.name}")
-                            else:
-                                print(f"模糊匹配也未找到对应景点: {attr_city} - {attr_name}")
-                print(f"从用户选择的景点中找到数据库对象数量: {len(suitable_attractions)}")
+                logger.debug("使用用户选择的景点，数量: %s", len(selected_attractions))
+                suitable_attractions = self._resolve_selected_attractions(selected_attractions)
+                logger.debug("从用户选择的景点中找到数据库对象数量: %s", len(suitable_attractions))
             else:
                 # 2. 如果没有用户选择的景点，根据偏好筛选目标城市的景点
-                print(f"开始筛选目标城市景点，目标城市: {target_city}")
+                logger.debug("开始筛选目标城市景点，目标城市: %s", target_city)
                 suitable_attractions = self._filter_attractions(preferences, start_city, target_city)
-                print(f"根据偏好筛选后景点数量: {len(suitable_attractions)}")
+                logger.debug("根据偏好筛选后景点数量: %s", len(suitable_attractions))
             
             # 验证适合的景点
             valid_suitable_attractions = []
@@ -858,12 +979,12 @@ class PathOptimizationService:
                 if hasattr(attr, 'id'):
                     valid_suitable_attractions.append(attr)
                 else:
-                    print(f"警告：适合的景点中包含非景点对象: {type(attr)}")
+                    sampled_logger.warning("适合的景点中包含非景点对象: %s", type(attr))
             suitable_attractions = valid_suitable_attractions
             
             # 如果没有符合条件的景点，返回空行程
             if not suitable_attractions:
-                print("没有找到符合条件的景点，返回空行程")
+                logger.warning("没有找到符合条件的景点，返回空行程")
                 return {'itinerary': [{"day": 1, "attractions": [], "weather": None, "adjusted": False}], 'budget': {}}
             
             # 确保景点列表不重复
@@ -875,51 +996,51 @@ class PathOptimizationService:
                     seen.add(attr_key)
                     unique_attractions.append(attr)
             suitable_attractions = unique_attractions
-            print(f"去重后景点数量: {len(suitable_attractions)}")
+            logger.debug("去重后景点数量: %s", len(suitable_attractions))
             
             # 如果使用用户选择的景点，不再额外添加其他景点
             if selected_attractions and len(selected_attractions) > 0:
                 # 如果用户选择的景点数量不足，重复使用现有景点，而不是添加新景点
                 if len(suitable_attractions) < 2:
-                    print(f"用户选择的景点数量不足2个，重复使用现有景点，当前数量: {len(suitable_attractions)}")
+                    logger.debug("用户选择的景点数量不足2个，重复使用现有景点，当前数量: %s", len(suitable_attractions))
                     suitable_attractions = suitable_attractions * 2
-                    print(f"重复后景点数量: {len(suitable_attractions)}")
+                    logger.debug("重复后景点数量: %s", len(suitable_attractions))
                 
                 # 确保景点数量至少等于旅行天数，这样每天至少有一个景点
                 if len(suitable_attractions) < days:
-                    print(f"用户选择的景点数量({len(suitable_attractions)})小于旅行天数({days})，重复使用现有景点")
+                    logger.debug("用户选择的景点数量(%s)小于旅行天数(%s)，重复使用现有景点", len(suitable_attractions), days)
                     # 重复景点直到数量至少等于旅行天数
                     while len(suitable_attractions) < days:
                         suitable_attractions.extend(suitable_attractions)
                     # 限制最大数量，避免过多重复
                     suitable_attractions = suitable_attractions[:days * 2]
-                    print(f"重复后景点数量: {len(suitable_attractions)}")
+                    logger.debug("重复后景点数量: %s", len(suitable_attractions))
             else:
                 # 限制景点数量，提高性能
                 suitable_attractions = suitable_attractions[:50]  # 最多使用50个景点
-                print(f"限制景点数量后: {len(suitable_attractions)}")
+                logger.debug("限制景点数量后: %s", len(suitable_attractions))
             
             # 确保suitable_attractions不为空
             if not suitable_attractions:
                 # 如果没有任何景点，返回空行程
-                print("没有找到任何景点，无法生成路径")
+                logger.warning("没有找到任何景点，无法生成路径")
                 return {'itinerary': [{"day": 1, "attractions": [], "weather": None, "adjusted": False}], 'budget': {}}
             
             # 确保suitable_attractions至少有2个元素
             if len(suitable_attractions) < 2:
                 # 如果只有1个景点，复制一份
-                print(f"景点数量不足2个，复制景点，当前数量: {len(suitable_attractions)}")
+                logger.debug("景点数量不足2个，复制景点，当前数量: %s", len(suitable_attractions))
                 suitable_attractions = suitable_attractions * 2
-                print(f"复制后景点数量: {len(suitable_attractions)}")
+                logger.debug("复制后景点数量: %s", len(suitable_attractions))
             
             # 2. 构建初始种群，包含跨城市的完整路径结构
-            print("开始构建初始种群")
+            logger.debug("开始构建初始种群")
             initial_population = []
             population_size = 20
             
             # 过滤掉可能包含的None值
             valid_attractions = [attr for attr in suitable_attractions if attr is not None and hasattr(attr, 'id')]
-            print(f"有效景点数量: {len(valid_attractions)}")
+            logger.debug("有效景点数量: %s", len(valid_attractions))
             
             for _ in range(population_size):
                 # 生成随机路径长度（目标城市景点数量）
@@ -940,12 +1061,12 @@ class PathOptimizationService:
                 # 构建路径：目标城市景点（遗传算法优化后，行程生成时会自动添加起点和终点）
                 path = selected_target_attrs
                 initial_population.append(path)
-            print(f"初始种群构建完成，种群大小: {len(initial_population)}")
+            logger.debug("初始种群构建完成，种群大小: %s", len(initial_population))
             
             # 3. 遗传算法优化，传递目标城市参数
-            print("开始遗传算法优化")
-            optimized_path = self._genetic_algorithm(initial_population, days, target_city=target_city)
-            print(f"遗传算法优化完成，优化后路径长度: {len(optimized_path)}")
+            logger.debug("开始遗传算法优化")
+            optimized_path = self._genetic_algorithm(initial_population, days, target_city=target_city, time_budget_ms=time_budget_ms)
+            logger.debug("遗传算法优化完成，优化后路径长度: %s", len(optimized_path))
             
             # 确保optimized_path中的所有元素都是景点对象
             validated_path = []
@@ -953,26 +1074,26 @@ class PathOptimizationService:
                 if hasattr(item, 'id'):  # 检查是否为景点对象
                     validated_path.append(item)
                 else:
-                    print(f"警告：跳过非景点对象: {type(item)}, 内容: {item}")
+                    sampled_logger.warning("跳过非景点对象: %s, 内容: %s", type(item), item)
             optimized_path = validated_path
-            print(f"验证后路径长度: {len(optimized_path)}")
+            logger.debug("验证后路径长度: %s", len(optimized_path))
             
             # 如果遗传算法返回空列表，直接使用suitable_attractions中的景点构建路径
             if not optimized_path:
-                print("遗传算法返回空路径，使用随机景点构建路径")
+                logger.debug("遗传算法返回空路径，使用随机景点构建路径")
                 # 随机选择3-7个景点
                 path_length = random.randint(3, min(7, len(suitable_attractions)))
                 optimized_path = random.sample(suitable_attractions, path_length)
-                print(f"随机构建路径长度: {len(optimized_path)}")
+                logger.debug("随机构建路径长度: %s", len(optimized_path))
             
             # 4. 构建最终路径
-            print("开始构建最终路径")
+            logger.debug("开始构建最终路径")
             final_path = []
             
             # 根据起点城市和目标城市是否相同，构建不同类型的路径
             if start_city == target_city:
                 # 当起点城市和目标城市相同时，构建闭环路径
-                print("构建闭环路径")
+                logger.debug("构建闭环路径")
                 
                 # 确保路径有足够的景点
                 if optimized_path:
@@ -984,16 +1105,16 @@ class PathOptimizationService:
                     final_path = [random_attr, random_attr]
             else:
                 # 当起点城市和目标城市不同时，构建单向路径
-                print("构建单向路径")
+                logger.debug("构建单向路径")
                 
                 # 使用城市中心点作为起点位置，而不是具体景点
                 start_attr = self._create_city_center_attraction(start_city)
-                print(f"使用{start_city}的中心点作为起点")
+                logger.debug("使用%s的中心点作为起点", start_city)
                 
                 # 路径：城市中心点 → 目标城市景点
                 final_path = [start_attr] + optimized_path
             
-            print(f"最终路径构建完成，路径长度: {len(final_path)}")
+            logger.debug("最终路径构建完成，路径长度: %s", len(final_path))
             
             # 确保最终路径中的所有元素都是景点对象
             valid_final_path = []
@@ -1001,70 +1122,67 @@ class PathOptimizationService:
                 if hasattr(item, 'id'):  # 检查是否为景点对象
                     valid_final_path.append(item)
                 else:
-                    print(f"警告：最终路径中包含非景点对象: {type(item)}")
+                    sampled_logger.warning("最终路径中包含非景点对象: %s", type(item))
             final_path = valid_final_path
-            print(f"验证后最终路径长度: {len(final_path)}")
+            logger.debug("验证后最终路径长度: %s", len(final_path))
             
             # 确保最终路径长度至少为 2
             if len(final_path) < 2:
-                print("最终路径长度不足，添加额外景点")
+                logger.debug("最终路径长度不足，添加额外景点")
                 # 从合适的景点中随机选择一个添加到路径中
                 random_attr = random.choice(suitable_attractions)
                 final_path.append(random_attr)
-                print(f"添加额外景点后，最终路径长度: {len(final_path)}")
+                logger.debug("添加额外景点后，最终路径长度: %s", len(final_path))
             
             # 5. 生成详细行程安排，包含从起点城市到目标城市的完整闭环路径
-            print("开始生成详细行程安排")
+            logger.debug("开始生成详细行程安排")
             itinerary = self._generate_itinerary(final_path, days, start_city, target_city, selected_attractions)
-            print(f"行程安排生成完成，天数: {len(itinerary)}")
+            logger.debug("行程安排生成完成，天数: %s", len(itinerary))
             
             # 6. 自动获取未来天气预报并进行天气敏感型路径优化
             # 如果使用用户选择的景点，跳过天气优化，避免添加新景点
             if self.weather_service and not selected_attractions:
                 try:
                     # 获取未来天气预测
-                    print(f"开始获取未来天气预报，城市: {target_city}, 天数: {days}")
+                    logger.debug("开始获取未来天气预报，城市: %s, 天数: %s", target_city, days)
                     weather_forecast = self.weather_service.get_future_weather_forecast(
                         days=days,
                         city=target_city
                     )
-                    print(f"获取天气预报完成，预报天数: {len(weather_forecast)}")
+                    logger.debug("获取天气预报完成，预报天数: %s", len(weather_forecast))
                     
                     if weather_forecast:
                         # 根据天气预测优化路径
-                        print("开始根据天气预测优化路径")
+                        logger.debug("开始根据天气预测优化路径")
                         itinerary = self.optimize_path_for_weather(itinerary, weather_forecast)
-                        print(f"成功根据天气预测优化路径，共优化{len(itinerary)}天行程")
+                        logger.debug("成功根据天气预测优化路径，共优化%s天行程", len(itinerary))
                 except Exception as e:
-                    print(f"天气优化失败: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("天气优化失败: %s", e)
             
             # 添加酒店和餐饮推荐
-            print("开始添加酒店和餐饮推荐")
+            logger.debug("开始添加酒店和餐饮推荐")
             itinerary_with_accommodation_dining = self._add_accommodation_dining_recommendations(
                 itinerary, target_city
             )
-            print(f"酒店和餐饮推荐添加完成")
+            logger.debug("酒店和餐饮推荐添加完成")
             
             # 计算旅行费用预算
-            print("开始计算旅行费用预算")
+            logger.debug("开始计算旅行费用预算")
             budget = self.calculate_travel_budget(
                 target_city, days, preferences, start_city
             )
-            print(f"旅行费用预算计算完成: {budget}")
+            logger.debug("旅行费用预算计算完成: %s", budget)
             
-            print("路径生成完成")
+            logger.debug("路径生成完成")
             return {
                 'itinerary': itinerary_with_accommodation_dining,
                 'budget': budget,
                 'start_city': start_city,
-                'target_city': target_city
+                'target_city': target_city,
+                'search': self.last_search
             }
         except Exception as e:
-            print(f"路径生成失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("路径生成失败: %s", e)
             return {
                 'itinerary': [{"day": 1, "attractions": [], "weather": None, "adjusted": False}],
                 'budget': {}
@@ -1196,9 +1314,7 @@ class PathOptimizationService:
                 optimized_itinerary.append(new_day_plan)
             except Exception as e:
                 # 如果当天的天气调整失败，使用原始行程
-                print(f"第{day+1}天天气调整失败: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("第%s天天气调整失败: %s", day+1, e)
                 optimized_itinerary.append(day_plan.copy())
         
         return optimized_itinerary
@@ -1267,7 +1383,7 @@ class PathOptimizationService:
     def _add_accommodation_dining_recommendations(self, itinerary, target_city):
         """为行程添加酒店和餐饮推荐"""
         if not self.accommodation_dining_service:
-            print("住宿餐饮服务未初始化，无法添加推荐")
+            logger.warning("住宿餐饮服务未初始化，无法添加推荐")
             return itinerary
         
         # 为每天行程添加推荐
@@ -1345,7 +1461,7 @@ class PathOptimizationService:
     def calculate_travel_budget(self, city, days, preferences, start_city=None):
         """计算旅行费用预算"""
         if not self.accommodation_dining_service:
-            print("住宿餐饮服务未初始化，无法计算预算")
+            logger.warning("住宿餐饮服务未初始化，无法计算预算")
             return {}
         
         # 默认预算参数
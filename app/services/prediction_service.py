@@ -1,15 +1,44 @@
+import logging
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 from datetime import datetime, timedelta
-import joblib
 import os
 import hashlib
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from abc import ABC, abstractmethod
+from app.utils import log_setup, metrics, single_flight
+
+logger = logging.getLogger(__name__)
+
+
+# 预派生部署时（见 app/utils/prefork.py），从磁盘加载的模型在进程内共享：fork 前加载一次，各工作进程共享同一份内存。
+# 键为模型文件路径，值为 (修改时间, 模型)，模型文件被重新训练覆盖后按修改时间失效。
+# 全部模型约占 1.7GB，单进程部署时预测结果已有 forecast_cache 缓存，不常驻模型，默认不共享
+_loaded_models = {}
+_loaded_models_lock = threading.Lock()
+_share_loaded_models = False
+
+
+def share_loaded_models(enabled=True):
+    """开启或关闭进程内共享已加载的模型，关闭时释放已缓存的模型"""
+    global _share_loaded_models
+    with _loaded_models_lock:
+        _share_loaded_models = enabled
+        if not enabled:
+            _loaded_models.clear()
+
+
+def _predictions_key(service, weather_df, days=7):
+    """predict_all_cities 的合并键：模型目录、天气数据对象和预测天数"""
+    return (str(service.model_dir), id(weather_df), days)
+
+
+def _copy_predictions(predictions):
+    return {city: frame.copy() for city, frame in predictions.items()}
 
 
 class WeatherPredictionInterface(ABC):
@@ -108,27 +137,42 @@ class WeatherPredictionService(WeatherPredictionInterface):
         return f"{city_name}_{target_var}_model.joblib"
     
     def _load_model(self, city_name, target_var):
-        """加载缓存的模型"""
+        """加载缓存的模型，共享模型时同一模型文件在进程内只加载一次"""
+        import joblib
         model_path = self.model_dir / self._generate_model_id(city_name, target_var)
-        if model_path.exists():
-            try:
-                return joblib.load(model_path)
-            except Exception as e:
-                print(f"加载模型失败 {model_path}: {e}")
-        return None
+        try:
+            mtime = model_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        key = str(model_path)
+        with _loaded_models_lock:
+            cached = _loaded_models.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            model = joblib.load(model_path)
+        except Exception as e:
+            logger.error("加载模型失败 %s: %s", model_path, e)
+            return None
+        with _loaded_models_lock:
+            if _share_loaded_models:
+                _loaded_models[key] = (mtime, model)
+        return model
     
     def _save_model(self, model, city_name, target_var):
         """保存模型到缓存"""
+        import joblib
         model_path = self.model_dir / self._generate_model_id(city_name, target_var)
         try:
             joblib.dump(model, model_path)
             return True
         except Exception as e:
-            print(f"保存模型失败 {model_path}: {e}")
+            logger.error("保存模型失败 %s: %s", model_path, e)
             return False
     
     def _prepare_features(self, df):
         """准备模型特征"""
+        from sklearn.preprocessing import LabelEncoder
         if df.empty:
             return df, {}
         
@@ -163,7 +207,19 @@ class WeatherPredictionService(WeatherPredictionInterface):
         return df, encoders
     
     def train_model(self, df, city_name, target_var, test_size=0.2, random_state=42):
-        """训练单个城市的天气预测模型"""
+        """训练单个城市的天气预测模型，同一模型文件的并发训练只执行一次，其余调用共享训练结果"""
+        model_path = self.model_dir / self._generate_model_id(city_name, target_var)
+        model, mae, rmse = single_flight.group('train_model').do(
+            str(model_path), self._train_model, df, city_name, target_var, test_size, random_state
+        )
+        if model is not None:
+            self.models[(city_name, target_var)] = model
+        return model, mae, rmse
+    
+    def _train_model(self, df, city_name, target_var, test_size, random_state):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_absolute_error, mean_squared_error
         if df.empty:
             return None, 0, 0
         
@@ -192,8 +248,10 @@ class WeatherPredictionService(WeatherPredictionInterface):
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
         
         # 训练模型
-        model = RandomForestRegressor(n_estimators=100, random_state=random_state)
-        model.fit(X_train, y_train)
+        with metrics.span("weather_train"):
+            model = RandomForestRegressor(n_estimators=100, random_state=random_state)
+            model.fit(X_train, y_train)
+        metrics.inc('app_model_trainings_total', model='weather')
         
         # 评估模型
         y_pred = model.predict(X_test)
@@ -207,59 +265,72 @@ class WeatherPredictionService(WeatherPredictionInterface):
         return model, mae, rmse
     
     def train_all_models(self, weather_df):
-        """为所有城市训练预测模型"""
+        """为所有城市训练预测模型，相同数据的并发训练只执行一次，其余调用共享训练结果"""
+        results = single_flight.group('train_all_models').do(
+            (str(self.model_dir), id(weather_df)), self._train_all_models, weather_df
+        )
+        # 共享结果的调用也把模型放入当前实例
+        for city, city_results in results.items():
+            for target_var, result in city_results.items():
+                if result.get('model') is not None:
+                    self.models[(city, target_var)] = result['model']
+        return results
+    
+    def _train_all_models(self, weather_df):
         if weather_df.empty or '城市' not in weather_df.columns:
             return {}
         
         results = {}
         cities = weather_df['城市'].unique()
         
-        for city in cities:
-            city_df = weather_df[weather_df['城市'] == city].copy()
-            city_results = {}
-            
-            for target_var in self.target_vars:
-                if target_var in city_df.columns:
-                    model, mae, rmse = self.train_model(city_df, city, target_var)
-                    city_results[target_var] = {'model': model, 'mae': mae, 'rmse': rmse}
-            
-            results[city] = city_results
+        with log_setup.timed(logger, "训练所有城市的天气预测模型", cities=len(cities)):
+            for city in cities:
+                city_df = weather_df[weather_df['城市'] == city].copy()
+                city_results = {}
+                
+                for target_var in self.target_vars:
+                    if target_var in city_df.columns:
+                        model, mae, rmse = self.train_model(city_df, city, target_var)
+                        city_results[target_var] = {'model': model, 'mae': mae, 'rmse': rmse}
+                
+                results[city] = city_results
         
         return results
     
+    @metrics.instrument("predict_future")
     def predict_future(self, weather_df, city_name, days=7):
         """预测未来几天的天气"""
-        print(f"=== 开始预测天气: 城市={city_name}, 天数={days} ===")
-        print(f"天气数据行数: {len(weather_df)}")
-        print(f"城市列中的唯一值: {weather_df['城市'].unique()[:5]}...")
+        logger.debug("=== 开始预测天气: 城市=%s, 天数=%s ===", city_name, days)
+        logger.debug("天气数据行数: %s", len(weather_df))
+        logger.debug("城市列中的唯一值: %s...", weather_df['城市'].unique()[:5])
         
         if weather_df.empty:
-            print("天气数据为空，返回空DataFrame")
+            logger.debug("天气数据为空，返回空DataFrame")
             return pd.DataFrame()
         
         # 处理城市名称，确保与数据格式匹配
         # 数据中的城市名称可能带有"市"后缀，所以我们需要尝试两种格式
         city_df = weather_df[weather_df['城市'] == city_name].copy()
-        print(f"使用城市名称'{city_name}'查找数据，找到{len(city_df)}行")
+        logger.debug("使用城市名称'%s'查找数据，找到%s行", city_name, len(city_df))
         
         has_city_suffix = city_name.endswith('市')
         
         if city_df.empty and not has_city_suffix:
             # 如果没有找到，尝试添加"市"后缀
             city_df = weather_df[weather_df['城市'] == city_name + '市'].copy()
-            print(f"使用城市名称'{city_name}市'查找数据，找到{len(city_df)}行")
+            logger.debug("使用城市名称'%s市'查找数据，找到%s行", city_name, len(city_df))
         
         if city_df.empty:
-            print(f"没有找到城市'{city_name}'的数据，返回空DataFrame")
+            logger.warning("没有找到城市'%s'的数据，返回空DataFrame", city_name)
             return pd.DataFrame()
         
         # 从明天开始预测，而不是从历史数据的最后日期
         tomorrow = datetime.now().date() + timedelta(days=1)
-        print(f"预测起始日期: {tomorrow}")
+        logger.debug("预测起始日期: %s", tomorrow)
         
         # 生成未来日期
         future_dates = [tomorrow + timedelta(days=i) for i in range(days)]
-        print(f"生成的未来日期: {future_dates}")
+        logger.debug("生成的未来日期: %s", future_dates)
         
         # 为未来日期创建特征
         future_features = []
@@ -280,7 +351,7 @@ class WeatherPredictionService(WeatherPredictionInterface):
             future_features.append(feature)
         
         future_df = pd.DataFrame(future_features)
-        print(f"未来特征数据行数: {len(future_df)}")
+        logger.debug("未来特征数据行数: %s", len(future_df))
         
         # 加载城市的原始数据，用于获取分类特征的众数（原始值）
         original_city_df = weather_df[weather_df['城市'] == city_df['城市'].iloc[0]].copy()
@@ -292,7 +363,7 @@ class WeatherPredictionService(WeatherPredictionInterface):
                 # 使用原始数据的众数（未编码的原始值）
                 mode_val = original_city_df[col].mode()[0]
                 future_df[col] = mode_val
-                print(f"填充分类特征 '{col}' 使用原始众数值: {mode_val}")
+                logger.debug("填充分类特征 '%s' 使用原始众数值: %s", col, mode_val)
         
         # 加载所有目标变量的模型，如果尚未加载
         for target_var in self.target_vars:
@@ -311,9 +382,9 @@ class WeatherPredictionService(WeatherPredictionInterface):
                 model = self._load_model(model_city_name, target_var)
                 if model:
                     self.models[model_key] = model
-                    print(f"从文件加载模型: {model_key}")
+                    logger.debug("从文件加载模型: %s", model_key)
             else:
-                print(f"模型已在内存中: {model_key}")
+                logger.debug("模型已在内存中: %s", model_key)
         
         # 准备特征：只处理数值特征，分类特征使用原始数据的编码器
         future_df_with_features = future_df.copy()
@@ -332,12 +403,12 @@ class WeatherPredictionService(WeatherPredictionInterface):
                 future_df_with_features[col] = future_df_with_features[col].apply(lambda x: x if x in le.classes_ else city_df[col].mode()[0])
                 # 使用历史编码器进行转换
                 future_df_with_features[col] = le.transform(future_df_with_features[col].astype(str))
-                print(f"使用历史编码器编码特征 '{col}'")
+                logger.debug("使用历史编码器编码特征 '%s'", col)
         
-        print(f"编码后的未来特征数据列: {list(future_df_with_features.columns)}")
+        logger.debug("编码后的未来特征数据列: %s", list(future_df_with_features.columns))
         
         # 打印当前模型列表
-        print(f"当前模型列表: {list(self.models.keys())[:10]}...")
+        logger.debug("当前模型列表: %s...", list(self.models.keys())[:10])
         
         # 预测每个目标变量
         for target_var in self.target_vars:
@@ -347,24 +418,24 @@ class WeatherPredictionService(WeatherPredictionInterface):
                 model_city_name = city_name + '市'
             
             model_key = (model_city_name, target_var)
-            print(f"尝试模型键: {model_key}")
+            logger.debug("尝试模型键: %s", model_key)
             
             if model_key in self.models:
-                print(f"找到模型: {model_key}")
+                logger.debug("找到模型: %s", model_key)
                 model = self.models[model_key]
                 # 选择特征列
                 feature_cols = ['月份', '季节', '年份', '星期', '日']
                 feature_cols += [col for col in categorical_cols if col in future_df_with_features.columns]
-                print(f"使用特征列: {feature_cols}")
+                logger.debug("使用特征列: %s", feature_cols)
                 
                 X_future = future_df_with_features[feature_cols]
-                print(f"特征数据形状: {X_future.shape}")
+                logger.debug("特征数据形状: %s", X_future.shape)
                 future_df[target_var] = model.predict(X_future)
-                print(f"预测完成: {target_var}")
+                logger.debug("预测完成: %s", target_var)
             else:
-                print(f"未找到模型: {model_key}")
+                logger.debug("未找到模型: %s", model_key)
                 # 如果没有找到模型，尝试训练模型
-                print(f"尝试训练模型: {model_key}")
+                logger.debug("尝试训练模型: %s", model_key)
                 self.train_model(city_df, model_city_name, target_var)
                 if model_key in self.models:
                     model = self.models[model_key]
@@ -372,15 +443,15 @@ class WeatherPredictionService(WeatherPredictionInterface):
                     feature_cols += [col for col in categorical_cols if col in future_df_with_features.columns]
                     X_future = future_df_with_features[feature_cols]
                     future_df[target_var] = model.predict(X_future)
-                    print(f"训练并预测完成: {target_var}")
+                    logger.debug("训练并预测完成: %s", target_var)
                 else:
                     # 如果仍然没有模型，设置默认值
                     future_df[target_var] = 15.0  # 默认温度
-                    print(f"使用默认值: {target_var} = 15.0")
+                    logger.warning("使用默认值: %s = 15.0", target_var)
         
-        print(f"预测结果列: {list(future_df.columns)}")
-        print(f"预测结果行数: {len(future_df)}")
-        print("=== 天气预测完成 ===")
+        logger.debug("预测结果列: %s", list(future_df.columns))
+        logger.debug("预测结果行数: %s", len(future_df))
+        logger.debug("=== 天气预测完成 ===")
         
         # 计算旅游评分
         if '最高气温' in future_df.columns and '最低气温' in future_df.columns:
@@ -483,21 +554,26 @@ class WeatherPredictionService(WeatherPredictionInterface):
             total_score = max(0, min(100, total_score))  # 确保评分在0-100之间
             return round(total_score, 2)
         except Exception as e:
-            print(f"计算旅游评分时出错: {e}")
+            logger.error("计算旅游评分时出错: %s", e)
             return 0
     
+    @single_flight.coalesce('predict_all_cities', key=_predictions_key, copy=_copy_predictions)
     def predict_all_cities(self, weather_df, days=7):
-        """预测所有城市的未来天气"""
+        """预测所有城市的未来天气，相同数据和天数的并发预测只执行一次，其余调用得到结果的副本"""
+        return self._predict_all_cities(weather_df, days)
+    
+    def _predict_all_cities(self, weather_df, days):
         if weather_df.empty or '城市' not in weather_df.columns:
             return {}
         
         predictions = {}
         cities = weather_df['城市'].unique()
         
-        for city in cities:
-            city_prediction = self.predict_future(weather_df, city, days)
-            if not city_prediction.empty:
-                predictions[city] = city_prediction
+        with log_setup.timed(logger, "预测所有城市的未来天气", cities=len(cities), days=days):
+            for city in cities:
+                city_prediction = self.predict_future(weather_df, city, days)
+                if not city_prediction.empty:
+                    predictions[city] = city_prediction
         
         return predictions
     
@@ -510,6 +586,109 @@ class WeatherPredictionService(WeatherPredictionInterface):
 
 
 
+# 进程池在所有服务实例之间共享，避免每个请求都重新启动子进程
+_process_pool = {
+    "executor": None,
+    "max_workers": None,
+}
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(max_workers=None):
+    """获取共享的进程池，首次调用时创建"""
+    with _process_pool_lock:
+        executor = _process_pool["executor"]
+        if executor is None or _process_pool["max_workers"] != max_workers:
+            if executor is not None:
+                executor.shutdown(wait=False)
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            _process_pool["executor"] = executor
+            _process_pool["max_workers"] = max_workers
+        return executor
+
+
+def _reset_process_pool():
+    """关闭共享进程池（进程池损坏或程序退出时调用）"""
+    with _process_pool_lock:
+        executor = _process_pool["executor"]
+        _process_pool["executor"] = None
+        _process_pool["max_workers"] = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_reset_process_pool)
+
+
+def _train_city_shard(data_dir, city, city_df):
+    """在子进程中训练单个城市的全部目标变量模型
+
+    模型由子进程直接保存到模型目录，只把评估指标返回给主进程，
+    避免在进程间传输随机森林模型。
+    """
+    service = WeatherPredictionService(data_dir)
+    city_results = {}
+    for target_var in service.target_vars:
+        if target_var in city_df.columns:
+            _, mae, rmse = service.train_model(city_df, city, target_var)
+            city_results[target_var] = {'mae': mae, 'rmse': rmse}
+    return city, city_results
+
+
+class ProcessPoolWeatherPredictionService(WeatherPredictionService):
+    """基于本地进程池的天气预测服务实现
+
+    训练按城市分片，提交到本机进程池并行执行，可以利用多核CPU，
+    且不需要Spark所依赖的JVM和Hive环境。
+    预测仍在当前进程内完成：单个城市的预测只需几毫秒，分发到子进程时每次都要传输城市数据、
+    在子进程中重新从磁盘加载模型，比在当前进程内预测更慢；各子进程常驻模型又会成倍占用内存。
+    """
+    
+    def __init__(self, data_dir, max_workers=None):
+        """初始化进程池预测服务
+        
+        Args:
+            data_dir: 数据目录路径
+            max_workers: 进程池大小，None时使用CPU核数
+        """
+        super().__init__(data_dir)
+        self.max_workers = max_workers
+    
+    def _run_sharded(self, func, shards):
+        """将按城市划分的任务提交到进程池，返回 {城市: 结果}
+        
+        进程池不可用时回退到当前进程内顺序执行。
+        """
+        try:
+            executor = _get_process_pool(self.max_workers)
+            futures = [executor.submit(func, str(self.data_dir), *shard) for shard in shards]
+            return dict(future.result() for future in futures)
+        except (BrokenProcessPool, OSError) as e:
+            logger.error("进程池执行失败: %s，回退到当前进程执行", e)
+            _reset_process_pool()
+            return dict(func(str(self.data_dir), *shard) for shard in shards)
+    
+    def _train_all_models(self, weather_df):
+        """按城市分片，在进程池中并行训练所有城市的预测模型"""
+        if weather_df.empty or '城市' not in weather_df.columns:
+            return {}
+        
+        shards = [(city, city_df.copy()) for city, city_df in weather_df.groupby('城市', sort=False)]
+        shard_results = self._run_sharded(_train_city_shard, shards)
+        
+        # 子进程已将模型保存到磁盘，加载到当前进程供后续预测使用
+        results = {}
+        for city, city_results in shard_results.items():
+            for target_var, target_metrics in city_results.items():
+                model = self._load_model(city, target_var)
+                if model is not None:
+                    self.models[(city, target_var)] = model
+                target_metrics['model'] = model
+            results[city] = city_results
+        
+        return results
+
+
 class SparkWeatherPredictionService(WeatherPredictionInterface):
     """基于Spark的天气预测服务实现"""
     
@@ -527,7 +706,7 @@ class SparkWeatherPredictionService(WeatherPredictionInterface):
             .config("spark.sql.catalogImplementation", "hive") \
             .getOrCreate()
         
-        print("Spark天气预测服务初始化完成")
+        logger.debug("Spark天气预测服务初始化完成")
     
     def train_all_models(self, weather_df):
         """使用Spark为所有城市训练预测模型"""
@@ -596,6 +775,7 @@ class SparkWeatherPredictionService(WeatherPredictionInterface):
         
         return results
     
+    @metrics.instrument("predict_future")
     def predict_future(self, weather_df, city_name, days=7):
         """使用Spark预测指定城市未来几天的天气"""
         from pyspark.sql import functions as F
@@ -646,7 +826,7 @@ class SparkWeatherPredictionService(WeatherPredictionInterface):
                 # 将预测结果添加到未来数据中
                 future_df[target_var] = predictions_pd['prediction']
             except Exception as e:
-                print(f"加载或使用Spark模型失败: {e}")
+                logger.error("加载或使用Spark模型失败: %s", e)
                 # 如果模型加载失败，使用默认值
                 future_df[target_var] = 0
         
@@ -724,7 +904,7 @@ class WeatherPredictionServiceFactory:
         """创建天气预测服务实例
         
         Args:
-            service_type: 服务类型，"sklearn"或"spark"，None时从配置文件获取
+            service_type: 服务类型，"sklearn"、"process"或"spark"，None时从配置文件获取
             data_dir: 数据目录
             
         Returns:
@@ -736,7 +916,7 @@ class WeatherPredictionServiceFactory:
         # 如果没有指定服务类型，从配置文件获取
         if service_type is None:
             service_type = Config.PREDICTION_SERVICE_TYPE
-            print(f"从配置文件获取预测服务类型: {service_type}")
+            logger.debug("从配置文件获取预测服务类型: %s", service_type)
         
         # 检查操作系统
         is_windows = platform.system() == "Windows"
@@ -744,17 +924,19 @@ class WeatherPredictionServiceFactory:
         if service_type == "spark":
             if is_windows:
                 # 在Windows系统上，PySpark可能会遇到兼容性问题，回退到使用Scikit-learn
-                print("Windows系统上Spark可能遇到兼容性问题，回退使用Scikit-learn实现")
+                logger.warning("Windows系统上Spark可能遇到兼容性问题，回退使用Scikit-learn实现")
                 return WeatherPredictionService(data_dir)
             else:
                 try:
                     return SparkWeatherPredictionService(data_dir)
                 except Exception as e:
                     # 如果Spark初始化失败，回退到使用Scikit-learn
-                    print(f"Spark初始化失败: {e}，回退使用Scikit-learn实现")
+                    logger.error("Spark初始化失败: %s，回退使用Scikit-learn实现", e)
                     return WeatherPredictionService(data_dir)
         elif service_type == "sklearn":
             return WeatherPredictionService(data_dir)
+        elif service_type == "process":
+            return ProcessPoolWeatherPredictionService(data_dir, max_workers=Config.PREDICTION_WORKERS)
         else:
             raise ValueError(f"不支持的预测服务类型: {service_type}")
         
@@ -764,26 +946,29 @@ class WeatherPredictionServiceFactory:
     
     def _load_model(self, city_name, target_var):
         """加载缓存的模型"""
+        import joblib
         model_path = self.model_dir / self._generate_model_id(city_name, target_var)
         if model_path.exists():
             try:
                 return joblib.load(model_path)
             except Exception as e:
-                print(f"加载模型失败 {model_path}: {e}")
+                logger.error("加载模型失败 %s: %s", model_path, e)
         return None
     
     def _save_model(self, model, city_name, target_var):
         """保存模型到缓存"""
+        import joblib
         model_path = self.model_dir / self._generate_model_id(city_name, target_var)
         try:
             joblib.dump(model, model_path)
             return True
         except Exception as e:
-            print(f"保存模型失败 {model_path}: {e}")
+            logger.error("保存模型失败 %s: %s", model_path, e)
             return False
     
     def _prepare_features(self, df):
         """准备模型特征"""
+        from sklearn.preprocessing import LabelEncoder
         if df.empty:
             return df, {}
         
@@ -820,6 +1005,9 @@ class WeatherPredictionServiceFactory:
     
     def train_model(self, df, city_name, target_var, test_size=0.2, random_state=42):
         """训练单个城市的天气预测模型"""
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_absolute_error, mean_squared_error
         if df.empty:
             return None, 0, 0
         
@@ -851,8 +1039,10 @@ class WeatherPredictionServiceFactory:
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
         
         # 训练模型
-        model = RandomForestRegressor(n_estimators=100, random_state=random_state)
-        model.fit(X_train, y_train)
+        with metrics.span("weather_train"):
+            model = RandomForestRegressor(n_estimators=100, random_state=random_state)
+            model.fit(X_train, y_train)
+        metrics.inc('app_model_trainings_total', model='weather')
         
         # 评估模型
         y_pred = model.predict(X_test)
@@ -1,11 +1,32 @@
+import logging
 import pandas as pd
 import os
+import random
+import threading
+import zlib
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from app.utils import recommendation_store
+from app.utils import search_index
+from app.utils import log_setup, metrics, single_flight
+
+logger = logging.getLogger(__name__)
+# 逐个景点计算推荐分数时的日志按调用位置采样输出
+sampled_logger = log_setup.sampled(logger)
+
+# 清洗后的景点数据在进程内共享，只读使用（各方法筛选前先 copy），
+# 不再每个服务实例各持一份；预派生部署时在 fork 前加载，各工作进程共享同一份内存
+_catalog_lock = threading.Lock()
+_catalog = {
+    "key": None,           # search_index.catalog_key()，景点数据文件变化后重新加载
+    "frame": None,
+}
 
 class RecommendationService:
     """旅游推荐服务类"""
     
+    @metrics.instrument("init.RecommendationService")
     def __init__(self, data_dir):
         """初始化推荐服务"""
         self.data_dir = Path(data_dir)
@@ -32,14 +53,24 @@ class RecommendationService:
         }
         
         # 加载景点数据 - 现在weather_sensitivity_categories已经定义，可以安全调用
-        self.attractions_df = self._load_attractions_data()
+        self.attractions_df = self._get_shared_attractions_data()
+    
+    def _get_shared_attractions_data(self):
+        """获取进程内共享的景点数据，景点数据文件未变化时不重新加载"""
+        key = search_index.catalog_key(self.data_dir)
+        with _catalog_lock:
+            if _catalog["key"] == key:
+                return _catalog["frame"]
+            frame = self._load_attractions_data()
+            _catalog.update(key=key, frame=frame)
+            return frame
     
     def _load_attractions_data(self):
         """加载辽宁省景点数据，从data/poi目录下的所有城市文件中加载"""
-        # 设置固定随机种子，确保每次加载数据时生成的随机数相同，保证推荐结果的一致性
-        import random
+        # 使用固定种子的私有随机数生成器，确保每次加载数据时生成的随机数相同，保证推荐结果的一致性；
+        # 不重置全局随机数，避免影响其他模块和线程
         import re
-        random.seed(42)
+        rng = random.Random(42)
         
         # 使用传入的data_dir参数，而不是硬编码的路径
         poi_dir = self.data_dir / "poi"
@@ -66,7 +97,7 @@ class RecommendationService:
                     df_city['城市'] = city_name
                 df_list.append(df_city)
             except Exception as e:
-                print(f"警告：加载文件 {file_path} 失败: {e}")
+                logger.warning("加载文件 %s 失败: %s", file_path, e)
                 continue
         
         if not df_list:
@@ -111,9 +142,9 @@ class RecommendationService:
                 if price == '免费':
                     # 为了演示付费景点筛选功能，我们将30%的景点标记为付费
                     # 每3个景点中有1个付费景点，价格随机生成
-                    if random.random() < 0.3:
+                    if rng.random() < 0.3:
                         # 随机生成10-100元的门票价格，并保留整数
-                        return round(random.uniform(10, 100))
+                        return round(rng.uniform(10, 100))
                     return 0.0
                 # 提取数字
                 match = re.search(r'\d+(\.\d+)?', price)
@@ -132,11 +163,10 @@ class RecommendationService:
         # 统计门票价格分布
         free_count = (df['门票价格'] == 0).sum()
         paid_count = (df['门票价格'] > 0).sum()
-        print(f"门票价格统计：免费景点 {free_count} 个，付费景点 {paid_count} 个")
+        logger.debug("门票价格统计：免费景点 %s 个，付费景点 %s 个", free_count, paid_count)
         
         # 显示前10个景点的门票价格，用于调试
-        print("\n前10个景点的门票价格：")
-        print(df[['城市', '景点名称', '门票价格']].head(10))
+        logger.debug("前10个景点的门票价格：\n%s", df[['城市', '景点名称', '门票价格']].head(10))
         
         # 处理最佳季节字段（如果需要）
         # 这里可以根据景点类型自动设置最佳季节
@@ -206,17 +236,17 @@ class RecommendationService:
             
             # 安全检查：确保 weather_df 是 DataFrame
             if not isinstance(weather_df, pd.DataFrame):
-                print(f"weather_df 不是 DataFrame，而是 {type(weather_df)}")
+                logger.debug("weather_df 不是 DataFrame，而是 %s", type(weather_df))
                 return pd.DataFrame()
             
             # 安全检查：确保 seasons 不是 DataFrame
             if isinstance(seasons, pd.DataFrame):
-                print(f"seasons 是 DataFrame，将其设置为 None")
+                logger.debug("seasons 是 DataFrame，将其设置为 None")
                 seasons = None
             
             # 安全检查：确保 attraction_types 不是 DataFrame
             if isinstance(attraction_types, pd.DataFrame):
-                print(f"attraction_types 是 DataFrame，将其设置为 []")
+                logger.debug("attraction_types 是 DataFrame，将其设置为 []")
                 attraction_types = []
             
             # 获取推荐日期的季节，不依赖天气数据
@@ -227,16 +257,16 @@ class RecommendationService:
                     season = self.season_mapping.get(recommend_date.month, None)
                 except (ValueError, TypeError, AttributeError) as e:
                     # 使用当前月份作为默认季节
-                    print(f"日期解析出错: {e}")
+                    logger.error("日期解析出错: %s", e)
                     season = self.season_mapping.get(datetime.now().month, None)
             else:
                 # 没有提供日期或日期是DataFrame，使用当前月份的季节
-                print(f"日期是 DataFrame 或为空: {date}")
+                logger.debug("日期是 DataFrame 或为空: %s", date)
                 season = self.season_mapping.get(datetime.now().month, None)
             
             # 筛选城市
             if self.attractions_df.empty:
-                print("attractions_df 为空")
+                logger.debug("attractions_df 为空")
                 return pd.DataFrame()
             filtered_attractions = self.attractions_df.copy()
             has_city_filter = False
@@ -467,7 +497,7 @@ class RecommendationService:
                         try:
                             # 安全检查：确保 weather_df 中包含 '城市' 列
                             if '城市' not in weather_df.columns:
-                                print("weather_df 中没有 '城市' 列")
+                                logger.debug("weather_df 中没有 '城市' 列")
                             else:
                                 city_weather = weather_df[weather_df['城市'] == city]
                                 if not city_weather.empty:
@@ -507,10 +537,10 @@ class RecommendationService:
                                                     weather_score_multiplier = 1.2
                                                     weather_condition = 'good'
                                             except Exception as e:
-                                                print(f"获取天气状况出错: {e}")
+                                                sampled_logger.error("获取天气状况出错: %s", e)
                         except (KeyError, ValueError, AttributeError) as e:
                             # 如果没有旅游评分列或计算出错，尝试从天气状况判断
-                            print(f"天气评分计算出错: {e}")
+                            sampled_logger.error("天气评分计算出错: %s", e)
                     
                     # 根据天气敏感度调整分数
                     weather_sensitivity = row.get('天气敏感度', '中敏感度')
@@ -545,12 +575,12 @@ class RecommendationService:
                     
                     return score
                 except Exception as e:
-                    print(f"计算推荐分数出错: {e}")
+                    sampled_logger.error("计算推荐分数出错: %s", e)
                     return 0.0
             
             # 检查 filtered_attractions 是否为空
             if filtered_attractions.empty:
-                print("filtered_attractions 为空")
+                logger.debug("filtered_attractions 为空")
                 return pd.DataFrame()
             
             # 计算每个景点的推荐分数
@@ -575,7 +605,8 @@ class RecommendationService:
                 # 实际项目中可以使用数据库或缓存来跟踪景点的推荐频率
                 attraction_name = row.get('景点名称', '')
                 date_int = int(date_str.replace('-', '')) if isinstance(date_str, str) else 0
-                name_hash = hash(attraction_name) % 10
+                # 使用crc32而不是hash()，保证不同进程（包括预计算任务）得到相同的结果
+                name_hash = zlib.crc32(str(attraction_name).encode('utf-8')) % 10
                 
                 # 基于哈希值和日期计算一个"出现概率"，确保不同日期推荐不同景点
                 if (date_int + name_hash) % 3 == 0:
@@ -596,11 +627,58 @@ class RecommendationService:
             
             return recommendations
         except Exception as e:
-            print(f"推荐景点出错: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("推荐景点出错: %s", e)
             return pd.DataFrame()
     
+    def get_daily_recommendations(self, weather_df, city, date, top_n=3):
+        """获取某城市某天的推荐景点，优先读取预计算结果，没有时实时计算
+        
+        Returns:
+            list: 推荐景点记录列表
+        """
+        date_str = date if isinstance(date, str) else date.strftime('%Y-%m-%d')
+        records = recommendation_store.get_recommendations(self.data_dir, city, date_str, top_n)
+        if records is not None:
+            return records
+        
+        recommendations = self.recommend_by_weather(weather_df, city=city, date=date_str, top_n=top_n)
+        return recommendations.to_dict('records')
+    
+    def precompute_daily_recommendations(self, weather_df, days=7, top_n=3, cities=None, start_date=None):
+        """预计算各城市未来几天每天的推荐景点
+        
+        Args:
+            weather_df: 天气数据
+            days: 预计算天数
+            top_n: 每天推荐的景点数量
+            cities: 城市列表，None时使用天气数据中的所有城市
+            start_date: 起始日期，None时从明天开始（与天气预测的起点一致）
+            
+        Returns:
+            DataFrame: 推荐结果，每行一个推荐景点，附加推荐城市、推荐日期和推荐排名列
+        """
+        if cities is None:
+            cities = sorted(weather_df['城市'].unique()) if '城市' in weather_df.columns else []
+        if start_date is None:
+            start_date = datetime.now().date() + timedelta(days=1)
+        
+        frames = []
+        for city in cities:
+            for i in range(days):
+                date_str = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
+                recommendations = self.recommend_by_weather(weather_df, city=city, date=date_str, top_n=top_n)
+                if recommendations.empty:
+                    continue
+                recommendations = recommendations.reset_index(drop=True)
+                recommendations[recommendation_store.CITY_COLUMN] = city
+                recommendations[recommendation_store.DATE_COLUMN] = date_str
+                recommendations[recommendation_store.RANK_COLUMN] = range(1, len(recommendations) + 1)
+                frames.append(recommendations)
+        
+        if not frames:
+            return pd.DataFrame(columns=recommendation_store.KEY_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+    
     def recommend_by_season(self, season, city=None, top_n=5, min_rating=0, max_price=None, is_free=None):
         """基于季节推荐景点"""
         if season not in ['春季', '夏季', '秋季', '冬季']:
@@ -698,7 +776,7 @@ class RecommendationService:
         name_condition = filtered_attractions['景点名称'].str.contains('|'.join(target_types), case=False, na=False)
         filtered_attractions = filtered_attractions[type_condition | name_condition]
         
-        print(f"推荐服务类型匹配: attraction_type={attraction_type}, target_types={target_types}, city={city}, 匹配景点数量={len(filtered_attractions)}")
+        logger.debug("推荐服务类型匹配: attraction_type=%s, target_types=%s, city=%s, 匹配景点数量=%s", attraction_type, target_types, city, len(filtered_attractions))
         
         # 应用额外筛选条件
         # 评分范围筛选
@@ -720,7 +798,7 @@ class RecommendationService:
         if seasons and len(seasons) > 0:
             filtered_attractions = filtered_attractions[filtered_attractions['最佳季节'].apply(lambda x: any(s in x for s in seasons))]
         
-        print(f"推荐服务最终筛选后景点数量: {len(filtered_attractions)}")
+        logger.debug("推荐服务最终筛选后景点数量: %s", len(filtered_attractions))
         
         # 如果没有景点数据，返回空DataFrame
         if filtered_attractions.empty:
@@ -758,7 +836,7 @@ class RecommendationService:
             recommendations = recommendations.copy()
             recommendations['简介截断'] = recommendations['简介'].apply(lambda x: x[:150] + '...' if len(x) > 150 else x)
         
-        print(f"推荐服务返回结果数量: {len(recommendations)}")
+        logger.debug("推荐服务返回结果数量: %s", len(recommendations))
         return recommendations
     
     def get_city_attractions(self, city, top_n=10):
@@ -774,24 +852,26 @@ class RecommendationService:
         """获取所有景点类型"""
         return sorted(self.attractions_df['景点类型'].unique())
     
+    def get_search_index(self):
+        """获取景点倒排索引，景点数据不变时在各服务实例之间复用"""
+        return search_index.get_index(self.data_dir, self.attractions_df)
+    
     def search_attractions(self, keyword, city=None, top_n=20):
-        """根据关键词搜索景点"""
-        filtered_attractions = self.attractions_df.copy()
-        
-        # 城市筛选
-        if city:
-            filtered_attractions = filtered_attractions[filtered_attractions['城市'] == city]
-        
-        # 关键词搜索，在景点名称和简介中搜索
-        if keyword:
-            keyword = keyword.lower()
-            filtered_attractions = filtered_attractions[
-                filtered_attractions['景点名称'].str.lower().str.contains(keyword) | 
-                filtered_attractions['简介'].str.lower().str.contains(keyword)
-            ]
-        
-        # 按评分排序
-        filtered_attractions = filtered_attractions.sort_values('评分', ascending=False).head(top_n)
+        """根据关键词搜索景点，结果按相关度和评分排序"""
+        if keyword and keyword.strip():
+            # 关键词搜索，在景点名称、类型和简介中检索，支持拼音首字母
+            index = self.get_search_index()
+            doc_ids = index.search(keyword, city=city, top_n=top_n)
+            filtered_attractions = index.df.iloc[doc_ids]
+        else:
+            filtered_attractions = self.attractions_df.copy()
+            
+            # 城市筛选
+            if city:
+                filtered_attractions = filtered_attractions[filtered_attractions['城市'] == city]
+            
+            # 按评分排序
+            filtered_attractions = filtered_attractions.sort_values('评分', ascending=False).head(top_n)
         
         # 添加简介截断字段，确保前端显示正常
         if not filtered_attractions.empty:
@@ -801,7 +881,14 @@ class RecommendationService:
         return filtered_attractions
     
     def calculate_city_travel_score(self, weather_df, date=None):
-        """计算各城市的平均旅游评分"""
+        """计算各城市的平均旅游评分，相同景点数据、天气数据和日期的并发计算只执行一次，其余调用得到结果的副本"""
+        # 景点数据和天气数据在进程内共享（见 _get_shared_attractions_data 和 data_loader），按对象区分
+        key = (id(self.attractions_df), id(weather_df), id(date) if isinstance(date, pd.DataFrame) else str(date))
+        return single_flight.group('city_travel_score').do(
+            key, self._calculate_city_travel_score, weather_df, date, copy=lambda scores: scores.copy()
+        )
+    
+    def _calculate_city_travel_score(self, weather_df, date):
         try:
             # 安全检查：确保 weather_df 是 DataFrame
             if not isinstance(weather_df, pd.DataFrame):
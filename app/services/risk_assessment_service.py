@@ -1,24 +1,26 @@
+import logging
 from app.utils.data_loader import load_all_city_data
+from app.utils import metrics
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class RiskAssessmentService:
     """出行风险决策服务
     
     结合天气数据和景点类型，构建旅游风险评估模型，对景点出行风险分级，并给出规避建议
     """
     
+    @metrics.instrument("init.RiskAssessmentService")
     def __init__(self, data_dir):
         """初始化服务
         
         Args:
             data_dir: 数据目录路径
         """
+        from sklearn.preprocessing import LabelEncoder
         self.data_dir = data_dir
         
         # 风险等级定义和描述
@@ -233,6 +235,9 @@ class RiskAssessmentService:
         
     def _train_risk_model(self):
         """训练风险评估机器学习模型"""
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score
         try:
             # 加载风险数据（假设存在风险数据集）
             risk_data_path = f"{self.data_dir}/risk/risk_assessment_data.csv"
@@ -265,20 +270,22 @@ class RiskAssessmentService:
             # 训练随机森林模型
             self.risk_model = RandomForestClassifier(n_estimators=100, random_state=42)
             self.risk_model.fit(X_train, y_train)
+            metrics.inc('app_model_trainings_total', model='risk')
             
             # 评估模型
             y_pred = self.risk_model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
-            print(f"风险评估模型训练完成，准确率: {accuracy:.2f}")
+            logger.debug("风险评估模型训练完成，准确率: %.2f", accuracy)
             
         except Exception as e:
-            print(f"训练风险评估模型失败: {str(e)}")
+            logger.error("训练风险评估模型失败: %s", e)
             # 如果训练失败，使用模拟数据训练模型
             self._train_with_synthetic_data()
     
     def _train_with_synthetic_data(self):
         """使用模拟数据训练风险评估模型"""
-        print("使用模拟数据训练风险评估模型")
+        from sklearn.ensemble import RandomForestClassifier
+        logger.debug("使用模拟数据训练风险评估模型")
         
         # 创建模拟数据
         # 使用当前时间作为随机种子，确保每次运行结果不同
@@ -340,8 +347,9 @@ class RiskAssessmentService:
         # 训练模型
         self.risk_model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.risk_model.fit(X, y_encoded)
+        metrics.inc('app_model_trainings_total', model='risk')
         
-        print("使用模拟数据训练完成")
+        logger.debug("使用模拟数据训练完成")
     
     def _predict_risk_ml(self, attraction_type, weather_forecast):
         """使用机器学习模型预测风险等级"""
@@ -380,7 +388,7 @@ class RiskAssessmentService:
             
             return prediction
         except Exception as e:
-            print(f"使用机器学习模型预测风险失败: {str(e)}")
+            logger.error("使用机器学习模型预测风险失败: %s", e)
             return None
         
     def assess_risk(self, attraction_type, weather_forecast):
@@ -1,8 +1,6 @@
 from app.utils.data_loader import load_all_city_data, load_attractions_data
+from app.utils import metrics
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
 from datetime import datetime, timedelta
 import os
 import logging
@@ -17,6 +15,7 @@ class TrafficPredictionService:
     基于历史天气数据和景点属性，构建客流量预测模型，支持节假日和极端天气下的客流量预测
     """
     
+    @metrics.instrument("init.TrafficPredictionService")
     def __init__(self, data_dir):
         """初始化服务
         
@@ -165,6 +164,7 @@ class TrafficPredictionService:
         Returns:
             tuple: (X_train, X_test, y_train, y_test) 训练和测试数据
         """
+        from sklearn.model_selection import train_test_split
         # 加载所有天气数据
         weather_df = load_all_city_data()
         
@@ -394,8 +394,11 @@ class TrafficPredictionService:
         Returns:
             model: 训练好的模型
         """
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        from sklearn.ensemble import RandomForestRegressor
+        with metrics.span("traffic_train"):
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            model.fit(X_train, y_train)
+        metrics.inc('app_model_trainings_total', model='traffic')
         return model
     
     def train_all_models(self):
@@ -404,6 +407,7 @@ class TrafficPredictionService:
         Returns:
             dict: 训练结果，包含每个景点的模型和评估指标
         """
+        from sklearn.metrics import mean_squared_error
         training_results = {}
         attraction_names = self.attractions_df['景点名称'].unique()
         logger.info(f"开始训练 {len(attraction_names)} 个景点的客流量预测模型")
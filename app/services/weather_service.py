@@ -1,11 +1,16 @@
+import logging
 import pandas as pd
 import os
 import requests
 from pathlib import Path
 from datetime import datetime, timedelta
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class WeatherService:
+    @metrics.instrument("init.WeatherService")
     def __init__(self, data_dir, city_name="沈阳"):
         """初始化天气服务
 
@@ -331,11 +336,11 @@ class WeatherService:
                     '风力(夜间)_数值': wind_level
                 })
             
-            print(f"成功获取{forecast_city}未来{days}天的天气预报")
+            logger.debug("成功获取%s未来%s天的天气预报", forecast_city, days)
             return weather_forecast
             
         except Exception as e:
-            print(f"获取天气预报失败: {str(e)}")
+            logger.error("获取天气预报失败: %s", e)
             # 如果API调用失败，返回模拟数据
             return self._generate_mock_weather_forecast(days, forecast_city)
     
@@ -0,0 +1,205 @@
+"""准入控制：限制 CPU 密集型接口的并发
+
+遗传算法路径优化、模型训练和 folium 地图生成都是受 GIL 限制的 CPU 密集计算，
+同时执行的越多，每个请求越慢，并且会拖慢 /query 等轻量页面。准入控制在请求开始前：
+
+1. 按 ADMISSION_ENDPOINTS 找到端点所属的资源池（path、map、prediction），未登记的端点不受限制
+2. 资源池同时执行的请求数不超过 limit，超出的请求排队等待，排队数不超过 queue，
+   等待超过 timeout 秒仍未轮到则放弃
+3. 排队的请求同样占用服务线程（render.yaml 中 waitress 为 8 个线程），因此所有资源池中执行和排队的请求总数
+   不超过 ADMISSION_MAX_HEAVY_REQUESTS，为轻量页面保留服务线程
+
+队列已满、等待超时或重计算请求总数达到上限时返回 503，带 Retry-After 头（ADMISSION_RETRY_AFTER 秒）。
+各资源池执行中和排队的请求数由 /metrics 输出（app_admission_active、app_admission_waiting），
+拒绝次数和排队耗时分别为 app_admission_rejected_total、app_admission_wait_seconds。
+
+后台任务（job_queue）不经过准入控制，由 JOB_WORKERS 限制并发。
+限制只在当前进程内生效，预派生部署中每个工作进程各自计数。
+"""
+import threading
+import time
+
+from app.utils import metrics
+
+# 拒绝原因
+BUSY = 'busy'  # 重计算请求总数达到上限
+QUEUE_FULL = 'queue_full'
+TIMEOUT = 'timeout'
+
+metrics.describe('app_admission_wait_seconds', 'histogram', "准入控制排队等待耗时（秒）")
+metrics.describe('app_admission_rejected_total', 'counter', "准入控制拒绝的请求数，按资源池和原因区分")
+
+
+class Pool:
+    """一个资源池：同时执行数上限、排队数上限和排队超时"""
+
+    def __init__(self, name, limit=1, queue=0, timeout=10):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            QUEUE_FULL: 0,
+            TIMEOUT: 0,
+        }
+
+    def acquire(self):
+        """获取执行许可，返回 None 表示获得许可，否则返回拒绝原因"""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                self._stats["admitted"] += 1
+                return None
+            if self.waiting >= self.queue:
+                self._stats[QUEUE_FULL] += 1
+                return QUEUE_FULL
+            self.waiting += 1
+            self._stats["queued"] += 1
+            deadline = time.monotonic() + self.timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats[TIMEOUT] += 1
+                        return TIMEOUT
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self._stats["admitted"] += 1
+            return None
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def get_stats(self):
+        with self._cond:
+            return dict(self._stats, active=self.active, waiting=self.waiting,
+                        limit=self.limit, queue=self.queue)
+
+
+class Admission:
+    """单个应用的准入控制"""
+
+    def __init__(self, pools, endpoints, max_heavy_requests=6, retry_after=5):
+        self.pools = {name: Pool(name, **options) for name, options in pools.items()}
+        self.endpoints = dict(endpoints)
+        self.max_heavy_requests = max_heavy_requests
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        # 所有资源池中执行和排队的请求数，即重计算请求占用的服务线程数
+        self.occupied = 0
+
+    def pool_for(self, endpoint):
+        name = self.endpoints.get(endpoint)
+        return self.pools.get(name) if name else None
+
+    def admit(self, pool):
+        """在资源池中获取执行许可，返回 None 表示获得许可，否则返回拒绝原因"""
+        with self._lock:
+            if self.occupied >= self.max_heavy_requests:
+                return BUSY
+            self.occupied += 1
+        started = time.perf_counter()
+        reason = pool.acquire()
+        if reason is not None:
+            self._leave()
+            return reason
+        metrics.observe('app_admission_wait_seconds', time.perf_counter() - started, pool=pool.name)
+        return None
+
+    def release(self, pool):
+        pool.release()
+        self._leave()
+
+    def _leave(self):
+        with self._lock:
+            self.occupied -= 1
+
+    def gauge_values(self, field):
+        return [({'pool': name}, getattr(pool, field)) for name, pool in sorted(self.pools.items())]
+
+    def get_stats(self):
+        with self._lock:
+            occupied = self.occupied
+        return {
+            "occupied": occupied,
+            "max_heavy_requests": self.max_heavy_requests,
+            "pools": {name: pool.get_stats() for name, pool in self.pools.items()},
+        }
+
+
+def _before_request():
+    from flask import current_app, g, request
+
+    admission = current_app.extensions['admission']
+    pool = admission.pool_for(request.endpoint)
+    if pool is None:
+        return None
+    reason = admission.admit(pool)
+    if reason is None:
+        g._admission_pool = pool
+        return None
+
+    metrics.inc('app_admission_rejected_total', pool=pool.name, reason=reason)
+    current_app.logger.warning("准入控制拒绝请求 %s %s：资源池 %s %s", request.method, request.path, pool.name, reason)
+    return _overloaded_response(admission.retry_after)
+
+
+def _teardown_request(exc=None):
+    from flask import current_app, g
+
+    pool = g.pop('_admission_pool', None)
+    if pool is not None:
+        current_app.extensions['admission'].release(pool)
+
+
+def _overloaded_response(retry_after):
+    """接口请求返回JSON，页面请求返回错误页，状态码均为503"""
+    from flask import jsonify, make_response, render_template, request
+
+    message = '服务器繁忙，请稍后重试'
+    if request.method != 'GET' or request.is_json or request.path.startswith('/api/'):
+        response = jsonify({'success': False, 'message': message})
+    else:
+        response = make_response(render_template('error.html', message=message,
+                                                 details=f'当前计算请求较多，请在 {retry_after} 秒后刷新页面'))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def init_app(app):
+    """为应用创建准入控制，ADMISSION_ENABLED 关闭时不限制"""
+    admission = Admission(
+        app.config.get('ADMISSION_POOLS', {}),
+        app.config.get('ADMISSION_ENDPOINTS', {}),
+        max_heavy_requests=app.config.get('ADMISSION_MAX_HEAVY_REQUESTS', 6),
+        retry_after=app.config.get('ADMISSION_RETRY_AFTER', 5),
+    )
+    app.extensions['admission'] = admission
+    if not app.config.get('ADMISSION_ENABLED', True):
+        return admission
+
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    metrics.register_gauge('app_admission_active', "准入控制各资源池执行中的请求数",
+                           lambda: admission.gauge_values('active'))
+    metrics.register_gauge('app_admission_waiting', "准入控制各资源池排队中的请求数",
+                           lambda: admission.gauge_values('waiting'))
+    return admission
+
+
+def get_admission(app=None):
+    """获取应用的准入控制，默认为当前应用"""
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+    return app.extensions['admission']
@@ -0,0 +1,214 @@
+"""景点数据批量导入
+
+从 data/poi/*_attractions.csv 导入景点到 attraction 表：
+- 使用 pandas 向量化清洗门票价格、评分、经纬度等字段
+- 以 (城市, 景点名称) 为自然键做 upsert：新景点插入，已存在的更新
+- 对每个景点的内容计算哈希，与数据库中现有内容的哈希比较，未变化的直接跳过
+- 插入和更新都按块使用 executemany 批量执行，整个导入在一个事务中完成
+
+重复执行不会产生重复数据，也不需要先清空景点表（原有景点ID保持不变，
+行程中引用的景点不受影响）。attraction 表在 (城市, 景点名称) 上有唯一索引（迁移 0009），
+两个导入同时执行时，后提交的一方插入已存在的景点会违反唯一约束，此时回滚并重新比较后重试，
+因此导入可以在应用运行期间执行。CSV 中已不存在的景点不会被删除。
+CSV 中的经纬度只是城市中心坐标，已有景点的坐标（由 fix_attraction_coords.py 分散处理过）
+保持不变，只在数据库中坐标为空时才写入。
+"""
+import logging
+import glob
+import hashlib
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Attraction
+
+logger = logging.getLogger(__name__)
+
+# CSV列名 -> Attraction字段
+COLUMN_MAPPING = {
+    '城市': 'city',
+    '景点名称': 'name',
+    '类型': 'type',
+    '最佳季节': 'best_season',
+    '评分': 'rating',
+    '门票价格': 'price',
+    '推荐游玩时长': 'duration',
+    '简介': 'description',
+    '经度': 'longitude',
+    '纬度': 'latitude',
+    '电话': 'phone',
+}
+
+TEXT_FIELDS = ['city', 'name', 'type', 'best_season', 'duration', 'description', 'phone']
+FLOAT_FIELDS = ['rating', 'price', 'longitude', 'latitude']
+CONTENT_FIELDS = TEXT_FIELDS + FLOAT_FIELDS
+
+# 已有景点保留数据库中的值，数据库为空时才使用CSV中的值
+PRESERVED_FIELDS = ['longitude', 'latitude']
+
+FREE_PRICE_VALUES = ['免费', 'Free', 'free']
+
+DEFAULT_CHUNK_SIZE = 500
+
+# 与并发导入冲突（违反唯一约束）时的最多尝试次数
+MAX_ATTEMPTS = 3
+
+
+def read_poi_files(poi_dir="data/poi"):
+    """读取POI目录下的所有景点CSV文件并合并"""
+    frames = []
+    for file_path in sorted(glob.glob(os.path.join(poi_dir, "*_attractions.csv"))):
+        try:
+            df = pd.read_csv(file_path, encoding="utf-8", on_bad_lines='skip', dtype=str)
+        except Exception as e:
+            logger.error("读取文件 %s 时出错: %s", os.path.basename(file_path), e)
+            continue
+        df.columns = df.columns.str.strip()
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=list(COLUMN_MAPPING))
+    return pd.concat(frames, ignore_index=True)
+
+
+def normalize_attractions(raw_df):
+    """向量化清洗景点数据，返回以 Attraction 字段名为列的 DataFrame
+
+    - 文本字段去除首尾空白，空值转为空字符串
+    - 门票价格"免费"转为0，无法解析的价格和评分转为0
+    - 经纬度无法解析时为空
+    - 缺少城市或名称的行被丢弃，同一城市的同名景点只保留第一条
+    """
+    df = raw_df.rename(columns=COLUMN_MAPPING)
+    for field in CONTENT_FIELDS:
+        if field not in df.columns:
+            df[field] = None
+    df = df[CONTENT_FIELDS].copy()
+
+    for field in TEXT_FIELDS:
+        df[field] = df[field].fillna('').astype(str).str.strip()
+
+    price = df['price'].astype(str).str.strip()
+    price = price.mask(price.isin(FREE_PRICE_VALUES), '0')
+    df['price'] = pd.to_numeric(price, errors='coerce').fillna(0.0).astype(float)
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce').fillna(0.0).astype(float)
+    for field in ['longitude', 'latitude']:
+        df[field] = pd.to_numeric(df[field], errors='coerce').astype(float)
+
+    df = df[(df['city'] != '') & (df['name'] != '')]
+    df = df.drop_duplicates(subset=['city', 'name'], keep='first')
+    return df.reset_index(drop=True)
+
+
+def content_hashes(df):
+    """计算每行景点内容的哈希，用于判断景点是否发生变化"""
+    if df.empty:
+        return pd.Series([], dtype=str, index=df.index)
+    parts = [df[field].fillna('').astype(str) for field in TEXT_FIELDS]
+    parts += [df[field].map(lambda v: '' if pd.isna(v) else repr(round(float(v), 6))) for field in FLOAT_FIELDS]
+    joined = parts[0].str.cat(parts[1:], sep='\x1f')
+    return joined.map(lambda text: hashlib.md5(text.encode('utf-8')).hexdigest())
+
+
+def _load_existing():
+    """读取数据库中现有景点，同一自然键有多条时使用ID最小的一条"""
+    table = Attraction.__table__
+    rows = db.session.execute(
+        select(table.c.id, *[table.c[field] for field in CONTENT_FIELDS]).order_by(table.c.id)
+    ).all()
+    existing = pd.DataFrame(rows, columns=['id'] + CONTENT_FIELDS)
+    if existing.empty:
+        return existing.assign(hash=pd.Series(dtype=str))
+
+    for field in TEXT_FIELDS:
+        existing[field] = existing[field].fillna('').astype(str)
+    for field in FLOAT_FIELDS:
+        existing[field] = pd.to_numeric(existing[field], errors='coerce').astype(float)
+    existing = existing.drop_duplicates(subset=['city', 'name'], keep='first')
+    existing['hash'] = content_hashes(existing)
+    return existing
+
+
+def _records(df, fields):
+    """DataFrame转为executemany参数列表，NaN转为None"""
+    df = df[fields].astype(object).where(df[fields].notna(), None)
+    return df.to_dict('records')
+
+
+def _chunks(records, chunk_size):
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+
+def upsert_attractions(df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按 (城市, 景点名称) upsert 景点数据，内容未变化的跳过
+
+    需要在应用上下文中调用，所有写入在一个事务中提交。
+    其他导入同时插入了相同景点时，回滚后重新读取现有景点再执行，最多尝试 MAX_ATTEMPTS 次。
+
+    Returns:
+        dict: inserted、updated、unchanged 数量
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return _upsert_once(df, chunk_size)
+        except IntegrityError as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            logger.warning("景点导入与其他导入冲突，重试（第%s次）: %s", attempt, e.orig)
+
+
+def _upsert_once(df, chunk_size):
+    existing = _load_existing()
+
+    existing = existing[['id', 'city', 'name', 'hash'] + PRESERVED_FIELDS].rename(
+        columns={field: f'{field}_existing' for field in ['hash'] + PRESERVED_FIELDS}
+    )
+    merged = df.merge(existing, on=['city', 'name'], how='left')
+    is_new = merged['id'].isna()
+    for field in PRESERVED_FIELDS:
+        merged[field] = merged[f'{field}_existing'].where(merged[f'{field}_existing'].notna(), merged[field])
+    merged['hash'] = content_hashes(merged)
+    is_changed = ~is_new & (merged['hash'] != merged['hash_existing'])
+
+    table = Attraction.__table__
+    try:
+        to_insert = _records(merged[is_new], CONTENT_FIELDS)
+        for chunk in _chunks(to_insert, chunk_size):
+            db.session.execute(insert(table), chunk)
+
+        changed = merged[is_changed].copy()
+        changed['id'] = changed['id'].astype(int)
+        changed['updated_at'] = datetime.utcnow()
+        to_update = _records(changed, ['id', 'updated_at'] + CONTENT_FIELDS)
+        # ORM按主键批量更新，同样以executemany方式执行
+        for chunk in _chunks(to_update, chunk_size):
+            db.session.execute(update(Attraction), chunk)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'inserted': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'unchanged': int(len(merged) - is_new.sum() - is_changed.sum()),
+    }
+
+
+def import_attractions(poi_dir="data/poi", chunk_size=DEFAULT_CHUNK_SIZE):
+    """读取、清洗并 upsert 所有景点数据（需要在应用上下文中调用）
+
+    Returns:
+        dict: inserted、updated、unchanged 数量和耗时（秒）
+    """
+    start_time = time.time()
+    df = normalize_attractions(read_poi_files(poi_dir))
+    stats = upsert_attractions(df, chunk_size=chunk_size)
+    stats['elapsed'] = round(time.time() - start_time, 3)
+    return stats
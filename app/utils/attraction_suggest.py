@@ -0,0 +1,161 @@
+"""数据库景点名称补全索引
+
+为路径规划中的景点选择提供输入补全：按城市为 Attraction.name 建立
+- 有序名称表（二分查找实现前缀查询，相当于前缀树）
+- 拼音首字母有序表（支持 "sygg" 补全 "沈阳故宫"）
+- 中文 bigram 倒排表（前缀匹配不足时补充名称中间位置的匹配）
+
+补全结果带景点ID，路径优化时可以按主键一次性查询选中的景点，
+不再为每个景点执行模糊 LIKE 查询。
+
+索引在第一次使用时从数据库构建，景点表的数量、最大ID或最近更新时间变化后自动重建。
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Attraction
+from app.utils.search_index import pinyin_initials
+
+_lock = threading.Lock()
+
+_cache = {
+    "version": None,
+    "index": None,
+}
+
+
+def _normalize_city(city):
+    """统一城市名称格式，去掉"市"后缀"""
+    return city.replace("市", "") if isinstance(city, str) else city
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class AttractionNameIndex:
+    """按城市组织的景点名称索引"""
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: (id, name, city, type, rating) 元组序列
+        """
+        self.entries = {}                                # 景点ID -> 景点信息
+        self.name_prefixes = defaultdict(list)           # 城市 -> [(小写名称, ID)]
+        self.initial_prefixes = defaultdict(list)        # 城市 -> [(拼音首字母, ID)]
+        self.bigrams = defaultdict(lambda: defaultdict(set))  # 城市 -> bigram -> {ID}
+
+        for attraction_id, name, city, attraction_type, rating in rows:
+            if not name:
+                continue
+            city = _normalize_city(city)
+            lowered = name.lower()
+            self.entries[attraction_id] = {
+                'id': attraction_id,
+                'name': name,
+                'city': city,
+                'type': attraction_type,
+                'rating': rating or 0.0,
+            }
+            self.name_prefixes[city].append((lowered, attraction_id))
+            initials = pinyin_initials(name)
+            if initials:
+                self.initial_prefixes[city].append((initials, attraction_id))
+            for gram in _bigrams(lowered):
+                self.bigrams[city][gram].add(attraction_id)
+
+        for sorted_pairs in list(self.name_prefixes.values()) + list(self.initial_prefixes.values()):
+            sorted_pairs.sort()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _cities(self, city):
+        if city:
+            return [_normalize_city(city)]
+        return list(self.name_prefixes)
+
+    @staticmethod
+    def _prefix_range(sorted_pairs, prefix):
+        start = bisect.bisect_left(sorted_pairs, (prefix,))
+        for key, attraction_id in sorted_pairs[start:]:
+            if not key.startswith(prefix):
+                break
+            yield attraction_id
+
+    def _rank(self, attraction_ids):
+        return sorted(attraction_ids, key=lambda i: (-self.entries[i]['rating'], self.entries[i]['name']))
+
+    def suggest(self, prefix, city=None, limit=10):
+        """景点名称补全
+
+        名称或拼音首字母以输入开头的景点排在前面，不足 limit 个时补充名称中包含输入的景点，
+        两组内部按评分排序。
+
+        Returns:
+            list: 景点信息字典列表，包含 id、name、city、type、rating
+        """
+        prefix = (prefix or "").strip().lower()
+        if not prefix or limit <= 0:
+            return []
+
+        prefix_ids = set()
+        for city_name in self._cities(city):
+            prefix_ids.update(self._prefix_range(self.name_prefixes.get(city_name, []), prefix))
+            if prefix.isascii() and prefix.isalnum():
+                prefix_ids.update(self._prefix_range(self.initial_prefixes.get(city_name, []), prefix))
+        ranked = self._rank(prefix_ids)
+
+        if len(ranked) < limit and len(prefix) >= 2:
+            grams = _bigrams(prefix)
+            infix_ids = set()
+            for city_name in self._cities(city):
+                city_bigrams = self.bigrams.get(city_name, {})
+                postings = [city_bigrams.get(gram, set()) for gram in grams]
+                if not postings:
+                    continue
+                candidates = set.intersection(*postings) - prefix_ids
+                infix_ids.update(i for i in candidates if prefix in self.entries[i]['name'].lower())
+            ranked.extend(self._rank(infix_ids))
+
+        return [dict(self.entries[i]) for i in ranked[:limit]]
+
+
+def _table_version():
+    """景点表版本：数量、最大ID和最近更新时间，任一变化都需要重建索引"""
+    return db.session.query(
+        func.count(Attraction.id), func.max(Attraction.id), func.max(Attraction.updated_at)
+    ).one()
+
+
+def get_index():
+    """获取景点名称索引，景点表变化后自动重建（需要在应用上下文中调用）"""
+    version = tuple(_table_version())
+    with _lock:
+        if _cache["version"] == version and _cache["index"] is not None:
+            return _cache["index"]
+
+    rows = db.session.query(
+        Attraction.id, Attraction.name, Attraction.city, Attraction.type, Attraction.rating
+    ).all()
+    index = AttractionNameIndex(rows)
+
+    with _lock:
+        _cache.update(version=version, index=index)
+    return index
+
+
+def suggest(prefix, city=None, limit=10):
+    """景点名称补全，见 AttractionNameIndex.suggest"""
+    return get_index().suggest(prefix, city=city, limit=limit)
+
+
+def clear():
+    """清空已构建的索引"""
+    with _lock:
+        _cache.update(version=None, index=None)
@@ -0,0 +1,211 @@
+"""审计记录异步写入队列（write-behind）
+
+登录记录等审计数据不在请求中同步提交，而是放入内存队列，由后台线程批量插入：
+- 每 AUDIT_FLUSH_INTERVAL_MS 毫秒或攒够 AUDIT_BATCH_SIZE 条记录写入一次，
+  每批按模型分组，每个模型一条 executemany INSERT、一次提交
+- 队列长度上限为 AUDIT_QUEUE_MAXSIZE，队列满时退回到在请求中同步写入，内存占用有界且不丢记录
+- 进程退出时（atexit）写完队列中剩余的记录
+
+记录的时间字段在入队时确定，不受批量写入延迟影响。
+后台线程在第一次入队时才启动，不记录审计数据的脚本不会多出线程。
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+_queues = []
+_queues_lock = threading.Lock()
+
+# 停止标记，后台线程取到后写完剩余记录并退出
+_STOP = object()
+
+
+class AuditQueue:
+    """单个应用的审计记录写入队列"""
+
+    def __init__(self, app, flush_interval_ms=200, batch_size=100, maxsize=10000):
+        self.app = app
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "sync_writes": 0,
+            "failed": 0,
+        }
+
+    def enqueue(self, model, **values):
+        """放入一条记录，队列满时在当前线程同步写入"""
+        if self._stopping.is_set():
+            self._write_sync(model, values)
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((model, values))
+            self._count("enqueued")
+        except queue.Full:
+            self._write_sync(model, values)
+
+    def flush(self, timeout=None):
+        """等待队列中已有的记录全部写入，返回是否在超时前完成"""
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=10):
+        """停止后台线程，停止前写完队列中剩余的记录"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                thread.join(timeout)
+            except queue.Full:
+                logger.error("审计队列停止超时，部分记录未写入")
+        # 停止过程中入队的记录直接同步写入
+        while not thread or not thread.is_alive():
+            try:
+                model, values = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._write_sync(model, values)
+            self._queue.task_done()
+
+    def get_stats(self):
+        """获取队列统计信息"""
+        with self._stats_lock:
+            return dict(self.stats, queued=self._queue.qsize())
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-queue", daemon=True)
+                self._thread.start()
+                with _queues_lock:
+                    _queues.append(self)
+
+    def _run(self):
+        draining = False
+        while True:
+            batch, stop_seen = self._collect_batch(block=not draining)
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + int(stop_seen)):
+                self._queue.task_done()
+            if draining and not batch:
+                return
+            draining = draining or stop_seen
+
+    def _collect_batch(self, block=True):
+        """取出一批记录：攒够 batch_size 条或距第一条记录超过 flush_interval 即返回
+
+        Returns:
+            tuple: (记录列表, 是否取到停止标记)
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if not block:
+                    # 停止时不再等待，只取出已在队列中的记录
+                    item = self._queue.get_nowait()
+                elif deadline is None:
+                    # 空闲时阻塞等待第一条记录
+                    item = self._queue.get()
+                    deadline = time.monotonic() + self.flush_interval
+                else:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, batch):
+        from app import db
+
+        rows_by_model = {}
+        for model, values in batch:
+            rows_by_model.setdefault(model, []).append(values)
+        try:
+            with self.app.app_context():
+                for model, rows in rows_by_model.items():
+                    db.session.execute(insert(model), rows)
+                db.session.commit()
+            self._count("written", len(batch))
+            self._count("batches")
+        except Exception as e:
+            self._count("failed", len(batch))
+            logger.error(f"审计记录批量写入失败，丢弃 {len(batch)} 条记录: {e}")
+
+    def _write_sync(self, model, values):
+        from app import db
+
+        try:
+            with self.app.app_context():
+                db.session.execute(insert(model), [values])
+                db.session.commit()
+            self._count("sync_writes")
+        except Exception as e:
+            self._count("failed")
+            logger.error(f"审计记录写入失败: {e}")
+
+
+def init_app(app):
+    """为应用创建审计写入队列"""
+    audit_queue = AuditQueue(
+        app,
+        flush_interval_ms=app.config.get('AUDIT_FLUSH_INTERVAL_MS', 200),
+        batch_size=app.config.get('AUDIT_BATCH_SIZE', 100),
+        maxsize=app.config.get('AUDIT_QUEUE_MAXSIZE', 10000),
+    )
+    app.extensions['audit_queue'] = audit_queue
+    return audit_queue
+
+
+def get_queue(app=None):
+    """获取应用的审计写入队列，默认为当前应用"""
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+    return app.extensions['audit_queue']
+
+
+def record(model, **values):
+    """在当前应用的审计队列中记录一条数据"""
+    get_queue().enqueue(model, **values)
+
+
+@atexit.register
+def shutdown(timeout=10):
+    """写完所有队列中剩余的记录（进程退出时自动执行）"""
+    with _queues_lock:
+        queues = list(_queues)
+    for audit_queue in queues:
+        audit_queue.stop(timeout)
@@ -1,7 +1,11 @@
+import logging
 import pandas as pd
 import os
 import re
 from datetime import datetime
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
 
 _cache = {
     "all_data": None,
@@ -253,6 +257,7 @@ def load_weather_data(city_name):
     
     return df
 
+@metrics.instrument("load_all_city_data")
 def load_all_city_data(data_dir="data", use_cache=True):
     if _cache["all_data"] is not None:
         return _cache["all_data"]
@@ -260,7 +265,7 @@ def load_all_city_data(data_dir="data", use_cache=True):
     # 优先从文件缓存加载数据
     cache_file = os.path.join(data_dir, "cache", "all_city_data.pkl")
     if use_cache and os.path.exists(cache_file):
-        print(f"从文件缓存加载数据: {cache_file}")
+        logger.debug("从文件缓存加载数据: %s", cache_file)
         try:
             import pickle
             with open(cache_file, 'rb') as f:
@@ -268,9 +273,9 @@ def load_all_city_data(data_dir="data", use_cache=True):
             _cache["all_data"] = df
             return df
         except Exception as e:
-            print(f"从文件缓存加载数据失败: {e}")
+            logger.error("从文件缓存加载数据失败: %s", e)
     
-    print("加载本地天气数据...")
+    logger.debug("加载本地天气数据...")
     all_data = []
     
     # 获取辽宁省所有城市名称
@@ -286,9 +291,9 @@ def load_all_city_data(data_dir="data", use_cache=True):
             city_df = load_weather_data(city)
             all_data.append(city_df)
         except FileNotFoundError:
-            print(f"⚠️ 无法加载 {city} 天气数据")
+            logger.warning("无法加载 %s 天气数据", city)
         except Exception as e:
-            print(f"⚠️ 加载 {city} 天气数据失败: {e}")
+            logger.error("加载 %s 天气数据失败: %s", city, e)
     
     if all_data:
         df = pd.concat(all_data, ignore_index=True)
@@ -395,7 +400,7 @@ def load_attractions_data(data_dir):
             
             all_attractions.append(df)
         except Exception as e:
-            print(f"加载景点数据文件失败 {file_path}: {e}")
+            logger.error("加载景点数据文件失败 %s: %s", file_path, e)
     
     if all_attractions:
         return pd.concat(all_attractions, ignore_index=True)
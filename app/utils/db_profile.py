@@ -0,0 +1,163 @@
+"""数据库连接配置（按数据库类型）
+
+根据 SQLALCHEMY_DATABASE_URI 识别数据库类型，生成对应的引擎参数并注册连接事件：
+
+- SQLite（文件数据库）：
+  - 每个连接设置 WAL 日志模式、synchronous=NORMAL、busy_timeout 和 mmap_size。
+  - WAL 模式下读连接互不阻塞，连接池即读连接池。
+  - 写事务在进程内通过写锁串行执行（单写者队列），
+    waitress 多线程并发登录、保存行程时不再因争抢数据库锁而报 "database is locked"。
+- SQLite（内存数据库）：不做任何修改。
+- MySQL 等其他数据库：设置连接池大小、溢出数、回收时间，并开启 pre-ping，
+  自动替换被服务端断开的连接。
+
+配置项见 Config 中的 DB_* 和 SQLITE_* 项；SQLALCHEMY_ENGINE_OPTIONS 中显式给出的参数优先。
+"""
+import re
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# 写语句：写事务从第一条写语句开始持有写锁，直到提交或回滚
+_WRITE_STATEMENT = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+# 连接上记录是否持有写锁的键（存放在连接池连接记录的 info 中）
+_WRITER_KEY = 'sqlite_writer_lock'
+
+_stats = {
+    "write_transactions": 0,
+    "lock_wait_timeouts": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def backend_name(uri):
+    """数据库类型，如 sqlite、mysql"""
+    return make_url(uri).get_backend_name()
+
+
+def is_sqlite_file(uri):
+    """是否为SQLite文件数据库（内存数据库返回False）"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """根据数据库类型生成 SQLALCHEMY_ENGINE_OPTIONS
+
+    Args:
+        config: Flask 配置（dict 或 Config 类）
+
+    Returns:
+        dict: 引擎参数，SQLALCHEMY_ENGINE_OPTIONS 中显式给出的参数覆盖默认值
+    """
+    get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+    uri = get('SQLALCHEMY_DATABASE_URI')
+    explicit = dict(get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    if backend_name(uri) == 'sqlite':
+        if not is_sqlite_file(uri):
+            return explicit
+        options = {
+            # 读连接池：WAL模式下读不阻塞写，连接可在线程间复用
+            'pool_size': get('DB_POOL_SIZE', 5),
+            'max_overflow': get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': get('DB_POOL_TIMEOUT', 30),
+            'connect_args': {
+                'check_same_thread': False,
+                # sqlite3 模块自身的锁等待时间（秒），与 busy_timeout 一致
+                'timeout': get('SQLITE_BUSY_TIMEOUT', 5000) / 1000,
+            },
+        }
+    else:
+        options = {
+            'pool_size': get('DB_POOL_SIZE', 5),
+            'max_overflow': get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': get('DB_POOL_TIMEOUT', 30),
+            # 小于MySQL默认的wait_timeout（8小时），避免使用被服务端关闭的连接
+            'pool_recycle': get('DB_POOL_RECYCLE', 3600),
+            'pool_pre_ping': True,
+        }
+    options.update(explicit)
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, config):
+    cursor = dbapi_connection.cursor()
+    try:
+        if config['wal']:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f"PRAGMA busy_timeout={int(config['busy_timeout'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(config['mmap_size'])}")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine, config):
+    """为引擎注册数据库类型对应的连接事件
+
+    对SQLite文件数据库设置PRAGMA并启用进程内写锁，其他数据库不需要额外处理。
+    同一引擎重复调用不会重复注册。
+
+    Args:
+        engine: SQLAlchemy 引擎
+        config: Flask 配置（dict 或 Config 类）
+    """
+    if not is_sqlite_file(str(engine.url)) or getattr(engine, '_db_profile_configured', False):
+        return
+    get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+    sqlite_config = {
+        'wal': get('SQLITE_WAL', True),
+        'busy_timeout': get('SQLITE_BUSY_TIMEOUT', 5000),
+        'mmap_size': get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    }
+    writer_lock = threading.Lock()
+    lock_timeout = sqlite_config['busy_timeout'] / 1000
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, sqlite_config)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _acquire_writer(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get(_WRITER_KEY) or not _WRITE_STATEMENT.match(statement):
+            return
+        if writer_lock.acquire(timeout=lock_timeout):
+            conn.info[_WRITER_KEY] = True
+            with _stats_lock:
+                _stats["write_transactions"] += 1
+        else:
+            # 等待超时后不再排队，由SQLite的busy_timeout继续等待数据库锁
+            with _stats_lock:
+                _stats["lock_wait_timeouts"] += 1
+
+    def _release_writer(info):
+        if info.pop(_WRITER_KEY, False):
+            writer_lock.release()
+
+    @event.listens_for(engine, 'commit')
+    def _on_commit(conn):
+        _release_writer(conn.info)
+
+    @event.listens_for(engine, 'rollback')
+    def _on_rollback(conn):
+        _release_writer(conn.info)
+
+    # 连接未提交就归还连接池或失效时同样释放写锁
+    @event.listens_for(engine.pool, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        _release_writer(connection_record.info)
+
+    @event.listens_for(engine.pool, 'invalidate')
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _release_writer(connection_record.info)
+
+    engine._db_profile_configured = True
+
+
+def get_stats():
+    """获取写锁统计信息"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,178 @@
+"""天气预测结果缓存
+
+同一城市、同一预测天数的预测结果在一天之内是确定的（预测起点固定为明天），
+因此预测页面、未来天气地图和所有城市预测页面可以共享同一份预测结果。
+
+缓存键为 (城市, 起始日期, 预测天数, 模型版本)：
+- 城市名称统一去掉"市"后缀，"沈阳"和"沈阳市"命中同一条缓存
+- 模型版本由模型目录中模型文件的名称和修改时间计算，重新训练后自动失效
+- 跨过本地时间午夜后整体失效
+- 当天第一次访问某个预测天数时，一次性预测并缓存全部城市（预热）
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+_lock = threading.RLock()
+
+_cache = {
+    "day": None,       # 缓存所属的本地日期
+    "frames": {},      # (城市, 起始日期, 天数, 模型版本) -> 预测结果DataFrame
+    "cities": {},      # (起始日期, 天数, 模型版本) -> 预热时得到的城市名称列表（原始格式）
+}
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "warmups": 0,
+}
+
+
+def _today():
+    """当前本地日期，单独封装便于测试"""
+    return datetime.now().date()
+
+
+def _normalize_city(city):
+    """统一城市名称格式，去掉"市"后缀"""
+    return city.replace("市", "") if isinstance(city, str) else city
+
+
+def _ensure_current_day():
+    """跨过午夜后清空缓存，返回当天日期"""
+    today = _today()
+    if _cache["day"] != today:
+        _cache["frames"].clear()
+        _cache["cities"].clear()
+        _cache["day"] = today
+    return today
+
+
+def get_model_version(prediction_service):
+    """根据预测服务类型和模型文件状态计算模型版本
+
+    模型文件被新增、删除或覆盖（重新训练）时版本号都会变化。
+    """
+    parts = [type(prediction_service).__name__]
+    model_dir = getattr(prediction_service, "model_dir", None)
+    if model_dir and os.path.isdir(model_dir):
+        entries = []
+        with os.scandir(model_dir) as it:
+            for entry in it:
+                try:
+                    entries.append(f"{entry.name}:{entry.stat().st_mtime_ns}")
+                except OSError:
+                    continue
+        parts.extend(sorted(entries))
+    return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def _lookup(city, start_date, days, version):
+    return _cache["frames"].get((_normalize_city(city), start_date, days, version))
+
+
+def _store(city, start_date, days, version, frame):
+    _cache["frames"][(_normalize_city(city), start_date, days, version)] = frame
+
+
+def _copy_for(frame, city):
+    """返回缓存结果的副本，城市列与调用方传入的名称保持一致"""
+    result = frame.copy()
+    if city is not None and "城市" in result.columns:
+        result["城市"] = city
+    return result
+
+
+def warm_up(prediction_service, weather_df, days=7):
+    """预测并缓存所有城市未来 days 天的天气
+
+    Returns:
+        dict: 以城市名为键，预测结果DataFrame为值的字典
+    """
+    predictions = prediction_service.predict_all_cities(weather_df, days)
+    # 预测过程中可能补训了缺失的模型，以预测完成后的模型版本存储
+    version = get_model_version(prediction_service)
+
+    with _lock:
+        start_date = _ensure_current_day() + timedelta(days=1)
+        cities = []
+        for city, frame in predictions.items():
+            if frame is None or frame.empty:
+                continue
+            _store(city, start_date, days, version, frame)
+            cities.append(city)
+        if cities:
+            _cache["cities"][(start_date, days, version)] = cities
+        _stats["warmups"] += 1
+
+    return predictions
+
+
+def get_city_forecast(prediction_service, weather_df, city, days=7):
+    """获取单个城市的预测结果，优先读取缓存
+
+    Returns:
+        DataFrame: 预测结果，未能预测时为空DataFrame
+    """
+    version = get_model_version(prediction_service)
+    with _lock:
+        start_date = _ensure_current_day() + timedelta(days=1)
+        frame = _lookup(city, start_date, days, version)
+        warmed = (start_date, days, version) in _cache["cities"]
+        if frame is not None:
+            _stats["hits"] += 1
+            return _copy_for(frame, city)
+        _stats["misses"] += 1
+
+    if not warmed:
+        warm_up(prediction_service, weather_df, days)
+        version = get_model_version(prediction_service)
+        with _lock:
+            frame = _lookup(city, _ensure_current_day() + timedelta(days=1), days, version)
+        if frame is not None:
+            return _copy_for(frame, city)
+
+    # 预热结果中没有该城市（例如名称格式不一致），单独预测
+    frame = prediction_service.predict_future(weather_df, city, days)
+    if frame is not None and not frame.empty:
+        version = get_model_version(prediction_service)
+        with _lock:
+            _store(city, _ensure_current_day() + timedelta(days=1), days, version, frame)
+        return _copy_for(frame, city)
+    return frame
+
+
+def get_all_forecasts(prediction_service, weather_df, days=7):
+    """获取所有城市的预测结果，优先读取缓存
+
+    Returns:
+        dict: 以城市名为键，预测结果DataFrame为值的字典
+    """
+    version = get_model_version(prediction_service)
+    with _lock:
+        start_date = _ensure_current_day() + timedelta(days=1)
+        cities = _cache["cities"].get((start_date, days, version))
+        if cities:
+            frames = {city: _lookup(city, start_date, days, version) for city in cities}
+            if all(frame is not None for frame in frames.values()):
+                _stats["hits"] += 1
+                return {city: frame.copy() for city, frame in frames.items()}
+        _stats["misses"] += 1
+
+    predictions = warm_up(prediction_service, weather_df, days)
+    return {city: frame.copy() for city, frame in predictions.items() if frame is not None and not frame.empty}
+
+
+def clear():
+    """清空预测缓存"""
+    with _lock:
+        _cache["frames"].clear()
+        _cache["cities"].clear()
+        _cache["day"] = None
+
+
+def get_stats():
+    """获取缓存统计信息"""
+    with _lock:
+        return dict(_stats, entries=len(_cache["frames"]))
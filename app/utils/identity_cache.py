@@ -0,0 +1,114 @@
+"""登录用户身份缓存
+
+Flask-Login 每个请求都调用 user_loader 加载当前用户。这里按登录ID（user_1、admin_1）
+缓存用户的只读快照，命中时不再查询数据库：
+- 快照与数据库会话无关（detached），跨请求、跨线程使用都是安全的，且不可修改
+- 每条缓存 IDENTITY_CACHE_TTL 秒后过期，最多缓存 MAX_ENTRIES 个用户，超出时淘汰最久未访问的
+- 激活、停用、删除用户以及修改个人资料、密码后调用 invalidate() 立即失效
+
+缓存在进程内；多进程部署时其他进程的缓存最迟在过期时间后更新。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.security import check_password_hash
+
+MAX_ENTRIES = 1024
+DEFAULT_TTL = 60
+
+_lock = threading.Lock()
+
+# 登录ID -> (过期时间, 快照)
+_cache = OrderedDict()
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "expired": 0,
+    "invalidations": 0,
+}
+
+_FIELDS = ('id', 'username', 'email', 'password_hash', 'nickname', 'avatar', 'created_at', 'is_active')
+
+
+class AccountSnapshot:
+    """用户或管理员的只读快照，提供 Flask-Login 需要的属性和方法"""
+
+    __slots__ = _FIELDS + ('_admin',)
+
+    def __init__(self, account):
+        for field in _FIELDS:
+            object.__setattr__(self, field, getattr(account, field))
+        object.__setattr__(self, '_admin', account.is_admin())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("用户快照不可修改，请通过 auth.current_account() 获取数据库记录后修改")
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return f"{'admin' if self._admin else 'user'}_{self.id}"
+
+    def is_admin(self):
+        return self._admin
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+    def __repr__(self):
+        return f"<{'Admin' if self._admin else 'User'} {self.username}>"
+
+
+def get(login_id, now=None):
+    """读取缓存的快照，未命中或已过期时返回None"""
+    now = time.monotonic() if now is None else now
+    with _lock:
+        entry = _cache.get(login_id)
+        if entry is not None:
+            expires_at, snapshot = entry
+            if expires_at > now:
+                _cache.move_to_end(login_id)
+                _stats["hits"] += 1
+                return snapshot
+            del _cache[login_id]
+            _stats["expired"] += 1
+        _stats["misses"] += 1
+        return None
+
+
+def put(login_id, account, ttl=DEFAULT_TTL, now=None):
+    """缓存用户或管理员的快照，返回快照"""
+    snapshot = AccountSnapshot(account)
+    now = time.monotonic() if now is None else now
+    with _lock:
+        _cache[login_id] = (now + ttl, snapshot)
+        _cache.move_to_end(login_id)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return snapshot
+
+
+def invalidate(login_id):
+    """使某个用户的缓存失效，login_id 形如 user_1 或 admin_1"""
+    with _lock:
+        _cache.pop(login_id, None)
+        _stats["invalidations"] += 1
+
+
+def clear():
+    """清空全部缓存"""
+    with _lock:
+        _cache.clear()
+
+
+def get_stats():
+    """获取缓存统计信息"""
+    with _lock:
+        return dict(_stats, entries=len(_cache))
@@ -0,0 +1,73 @@
+"""历史行程响应缓存
+
+缓存历史行程列表（分页）和行程详情的响应数据，按用户分组：
+用户保存或删除行程时清空该用户的全部缓存条目。
+最多缓存 MAX_USERS 个用户的数据，超出时淘汰最久未访问的用户。
+
+缓存在进程内，预派生部署中保存或删除行程的请求只能清空处理它的工作进程中的缓存。
+因此每个用户的缓存条目都带有版本（由调用方从数据库读取，即该用户的行程修订号），
+读取时版本不一致说明其他进程修改过该用户的行程，丢弃该用户的全部条目。
+"""
+import threading
+from collections import OrderedDict
+
+MAX_USERS = 512
+
+_lock = threading.Lock()
+
+# 用户ID -> (版本, {缓存键: 响应数据})
+_cache = OrderedDict()
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stale": 0,
+    "invalidations": 0,
+}
+
+
+def get(user_id, key, version):
+    """读取缓存，未命中或版本不一致时返回None"""
+    with _lock:
+        cached = _cache.get(user_id)
+        if cached is not None and cached[0] != version:
+            del _cache[user_id]
+            _stats["stale"] += 1
+            cached = None
+        if cached is not None and key in cached[1]:
+            _cache.move_to_end(user_id)
+            _stats["hits"] += 1
+            return cached[1][key]
+        _stats["misses"] += 1
+        return None
+
+
+def put(user_id, key, payload, version):
+    """写入缓存，version 为生成响应前读取的版本"""
+    with _lock:
+        cached = _cache.get(user_id)
+        if cached is None or cached[0] != version:
+            cached = _cache[user_id] = (version, {})
+        cached[1][key] = payload
+        _cache.move_to_end(user_id)
+        while len(_cache) > MAX_USERS:
+            _cache.popitem(last=False)
+
+
+def invalidate(user_id):
+    """清空某个用户的缓存（保存或删除行程后调用）"""
+    with _lock:
+        _cache.pop(user_id, None)
+        _stats["invalidations"] += 1
+
+
+def clear():
+    """清空全部缓存"""
+    with _lock:
+        _cache.clear()
+
+
+def get_stats():
+    """获取缓存统计信息"""
+    with _lock:
+        return dict(_stats, users=len(_cache), entries=sum(len(entries) for _version, entries in _cache.values()))
@@ -0,0 +1,347 @@
+"""后台任务队列
+
+路径优化、天气调整和全部城市预测耗时数秒，同步接口在整个计算期间占用一个 waitress 线程，
+几个用户同时提交就会占满线程池。后台任务把计算移出请求线程：
+
+1. POST /jobs/<任务类型> 提交任务，立即返回任务ID（202）
+2. 后台工作线程（JOB_WORKERS 个）从队列中取出任务，在应用上下文中执行登记的处理函数
+3. 客户端轮询 GET /jobs/<任务ID>，或订阅 GET /jobs/<任务ID>/events（SSE），完成后读取结果
+
+任务状态和结果在最后一次更新后保留 JOB_RESULT_TTL 秒，过期后按不存在处理。
+排队的任务数上限为 JOB_QUEUE_MAXSIZE，队列满时提交失败（接口返回503），避免积压无限增长。
+
+任务的存储和排队由 JOB_BACKEND 选择：
+- memory（默认）：保存在当前进程内，只有提交任务的进程能查询到结果，适合单进程部署（waitress）
+- redis：保存在 Redis 中（JOB_REDIS_URL，需安装 redis 包），预派生部署的多个工作进程共享同一个队列，
+  任一进程都能查询结果；测试中可传入接口相同的替身客户端
+
+处理函数由各路由模块通过 register() 登记，接收提交的参数（字典），返回可序列化为JSON的结果；
+抛出异常时任务记为失败（failed），异常信息作为 error。同步接口返回 (结果, 状态码) 的函数
+用 register_view() 登记，状态码不是200时抛出 JobFailed，任务失败，error 为结果中的 message。
+工作线程在第一次提交任务时才启动；进程退出时排队中的任务随内存后端一起丢失。
+"""
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED = (SUCCEEDED, FAILED)
+
+# 任务类型 -> 处理函数
+_handlers = {}
+
+metrics.describe('app_job_wait_seconds', 'histogram', "后台任务排队等待耗时（秒）")
+metrics.describe('app_jobs_total', 'counter', "后台任务数，按类型和结果区分")
+
+
+class JobQueueFull(Exception):
+    """排队的任务数达到上限"""
+
+
+class JobFailed(Exception):
+    """处理函数报告的失败（如参数错误），不记录异常堆栈"""
+
+
+def register(job_type, handler):
+    """登记任务类型的处理函数"""
+    _handlers[job_type] = handler
+
+
+def register_view(job_type, view):
+    """登记返回 (结果, 状态码) 的函数，状态码不是200时任务失败"""
+    def handler(params):
+        payload, status = view(params)
+        if status != 200:
+            raise JobFailed(payload.get('message') or f"状态码 {status}")
+        return payload
+
+    register(job_type, handler)
+
+
+def job_types():
+    return sorted(_handlers)
+
+
+class MemoryJobStore:
+    """进程内的任务存储和队列"""
+
+    def __init__(self, ttl=600, maxsize=100):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # 任务ID -> (过期时间, 任务)
+        self._jobs = {}
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job['id']] = (time.time() + self.ttl, dict(job))
+
+    def load(self, job_id):
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._jobs[job_id]
+                return None
+            return dict(entry[1])
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def push(self, job_id):
+        self._purge()
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            raise JobQueueFull() from None
+
+    def pop(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _purge(self):
+        """删除已过期的任务"""
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, (expires_at, _job) in self._jobs.items() if expires_at <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+class RedisJobStore:
+    """Redis 中的任务存储和队列，任务以 JSON 字符串保存并设置过期时间，队列为列表"""
+
+    def __init__(self, client, ttl=600, maxsize=100, prefix='jobs:'):
+        self.client = client
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.prefix = prefix
+        self.queue_key = f'{prefix}queue'
+
+    def _key(self, job_id):
+        return f'{self.prefix}job:{job_id}'
+
+    def save(self, job):
+        # 结果中的日期等类型转换为字符串
+        self.client.set(self._key(job['id']), json.dumps(job, ensure_ascii=False, default=str), ex=int(self.ttl))
+
+    def load(self, job_id):
+        raw = self.client.get(self._key(job_id))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def delete(self, job_id):
+        self.client.delete(self._key(job_id))
+
+    def push(self, job_id):
+        # 先检查长度再入队，多个进程同时提交时可能略微超出上限
+        if self.client.llen(self.queue_key) >= self.maxsize:
+            raise JobQueueFull()
+        self.client.rpush(self.queue_key, job_id)
+
+    def pop(self, timeout):
+        item = self.client.blpop([self.queue_key], timeout=max(int(timeout), 1))
+        if item is None:
+            return None
+        job_id = item[1]
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    def depth(self):
+        return self.client.llen(self.queue_key)
+
+
+def create_store(config):
+    """按 JOB_BACKEND 创建任务存储"""
+    ttl = config.get('JOB_RESULT_TTL', 600)
+    maxsize = config.get('JOB_QUEUE_MAXSIZE', 100)
+    backend = config.get('JOB_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryJobStore(ttl=ttl, maxsize=maxsize)
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("JOB_BACKEND=redis 需要安装 redis 包") from None
+        client = redis.Redis.from_url(config.get('JOB_REDIS_URL', 'redis://localhost:6379/0'))
+        return RedisJobStore(client, ttl=ttl, maxsize=maxsize)
+    raise ValueError(f"未知的任务队列后端: {backend}")
+
+
+class JobQueue:
+    """单个应用的后台任务队列"""
+
+    def __init__(self, app, store, workers=2, poll_interval=1.0):
+        self.app = app
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._threads_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, job_type, params=None):
+        """提交任务，返回任务状态
+
+        Raises:
+            KeyError: 任务类型未登记
+            JobQueueFull: 排队的任务数达到上限
+        """
+        if job_type not in _handlers:
+            raise KeyError(job_type)
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": job_type,
+            "status": QUEUED,
+            "params": params or {},
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self.store.save(job)
+        try:
+            self.store.push(job["id"])
+        except JobQueueFull:
+            self.store.delete(job["id"])
+            metrics.inc('app_jobs_total', type=job_type, status='rejected')
+            raise
+        self._ensure_workers()
+        return _public(job)
+
+    def get(self, job_id, include_result=False):
+        """任务状态，不存在或已过期时返回None"""
+        job = self.store.load(job_id)
+        if job is None:
+            return None
+        return _public(job, include_result)
+
+    def wait(self, job_id, timeout=None, interval=0.1):
+        """等待任务结束，返回任务状态（含结果）；超时或任务不存在时返回当前状态或None"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id, include_result=True)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def depth(self):
+        """排队中的任务数"""
+        return self.store.depth()
+
+    def stop(self, timeout=10):
+        """停止工作线程，正在执行的任务执行完毕后退出"""
+        self._stopping.set()
+        with self._threads_lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        with self._threads_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'job-worker-{i + 1}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job_id = self.store.pop(self.poll_interval)
+            except Exception as e:
+                logger.error("读取任务队列失败: %s", e)
+                time.sleep(self.poll_interval)
+                continue
+            if job_id is not None:
+                self._execute(job_id)
+
+    def _execute(self, job_id):
+        job = self.store.load(job_id)
+        if job is None:
+            # 排队期间已过期
+            return
+        handler = _handlers.get(job["type"])
+        job.update(status=RUNNING, started_at=time.time())
+        self.store.save(job)
+        metrics.observe('app_job_wait_seconds', job["started_at"] - job["submitted_at"], type=job["type"])
+
+        try:
+            if handler is None:
+                raise KeyError(f"未登记的任务类型: {job['type']}")
+            with self.app.app_context(), metrics.span(f"job.{job['type']}"):
+                result = handler(job["params"])
+            job.update(status=SUCCEEDED, result=result)
+        except JobFailed as e:
+            logger.warning("后台任务 %s（%s）失败: %s", job_id, job["type"], e)
+            job.update(status=FAILED, error=str(e))
+        except Exception as e:
+            logger.exception("后台任务 %s（%s）失败", job_id, job["type"])
+            job.update(status=FAILED, error=str(e))
+        job["finished_at"] = time.time()
+        self.store.save(job)
+        metrics.inc('app_jobs_total', type=job["type"], status=job["status"])
+        logger.info("后台任务 %s（%s）%s", job_id, job["type"], job["status"],
+                    extra={'duration_ms': round((job["finished_at"] - job["started_at"]) * 1000, 1)})
+
+
+def _public(job, include_result=False):
+    """接口返回的任务状态，不包含提交的参数"""
+    data = {key: job[key] for key in ("id", "type", "status", "submitted_at", "started_at", "finished_at", "error")}
+    if include_result:
+        data["result"] = job["result"]
+    return data
+
+
+def init_app(app):
+    """为应用创建后台任务队列"""
+    job_queue = JobQueue(
+        app,
+        create_store(app.config),
+        workers=app.config.get('JOB_WORKERS', 2),
+    )
+    app.extensions['job_queue'] = job_queue
+    metrics.register_gauge('app_job_queue_depth', "后台任务队列中排队的任务数", lambda: _depth_values(job_queue))
+    return job_queue
+
+
+def _depth_values(job_queue):
+    try:
+        return [({}, job_queue.depth())]
+    except Exception as e:
+        # Redis 不可用时不影响其他指标的输出
+        logger.error("读取任务队列长度失败: %s", e)
+        return []
+
+
+def get_queue(app=None):
+    """获取应用的后台任务队列，默认为当前应用"""
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+    return app.extensions['job_queue']
@@ -0,0 +1,270 @@
+"""日志查询
+
+日志由 RotatingFileHandler 写入 logs/app.log，轮转后的备份为 app.log.1（最新）到 app.log.N（最旧）。
+查询时按从新到旧的顺序流式读取这些文件，内存占用与日志大小无关：
+
+- 只看最后 N 行或按关键词搜索时，从文件末尾按块向前读取，找够 N 行即停止
+- 按级别或时间筛选时使用块索引：每个文件按约 BLOCK_SIZE 字节（按行对齐）分块，
+  记录每块的起止时间和出现的日志级别，查询时跳过时间范围或级别不匹配的块，
+  "最近一小时的错误"只需读取最后几个块
+
+块索引保存在进程内存中，每块只占几十字节。文件追加内容后增量扩展，被轮转或清空后重建。
+日志行的编码兼容 UTF-8 和 GBK（Windows 下写入的日志）。
+"""
+import os
+import re
+import threading
+from collections import deque
+
+BLOCK_SIZE = 64 * 1024
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# 日志格式：'%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_RECORD = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3} - .*? - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ')
+
+_lock = threading.Lock()
+
+# 文件路径 -> _FileIndex
+_indexes = {}
+
+_stats = {
+    "index_builds": 0,
+    "index_extends": 0,
+    "blocks_read": 0,
+    "blocks_skipped": 0,
+}
+
+
+def decode_line(raw):
+    """解码一行日志，优先UTF-8，失败时按GBK解码"""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('gbk', errors='replace')
+
+
+def log_files(log_file):
+    """当前日志文件及其轮转备份，按从新到旧排列，只包含存在的文件"""
+    log_file = str(log_file)
+    files = [log_file] if os.path.exists(log_file) else []
+    i = 1
+    while os.path.exists(f"{log_file}.{i}"):
+        files.append(f"{log_file}.{i}")
+        i += 1
+    return files
+
+
+def iter_lines_reverse(path, block_size=BLOCK_SIZE):
+    """从文件末尾按块向前读取，逐行返回原始字节（不含换行符），最后一行最先返回"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b'\n')
+            # 第一段可能是上一块中某行的后半部分，留到读取上一块时拼接
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line.rstrip(b'\r')
+        if remainder:
+            yield remainder.rstrip(b'\r')
+
+
+def _parse_record(raw):
+    """解析日志记录行的时间（精确到秒的字符串）和级别，续行（如异常堆栈）返回 (None, None)"""
+    match = _RECORD.match(raw)
+    if match is None:
+        return None, None
+    return match.group(1).decode('ascii'), match.group(2).decode('ascii')
+
+
+class _Block:
+    """索引中的一块：按行对齐的字节范围、时间范围和出现的级别
+
+    start_time/start_level 为块开始时生效的时间和级别，块开头的续行属于上一块最后一条记录。
+    """
+
+    __slots__ = ('start', 'end', 'first_time', 'last_time', 'levels', 'start_time', 'start_level')
+
+    def __init__(self, start, start_time, start_level):
+        self.start = start
+        self.end = start
+        self.first_time = start_time
+        self.last_time = start_time
+        self.levels = set()
+        self.start_time = start_time
+        self.start_level = start_level
+
+
+class _FileIndex:
+    """单个日志文件的块索引"""
+
+    def __init__(self, path, block_size):
+        self.path = path
+        self.block_size = block_size
+        self.blocks = []
+        self.inode = None
+        self.size = 0
+        # 已索引部分末尾的记录时间和级别，增量扩展时作为新块的初始值
+        self.tail_time = None
+        self.tail_level = None
+
+    def refresh(self):
+        """根据文件状态增量扩展或重建索引"""
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.size:
+            self.blocks = []
+            self.size = 0
+            self.tail_time = self.tail_level = None
+            self.inode = stat.st_ino
+            _stats["index_builds"] += 1
+        elif stat.st_size == self.size:
+            return
+        else:
+            _stats["index_extends"] += 1
+        self._extend(stat.st_size)
+
+    def _extend(self, file_size):
+        if self.blocks and self.blocks[-1].end - self.blocks[-1].start < self.block_size:
+            # 最后一块未满时从该块开头继续索引，避免日志缓慢增长时产生大量小块
+            last = self.blocks.pop()
+            start, current_time, current_level = last.start, last.start_time, last.start_level
+        else:
+            start, current_time, current_level = self.size, self.tail_time, self.tail_level
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            block = _Block(start, current_time, current_level)
+            while f.tell() < file_size:
+                raw = f.readline()
+                if not raw.endswith(b'\n'):
+                    # 正在写入的最后一行，下次刷新时再索引
+                    break
+                record_time, record_level = _parse_record(raw)
+                if record_time is not None:
+                    current_time, current_level = record_time, record_level
+                    if block.first_time is None:
+                        block.first_time = record_time
+                    block.last_time = record_time
+                if current_level is not None:
+                    block.levels.add(current_level)
+                block.end = f.tell()
+                if block.end - block.start >= self.block_size:
+                    self.blocks.append(block)
+                    block = _Block(block.end, current_time, current_level)
+            if block.end > block.start:
+                self.blocks.append(block)
+        self.size = self.blocks[-1].end if self.blocks else 0
+        self.tail_time, self.tail_level = current_time, current_level
+
+    def read_block(self, block):
+        """按顺序返回块中的 (时间, 级别, 原始行)，续行继承所属记录的时间和级别"""
+        with open(self.path, 'rb') as f:
+            f.seek(block.start)
+            data = f.read(block.end - block.start)
+        _stats["blocks_read"] += 1
+        current_time, current_level = block.start_time, block.start_level
+        for raw in data.split(b'\n'):
+            if not raw:
+                continue
+            record_time, record_level = _parse_record(raw)
+            if record_time is not None:
+                current_time, current_level = record_time, record_level
+            yield current_time, current_level, raw.rstrip(b'\r')
+
+
+def get_index(path, block_size=BLOCK_SIZE, cache=True):
+    """获取（并按需更新）日志文件的块索引
+
+    cache=False 时临时建立索引、不保存在内存中（每次查询都完整扫描一遍文件）。
+    """
+    path = str(path)
+    if not cache:
+        index = _FileIndex(path, block_size)
+        index.refresh()
+        return index
+    with _lock:
+        index = _indexes.get(path)
+        if index is None or index.block_size != block_size:
+            index = _indexes[path] = _FileIndex(path, block_size)
+        index.refresh()
+        return index
+
+
+def _matches(raw_text, search):
+    return not search or search in raw_text.casefold()
+
+
+def tail(log_file, lines=100, search=None, level=None, since=None, use_index=True, block_size=BLOCK_SIZE):
+    """查询最后 lines 行日志
+
+    Args:
+        log_file: 当前日志文件路径，轮转备份会一起查询
+        lines: 最多返回的行数
+        search: 关键词（不区分大小写的子串匹配）
+        level: 最低日志级别，如 'ERROR' 表示只看 ERROR 和 CRITICAL
+        since: 起始时间字符串 'YYYY-MM-DD HH:MM:SS'，只看此时间之后的日志
+        use_index: 按级别或时间筛选时是否使用并保留内存中的块索引
+
+    Returns:
+        list: 按时间先后排列的日志行（str）
+    """
+    if lines <= 0:
+        return []
+    search = search.casefold() if search else None
+    result = deque()
+
+    if level is None and since is None:
+        # 只看最后N行或按关键词搜索：从文件末尾向前读，找够即停止
+        for path in log_files(log_file):
+            for raw in iter_lines_reverse(path, block_size):
+                text = decode_line(raw)
+                if _matches(text, search):
+                    result.appendleft(text)
+                    if len(result) >= lines:
+                        return list(result)
+        return list(result)
+
+    wanted_levels = set(LEVELS[LEVELS.index(level):]) if level else None
+    for path in log_files(log_file):
+        index = get_index(path, block_size, cache=use_index)
+        for block in reversed(index.blocks):
+            if since is not None and block.last_time is not None and block.last_time < since:
+                # 更早的块和更旧的文件都在起始时间之前
+                _stats["blocks_skipped"] += 1
+                return list(result)
+            if wanted_levels is not None and not (block.levels & wanted_levels):
+                _stats["blocks_skipped"] += 1
+                continue
+            matched = []
+            for record_time, record_level, raw in index.read_block(block):
+                if since is not None and (record_time is None or record_time < since):
+                    continue
+                if wanted_levels is not None and record_level not in wanted_levels:
+                    continue
+                text = decode_line(raw)
+                if _matches(text, search):
+                    matched.append(text)
+            for text in reversed(matched):
+                result.appendleft(text)
+                if len(result) >= lines:
+                    return list(result)
+    return list(result)
+
+
+def clear():
+    """清空全部索引"""
+    with _lock:
+        _indexes.clear()
+
+
+def get_stats():
+    """获取索引统计信息"""
+    with _lock:
+        return dict(_stats, indexed_files=len(_indexes),
+                    indexed_blocks=sum(len(index.blocks) for index in _indexes.values()))
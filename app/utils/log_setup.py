@@ -0,0 +1,249 @@
+"""日志配置
+
+应用和各服务模块统一使用标准库 logging（logging.getLogger(__name__)，均在 app 日志器之下），
+不再直接 print：
+
+- 日志记录由 QueueHandler 放入队列，QueueListener 在后台线程中写文件和控制台，
+  请求线程不因磁盘或终端输出阻塞
+- 总日志级别为 LOG_LEVEL，LOG_MODULE_LEVELS（dict 或 "模块=级别,..." 字符串）可为单个模块单独设置级别；
+  生产环境默认 INFO，各服务的调试输出（DEBUG）在调用处就被过滤掉
+- LOG_FORMAT 为 text 时沿用原来的文本格式（日志查看页面按此格式解析），extra 中的字段
+  以 key=value 追加在消息后；为 json 时每行一个 JSON 对象
+- 循环中的日志用 sampled() 采样，每个调用位置只输出第一次和此后每 N 次中的一次
+- timed() 记录一段代码的耗时，duration_ms 作为结构化字段输出
+
+fork 出的子进程（如天气预测的进程池）中没有后台线程，改为直接写入各输出处理器。
+预派生部署中 gunicorn 的 post_fork 钩子调用 start_in_worker()，每个工作进程重新启动自己的
+后台线程。多个进程写同一个日志文件时不能各自按大小轮转（一个进程改名后其他进程仍写旧文件，
+还会重复轮转），LOG_ROTATE 为 False 时改用 WatchedFileHandler：只追加写入，
+文件被外部工具（logrotate）改名后自动重新打开。
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord 自带的属性，其余属性来自 extra
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+_logger = None
+_handlers = []
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED and not key.startswith('_')}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """文本格式，extra 字段以 key=value 追加在消息后"""
+
+    def __init__(self, fmt=TEXT_FORMAT):
+        super().__init__(fmt)
+
+    def format(self, record):
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += ' | ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON 格式，每条日志一行"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(_extra_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SampledLogger:
+    """采样日志：每个调用位置只输出第一次和此后每 every 次中的一次
+
+    用于遗传算法、逐景点处理等循环中的日志，输出的记录带 sampled_every 和 suppressed 字段。
+    日志级别未启用时直接返回，不计数也不格式化。
+    """
+
+    def __init__(self, logger, every=100):
+        self.logger = logger
+        self.every = max(int(every), 1)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _log(self, level, msg, args, kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        caller = sys._getframe(2)
+        key = (caller.f_code.co_filename, caller.f_lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return
+        extra = dict(kwargs.pop('extra', None) or {}, sampled_every=self.every, suppressed=self.every - 1 if count else 0)
+        self.logger.log(level, msg, *args, extra=extra, stacklevel=3, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, args, kwargs)
+
+
+def sampled(logger, every=None):
+    """创建采样日志器，every 默认取配置 LOG_SAMPLE_EVERY"""
+    if every is None:
+        from app.config import Config
+        every = getattr(Config, 'LOG_SAMPLE_EVERY', 100)
+    return SampledLogger(logger, every)
+
+
+@contextmanager
+def timed(logger, event, level=logging.INFO, **fields):
+    """记录代码块耗时，duration_ms 和 fields 作为结构化字段输出"""
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        if logger.isEnabledFor(level):
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.log(level, event, extra=dict(fields, event=event, duration_ms=duration_ms), stacklevel=3)
+
+
+def parse_module_levels(value):
+    """解析 'app.services=DEBUG,app.routes.api=WARNING' 形式的模块级别配置"""
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _make_formatter(config):
+    return JsonFormatter() if config.get('LOG_FORMAT') == 'json' else KeyValueFormatter()
+
+
+def configure_logging(app):
+    """为应用配置日志：app 日志器及其下所有模块日志器经队列异步输出
+
+    重复调用（如测试中多次创建应用）会先停止上一次的后台线程。
+    """
+    global _listener, _queue_handler, _logger, _handlers
+    from flask.logging import default_handler
+
+    config = app.config
+    formatter = _make_formatter(config)
+    handlers = []
+
+    if not app.debug and not app.testing:
+        if config.get('LOG_ROTATE', True):
+            # 日志文件限制为10MB，保留5个备份
+            file_handler = RotatingFileHandler(
+                config['LOG_FILE'],
+                maxBytes=10 * 1024 * 1024,
+                backupCount=5,
+                encoding='utf-8'
+            )
+        else:
+            file_handler = WatchedFileHandler(config['LOG_FILE'], encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    if config.get('LOG_CONSOLE', True):
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        if config.get('LOG_CONSOLE_LEVEL'):
+            console_handler.setLevel(config['LOG_CONSOLE_LEVEL'])
+        handlers.append(console_handler)
+
+    logger = logging.getLogger(app.import_name.split('.')[0])
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            logger.removeHandler(_queue_handler)
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _logger = logger
+        _handlers = handlers
+
+    logger.removeHandler(default_handler)
+    app.logger.removeHandler(default_handler)
+    logger.addHandler(_queue_handler)
+    logger.setLevel(config.get('LOG_LEVEL') or ('DEBUG' if app.debug else 'INFO'))
+    logger.propagate = False
+
+    module_levels = config.get('LOG_MODULE_LEVELS') or {}
+    if isinstance(module_levels, str):
+        module_levels = parse_module_levels(module_levels)
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(level)
+
+
+@atexit.register
+def shutdown():
+    """写完队列中剩余的日志（进程退出时自动执行）"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def start_in_worker():
+    """预派生工作进程中重新经队列输出：启动本进程的后台线程（gunicorn.conf.py 的 post_fork 调用）"""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None or _logger is None or not _handlers:
+            return
+        for handler in _handlers:
+            _logger.removeHandler(handler)
+        log_queue = queue.SimpleQueue()
+        _queue_handler = QueueHandler(log_queue)
+        _listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+        _logger.addHandler(_queue_handler)
+
+
+def _after_fork_in_child():
+    """子进程中不再经队列输出，直接使用主进程配置的处理器"""
+    global _lock, _listener, _queue_handler
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _logger.removeHandler(_queue_handler)
+    for handler in _handlers:
+        _logger.addHandler(handler)
+    _listener = _queue_handler = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,275 @@
+"""性能指标
+
+在进程内记录请求耗时、热点代码段耗时、数据库查询耗时、缓存命中和模型训练次数，
+由 /metrics 以 Prometheus 文本格式输出：
+
+- app_request_duration_seconds：每个请求的耗时直方图，按路由规则、方法和状态码区分
+- app_span_duration_seconds：span() / instrument() 标记的代码段耗时直方图
+  （数据加载、服务初始化、遗传算法、天气预测、客流量模型训练、图表生成等）
+- app_db_query_duration_seconds：每条 SQL 的耗时直方图，按语句类型区分
+- app_model_trainings_total：模型训练次数
+- app_cache_hits_total / app_cache_misses_total：各缓存模块 get_stats() 中的命中统计
+- register_gauge() 登记的瞬时值（准入控制的执行中和排队请求数、后台任务队列长度），输出时读取
+
+METRICS_SERVER_TIMING 开启时，响应带 Server-Timing 头，列出本次请求中各代码段和数据库查询的累计耗时，
+浏览器开发者工具的网络面板可直接查看。
+
+指标保存在当前进程内；进程池子进程中的训练只计入主进程中调用它们的代码段耗时。
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+
+# 指标名称 -> (类型, 说明, 直方图分桶)
+_meta = {}
+
+# (指标名称, 标签元组) -> 计数
+_counters = {}
+
+# (指标名称, 标签元组) -> [各桶计数..., 超出最大桶的计数, 总和, 次数]
+_histograms = {}
+
+# 缓存名称 -> get_stats 函数
+_cache_sources = {}
+
+# 指标名称 -> 返回 [(标签字典, 值), ...] 的函数
+_gauge_sources = {}
+
+
+def describe(name, kind, help_text, buckets=DEFAULT_BUCKETS):
+    """登记指标的类型（counter 或 histogram）和说明"""
+    with _lock:
+        _meta[name] = (kind, help_text, tuple(buckets))
+
+
+describe('app_request_duration_seconds', 'histogram', "请求处理耗时（秒）")
+describe('app_span_duration_seconds', 'histogram', "热点代码段耗时（秒）")
+describe('app_db_query_duration_seconds', 'histogram', "数据库查询耗时（秒）",
+         buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+describe('app_model_trainings_total', 'counter', "模型训练次数")
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """计数器加 value"""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """在直方图中记录一次耗时"""
+    key = (name, _label_key(labels))
+    with _lock:
+        buckets = _meta[name][2]
+        values = _histograms.get(key)
+        if values is None:
+            values = _histograms[key] = [0] * (len(buckets) + 3)
+        values[bisect_left(buckets, seconds)] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+
+def _request_timings():
+    """当前请求中各代码段的累计耗时（毫秒），不在请求中时返回None"""
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    return g.get('_metrics_timings')
+
+
+def add_request_timing(name, seconds):
+    """把一段耗时计入当前请求的 Server-Timing"""
+    timings = _request_timings()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+
+@contextmanager
+def span(name):
+    """记录代码块耗时"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('app_span_duration_seconds', elapsed, span=name)
+        add_request_timing(name, elapsed)
+
+
+def instrument(name):
+    """装饰器：记录函数每次调用的耗时"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_cache(name, get_stats):
+    """登记缓存模块，输出其 get_stats() 中的 hits、misses"""
+    with _lock:
+        _cache_sources[name] = get_stats
+
+
+def register_gauge(name, help_text, get_values):
+    """登记瞬时值指标，get_values() 返回 [(标签字典, 值), ...]，在输出指标时调用"""
+    with _lock:
+        _meta[name] = ('gauge', help_text, ())
+        _gauge_sources[name] = get_values
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render():
+    """以 Prometheus 文本格式输出全部指标"""
+    with _lock:
+        meta = dict(_meta)
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        cache_sources = dict(_cache_sources)
+        gauge_sources = dict(_gauge_sources)
+
+    for name, get_stats in sorted(cache_sources.items()):
+        stats = get_stats()
+        for field in ('hits', 'misses'):
+            if field in stats:
+                counters[(f'app_cache_{field}_total', (('cache', name),))] = stats[field]
+    meta.setdefault('app_cache_hits_total', ('counter', "缓存命中次数", ()))
+    meta.setdefault('app_cache_misses_total', ('counter', "缓存未命中次数", ()))
+    for name, get_values in sorted(gauge_sources.items()):
+        for labels, value in get_values():
+            counters[(name, _label_key(labels))] = value
+
+    lines = []
+    for name in sorted({key[0] for key in counters} | {key[0] for key in histograms}):
+        kind, help_text, buckets = meta.get(name, ('counter', name, ()))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'histogram':
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), values):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _format_number(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(float(values[-2]))}")
+                lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+        else:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _before_request():
+    from flask import g
+    g._metrics_started = time.perf_counter()
+    g._metrics_timings = {}
+
+
+def _after_request(response):
+    from flask import current_app, g, request
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    observe('app_request_duration_seconds', elapsed,
+            endpoint=endpoint, method=request.method, status=response.status_code)
+    timings = g.pop('_metrics_timings', None) or {}
+    if current_app.config.get('METRICS_SERVER_TIMING'):
+        entries = [f"{name};dur={duration:.1f}" for name, duration in timings.items()]
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+
+def _configure_engine(engine):
+    """记录每条 SQL 的耗时，同一引擎只注册一次"""
+    from sqlalchemy import event
+
+    if getattr(engine, '_metrics_configured', False):
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_metrics_query_started'].pop()
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        observe('app_db_query_duration_seconds', elapsed, operation=operation)
+        add_request_timing('db', elapsed)
+
+    @event.listens_for(engine, 'handle_error')
+    def _on_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('_metrics_query_started'):
+            connection.info['_metrics_query_started'].pop()
+
+    engine._metrics_configured = True
+
+
+def init_app(app):
+    """为应用注册请求计时、SQL 计时和缓存统计"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    from app import db
+    from app.utils import forecast_cache, identity_cache, itinerary_cache
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        _configure_engine(db.engine)
+
+    register_cache('forecast', forecast_cache.get_stats)
+    register_cache('identity', identity_cache.get_stats)
+    register_cache('itinerary', itinerary_cache.get_stats)
+
+
+def clear():
+    """清空全部指标"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def get_stats():
+    """获取指标数量统计信息"""
+    with _lock:
+        return {
+            "counters": len(_counters),
+            "histograms": len(_histograms),
+            "caches": len(_cache_sources),
+            "gauges": len(_gauge_sources),
+        }
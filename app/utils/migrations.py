@@ -0,0 +1,223 @@
+"""数据库结构迁移
+
+替代原来 scripts/update_*.py 中零散的表结构更新脚本。每个迁移有一个递增的版本号，
+执行过的版本记录在 schema_migration 表中，只会执行一次。
+迁移函数本身也先检查表结构再修改，在已经手动更新过的数据库上执行也是安全的。
+
+新建数据库由 db.create_all() 按模型直接创建完整结构，迁移只做版本登记；
+已有数据库在应用启动或执行 scripts/migrate.py 时补齐缺少的字段和索引。
+SQLite 和 MySQL 均可使用。
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migration = Table(
+    'schema_migration', _metadata,
+    Column('version', String(20), primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# (版本号, 说明, 迁移函数)，按版本号顺序执行
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """注册迁移函数，迁移函数接收一个处于事务中的数据库连接"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+
+def _has_table(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def _has_column(conn, table, column):
+    return any(c['name'] == column for c in inspect(conn).get_columns(table))
+
+
+def _has_index(conn, table, name):
+    return any(index['name'] == name for index in inspect(conn).get_indexes(table))
+
+
+def _add_column(conn, table, column, ddl):
+    """表存在且缺少该字段时添加字段，返回是否添加"""
+    if not _has_table(conn, table) or _has_column(conn, table, column):
+        return False
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(text(f'ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {ddl}'))
+    logger.info("成功为%s表添加%s字段", table, column)
+    return True
+
+
+@migration('0001', 'user表添加role字段')
+def _add_user_role(conn):
+    _add_column(conn, 'user', 'role', 'INT DEFAULT 0')
+
+
+@migration('0002', 'user表添加nickname和avatar字段')
+def _add_user_profile(conn):
+    _add_column(conn, 'user', 'nickname', "VARCHAR(64) DEFAULT ''")
+    _add_column(conn, 'user', 'avatar', "VARCHAR(255) DEFAULT ''")
+
+
+@migration('0003', 'admin表添加nickname和avatar字段')
+def _add_admin_profile(conn):
+    _add_column(conn, 'admin', 'nickname', "VARCHAR(64) DEFAULT ''")
+    _add_column(conn, 'admin', 'avatar', "VARCHAR(255) DEFAULT ''")
+
+
+@migration('0004', 'favorite表支持管理员收藏')
+def _add_favorite_admin(conn):
+    if not _has_table(conn, 'favorite'):
+        return
+    is_mysql = conn.dialect.name == 'mysql'
+    user_id = next((c for c in inspect(conn).get_columns('favorite') if c['name'] == 'user_id'), None)
+    # SQLite不支持修改字段定义，SQLite数据库由create_all按模型创建，user_id本身就可为空
+    if is_mysql and user_id is not None and not user_id['nullable']:
+        conn.execute(text('ALTER TABLE favorite MODIFY COLUMN user_id INT NULL'))
+        logger.info("成功将favorite表user_id字段修改为可为空")
+    if _add_column(conn, 'favorite', 'admin_id', 'INT NULL REFERENCES admin(id)') and is_mysql:
+        conn.execute(text('ALTER TABLE favorite ADD CONSTRAINT fk_favorite_admin FOREIGN KEY (admin_id) REFERENCES admin(id)'))
+
+
+@migration('0005', 'login_history表添加fail_reason字段')
+def _add_login_fail_reason(conn):
+    _add_column(conn, 'login_history', 'fail_reason', 'VARCHAR(100) NULL')
+
+
+def _create_model_indexes(conn, model, names):
+    """按名称创建模型中定义但数据库中缺少的索引
+
+    只创建指定名称的索引：模型中后来新增的索引可能依赖后续迁移才添加的字段。
+    """
+    table = model.__table__
+    if not _has_table(conn, table.name):
+        return
+    for index in table.indexes:
+        if index.name in names and not _has_index(conn, table.name, index.name):
+            index.create(conn)
+            logger.info("成功创建索引%s", index.name)
+
+
+@migration('0006', 'attraction表添加(城市,评分)、(城市,名称)、(城市,类型)复合索引')
+def _add_attraction_indexes(conn):
+    from app.models import Attraction
+
+    _create_model_indexes(conn, Attraction,
+                          {'ix_attraction_city_rating', 'ix_attraction_city_name', 'ix_attraction_city_type'})
+
+
+@migration('0007', '行程相关表添加(用户,创建时间)索引和外键索引')
+def _add_itinerary_indexes(conn):
+    from app.models import Itinerary, ItineraryDay, ItineraryAttraction
+
+    _create_model_indexes(conn, Itinerary, {'ix_itinerary_user_created'})
+    _create_model_indexes(conn, ItineraryDay, {'ix_itinerary_day_itinerary_id'})
+    _create_model_indexes(conn, ItineraryAttraction, {'ix_itinerary_attraction_itinerary_day_id'})
+
+
+@migration('0008', 'itinerary表添加idempotency_key字段和(用户,幂等键)唯一索引')
+def _add_itinerary_idempotency_key(conn):
+    from app.models import Itinerary
+
+    _add_column(conn, 'itinerary', 'idempotency_key', 'VARCHAR(64) NULL')
+    _create_model_indexes(conn, Itinerary, {'ux_itinerary_user_idempotency'})
+
+
+@migration('0009', 'attraction表(城市,名称)改为唯一索引，合并重复景点')
+def _add_attraction_natural_key(conn):
+    from app.models import Attraction
+
+    if not _has_table(conn, 'attraction') or _has_index(conn, 'attraction', 'ux_attraction_city_name'):
+        return
+    # 同一 (城市, 名称) 有多条时保留ID最小的一条，引用其他景点的记录改为引用保留的景点
+    keep = {}
+    duplicates = []
+    for attraction_id, city, name in conn.execute(text('SELECT id, city, name FROM attraction ORDER BY id')):
+        if (city, name) in keep:
+            duplicates.append({'duplicate': attraction_id, 'keep': keep[(city, name)]})
+        else:
+            keep[(city, name)] = attraction_id
+    if duplicates:
+        for table in ('itinerary_attraction', 'traffic_record', 'risk_assessment'):
+            if _has_table(conn, table):
+                conn.execute(text(f'UPDATE {table} SET attraction_id = :keep WHERE attraction_id = :duplicate'),
+                             duplicates)
+        conn.execute(text('DELETE FROM attraction WHERE id = :duplicate'),
+                     [{'duplicate': item['duplicate']} for item in duplicates])
+        logger.info("合并了%s个重复景点", len(duplicates))
+
+    if _has_index(conn, 'attraction', 'ix_attraction_city_name'):
+        on_table = ' ON attraction' if conn.dialect.name == 'mysql' else ''
+        conn.execute(text(f'DROP INDEX ix_attraction_city_name{on_table}'))
+    _create_model_indexes(conn, Attraction, {'ux_attraction_city_name'})
+
+
+@migration('0010', 'user表添加itinerary_revision字段')
+def _add_user_itinerary_revision(conn):
+    _add_column(conn, 'user', 'itinerary_revision', 'INT NOT NULL DEFAULT 0')
+
+
+@migration('0011', 'traffic_record和risk_assessment表添加(景点,日期)唯一索引，删除重复记录')
+def _add_record_natural_keys(conn):
+    from app.models import RiskAssessment, TrafficRecord
+
+    for model, index_name in ((TrafficRecord, 'ux_traffic_record_attraction_date'),
+                              (RiskAssessment, 'ux_risk_assessment_attraction_date')):
+        table = model.__tablename__
+        if not _has_table(conn, table) or _has_index(conn, table, index_name):
+            continue
+        # 以前的导入重复执行会插入重复记录，同一 (景点, 日期) 保留ID最小的一条
+        result = conn.execute(text(
+            f'DELETE FROM {table} WHERE id NOT IN '
+            f'(SELECT id FROM (SELECT MIN(id) AS id FROM {table} GROUP BY attraction_id, date) AS keep)'
+        ))
+        if result.rowcount:
+            logger.info("删除了%s表中%s条重复记录", table, result.rowcount)
+        _create_model_indexes(conn, model, {index_name})
+
+
+def applied_versions(engine):
+    """已执行的迁移版本集合"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(select(schema_migration.c.version))}
+
+
+def pending_migrations(engine):
+    """未执行的迁移列表"""
+    applied = applied_versions(engine)
+    return [item for item in MIGRATIONS if item[0] not in applied]
+
+
+def upgrade(engine):
+    """按版本顺序执行所有未执行的迁移，每个迁移在单独的事务中执行
+
+    Returns:
+        list: 本次执行的迁移版本号
+    """
+    executed = []
+    for version, description, func in pending_migrations(engine):
+        try:
+            with engine.begin() as conn:
+                func(conn)
+                conn.execute(schema_migration.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # 其他进程同时执行了该迁移
+            continue
+        logger.info("已执行数据库迁移 %s: %s", version, description)
+        executed.append(version)
+    return executed
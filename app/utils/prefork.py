@@ -0,0 +1,108 @@
+"""预派生（pre-fork）部署：工作进程共享只读数据
+
+gunicorn 等预派生服务器的每个工作进程如果各自加载天气数据、景点数据和预测模型，
+内存随工作进程数线性增长。预派生模式下（gunicorn.conf.py 开启 preload_app 并设置 PREFORK=1），
+run.py 在主进程 fork 之前调用 prepare()：
+
+1. 开启预测模型共享，同步执行启动预热（见 warmup.py），把天气数据、清洗后的景点数据、搜索索引和预测模型
+   加载到进程内共享的缓存中（data_loader、recommendation_service、search_index、prediction_service）。
+   这里不使用 WARMUP_TIMEOUT 时间预算，等待全部预热任务结束、预热线程退出后才 fork：
+   fork 时仍在执行的线程可能持有模块中的锁（如模型缓存锁），子进程继承到已锁定的锁会死锁，
+   而且这些线程之后加载的对象也不在 gc.freeze() 的范围内
+2. gc.freeze() 把这些对象移出垃圾回收的跟踪范围，工作进程中的垃圾回收不再写这些对象的头部，
+   包含它们的内存页不会因此被复制（写时复制）
+
+fork 后工作进程与主进程共享这些内存页，只有被修改的页才会复制。DataFrame 的数值列是 NumPy 数组，
+只读访问不会触发复制；字符串列和模型中的 Python 对象在被访问时会修改引用计数，相应的页仍会逐步复制，
+因此共享比例需要实际测量：memory_usage() 读取 /proc/<pid>/smaps_rollup，
+其中 uss（进程独占内存）才是每增加一个工作进程真正增加的内存，scripts/measure_memory.py 按此对比两种模式。
+
+fork 后子进程会丢弃从主进程继承的数据库连接（不关闭，避免影响主进程），各自重新建立连接。
+
+内存任务队列（JOB_BACKEND=memory）只在提交任务的工作进程内可见，轮询请求落到其他工作进程时
+查不到任务，因此多个工作进程时 prepare() 要求 JOB_BACKEND=redis，否则拒绝启动。
+"""
+import gc
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_state = {
+    "app": None,
+    "prepared": False,
+}
+
+
+def _after_fork_in_child():
+    """子进程丢弃继承的数据库连接池，连接不能跨进程共享"""
+    app = _state["app"]
+    if app is None:
+        return
+    from app import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def prepare(app, workers=None):
+    """fork 之前同步预热并冻结已加载的对象，返回预热状态
+
+    workers 为工作进程数，默认与 gunicorn.conf.py 相同，取 WEB_CONCURRENCY（默认2）
+    """
+    from app.services import prediction_service
+    from app.utils import warmup
+
+    if workers is None:
+        workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+    if workers > 1 and app.config.get('JOB_BACKEND', 'memory') == 'memory':
+        raise RuntimeError(
+            f"预派生部署的 {workers} 个工作进程不能共享内存任务队列，请设置 JOB_BACKEND=redis")
+
+    prediction_service.share_loaded_models()
+
+    state = warmup.get_warmup(app)
+    if not state.is_ready():
+        state.run(wait_all=True)
+    # 主进程不再持有数据库连接，避免子进程继承正在使用的连接
+    from app import db
+    with app.app_context():
+        db.engine.dispose()
+
+    gc.collect()
+    gc.freeze()
+    if _state["app"] is None and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+    _state.update(app=app, prepared=True)
+    logger.info("预派生准备完成，冻结对象 %d 个", gc.get_freeze_count())
+    return state
+
+
+def is_prepared():
+    return _state["prepared"]
+
+
+def memory_usage(pid='self'):
+    """进程内存占用（KB）：rss 常驻内存，pss 按共享进程数分摊后的内存，uss 独占内存
+
+    读取 Linux 的 /proc/<pid>/smaps_rollup，其他平台返回None
+    """
+    path = f'/proc/{pid}/smaps_rollup'
+    try:
+        with open(path, encoding='ascii') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[-1] == 'kB':
+            fields[name] = int(parts[0])
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    shared = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    return {
+        "rss": fields.get('Rss', 0),
+        "pss": fields.get('Pss', 0),
+        "uss": private,
+        "shared": shared,
+    }
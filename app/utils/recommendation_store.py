@@ -0,0 +1,191 @@
+"""预计算景点推荐结果存储
+
+由预计算任务（scripts/precompute_recommendations.py）每天生成未来 N 天、
+每个城市每天的推荐景点，整体保存为一个列式文件：
+
+    data/cache/recommendations_v{格式版本}_{生成日期}.parquet
+
+每行是一个推荐景点，除景点本身的字段外，额外包含推荐城市、推荐日期和推荐排名三列。
+使用 Parquet 列式格式（pyarrow 已列入 requirements.txt）；未安装 pyarrow 的开发环境中
+退化为 pandas pickle 格式，pickle 保存的是整个 DataFrame 对象，不是列式文件。
+写入时先写临时文件再原子替换，读取方不会看到写了一半的文件。
+格式版本变化后旧文件自动失效。
+
+查找最新文件需要列出并排序目录，全部城市预测页一次请求会读取近百次，
+因此解析出的最新文件最多每 RECHECK_INTERVAL 秒重新查找一次。
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# 预计算结果中附加的列
+CITY_COLUMN = "推荐城市"
+DATE_COLUMN = "推荐日期"
+RANK_COLUMN = "推荐排名"
+KEY_COLUMNS = [CITY_COLUMN, DATE_COLUMN, RANK_COLUMN]
+
+try:
+    import pyarrow  # noqa: F401
+    FILE_SUFFIX = ".parquet"
+except ImportError:
+    FILE_SUFFIX = ".pkl"
+
+# 重新查找最新预计算结果文件的间隔（秒）
+RECHECK_INTERVAL = 30
+
+_lock = threading.Lock()
+
+# 已加载的预计算结果，文件变化（重新生成）后重新加载
+_cache = {
+    "data_dir": None,
+    "checked_at": None,  # 上次查找最新文件的时间（time.monotonic）
+    "path": None,
+    "mtime": None,
+    "index": {},  # (城市, 日期) -> 推荐记录列表
+}
+
+
+def _normalize_city(city):
+    """统一城市名称格式，去掉"市"后缀"""
+    return city.replace("市", "") if isinstance(city, str) else city
+
+
+def get_store_dir(data_dir):
+    """预计算结果所在目录"""
+    return Path(data_dir) / "cache"
+
+
+def get_store_path(data_dir, generated_on):
+    """指定生成日期的预计算结果文件路径"""
+    return get_store_dir(data_dir) / f"recommendations_v{FORMAT_VERSION}_{generated_on:%Y-%m-%d}{FILE_SUFFIX}"
+
+
+def _read_frame(path):
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _write_frame(frame, path):
+    if path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_pickle(path)
+
+
+def write_recommendations(data_dir, frame, generated_on):
+    """原子写入预计算结果
+
+    Args:
+        data_dir: 数据目录
+        frame: 包含推荐城市、推荐日期、推荐排名列的推荐结果DataFrame
+        generated_on: 生成日期
+
+    Returns:
+        Path: 写入的文件路径
+    """
+    missing = [column for column in KEY_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"预计算推荐结果缺少列: {missing}")
+
+    path = get_store_path(data_dir, generated_on)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 在同一目录下写临时文件，保证 os.replace 是原子操作
+    fd, tmp_name = tempfile.mkstemp(prefix=path.stem + ".", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        _write_frame(frame.reset_index(drop=True), Path(tmp_name))
+        os.replace(tmp_name, path)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    # 当前进程内写入后立即重新查找
+    with _lock:
+        _cache["checked_at"] = None
+    return path
+
+
+def find_latest_store(data_dir):
+    """查找当前格式版本下最新生成的预计算结果文件，不存在时返回None"""
+    store_dir = get_store_dir(data_dir)
+    if not store_dir.is_dir():
+        return None
+    candidates = sorted(store_dir.glob(f"recommendations_v{FORMAT_VERSION}_*{FILE_SUFFIX}"))
+    return candidates[-1] if candidates else None
+
+
+def _build_index(frame):
+    index = {}
+    frame = frame.sort_values([CITY_COLUMN, DATE_COLUMN, RANK_COLUMN])
+    for (city, date_str), group in frame.groupby([CITY_COLUMN, DATE_COLUMN], sort=False):
+        index[(_normalize_city(city), date_str)] = group.drop(columns=KEY_COLUMNS).to_dict("records")
+    return index
+
+
+def _load_index(data_dir):
+    """加载最新的预计算结果并建立 (城市, 日期) 索引，距上次查找不足 RECHECK_INTERVAL 秒时直接返回已加载的索引"""
+    data_dir = str(data_dir)
+    now = time.monotonic()
+    with _lock:
+        if (_cache["data_dir"] == data_dir and _cache["checked_at"] is not None
+                and now - _cache["checked_at"] < RECHECK_INTERVAL):
+            return _cache["index"]
+
+    path = find_latest_store(data_dir)
+    mtime = None
+    if path is not None:
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            path = None
+
+    with _lock:
+        if _cache["data_dir"] == data_dir and _cache["path"] == path and _cache["mtime"] == mtime:
+            _cache["checked_at"] = now
+            return _cache["index"]
+
+    index = {}
+    if path is not None:
+        try:
+            index = _build_index(_read_frame(path))
+        except Exception as e:
+            # 文件损坏时不记录检查时间，下次读取重试
+            logger.error("加载预计算推荐结果失败: %s", e)
+            return {}
+
+    with _lock:
+        _cache.update(data_dir=data_dir, checked_at=now, path=path, mtime=mtime, index=index)
+    return index
+
+
+def get_recommendations(data_dir, city, date_str, top_n=None):
+    """读取某城市某天的预计算推荐结果
+
+    Returns:
+        list: 推荐景点记录列表，没有预计算结果时返回None
+    """
+    records = _load_index(data_dir).get((_normalize_city(city), date_str))
+    if records is None:
+        return None
+    if top_n is not None:
+        if len(records) < top_n:
+            return None
+        records = records[:top_n]
+    return [dict(record) for record in records]
+
+
+def clear():
+    """清空已加载的预计算结果"""
+    with _lock:
+        _cache.update(data_dir=None, checked_at=None, path=None, mtime=None, index={})
@@ -0,0 +1,258 @@
+"""客流量和风险评估数据批量导入
+
+从 data/traffic/*.csv 导入客流量记录（traffic_record），从 data/risk/*.csv 导入风险评估记录（risk_assessment），
+与景点导入（attraction_importer）相同：
+- 使用 pandas 向量化清洗日期、客流量等字段
+- 按 (城市, 景点名称) 解析景点ID，CSV 中没有城市列时取文件名开头的城市名；找不到的景点跳过
+- 以 (景点ID, 日期) 为自然键做 upsert：新记录插入，内容哈希变化的记录更新，未变化的跳过
+- 插入和更新都按块使用 executemany 批量执行，每张表的导入在一个事务中完成
+
+两张表在 (景点ID, 日期) 上有唯一索引（迁移 0011），重复执行不会产生重复记录；
+与其他导入同时执行发生冲突时回滚并重新比较后重试。CSV 中已不存在的记录不会被删除。
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Attraction, RiskAssessment, TrafficRecord
+
+logger = logging.getLogger(__name__)
+
+# CSV列名 -> 自然键字段（景点ID由城市和景点名称解析）
+KEY_COLUMNS = {
+    '城市': 'city',
+    '景点名称': 'name',
+    '日期': 'date',
+}
+
+# CSV列名 -> 记录字段
+TRAFFIC_COLUMNS = {
+    '客流量': 'traffic',
+    '是否节假日': 'is_holiday',
+    '天气': 'weather',
+}
+TRAFFIC_FIELDS = ['traffic', 'is_holiday', 'weather']
+
+RISK_COLUMNS = {
+    '风险等级': 'risk_level',
+    '建议': 'advice',
+    '天气': 'weather',
+}
+RISK_FIELDS = ['risk_level', 'advice', 'weather_forecast']
+
+DEFAULT_CHUNK_SIZE = 500
+
+# 与并发导入冲突（违反唯一约束）时的最多尝试次数
+MAX_ATTEMPTS = 3
+
+
+def city_from_filename(path):
+    """文件名开头的城市名，如 沈阳_traffic_data.csv、沈阳2013-2023年风险评估数据.csv → 沈阳"""
+    match = re.match(r'[^_\d.]+', os.path.basename(path))
+    return match.group() if match else ''
+
+
+def read_record_files(paths):
+    """读取并合并客流量或风险评估CSV文件，缺少城市列时按文件名补上"""
+    frames = []
+    for file_path in sorted(paths):
+        try:
+            df = pd.read_csv(file_path, encoding="utf-8-sig", dtype=str)
+        except Exception as e:
+            logger.error("读取文件 %s 时出错: %s", os.path.basename(file_path), e)
+            continue
+        df.columns = df.columns.str.strip()
+        if '城市' not in df.columns:
+            df['城市'] = city_from_filename(file_path)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=list(KEY_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _text(series):
+    """去除首尾空白，空值和空字符串转为None"""
+    series = series.fillna('').astype(str).str.strip()
+    return series.astype(object).where(series != '', None)
+
+
+def _normalize_keys(raw_df, columns):
+    """重命名列并清洗自然键，缺少城市、名称或日期无法解析的行被丢弃"""
+    df = raw_df.rename(columns=dict(KEY_COLUMNS, **columns))
+    fields = list(KEY_COLUMNS.values()) + list(columns.values())
+    for field in fields:
+        if field not in df.columns:
+            df[field] = None
+    df = df[fields].copy()
+    for field in ['city', 'name']:
+        df[field] = df[field].fillna('').astype(str).str.strip()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.date
+    return df[(df['city'] != '') & (df['name'] != '') & df['date'].notna()]
+
+
+def _drop_duplicate_keys(df):
+    """同一景点同一日期只保留第一条"""
+    return df.drop_duplicates(subset=['city', 'name', 'date'], keep='first').reset_index(drop=True)
+
+
+def normalize_traffic(raw_df):
+    """向量化清洗客流量数据：客流量无法解析的行被丢弃，是否节假日按数值判断"""
+    df = _normalize_keys(raw_df, TRAFFIC_COLUMNS)
+    traffic = pd.to_numeric(df['traffic'], errors='coerce')
+    df = df[traffic.notna()].copy()
+    df['traffic'] = traffic[traffic.notna()].round().astype(int)
+    df['is_holiday'] = pd.to_numeric(df['is_holiday'], errors='coerce').fillna(0).astype(bool)
+    df['weather'] = _text(df['weather'])
+    return _drop_duplicate_keys(df)
+
+
+def normalize_risks(raw_df):
+    """向量化清洗风险评估数据：缺少风险等级的行被丢弃，天气保存在 weather_forecast 中"""
+    df = _normalize_keys(raw_df, RISK_COLUMNS)
+    df['risk_level'] = _text(df['risk_level'])
+    df = df[df['risk_level'].notna()].copy()
+    df['advice'] = _text(df['advice'])
+    df['weather_forecast'] = _text(df['weather']).map(lambda weather: {'weather': weather})
+    return _drop_duplicate_keys(df.drop(columns='weather'))
+
+
+def _hash_value(value):
+    if hasattr(value, 'item'):
+        # NumPy 标量转为 Python 值，与数据库中读出的值序列化结果一致
+        value = value.item()
+    if isinstance(value, float) and pd.isna(value):
+        value = None
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def content_hashes(df, fields):
+    """计算每条记录内容的哈希，用于判断记录是否发生变化"""
+    if df.empty:
+        return pd.Series([], dtype=str, index=df.index)
+    parts = [df[field].map(_hash_value) for field in fields]
+    joined = parts[0].str.cat(parts[1:], sep='\x1f')
+    return joined.map(lambda text: hashlib.md5(text.encode('utf-8')).hexdigest())
+
+
+def _attraction_ids():
+    """(城市, 景点名称) -> 景点ID"""
+    table = Attraction.__table__
+    rows = db.session.execute(select(table.c.id, table.c.city, table.c.name)).all()
+    return pd.DataFrame(rows, columns=['attraction_id', 'city', 'name'])
+
+
+def _load_existing(model, fields, attraction_ids, chunk_size):
+    """读取这些景点的现有记录，同一自然键有多条时使用ID最小的一条"""
+    table = model.__table__
+    rows = []
+    attraction_ids = sorted(attraction_ids)
+    for start in range(0, len(attraction_ids), chunk_size):
+        chunk = attraction_ids[start:start + chunk_size]
+        rows += db.session.execute(
+            select(table.c.id, table.c.attraction_id, table.c.date, *[table.c[field] for field in fields])
+            .where(table.c.attraction_id.in_(chunk))
+            .order_by(table.c.id)
+        ).all()
+    existing = pd.DataFrame(rows, columns=['id', 'attraction_id', 'date'] + fields)
+    existing = existing.drop_duplicates(subset=['attraction_id', 'date'], keep='first')
+    existing['hash'] = content_hashes(existing, fields)
+    return existing[['id', 'attraction_id', 'date', 'hash']]
+
+
+def _records(df, fields):
+    """DataFrame转为executemany参数列表，NaN转为None"""
+    df = df[fields].astype(object).where(df[fields].notna(), None)
+    return df.to_dict('records')
+
+
+def _chunks(records, chunk_size):
+    for start in range(0, len(records), chunk_size):
+        yield records[start:start + chunk_size]
+
+
+def upsert_records(model, df, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按 (景点ID, 日期) upsert 清洗后的记录，内容未变化的跳过
+
+    需要在应用上下文中调用，所有写入在一个事务中提交。
+    其他导入同时插入了相同记录时，回滚后重新读取现有记录再执行，最多尝试 MAX_ATTEMPTS 次。
+
+    Returns:
+        dict: inserted、updated、unchanged 数量，以及找不到景点而跳过的 skipped 数量
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return _upsert_once(model, df, fields, chunk_size)
+        except IntegrityError as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            logger.warning("%s导入与其他导入冲突，重试（第%s次）: %s", model.__tablename__, attempt, e.orig)
+
+
+def _upsert_once(model, df, fields, chunk_size):
+    resolved = df.merge(_attraction_ids(), on=['city', 'name'], how='inner')
+    skipped = len(df) - len(resolved)
+
+    existing = _load_existing(model, fields, set(resolved['attraction_id']), chunk_size)
+    merged = resolved.merge(existing.rename(columns={'hash': 'hash_existing'}), on=['attraction_id', 'date'], how='left')
+    merged['hash'] = content_hashes(merged, fields)
+    is_new = merged['id'].isna()
+    is_changed = ~is_new & (merged['hash'] != merged['hash_existing'])
+
+    table = model.__table__
+    try:
+        to_insert = _records(merged[is_new], ['attraction_id', 'date'] + fields)
+        for chunk in _chunks(to_insert, chunk_size):
+            db.session.execute(insert(table), chunk)
+
+        changed = merged[is_changed].copy()
+        changed['id'] = changed['id'].astype(int)
+        to_update = _records(changed, ['id'] + fields)
+        # ORM按主键批量更新，同样以executemany方式执行
+        for chunk in _chunks(to_update, chunk_size):
+            db.session.execute(update(model), chunk)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'inserted': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'unchanged': int(len(merged) - is_new.sum() - is_changed.sum()),
+        'skipped': int(skipped),
+    }
+
+
+def _import(paths, normalize, model, fields, chunk_size):
+    start_time = time.time()
+    df = normalize(read_record_files(paths))
+    stats = upsert_records(model, df, fields, chunk_size=chunk_size)
+    stats['elapsed'] = round(time.time() - start_time, 3)
+    return stats
+
+
+def import_traffic(paths, chunk_size=DEFAULT_CHUNK_SIZE):
+    """读取、清洗并 upsert 客流量数据（需要在应用上下文中调用）
+
+    Returns:
+        dict: inserted、updated、unchanged、skipped 数量和耗时（秒）
+    """
+    return _import(paths, normalize_traffic, TrafficRecord, TRAFFIC_FIELDS, chunk_size)
+
+
+def import_risks(paths, chunk_size=DEFAULT_CHUNK_SIZE):
+    """读取、清洗并 upsert 风险评估数据（需要在应用上下文中调用）
+
+    Returns:
+        dict: inserted、updated、unchanged、skipped 数量和耗时（秒）
+    """
+    return _import(paths, normalize_risks, RiskAssessment, RISK_FIELDS, chunk_size)
@@ -0,0 +1,247 @@
+"""慢请求剖析
+
+某个 /path/optimize 或 /dashboard 请求偶尔耗时十几秒时，事后只能从日志里看到耗时，看不到时间花在了哪里。
+开启 PROFILE_ENABLED 后，按 PROFILE_SAMPLE_RATE 的概率在请求开始时挂上 cProfile，
+请求结束时若耗时达到 PROFILE_MIN_DURATION_MS 就把剖析结果保存到 logs/profiles/，否则直接丢弃：
+
+- <名称>.folded：折叠调用栈（每行 "帧;帧;帧 微秒"），可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+- <名称>.prof：pstats 二进制格式，可用 snakeviz 或 python -m pstats 查看
+
+文件名包含时间、请求方法、路由规则和耗时，目录中最多保留 PROFILE_MAX_FILES 份，超出时删除最旧的。
+保存的剖析结果在日志查看页面中列出，供管理员下载。
+
+cProfile 只记录当前线程，对被剖析的请求有明显开销，未被抽中的请求没有额外开销，
+因此生产环境应使用较小的采样概率。
+"""
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+
+# 剖析文件名：时间_方法_路由_耗时ms.扩展名
+_FILENAME = re.compile(r'^(\d{8}-\d{6}-\d{6})_([A-Z]+)_([A-Za-z0-9_-]+)_(\d+)ms\.(folded|prof)$')
+
+EXTENSIONS = ('folded', 'prof')
+
+_lock = threading.Lock()
+
+_stats = {
+    "sampled": 0,
+    "saved": 0,
+    "discarded": 0,
+    "pruned": 0,
+    "errors": 0,
+}
+
+
+def _frame_label(func):
+    """pstats 函数键 (文件, 行号, 函数名) 转为火焰图中的帧名称"""
+    filename, lineno, name = func
+    if filename == '~':
+        # 内置函数，如 <built-in method time.sleep>
+        label = name
+    else:
+        path = os.path.abspath(filename)
+        if path.startswith(str(_PROJECT_DIR) + os.sep):
+            path = os.path.relpath(path, _PROJECT_DIR)
+        elif 'site-packages' + os.sep in path:
+            path = path.split('site-packages' + os.sep, 1)[1]
+        else:
+            path = os.path.basename(path)
+        label = f"{name} ({path.replace(os.sep, '/')}:{lineno})"
+    # 分号是折叠格式的帧分隔符
+    return label.replace(';', ',')
+
+
+def collapse(stats, min_fraction=0.001, max_depth=100):
+    """把 cProfile 的调用关系展开为折叠调用栈
+
+    cProfile 只记录"调用者 -> 被调用者"的耗时，不记录完整调用栈。
+    这里从没有调用者的根函数出发，沿调用关系向下展开，
+    被调用者在某条路径上的耗时按该路径占调用者耗时的比例分摊。
+    占总耗时不足 min_fraction 的分支和递归调用不再展开。
+
+    Args:
+        stats: cProfile.Profile().stats 或 pstats.Stats().stats
+
+    Returns:
+        dict: 调用栈（分号分隔的帧） -> 自身耗时（秒）
+    """
+    callees = defaultdict(dict)
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge
+    total = sum(entry[2] for entry in stats.values())
+    min_time = total * min_fraction
+    folded = defaultdict(float)
+
+    def walk(func, path, on_path, share):
+        # share 为该函数的耗时中属于当前调用路径的比例
+        _cc, _nc, tt, ct, _callers = stats[func]
+        if ct * share < min_time or len(path) >= max_depth:
+            return
+        path = path + (_frame_label(func),)
+        if tt * share > 0:
+            folded[';'.join(path)] += tt * share
+        for callee, edge in callees.get(func, {}).items():
+            if callee in on_path or callee not in stats or stats[callee][3] <= 0:
+                continue
+            walk(callee, path, on_path | {callee}, share * edge[3] / stats[callee][3])
+
+    for func, entry in stats.items():
+        if not entry[4]:
+            walk(func, (), frozenset([func]), 1.0)
+    return dict(folded)
+
+
+def format_folded(folded):
+    """折叠调用栈按 flamegraph.pl 的输入格式输出，耗时单位为微秒"""
+    lines = []
+    for stack, seconds in sorted(folded.items()):
+        micros = int(round(seconds * 1e6))
+        if micros > 0:
+            lines.append(f"{stack} {micros}")
+    return "\n".join(lines) + "\n"
+
+
+def _slug(rule):
+    return re.sub(r'[^A-Za-z0-9_]+', '-', rule).strip('-')[:60] or 'root'
+
+
+def save_profile(profile, directory, method, rule, duration_ms, max_files=None):
+    """保存一次请求的剖析结果并按保留份数清理旧文件，返回文件名（不含扩展名）"""
+    directory = Path(directory)
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}_{method.upper()}_{_slug(rule)}_{int(duration_ms)}ms"
+    profile.create_stats()
+    text = format_folded(collapse(profile.stats))
+
+    with _lock:
+        os.makedirs(directory, exist_ok=True)
+        (directory / f"{name}.folded").write_text(text, encoding='utf-8')
+        profile.dump_stats(str(directory / f"{name}.prof"))
+        _stats["saved"] += 1
+        if max_files:
+            _prune(directory, max_files)
+    return name
+
+
+def _profile_names(directory):
+    """目录中的剖析名称，按时间从旧到新"""
+    names = set()
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            match = _FILENAME.match(filename)
+            if match:
+                names.add(filename.rsplit('.', 1)[0])
+    return sorted(names)
+
+
+def _prune(directory, max_files):
+    """只保留最新的 max_files 份剖析结果（调用方持有 _lock）"""
+    names = _profile_names(directory)
+    for name in names[:max(len(names) - max_files, 0)]:
+        for extension in EXTENSIONS:
+            try:
+                os.remove(directory / f"{name}.{extension}")
+            except FileNotFoundError:
+                pass
+        _stats["pruned"] += 1
+
+
+def list_profiles(directory):
+    """列出保存的剖析结果，最新的在前"""
+    directory = Path(directory)
+    profiles = []
+    for name in reversed(_profile_names(directory)):
+        created, method, slug, duration_ms = _FILENAME.match(f"{name}.folded").groups()[:4]
+        files = [extension for extension in EXTENSIONS if (directory / f"{name}.{extension}").exists()]
+        profiles.append({
+            "name": name,
+            "created": datetime.strptime(created, '%Y%m%d-%H%M%S-%f'),
+            "method": method,
+            "endpoint": slug,
+            "duration_ms": int(duration_ms),
+            "files": files,
+        })
+    return profiles
+
+
+def profile_path(directory, filename):
+    """校验下载的文件名，返回剖析文件路径，文件名不合法或不存在时返回None"""
+    if not _FILENAME.match(filename):
+        return None
+    path = Path(directory) / filename
+    return path if path.is_file() else None
+
+
+def _before_request():
+    from flask import current_app, g
+    config = current_app.config
+    if random.random() >= config.get('PROFILE_SAMPLE_RATE', 0.0):
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # 其他剖析工具已在运行
+        return
+    g._profile = profile
+    g._profile_started = time.perf_counter()
+    with _lock:
+        _stats["sampled"] += 1
+
+
+def _teardown_request(exc=None):
+    from flask import current_app, g, request
+    profile = g.pop('_profile', None)
+    if profile is None:
+        return
+    profile.disable()
+    duration_ms = (time.perf_counter() - g.pop('_profile_started')) * 1000
+    config = current_app.config
+    if duration_ms < config.get('PROFILE_MIN_DURATION_MS', 1000):
+        with _lock:
+            _stats["discarded"] += 1
+        return
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    try:
+        name = save_profile(profile, config['PROFILE_DIR'], request.method, rule, duration_ms,
+                            max_files=config.get('PROFILE_MAX_FILES'))
+    except Exception:
+        with _lock:
+            _stats["errors"] += 1
+        logger.exception("保存慢请求剖析结果失败: %s %s", request.method, rule)
+        return
+    logger.warning("慢请求 %s %s 耗时 %.0fms，已保存剖析结果 %s", request.method, rule, duration_ms, name,
+                   extra={'duration_ms': round(duration_ms, 1), 'profile': name})
+
+
+def init_app(app):
+    """开启 PROFILE_ENABLED 时为应用注册慢请求剖析"""
+    if not app.config.get('PROFILE_ENABLED'):
+        return
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+
+
+def clear():
+    """清空统计"""
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def get_stats():
+    """获取剖析统计信息"""
+    with _lock:
+        return dict(_stats)
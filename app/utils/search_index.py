@@ -0,0 +1,308 @@
+"""景点搜索倒排索引
+
+在内存中为景点名称、景点类型和简介建立倒排索引：
+- 中文按单字和相邻两字（bigram）切分，英文和数字按连续字母数字切分
+- 景点名称额外记录拼音首字母（如"沈阳故宫" -> "sygg"），支持拼音首字母搜索和补全
+- 检索结果按 BM25 相关度加评分排序
+- 支持城市筛选和名称前缀补全（search-as-you-type）
+
+索引随景点数据构建一次，按 POI 数据文件的名称和修改时间缓存，数据文件变化后自动重建。
+安装了 pypinyin 时使用其计算拼音首字母，否则使用 GB2312 编码区间推算（覆盖一级常用汉字）。
+"""
+import bisect
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+
+# 字段权重：名称命中比简介命中更重要
+FIELD_WEIGHTS = {
+    "景点名称": 3.0,
+    "景点类型": 1.5,
+    "简介": 1.0,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 评分（0-5分）在最终排序分数中的权重
+RATING_WEIGHT = 0.5
+
+_CJK_RUN = re.compile(r"[一-龥]+")
+_WORD_RUN = re.compile(r"[a-z0-9]+")
+
+# GB2312 一级汉字按拼音排序，各声母起始编码
+_GB2312_INITIALS = [
+    (0xB0A1, "a"), (0xB0C5, "b"), (0xB2C1, "c"), (0xB4EE, "d"), (0xB6EA, "e"),
+    (0xB7A2, "f"), (0xB8C1, "g"), (0xB9FE, "h"), (0xBBF7, "j"), (0xBFA6, "k"),
+    (0xC0AC, "l"), (0xC2E8, "m"), (0xC4C3, "n"), (0xC5B6, "o"), (0xC5BE, "p"),
+    (0xC6DA, "q"), (0xC8BB, "r"), (0xC8F6, "s"), (0xCBFA, "t"), (0xCDDA, "w"),
+    (0xCEF4, "x"), (0xD1B9, "y"), (0xD4D1, "z"),
+]
+_GB2312_CODES = [code for code, _ in _GB2312_INITIALS]
+_GB2312_END = 0xD7FA
+
+
+def _normalize_city(city):
+    """统一城市名称格式，去掉"市"后缀"""
+    return city.replace("市", "") if isinstance(city, str) else city
+
+
+def _char_initial(char):
+    """通过 GB2312 编码推算单个汉字的拼音首字母，无法推算时返回空字符串"""
+    try:
+        encoded = char.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    if len(encoded) != 2:
+        return ""
+    code = (encoded[0] << 8) + encoded[1]
+    if code < _GB2312_CODES[0] or code >= _GB2312_END:
+        return ""
+    return _GB2312_INITIALS[bisect.bisect_right(_GB2312_CODES, code) - 1][1]
+
+
+def pinyin_initials(text):
+    """计算文本的拼音首字母，英文和数字原样保留（小写）"""
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    if lazy_pinyin is not None:
+        return "".join(
+            part[0] for part in lazy_pinyin(text, style=Style.FIRST_LETTER, errors=lambda s: list(s))
+            if part and (part[0].isalnum())
+        )
+    initials = []
+    for char in text:
+        if char.isascii():
+            if char.isalnum():
+                initials.append(char)
+        else:
+            initials.append(_char_initial(char))
+    return "".join(initials)
+
+
+def tokenize(text):
+    """将文本切分为检索词：中文单字和 bigram，英文数字按词"""
+    if not isinstance(text, str):
+        return []
+    text = text.lower()
+    tokens = []
+    for run in _CJK_RUN.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD_RUN.findall(text))
+    return tokens
+
+
+def _query_terms(keyword):
+    """查询词：中文片段有两个字以上时只用 bigram，单字时用单字"""
+    keyword = keyword.lower()
+    terms = []
+    for run in _CJK_RUN.findall(keyword):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    terms.extend(_WORD_RUN.findall(keyword))
+    return list(dict.fromkeys(terms))
+
+
+class AttractionSearchIndex:
+    """景点倒排索引，文档编号为景点在 DataFrame 中的位置"""
+
+    def __init__(self, attractions_df):
+        self.df = attractions_df.reset_index(drop=True)
+        self.postings = defaultdict(dict)   # 检索词 -> {文档编号: 加权词频}
+        self.doc_lengths = []
+        self.city_docs = defaultdict(list)  # 城市 -> 文档编号列表
+        self.names = []
+        self.texts = []                     # 用于校验子串匹配的小写文本
+        self.initials = []
+        self.ratings = []
+        self._build()
+
+    def _build(self):
+        columns = [column for column in FIELD_WEIGHTS if column in self.df.columns]
+        records = self.df[columns + [c for c in ("城市", "评分") if c in self.df.columns]].to_dict("records")
+
+        name_prefixes = []
+        initial_prefixes = []
+        for doc_id, record in enumerate(records):
+            length = 0.0
+            texts = []
+            for column in columns:
+                value = record.get(column)
+                tokens = tokenize(value)
+                weight = FIELD_WEIGHTS[column]
+                for token in tokens:
+                    postings = self.postings[token]
+                    postings[doc_id] = postings.get(doc_id, 0.0) + weight
+                length += weight * len(tokens)
+                texts.append(value.lower() if isinstance(value, str) else "")
+            self.doc_lengths.append(length)
+            self.texts.append(texts)
+
+            name = record.get("景点名称")
+            name = name if isinstance(name, str) else ""
+            initials = pinyin_initials(name)
+            self.names.append(name)
+            self.initials.append(initials)
+            name_prefixes.append((name.lower(), doc_id))
+            if initials:
+                initial_prefixes.append((initials, doc_id))
+
+            rating = record.get("评分", 0)
+            self.ratings.append(float(rating) if rating == rating and rating is not None else 0.0)
+            self.city_docs[_normalize_city(record.get("城市"))].append(doc_id)
+
+        self.postings = dict(self.postings)
+        self.city_docs = {city: set(doc_ids) for city, doc_ids in self.city_docs.items()}
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        # 按名称和拼音首字母排序，前缀查询用二分查找
+        self.name_prefixes = sorted(name_prefixes)
+        self.initial_prefixes = sorted(initial_prefixes)
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _city_filter(self, city):
+        if not city:
+            return None
+        return self.city_docs.get(_normalize_city(city), set())
+
+    @staticmethod
+    def _prefix_range(sorted_pairs, prefix):
+        start = bisect.bisect_left(sorted_pairs, (prefix,))
+        for key, doc_id in sorted_pairs[start:]:
+            if not key.startswith(prefix):
+                break
+            yield doc_id
+
+    def _bm25(self, term, doc_id, idf):
+        tf = self.postings[term][doc_id]
+        norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / (self.avg_length or 1.0)
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+    def search(self, keyword, city=None, top_n=20):
+        """关键词检索
+
+        名称、类型或简介中包含完整关键词的景点，以及拼音首字母以关键词开头的景点会被返回，
+        按 BM25 相关度加评分排序。
+
+        Returns:
+            list: 按相关度排序的文档编号
+        """
+        keyword = (keyword or "").strip().lower()
+        if not keyword:
+            return []
+        allowed = self._city_filter(city)
+
+        scores = {}
+        terms = _query_terms(keyword)
+        if terms:
+            term_postings = [self.postings.get(term, {}) for term in terms]
+            candidates = set(min(term_postings, key=len))
+            for postings in term_postings:
+                candidates.intersection_update(postings)
+            if allowed is not None:
+                candidates &= allowed
+
+            total = len(self)
+            idfs = [math.log(1 + (total - len(p) + 0.5) / (len(p) + 0.5)) for p in term_postings]
+            for doc_id in candidates:
+                # bigram 全部命中不代表包含完整关键词，再做一次子串校验
+                if not any(keyword in text for text in self.texts[doc_id]):
+                    continue
+                scores[doc_id] = sum(self._bm25(term, doc_id, idf) for term, idf in zip(terms, idfs))
+
+        if keyword.isascii() and keyword.isalnum():
+            for doc_id in self._prefix_range(self.initial_prefixes, keyword):
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                # 拼音首字母匹配视为名称命中
+                scores.setdefault(doc_id, FIELD_WEIGHTS["景点名称"])
+
+        ranked = sorted(scores, key=lambda d: (-(scores[d] + RATING_WEIGHT * self.ratings[d]), d))
+        return ranked[:top_n]
+
+    def suggest(self, prefix, city=None, limit=10):
+        """名称前缀补全，同时支持拼音首字母前缀，按评分排序
+
+        Returns:
+            list: 文档编号列表
+        """
+        prefix = (prefix or "").strip().lower()
+        if not prefix:
+            return []
+        allowed = self._city_filter(city)
+
+        doc_ids = set(self._prefix_range(self.name_prefixes, prefix))
+        if prefix.isascii() and prefix.isalnum():
+            doc_ids.update(self._prefix_range(self.initial_prefixes, prefix))
+        if allowed is not None:
+            doc_ids &= allowed
+
+        return sorted(doc_ids, key=lambda d: (-self.ratings[d], self.names[d]))[:limit]
+
+    def suggest_records(self, prefix, city=None, limit=10):
+        """名称补全，返回包含城市、景点名称、景点类型和评分的字典列表"""
+        doc_ids = self.suggest(prefix, city=city, limit=limit)
+        columns = [column for column in ("城市", "景点名称", "景点类型", "评分") if column in self.df.columns]
+        return self.df.iloc[doc_ids][columns].to_dict("records")
+
+
+_lock = threading.Lock()
+
+_cache = {
+    "key": None,
+    "index": None,
+}
+
+
+def catalog_key(data_dir):
+    """根据 POI 数据文件的名称、大小和修改时间计算景点数据版本"""
+    poi_dir = Path(data_dir) / "poi"
+    parts = []
+    if poi_dir.is_dir():
+        for path in sorted(poi_dir.glob("*_attractions.csv")):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            parts.append((path.name, stat.st_size, stat.st_mtime_ns))
+    return (os.path.abspath(data_dir), tuple(parts))
+
+
+def get_index(data_dir, attractions_df):
+    """获取景点数据对应的倒排索引，景点数据未变化时复用已构建的索引"""
+    key = catalog_key(data_dir)
+    with _lock:
+        if _cache["key"] == key and _cache["index"] is not None:
+            return _cache["index"]
+        index = AttractionSearchIndex(attractions_df)
+        _cache.update(key=key, index=index)
+        return index
+
+
+def get_cached_index(data_dir):
+    """获取已构建且仍然有效的索引，没有时返回None（不加载景点数据）"""
+    key = catalog_key(data_dir)
+    with _lock:
+        if _cache["key"] == key:
+            return _cache["index"]
+    return None
+
+
+def clear():
+    """清空已构建的索引"""
+    with _lock:
+        _cache.update(key=None, index=None)
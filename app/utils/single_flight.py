@@ -0,0 +1,130 @@
+"""合并并发的相同计算（single-flight）
+
+多个用户同时打开全部城市预测页或决策中心时，各个请求线程会各自执行同一份昂贵的计算
+（predict_all_cities、calculate_city_travel_score），缓存尚未写入时甚至会重复训练模型。
+同一分组内，键相同的调用如果已有一次正在执行，后来的调用等待它完成并共享它的结果（或异常），
+不再重复计算；计算结束后键即释放，之后的调用重新执行（结果缓存由各缓存模块负责）。
+
+键由调用的输入决定。天气数据等 DataFrame 参数以 id() 作为键的一部分：
+执行中的调用持有该对象的引用，期间 id 不会被复用，data_loader 等缓存对同一份数据返回同一个对象。
+
+等待方拿到的是同一个结果对象，结果可能被调用方修改（如 DataFrame）时通过 copy 参数为等待方复制一份。
+"""
+import logging
+import threading
+from functools import wraps
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe('app_single_flight_calls_total', 'counter', "合并计算的调用次数，role=leader 为实际执行，follower 为等待共享")
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+class _Call:
+    """一次正在执行的计算"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class Group:
+    """一组可合并的计算，键在组内唯一"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {
+            "leaders": 0,
+            "followers": 0,
+            "errors": 0,
+        }
+
+    def do(self, key, func, *args, copy=None, **kwargs):
+        """执行 func(*args, **kwargs)；键相同的调用正在执行时等待并共享其结果
+
+        Args:
+            copy: 可选，为等待方复制结果的函数
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                call.followers += 1
+                self._stats["followers"] += 1
+        metrics.inc('app_single_flight_calls_total', group=self.name, role='leader' if leader else 'follower')
+
+        if not leader:
+            logger.debug("等待正在执行的相同计算 %s %s", self.name, key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result if copy is None else copy(call.result)
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.followers:
+                logger.debug("计算 %s %s 的结果共享给 %d 个等待的调用", self.name, key, call.followers)
+
+    def in_flight(self):
+        """正在执行的计算数"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+
+def group(name):
+    """按名称获取（或创建）分组"""
+    with _groups_lock:
+        found = _groups.get(name)
+        if found is None:
+            found = _groups[name] = Group(name)
+        return found
+
+
+def coalesce(name, key, copy=None):
+    """装饰器：合并键相同的并发调用
+
+    Args:
+        name: 分组名称
+        key: 由被装饰函数的参数计算键的函数，参数与被装饰函数相同
+        copy: 可选，为等待方复制结果的函数
+    """
+    def decorator(func):
+        flight = group(name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return flight.do(key(*args, **kwargs), func, *args, copy=copy, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_stats():
+    """各分组的统计信息"""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {flight.name: flight.get_stats() for flight in groups}
@@ -0,0 +1,237 @@
+"""启动预热
+
+create_app 不再导入 pandas、scikit-learn 和各个服务模块（见 test_startup.py），
+如果不预热，部署后的第一批用户要承担导入、CSV解析、景点数据清洗和天气预测的全部耗时。
+预热在后台线程中并行执行以下任务，把结果放进各模块已有的进程内缓存：
+
+- weather_data：全部城市天气数据和查询页面的筛选选项（data_loader）
+- attractions：景点数据和景点搜索索引（search_index）
+- attraction_suggest：数据库景点名称补全索引（attraction_suggest）
+- recommendations：当天的预计算推荐结果（recommendation_store）
+- forecasts：加载持久化的天气预测模型，预测全部城市并写入预测缓存（forecast_cache），依赖 weather_data
+
+预热有时间预算 WARMUP_TIMEOUT（秒），超时后不再等待未完成的任务（它们继续在后台执行），
+直接标记为就绪，避免某个任务卡住导致实例永远不接收流量。
+预派生模式（prefork.prepare）在 fork 之前以 wait_all=True 执行，不限时间，等待全部任务结束、线程退出：
+fork 时仍在执行的线程可能持有模块中的锁，子进程继承到已锁定的锁会死锁。
+
+/healthz 只表示进程存活；/readyz 在预热完成（或超时）且数据库可用时才返回 200，
+负载均衡据此决定是否转发流量，冷实例不会接到请求。
+
+预热由服务启动入口（run.py）调用 start() 开始，使用 create_app 的命令行脚本不会预热。
+WARMUP_ENABLED 关闭或测试模式下不预热，直接就绪。
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'  # 依赖的任务失败
+TIMEOUT = 'timeout'  # 超出时间预算时仍未完成
+
+
+def _data_dir(app):
+    return os.path.abspath(app.config.get('DATA_DIR', 'data'))
+
+
+def _warm_weather_data(app):
+    from app.utils.data_loader import get_filter_options, load_all_city_data
+    weather_df = load_all_city_data()
+    get_filter_options()
+    return {"rows": len(weather_df)}
+
+
+def _warm_attractions(app):
+    from app.services.recommendation_service import RecommendationService
+    service = RecommendationService(_data_dir(app))
+    service.get_search_index()
+    return {"attractions": len(service.attractions_df)}
+
+
+def _warm_attraction_suggest(app):
+    from app.utils import attraction_suggest
+    attraction_suggest.get_index()
+    return {}
+
+
+def _warm_recommendations(app):
+    from app.utils import recommendation_store
+    path = recommendation_store.find_latest_store(_data_dir(app))
+    if path is None:
+        return {"store": None}
+    recommendation_store.get_recommendations(_data_dir(app), '沈阳', datetime.now().strftime('%Y-%m-%d'))
+    return {"store": path.name}
+
+
+def _warm_forecasts(app):
+    from app.services.prediction_service import WeatherPredictionServiceFactory
+    from app.utils import forecast_cache
+    from app.utils.data_loader import load_all_city_data
+    prediction_service = WeatherPredictionServiceFactory.create_service(data_dir=_data_dir(app))
+    predictions = forecast_cache.warm_up(prediction_service, load_all_city_data(),
+                                         days=app.config.get('WARMUP_FORECAST_DAYS', 7))
+    return {"cities": len(predictions)}
+
+
+# (名称, 函数, 依赖的任务)，依赖的任务必须排在前面
+TASKS = [
+    ('weather_data', _warm_weather_data, ()),
+    ('attractions', _warm_attractions, ()),
+    ('attraction_suggest', _warm_attraction_suggest, ()),
+    ('recommendations', _warm_recommendations, ()),
+    ('forecasts', _warm_forecasts, ('weather_data',)),
+]
+
+
+class Warmup:
+    """单个应用的预热状态"""
+
+    def __init__(self, app, tasks=None, timeout=120, workers=4):
+        self.app = app
+        self.tasks = list(TASKS if tasks is None else tasks)
+        self.timeout = timeout
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.finished_at = None
+        self.timed_out = False
+        self.results = {name: {"status": PENDING} for name, _func, _requires in self.tasks}
+
+    def start(self):
+        """在后台线程中开始预热，立即返回"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def run(self, wait_all=False):
+        """并行执行全部任务，全部完成或超出时间预算后标记为就绪
+
+        Args:
+            wait_all: 为 True 时不限时间，等待全部任务结束且工作线程退出后才返回
+        """
+        self.started_at = time.perf_counter()
+        if wait_all:
+            logger.info("开始预热，等待全部任务完成")
+        else:
+            logger.info("开始预热，时间预算 %ss", self.timeout)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='warmup')
+        futures = {}
+        for name, func, requires in self.tasks:
+            futures[name] = executor.submit(self._run_task, name, func, [futures[dep] for dep in requires])
+        done, not_done = wait(futures.values(), timeout=None if wait_all else self.timeout)
+        # 超出时间预算时不等待未完成的任务，它们在后台继续执行并更新各自的状态
+        executor.shutdown(wait=wait_all, cancel_futures=not wait_all)
+
+        with self._lock:
+            self.timed_out = bool(not_done)
+            for name, future in futures.items():
+                if future in not_done:
+                    self.results[name]["status"] = TIMEOUT
+            self.finished_at = time.perf_counter()
+        elapsed = self.finished_at - self.started_at
+        metrics.observe('app_span_duration_seconds', elapsed, span='warmup')
+        if self.timed_out:
+            logger.warning("预热超出时间预算 %ss，未完成的任务: %s", self.timeout,
+                           ', '.join(name for name, future in futures.items() if future in not_done))
+        else:
+            logger.info("预热完成，耗时 %.1fs", elapsed, extra={'duration_ms': round(elapsed * 1000, 1)})
+        self._ready.set()
+
+    def _run_task(self, name, func, dependencies):
+        for dependency in dependencies:
+            try:
+                succeeded = dependency.result() is True
+            except Exception:
+                succeeded = False
+            if not succeeded:
+                self._update(name, status=SKIPPED)
+                return False
+        self._update(name, status=RUNNING)
+        started = time.perf_counter()
+        try:
+            with self.app.app_context(), metrics.span(f"warmup.{name}"):
+                details = func(self.app)
+        except Exception as e:
+            self._update(name, status=FAILED, error=str(e),
+                         duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            logger.exception("预热任务 %s 失败", name)
+            return False
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self._update(name, status=DONE, duration_ms=duration_ms, **(details or {}))
+        logger.info("预热任务 %s 完成", name, extra={'duration_ms': duration_ms, 'task': name})
+        return True
+
+    def _update(self, name, **fields):
+        with self._lock:
+            result = self.results[name]
+            # 超出时间预算后才完成的任务同样更新为最终状态
+            result.clear()
+            result.update(fields)
+
+    def mark_ready(self):
+        """不预热，直接就绪"""
+        self._ready.set()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """等待预热结束，返回是否就绪"""
+        return self._ready.wait(timeout)
+
+    def get_status(self):
+        """预热状态，供 /readyz 输出"""
+        with self._lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = round((self.finished_at or time.perf_counter()) - self.started_at, 3)
+            return {
+                "ready": self.is_ready(),
+                "timed_out": self.timed_out,
+                "elapsed_seconds": elapsed,
+                "tasks": {name: dict(result) for name, result in self.results.items()},
+            }
+
+
+def init_app(app):
+    """为应用创建预热状态，WARMUP_ENABLED 关闭或测试模式下直接就绪"""
+    warmup = Warmup(
+        app,
+        timeout=app.config.get('WARMUP_TIMEOUT', 120),
+        workers=app.config.get('WARMUP_WORKERS', 4),
+    )
+    app.extensions['warmup'] = warmup
+    if not app.config.get('WARMUP_ENABLED', True) or app.testing:
+        warmup.mark_ready()
+    return warmup
+
+
+def start(app):
+    """在后台开始预热（已就绪时不执行）"""
+    warmup = get_warmup(app)
+    if not warmup.is_ready():
+        warmup.start()
+    return warmup
+
+
+def get_warmup(app=None):
+    """获取应用的预热状态，默认为当前应用"""
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+    return app.extensions['warmup']
@@ -0,0 +1,24 @@
+# gunicorn 预派生部署配置（仅 Linux，需另行 pip install gunicorn）：
+#     gunicorn -c gunicorn.conf.py run:app
+#
+# preload_app 让主进程在 fork 之前导入 run.py，run.py 检测到 PREFORK=1 后同步预热并冻结已加载的对象，
+# 各工作进程以写时复制的方式共享天气数据、景点数据和预测模型，见 app/utils/prefork.py。
+# 多个工作进程需要共享的后台任务队列：设置 JOB_BACKEND=redis（及 JOB_REDIS_URL），否则启动时报错。
+# 预派生模式下日志文件不在进程内轮转（LOG_ROTATE 默认关闭），由 logrotate 等外部工具负责。
+# 用 python scripts/measure_memory.py --pid <主进程PID> 查看每个工作进程的独占内存（USS）。
+import os
+
+os.environ.setdefault('PREFORK', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+# 单个请求的超时（秒），超时的工作进程由主进程重启；预热在 fork 之前完成，不计入
+timeout = 120
+
+
+def post_fork(server, worker):
+    """工作进程启动自己的日志后台线程，请求线程不直接写日志文件"""
+    from app.utils import log_setup
+    log_setup.start_in_worker()
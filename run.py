@@ -1,4 +1,6 @@
 from app import create_app
+from app.config import Config
+from app.utils import prefork, warmup
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +10,17 @@ load_dotenv()
 # 创建应用实例
 app = create_app()
 
+# 检查数据目录，数据目录不存在时直接报错退出
+for warning in Config.validate():
+    app.logger.warning(warning)
+
+if os.environ.get('PREFORK') == '1':
+    # 预派生部署（gunicorn.conf.py）：fork 之前同步预热，工作进程共享已加载的数据和模型
+    prefork.prepare(app)
+else:
+    # 在后台预热数据和模型，预热完成前 /readyz 返回503
+    warmup.start(app)
+
 if __name__ == '__main__':
     # 获取环境变量中的配置
     debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+基准测试：服务方法和主要页面、接口的耗时，结果保存为JSON，便于在不同提交之间比较
+
+- 每个用例先预热（加载模型、填充缓存），再计时运行 --repeat 次，每次运行前用固定种子
+  重置 random 和 numpy 的随机数，遗传算法等随机过程在同一提交上可重复
+- 使用 data/ 下的数据文件，以及 app.db 的临时副本（不修改 app.db）
+- 记录每个用例的最小值、中位数、平均值、p95 和标准差（毫秒），以及提交号、Python 版本等环境信息
+- --compare 与之前保存的结果按中位数比较，变慢超过 --threshold 的用例视为性能回退
+
+用法：
+    python scripts/benchmark.py                                  # 运行全部用例
+    python scripts/benchmark.py --filter path --repeat 10        # 只运行名称包含 path 的用例
+    python scripts/benchmark.py --list                           # 列出全部用例
+    python scripts/benchmark.py --compare benchmarks/results/上次的结果.json --fail-on-regression
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+# 将项目根目录添加到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+SEED = 20240601
+CITY = '沈阳'
+
+# 用例名称 -> (分组, 创建被测函数的 setup 函数, 最多计时次数)
+CASES = {}
+
+
+def case(name, group, max_repeat=None):
+    """登记用例：setup(fixtures) 返回无参数的被测函数
+
+    max_repeat 限制耗时很长的用例（如冷启动加载全部数据）的计时次数。
+    """
+    def decorator(setup):
+        CASES[name] = (group, setup, max_repeat)
+        return setup
+    return decorator
+
+
+def seed_all(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+class Fixtures:
+    """用例共享的应用、数据和服务，首次使用时创建"""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self._cache = {}
+
+    def _get(self, key, factory):
+        if key not in self._cache:
+            self._cache[key] = factory()
+        return self._cache[key]
+
+    @property
+    def data_dir(self):
+        from app.config import Config
+        return os.path.abspath(Config.DATA_DIR)
+
+    @property
+    def app(self):
+        return self._get('app', self._create_app)
+
+    def _create_app(self):
+        from app import create_app, db
+        from app.config import Config
+        from app.models import User
+
+        db_path = os.path.join(self.workdir, 'benchmark.db')
+        shutil.copyfile(os.path.join(ROOT, 'app.db'), db_path)
+
+        class BenchmarkConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+            LOG_CONSOLE = False
+
+        app = create_app(BenchmarkConfig)
+        with app.app_context():
+            user = User.query.filter_by(username='benchmark').first()
+            if user is None:
+                user = User(username='benchmark', email='benchmark@example.com')
+                user.set_password('benchmark')
+                db.session.add(user)
+                db.session.commit()
+            self._cache['user_id'] = user.id
+        app.app_context().push()
+        return app
+
+    @property
+    def client(self):
+        def factory():
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = f"user_{self._cache['user_id']}"
+                sess['_fresh'] = True
+            return client
+        return self._get('client', factory)
+
+    @property
+    def weather_df(self):
+        from app.utils.data_loader import load_all_city_data
+        return self._get('weather_df', lambda: load_all_city_data())
+
+    @property
+    def city_weather(self):
+        def factory():
+            from app.services.weather_service import WeatherService
+            return WeatherService(self.data_dir, CITY).df
+        return self._get('city_weather', factory)
+
+    @property
+    def forecast(self):
+        """7天的天气预报（列表），用于客流量和风险评估"""
+        def factory():
+            from app.services.weather_service import WeatherService
+            seed_all()
+            return WeatherService(self.data_dir, CITY).get_future_weather_forecast(days=7, city=CITY)
+        return self._get('forecast', factory)
+
+    def service(self, name):
+        def factory():
+            from app.services.path_optimization_service import PathOptimizationService
+            from app.services.prediction_service import WeatherPredictionService
+            from app.services.recommendation_service import RecommendationService
+            from app.services.risk_assessment_service import RiskAssessmentService
+            from app.services.traffic_prediction_service import TrafficPredictionService
+            self.app
+            factories = {
+                'path': PathOptimizationService,
+                'prediction': lambda: WeatherPredictionService(self.data_dir),
+                'recommendation': lambda: RecommendationService(self.data_dir),
+                'risk': lambda: RiskAssessmentService(self.data_dir),
+                'traffic': lambda: TrafficPredictionService(self.data_dir),
+            }
+            return factories[name]()
+        return self._get(('service', name), factory)
+
+
+# ---------------------------------------------------------------- 服务用例
+
+@case('load_all_city_data.cold', 'data', max_repeat=2)
+def _load_all_city_data_cold(fx):
+    from app.utils import data_loader
+
+    def run():
+        data_loader._cache["all_data"] = None
+        data_loader.load_all_city_data(use_cache=False)
+    return run
+
+
+@case('load_all_city_data.cached', 'data')
+def _load_all_city_data_cached(fx):
+    from app.utils import data_loader
+    return lambda: data_loader.load_all_city_data()
+
+
+@case('recommend_by_weather', 'recommendation')
+def _recommend_by_weather(fx):
+    service, weather_df = fx.service('recommendation'), fx.weather_df
+    return lambda: service.recommend_by_weather(weather_df, city=CITY, top_n=10)
+
+
+@case('calculate_city_travel_score', 'recommendation')
+def _calculate_city_travel_score(fx):
+    service, weather_df = fx.service('recommendation'), fx.weather_df
+    return lambda: service.calculate_city_travel_score(weather_df)
+
+
+def _path_case(days):
+    def setup(fx):
+        service = fx.service('path')
+        preferences = {'attraction_types': ['风景名胜'], 'min_rating': 4.0}
+        return lambda: service.generate_closed_loop_path(CITY, days, preferences, CITY, [])
+    return setup
+
+
+for _days in (1, 3, 7):
+    case(f'generate_closed_loop_path.{_days}d', 'path')(_path_case(_days))
+
+
+@case('predict_future', 'prediction')
+def _predict_future(fx):
+    service, weather_df = fx.service('prediction'), fx.weather_df
+    return lambda: service.predict_future(weather_df, CITY, 7)
+
+
+@case('predict_traffic.7d', 'traffic')
+def _predict_traffic(fx):
+    service, forecast = fx.service('traffic'), fx.forecast
+    attraction_name = service.attractions_df['景点名称'].iloc[0]
+    return lambda: service.predict_future_traffic(attraction_name, forecast)
+
+
+@case('assess_batch_risk.7d', 'risk')
+def _assess_batch_risk(fx):
+    service = fx.service('risk')
+    forecasts = [
+        {'date': day['date'], 'weather': day['weather'], 'temperature': day['temperature'],
+         'wind': day.get('wind', 0), 'precipitation': day.get('precipitation', 0)}
+        for day in fx.forecast
+    ]
+
+    def run():
+        for attraction_type in ('户外', '室内', '水上'):
+            service.assess_batch_risk(attraction_type, forecasts)
+    return run
+
+
+@case('generate_all_charts', 'charts')
+def _generate_all_charts(fx):
+    from app.routes.visualizations import _generate_all_charts
+    data = fx.city_weather
+    return lambda: _generate_all_charts(data)
+
+
+# ---------------------------------------------------------------- 接口用例
+
+def _get_case(path):
+    def setup(fx):
+        client = fx.client
+
+        def run():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return run
+    return setup
+
+
+def _post_case(path, payload):
+    def setup(fx):
+        client = fx.client
+
+        def run():
+            response = client.post(path, json=payload)
+            assert response.status_code == 200, (path, response.status_code)
+        return run
+    return setup
+
+
+for _name, _path in [
+    ('GET /dashboard', f'/dashboard?city={CITY}'),
+    ('GET /recommendation/', f'/recommendation/?city={CITY}'),
+    ('GET /prediction/', f'/prediction/?city={CITY}'),
+    ('GET /api/cities/list', '/api/cities/list'),
+    ('GET /api/attractions/list', f'/api/attractions/list?city={CITY}'),
+    ('GET /path/history', '/path/history'),
+]:
+    case(_name, 'endpoints')(_get_case(_path))
+
+case('POST /path/optimize', 'endpoints')(_post_case(
+    '/path/optimize', {'start_city': CITY, 'target_city': CITY, 'days': 3, 'preferences': {}}))
+
+
+# ---------------------------------------------------------------- 运行和比较
+
+def summarize(samples):
+    """耗时统计（毫秒）"""
+    ordered = sorted(samples)
+    p95_index = max(int(round(0.95 * len(ordered))) - 1, 0)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(ordered[p95_index] * 1000, 3),
+        'stdev_ms': round(statistics.stdev(ordered) * 1000, 3) if len(ordered) > 1 else 0.0,
+    }
+
+
+def run_case(fx, name, repeat, warmup):
+    group, setup, max_repeat = CASES[name]
+    if max_repeat is not None:
+        repeat = min(repeat, max_repeat)
+    seed_all()
+    func = setup(fx)
+    for _ in range(warmup):
+        seed_all()
+        func()
+    samples = []
+    for _ in range(repeat):
+        seed_all()
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return dict(summarize(samples), group=group)
+
+
+def environment():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+    }
+
+
+def compare(baseline, current, threshold):
+    """按中位数比较两次结果，返回变慢超过阈值的用例"""
+    regressions = []
+    print(f"\n{'用例':<40}{'之前(ms)':>12}{'现在(ms)':>12}{'变化':>10}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            print(f"{name:<40}{'-':>12}{result['median_ms']:>12.2f}{'新增':>10}")
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        flag = ' ✗' if ratio > 1 + threshold else ''
+        print(f"{name:<40}{old['median_ms']:>12.2f}{result['median_ms']:>12.2f}{(ratio - 1) * 100:>+9.1f}%{flag}")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="服务和接口基准测试")
+    parser.add_argument("--filter", default='', help="只运行名称或分组包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例计时运行的次数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个用例计时前的预热次数")
+    parser.add_argument("--output", help="结果文件路径，默认 benchmarks/results/<时间>_<提交号>.json")
+    parser.add_argument("--compare", help="与之前保存的结果文件比较")
+    parser.add_argument("--threshold", type=float, default=0.20, help="中位数变慢超过该比例视为回退")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有回退时以非零状态退出")
+    parser.add_argument("--list", action="store_true", help="列出全部用例")
+    args = parser.parse_args(argv)
+
+    names = [name for name, (group, *_) in CASES.items() if args.filter in name or args.filter in group]
+    if args.list:
+        for name in names:
+            print(f"{CASES[name][0]:<16}{name}")
+        return 0
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'warmup': args.warmup, 'results': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        fx = Fixtures(workdir)
+        for name in names:
+            result = run_case(fx, name, args.repeat, args.warmup)
+            report['results'][name] = result
+            print(f"{name:<40}中位数 {result['median_ms']:>10.2f} ms   p95 {result['p95_ms']:>10.2f} ms")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['environment']['commit'] or 'unknown'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n性能回退（中位数变慢超过 {args.threshold:.0%}）: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
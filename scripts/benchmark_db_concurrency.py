@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+SQLite 并发基准测试：比较原连接配置与 db_profile 配置（WAL + PRAGMA + 进程内写锁）
+
+在临时数据库上用多个线程模拟 waitress 的并发请求：
+- 写：登录记录插入（LoginHistory）、保存 2 天的行程
+- 读：查询用户最近的登录记录和行程数量
+
+用法：
+    python scripts/benchmark_db_concurrency.py
+    python scripts/benchmark_db_concurrency.py --threads 16 --duration 10 --write-ratio 0.3
+"""
+import sys
+import os
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+
+# 将项目根目录添加到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.config import Config
+from app.models import Itinerary, ItineraryDay, LoginHistory, User
+from app.utils import db_profile
+
+# 原 Config.SQLALCHEMY_ENGINE_OPTIONS
+LEGACY_ENGINE_OPTIONS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+}
+
+
+def _create_engine(db_path, profile):
+    uri = f'sqlite:///{db_path}'
+    if not profile:
+        return create_engine(uri, **LEGACY_ENGINE_OPTIONS)
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config.update(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS={})
+    engine = create_engine(uri, **db_profile.engine_options(config))
+    db_profile.configure_engine(engine, config)
+    return engine
+
+
+def _prepare(engine, users):
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x')
+                         for i in range(users)])
+        session.commit()
+
+
+def _write(session, user_id):
+    if random.random() < 0.5:
+        session.add(LoginHistory(user_id=user_id, ip_address='127.0.0.1', user_agent='benchmark'))
+    else:
+        itinerary = Itinerary(user_id=user_id, days=2, start_date=date.today(), start_city='沈阳', status='active')
+        itinerary.itinerary_days = [ItineraryDay(day_number=day, date=date.today()) for day in (1, 2)]
+        session.add(itinerary)
+    session.commit()
+
+
+def _read(session, user_id):
+    session.execute(
+        select(LoginHistory).filter_by(user_id=user_id).order_by(LoginHistory.login_time.desc()).limit(10)
+    ).all()
+    session.execute(select(func.count(Itinerary.id)).filter_by(user_id=user_id)).scalar()
+    session.rollback()
+
+
+def run(profile, threads=16, duration=5.0, write_ratio=0.2, users=20):
+    """运行一轮基准测试，返回吞吐量、延迟和错误统计"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = _create_engine(os.path.join(tmp_dir, 'bench.db'), profile)
+        _prepare(engine, users)
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local_latencies, local_errors = [], []
+            while time.perf_counter() < deadline:
+                user_id = rng.randint(1, users)
+                started = time.perf_counter()
+                with Session(engine) as session:
+                    try:
+                        if rng.random() < write_ratio:
+                            _write(session, user_id)
+                        else:
+                            _read(session, user_id)
+                        local_latencies.append(time.perf_counter() - started)
+                    except OperationalError as e:
+                        session.rollback()
+                        local_errors.append(str(e.orig))
+            with lock:
+                latencies.extend(local_latencies)
+                errors.extend(local_errors)
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return {
+        'profile': 'db_profile' if profile else 'legacy',
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'errors': len(errors),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SQLite 并发读写基准测试")
+    parser.add_argument("--threads", type=int, default=16, help="并发线程数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每轮测试时长（秒）")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="写操作比例")
+    args = parser.parse_args()
+
+    print(f"线程数: {args.threads}, 时长: {args.duration}秒, 写比例: {args.write_ratio}")
+    print(f"{'配置':<12}{'完成操作':>10}{'ops/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'错误':>8}")
+    for profile in (False, True):
+        result = run(profile, args.threads, args.duration, args.write_ratio)
+        print(f"{result['profile']:<12}{result['ops']:>10}{result['ops_per_sec']:>10.1f}"
+              f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}")
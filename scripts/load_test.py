@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+负载测试：在本地启动 waitress，用多个虚拟用户按真实访问比例并发请求，找出每种进程/线程配置的饱和点
+
+- 每个虚拟用户是一个线程，先登录，之后按权重随机选择页面或接口访问，两次请求之间有随机的思考时间；
+  访问的页面见 SCENARIO（决策中心、推荐、预测、路径优化、生成地图、主界面，以及重新登录）
+- SCENARIO 中的默认权重是估计值；--mix 从线上服务 /metrics 输出的请求计数（app_request_duration_seconds_count，
+  按路由和方法区分）推导各页面的实际访问比例，可以是 /metrics 地址或保存下来的文件
+- 按阶梯加压：--stages 5:30,10:30,20:30 表示 5 个用户持续 30 秒，再增加到 10 个用户 30 秒，依此类推
+- 每个阶段按接口统计请求数、错误率、吞吐量和 p50/p95/p99 延迟，结果同时保存为JSON；
+  准入控制过载时返回的 503（见 app/utils/admission.py）单独计为拒绝，不计入错误
+- 吞吐量不再随用户数增加（增幅小于 5%）的第一个阶段视为饱和点
+
+默认用 app.db 的临时副本启动 waitress（不修改 app.db），也可以用 --url 测试已经启动的服务。
+
+用法：
+    python scripts/load_test.py                                   # 默认阶梯 2:20,4:20,8:20,16:20
+    python scripts/load_test.py --threads 8 --stages 4:30,8:30,16:30,32:30
+    python scripts/load_test.py --url http://127.0.0.1:5000 --email user@example.com --password secret
+    python scripts/load_test.py --mix https://example.com/metrics         # 按线上访问比例加压
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+LOADTEST_EMAIL = 'loadtest@example.com'
+LOADTEST_PASSWORD = 'loadtest'
+
+CITIES = ['沈阳', '大连', '鞍山', '丹东', '锦州']
+
+
+# ---------------------------------------------------------------- 访问场景
+
+def _login(user):
+    response = user.session.post(f'{user.base_url}/login', data={'email': user.email, 'password': user.password})
+    return response, not response.url.rstrip('/').endswith('/login')
+
+
+def _get(path):
+    def task(user):
+        response = user.session.get(f'{user.base_url}{path(user)}')
+        # 登录态失效时会被重定向到登录页
+        return response, response.ok and '/login' not in response.url
+    return task
+
+
+def _optimize(user):
+    city = user.rng.choice(CITIES)
+    payload = {'start_city': city, 'target_city': city, 'days': user.rng.choice([1, 2, 3]), 'preferences': {}}
+    response = user.session.post(f'{user.base_url}/path/optimize', json=payload)
+    ok = response.ok and response.json().get('success', False)
+    if ok:
+        user.last_itinerary = response.json().get('itinerary')
+    return response, ok
+
+
+def _generate_map(user):
+    response = user.session.post(f'{user.base_url}/path/generate_map', json={'itinerary': user.last_itinerary})
+    return response, response.ok and response.json().get('success', False)
+
+
+# (名称, 默认权重, 任务)。默认权重是估计的访问比例，不是访问记录；用 --mix 按线上请求计数设置权重。
+# 名称为 "方法 路由规则"，与 /metrics 中请求计数的 method、endpoint 标签对应
+SCENARIO = [
+    ('POST /login', 3, _login),
+    ('GET /decision-center/', 15, _get(lambda user: '/decision-center/')),
+    ('GET /recommendation/', 20, _get(lambda user: f'/recommendation/?city={user.rng.choice(CITIES)}')),
+    ('GET /prediction/', 15, _get(lambda user: f'/prediction/?city={user.rng.choice(CITIES)}')),
+    ('POST /path/optimize', 15, _optimize),
+    ('POST /path/generate_map', 10, _generate_map),
+    ('GET /dashboard', 22, _get(lambda user: f'/dashboard?city={user.rng.choice(CITIES)}')),
+]
+
+# 同一视图的其他路由规则，推导访问比例时计入对应场景
+ROUTE_ALIASES = {
+    'POST /path/calculate': 'POST /path/optimize',
+}
+
+# 任务 -> 先决任务：生成地图需要一份行程，用户还没有行程时先执行一次路径优化，
+# 路径优化单独计时，不计入生成地图的延迟
+PREREQUISITES = {
+    'POST /path/generate_map': 'POST /path/optimize',
+}
+
+_REQUEST_COUNT = re.compile(r'^app_request_duration_seconds_count\{(?P<labels>[^}]*)\}\s+(?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def load_mix(source):
+    """从 /metrics 输出中按路由和方法汇总请求数，返回 {场景名称: 请求数}
+
+    Args:
+        source: /metrics 地址或保存的 Prometheus 文本文件
+    """
+    if source.startswith(('http://', 'https://')):
+        response = requests.get(source, timeout=10)
+        response.raise_for_status()
+        text = response.text
+    else:
+        with open(source, encoding='utf-8') as f:
+            text = f.read()
+
+    names = {name for name, _, _ in SCENARIO}
+    counts = dict.fromkeys(sorted(names), 0)
+    for line in text.splitlines():
+        match = _REQUEST_COUNT.match(line.strip())
+        if not match:
+            continue
+        labels = dict(_LABEL.findall(match.group('labels')))
+        name = f"{labels.get('method')} {labels.get('endpoint')}"
+        name = ROUTE_ALIASES.get(name, name)
+        if name in names:
+            counts[name] += int(float(match.group('value')))
+    if not any(counts.values()):
+        raise ValueError(f"{source} 中没有负载测试场景对应的请求计数")
+    return counts
+
+
+# ---------------------------------------------------------------- 统计
+
+class Recorder:
+    """按阶段、接口记录每个请求的延迟和是否出错"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage = None
+        self.samples = {}
+
+    def record(self, name, seconds, ok, shed=False):
+        with self._lock:
+            self.samples.setdefault((self.stage, name), []).append((seconds, ok, shed))
+
+    def start_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(max(int(round(fraction * len(ordered))) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(samples, duration):
+    latencies = sorted(seconds for seconds, _, _ in samples)
+    errors = sum(1 for _, ok, shed in samples if not ok and not shed)
+    shed = sum(1 for _, _, shed in samples if shed)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'shed': shed,
+        'shed_rate': round(shed / len(samples), 4) if samples else 0.0,
+        'rps': round(len(samples) / duration, 2) if duration else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+# ---------------------------------------------------------------- 虚拟用户
+
+class VirtualUser(threading.Thread):
+    def __init__(self, index, base_url, email, password, recorder, think_time, seed, weights):
+        super().__init__(daemon=True, name=f'vu-{index}')
+        self.base_url = base_url
+        self.email = email
+        self.password = password
+        self.recorder = recorder
+        self.think_time = think_time
+        self.rng = random.Random(seed + index)
+        self.session = requests.Session()
+        self.last_itinerary = None
+        self.stop_event = threading.Event()
+        self._names = [name for name, _, _ in SCENARIO]
+        self._weights = [weights[name] for name in self._names]
+        self._tasks = {name: task for name, _, task in SCENARIO}
+
+    def _run_task(self, name):
+        prerequisite = PREREQUISITES.get(name)
+        if prerequisite and not self.last_itinerary:
+            self._run_task(prerequisite)
+            if not self.last_itinerary:
+                return
+        started = time.perf_counter()
+        shed = False
+        try:
+            response, ok = self._tasks[name](self)
+            shed = response.status_code == 503
+        except (requests.RequestException, ValueError):
+            ok = False
+        self.recorder.record(name, time.perf_counter() - started, ok, shed)
+
+    def run(self):
+        self._run_task('POST /login')
+        while not self.stop_event.is_set():
+            self._run_task(self.rng.choices(self._names, self._weights)[0])
+            if self.think_time:
+                self.stop_event.wait(self.rng.uniform(0, 2 * self.think_time))
+
+
+def run_stages(base_url, stages, email, password, think_time, seed, weights=None):
+    if weights is None:
+        weights = {name: weight for name, weight, _ in SCENARIO}
+    recorder = Recorder()
+    users = []
+    report = []
+    for stage_index, (user_count, duration) in enumerate(stages):
+        recorder.start_stage(stage_index)
+        while len(users) < user_count:
+            user = VirtualUser(len(users), base_url, email, password, recorder, think_time, seed, weights)
+            user.start()
+            users.append(user)
+        while len(users) > user_count:
+            users.pop().stop_event.set()
+        started = time.monotonic()
+        time.sleep(duration)
+        elapsed = time.monotonic() - started
+
+        stage_samples = {name: samples for (stage, name), samples in recorder.samples.items() if stage == stage_index}
+        endpoints = {name: summarize(samples, elapsed) for name, samples in sorted(stage_samples.items())}
+        total = summarize([sample for samples in stage_samples.values() for sample in samples], elapsed)
+        report.append({'users': user_count, 'duration': duration, 'total': total, 'endpoints': endpoints})
+        _print_stage(report[-1])
+    for user in users:
+        user.stop_event.set()
+    for user in users:
+        user.join(timeout=30)
+    return report
+
+
+def find_saturation(report, min_gain=0.05):
+    """吞吐量增幅小于 min_gain 的第一个阶段的用户数，未饱和时返回None"""
+    for previous, current in zip(report, report[1:]):
+        if current['total']['rps'] < previous['total']['rps'] * (1 + min_gain):
+            return current['users']
+    return None
+
+
+def _print_stage(stage):
+    total = stage['total']
+    print(f"\n=== {stage['users']} 个用户，{stage['duration']} 秒：{total['rps']} 请求/秒，"
+          f"错误率 {total['error_rate']:.1%}，拒绝率 {total['shed_rate']:.1%}，p95 {total['p95_ms']} ms ===")
+    print(f"{'接口':<28}{'请求数':>8}{'错误率':>8}{'拒绝率':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for name, result in stage['endpoints'].items():
+        print(f"{name:<28}{result['requests']:>8}{result['error_rate']:>8.1%}{result['shed_rate']:>8.1%}"
+              f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+
+
+# ---------------------------------------------------------------- 本地服务
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _server_env(workdir, uri):
+    """本地服务的环境变量：临时数据库，日志写入临时目录"""
+    return dict(os.environ, DATABASE_URL=uri, LOG_FILE=os.path.join(workdir, 'app.log'),
+                FLASK_DEBUG='false', LOG_CONSOLE_LEVEL='ERROR')
+
+
+def prepare_database(workdir):
+    """复制 app.db 并创建负载测试用户，返回数据库URI"""
+    db_path = os.path.join(workdir, 'loadtest.db')
+    shutil.copyfile(os.path.join(ROOT, 'app.db'), db_path)
+    uri = f'sqlite:///{db_path}'
+    code = (
+        "from app import create_app, db\n"
+        "from app.config import Config\n"
+        "from app.models import User\n"
+        "app = create_app()\n"
+        "with app.app_context():\n"
+        f"    if User.query.filter_by(email={LOADTEST_EMAIL!r}).first() is None:\n"
+        f"        user = User(username='loadtest', email={LOADTEST_EMAIL!r})\n"
+        f"        user.set_password({LOADTEST_PASSWORD!r})\n"
+        "        db.session.add(user)\n"
+        "        db.session.commit()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=_server_env(workdir, uri), check=True)
+    return uri
+
+
+def start_server(workdir, threads):
+    """用临时数据库启动 waitress，返回 (进程, 地址)"""
+    uri = prepare_database(workdir)
+    port = _free_port()
+    env = _server_env(workdir, uri)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'waitress', '--host=127.0.0.1', f'--port={port}', f'--threads={threads}', 'run:app'],
+        cwd=ROOT, env=env,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    # 和负载均衡一样等到 /readyz 返回200（预热完成）再开始加压
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"waitress 启动失败，退出码 {process.returncode}")
+        try:
+            if requests.get(f'{base_url}/readyz', timeout=2).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("等待 waitress 启动超时")
+
+
+def parse_stages(value):
+    stages = []
+    for item in value.split(','):
+        users, duration = item.split(':')
+        stages.append((int(users), float(duration)))
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地负载测试")
+    parser.add_argument("--stages", default="2:20,4:20,8:20,16:20", help="阶梯加压配置，用户数:秒数,...")
+    parser.add_argument("--threads", type=int, default=4, help="waitress 工作线程数")
+    parser.add_argument("--think-time", type=float, default=1.0, help="两次请求之间的平均思考时间（秒）")
+    parser.add_argument("--seed", type=int, default=42, help="虚拟用户行为的随机种子")
+    parser.add_argument("--url", help="测试已经启动的服务，不再启动本地 waitress")
+    parser.add_argument("--email", default=LOADTEST_EMAIL, help="使用 --url 时登录的用户邮箱")
+    parser.add_argument("--password", default=LOADTEST_PASSWORD, help="使用 --url 时登录的用户密码")
+    parser.add_argument("--mix", help="按 /metrics 中的请求计数设置访问比例，/metrics 地址或保存的文件")
+    parser.add_argument("--output", help="结果文件路径，默认 benchmarks/results/loadtest_<时间>.json")
+    args = parser.parse_args(argv)
+
+    stages = parse_stages(args.stages)
+    if args.mix:
+        weights = load_mix(args.mix)
+        print("访问比例（来自 {}）：{}".format(args.mix, ', '.join(f"{name} {count}" for name, count in weights.items())))
+    else:
+        weights = {name: weight for name, weight, _ in SCENARIO}
+    with tempfile.TemporaryDirectory() as workdir:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            process, base_url = start_server(workdir, args.threads)
+        try:
+            report = run_stages(base_url, stages, args.email, args.password, args.think_time, args.seed, weights)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    saturation = find_saturation(report)
+    print(f"\n饱和点：{saturation} 个用户" if saturation else "\n各阶段吞吐量仍在增长，未达到饱和点")
+
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'url': args.url or 'local waitress',
+        'threads': None if args.url else args.threads,
+        'think_time': args.think_time,
+        'seed': args.seed,
+        'mix': {'source': args.mix or 'default', 'weights': weights},
+        'saturation_users': saturation,
+        'stages': report,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"loadtest_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
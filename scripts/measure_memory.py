@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+测量多工作进程部署时每个工作进程的内存，对比预派生共享和各自加载两种模式（仅 Linux）
+
+每个工作进程报告三项（MB）：
+- RSS：常驻内存，共享的页在每个进程中都计入，多个进程相加会重复计算
+- PSS：共享的页按共享进程数分摊后的内存，所有进程相加约等于实际占用
+- USS：进程独占的内存，即每增加一个工作进程真正增加的内存
+
+用法：
+    python scripts/measure_memory.py                   # 两种模式各启动 2 个工作进程并对比
+    python scripts/measure_memory.py --workers 4 --mode prefork
+    python scripts/measure_memory.py --pid 12345       # 测量正在运行的 gunicorn 主进程及其工作进程
+
+两种模式都在独立的子进程中运行（使用 app.db 的临时副本）：
+- prefork：主进程先同步预热并冻结对象（app/utils/prefork.py），再 fork 出工作进程
+- lazy：先 fork，每个工作进程各自预热
+fork 后每个工作进程都执行一遍预热任务（加载天气数据和景点数据、构建索引、预测全部城市），
+模拟处理请求时对这些数据的访问，然后报告内存。
+"""
+import sys
+import os
+import argparse
+import json
+import shutil
+import subprocess
+import tempfile
+
+# 将项目根目录添加到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('prefork', 'lazy')
+
+
+def _mb(kb):
+    return round(kb / 1024, 1)
+
+
+def _create_app(workdir):
+    from app import create_app
+    from app.config import Config
+
+    db_path = os.path.join(workdir, 'memory.db')
+    shutil.copyfile(os.path.join(ROOT, 'app.db'), db_path)
+
+    class MeasureConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        LOG_CONSOLE = False
+        LOG_FILE = os.path.join(workdir, 'app.log')
+
+    return create_app(MeasureConfig)
+
+
+def _exercise(app):
+    """工作进程访问共享数据：执行一遍预热任务（预派生模式下全部命中缓存）"""
+    from app.utils import warmup
+    return warmup.Warmup(app, timeout=app.config.get('WARMUP_TIMEOUT', 120)).run()
+
+
+def run_workers(mode, workers):
+    """在当前进程中按指定模式 fork 工作进程，返回主进程和各工作进程的内存占用"""
+    from app.utils import prefork
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = _create_app(workdir)
+        if mode == 'prefork':
+            # 测量用的工作进程不处理请求和后台任务，不需要共享的任务队列
+            prefork.prepare(app, workers=1)
+
+        children = []
+        for _ in range(workers):
+            ready_read, ready_write = os.pipe()
+            stop_read, stop_write = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(ready_read)
+                os.close(stop_write)
+                code = 0
+                try:
+                    _exercise(app)
+                except BaseException:
+                    code = 1
+                finally:
+                    # 通知主进程可以测量，然后等待主进程测量完毕
+                    os.write(ready_write, b'1')
+                    os.read(stop_read, 1)
+                    os._exit(code)
+            os.close(ready_write)
+            os.close(stop_read)
+            children.append((pid, ready_read, stop_write))
+
+        for _pid, ready_read, _stop_write in children:
+            os.read(ready_read, 1)
+        result = {
+            "mode": mode,
+            "master": prefork.memory_usage(),
+            "workers": [prefork.memory_usage(pid) for pid, _ready, _stop in children],
+        }
+        for pid, ready_read, stop_write in children:
+            os.write(stop_write, b'1')
+            os.waitpid(pid, 0)
+            os.close(ready_read)
+            os.close(stop_write)
+    return result
+
+
+def measure_pid(pid):
+    """测量已运行的主进程及其子进程"""
+    from app.utils import prefork
+
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', encoding='ascii') as f:
+                # 第4个字段是父进程ID（进程名可能含空格，从右括号之后解析）
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return {
+        "mode": f"pid {pid}",
+        "master": prefork.memory_usage(pid),
+        "workers": [prefork.memory_usage(child) for child in sorted(children)],
+    }
+
+
+def print_report(result):
+    print(f"\n=== {result['mode']} ===")
+    print(f"{'进程':<12}{'RSS(MB)':>10}{'PSS(MB)':>10}{'USS(MB)':>10}")
+    rows = [('主进程', result['master'])] + [(f"工作进程{i + 1}", usage) for i, usage in enumerate(result['workers'])]
+    for name, usage in rows:
+        if usage is None:
+            print(f"{name:<12}{'无法读取':>30}")
+            continue
+        print(f"{name:<12}{_mb(usage['rss']):>10}{_mb(usage['pss']):>10}{_mb(usage['uss']):>10}")
+    usages = [usage for usage in result['workers'] if usage]
+    if usages:
+        total_pss = sum(usage['pss'] for usage in usages) + (result['master'] or {}).get('pss', 0)
+        print(f"工作进程平均 USS {_mb(sum(u['uss'] for u in usages) / len(usages))} MB，"
+              f"全部进程 PSS 合计 {_mb(total_pss)} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量每个工作进程的独占内存（USS）")
+    parser.add_argument("--workers", type=int, default=2, help="工作进程数")
+    parser.add_argument("--mode", choices=MODES + ('both',), default='both', help="预派生共享、各自加载或两者对比")
+    parser.add_argument("--pid", type=int, help="测量正在运行的主进程及其工作进程")
+    parser.add_argument("--output", help="把结果保存为JSON文件")
+    parser.add_argument("--_child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("需要 Linux 的 /proc/<pid>/smaps_rollup")
+        return 1
+
+    if args._child:
+        # 在独立进程中运行一种模式，结果以JSON输出到标准输出的最后一行
+        print(json.dumps(run_workers(args._child, args.workers)))
+        return 0
+
+    if args.pid:
+        results = [measure_pid(args.pid)]
+    else:
+        results = []
+        for mode in (MODES if args.mode == 'both' else (args.mode,)):
+            print(f"运行 {mode} 模式，{args.workers} 个工作进程...")
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--_child', mode,
+                                     '--workers', str(args.workers)],
+                                    cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print_report(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：执行所有未执行的表结构迁移（替代原来的 update_*.py 脚本）
+
+用法：
+    python scripts/migrate.py           # 执行未执行的迁移
+    python scripts/migrate.py --status  # 查看迁移状态
+"""
+import sys
+import os
+import argparse
+
+# 将项目根目录添加到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.utils import migrations
+
+
+def show_status():
+    """显示各迁移的执行状态"""
+    applied = migrations.applied_versions(db.engine)
+    for version, description, _ in migrations.MIGRATIONS:
+        status = "已执行" if version in applied else "未执行"
+        print(f"{version}  [{status}]  {description}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="执行数据库表结构迁移")
+    parser.add_argument("--status", action="store_true", help="只查看迁移状态，不执行")
+    args = parser.parse_args()
+
+    # create_app 启动时已经执行了未执行的迁移
+    app = create_app()
+
+    with app.app_context():
+        if not args.status:
+            executed = migrations.upgrade(db.engine)
+            print(f"本次执行了 {len(executed)} 个迁移" if executed else "数据库已是最新结构")
+        show_status()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+景点推荐预计算脚本：生成各城市未来 N 天每天的推荐景点
+
+建议每天凌晨定时执行一次，例如 crontab：
+    10 0 * * * cd /path/to/project && python scripts/precompute_recommendations.py --days 7
+
+结果写入 data/cache/recommendations_v{格式版本}_{日期}.parquet（未安装pyarrow时为.pkl），
+预测页面和所有城市预测页面会优先读取该文件，缺失的城市或日期再实时计算。
+"""
+import sys
+import os
+import argparse
+import time
+from datetime import datetime
+
+# 将项目根目录添加到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.utils.data_loader import load_all_city_data
+from app.utils import recommendation_store
+from app.services.recommendation_service import RecommendationService
+
+
+def precompute_recommendations(days=7, top_n=3, keep=3):
+    """预计算推荐结果并原子写入存储文件
+
+    Args:
+        days: 预计算天数
+        top_n: 每天推荐的景点数量
+        keep: 保留最近几次生成的文件
+
+    Returns:
+        Path: 写入的文件路径
+    """
+    data_dir = os.path.abspath(Config.DATA_DIR)
+    start_time = time.time()
+
+    weather_df = load_all_city_data()
+    recommendation_service = RecommendationService(data_dir)
+    recommendations = recommendation_service.precompute_daily_recommendations(
+        weather_df, days=days, top_n=top_n
+    )
+
+    path = recommendation_store.write_recommendations(data_dir, recommendations, datetime.now().date())
+    print(f"已预计算 {recommendations[recommendation_store.CITY_COLUMN].nunique()} 个城市、"
+          f"{days} 天的推荐结果，共 {len(recommendations)} 条，耗时 {time.time() - start_time:.1f} 秒")
+    print(f"结果已保存到: {path}")
+
+    # 清理过期的预计算文件
+    old_files = sorted(path.parent.glob(f"recommendations_v*_*{recommendation_store.FILE_SUFFIX}"))
+    old_files = [f for f in old_files if f != path]
+    for old_file in old_files[:max(len(old_files) - (keep - 1), 0)]:
+        old_file.unlink()
+        print(f"已删除过期文件: {old_file}")
+
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="预计算各城市未来几天的景点推荐")
+    parser.add_argument("--days", type=int, default=7, help="预计算天数")
+    parser.add_argument("--top-n", type=int, default=3, help="每天推荐的景点数量")
+    parser.add_argument("--keep", type=int, default=3, help="保留最近几次生成的文件")
+    args = parser.parse_args()
+
+    precompute_recommendations(days=args.days, top_n=args.top_n, keep=args.keep)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试准入控制：资源池并发上限、排队和超时、重计算请求总数上限、503 和 Retry-After、排队数指标
+"""
+
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.utils import admission, metrics
+
+
+def _make_app(tmp_path, **options):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        ADMISSION_POOLS = {
+            'path': {'limit': 1, 'queue': 1, 'timeout': 5},
+            'map': {'limit': 1, 'queue': 0, 'timeout': 5},
+        }
+        ADMISSION_ENDPOINTS = {'heavy': 'path', 'heavy_page': 'map'}
+        ADMISSION_MAX_HEAVY_REQUESTS = 3
+
+    for key, value in options.items():
+        setattr(TestConfig, key, value)
+    metrics.clear()
+    app = create_app(TestConfig)
+    app.release = threading.Event()
+
+    @app.route('/_heavy', methods=['POST'])
+    def heavy():
+        app.release.wait(5)
+        return {'success': True}
+
+    @app.route('/_heavy_page')
+    def heavy_page():
+        app.release.wait(5)
+        return 'ok'
+
+    @app.route('/_light')
+    def light():
+        return 'ok'
+
+    return app
+
+
+def _start(app, method, path, results):
+    def request():
+        client = app.test_client()
+        response = client.open(path, method=method)
+        results.append((response.status_code, response.headers.get('Retry-After')))
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    return thread
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_pool_limit_and_queue(tmp_path):
+    """同时执行数达到上限后排队，排队已满时立即返回503，轻量页面不受影响"""
+    app = _make_app(tmp_path)
+    pool = admission.get_admission(app).pools['path']
+    client = app.test_client()
+    results = []
+
+    running = _start(app, 'POST', '/_heavy', results)
+    _wait_for(lambda: pool.active == 1)
+    queued = _start(app, 'POST', '/_heavy', results)
+    _wait_for(lambda: pool.waiting == 1)
+
+    response = client.post('/_heavy')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '5'
+    assert response.get_json()['success'] is False
+    assert client.get('/_light').status_code == 200
+
+    text = metrics.render()
+    assert 'app_admission_active{pool="path"} 1' in text
+    assert 'app_admission_waiting{pool="path"} 1' in text
+    assert 'app_admission_rejected_total{pool="path",reason="queue_full"} 1' in text
+
+    app.release.set()
+    running.join(5)
+    queued.join(5)
+    assert sorted(results) == [(200, None), (200, None)]
+    assert pool.get_stats()['active'] == 0 and admission.get_admission(app).occupied == 0
+
+
+def test_queue_timeout(tmp_path):
+    """排队超过 timeout 秒仍未轮到时返回503"""
+    app = _make_app(tmp_path, ADMISSION_POOLS={'path': {'limit': 1, 'queue': 1, 'timeout': 0.1}})
+    pool = admission.get_admission(app).pools['path']
+    results = []
+
+    running = _start(app, 'POST', '/_heavy', results)
+    _wait_for(lambda: pool.active == 1)
+    started = time.perf_counter()
+    response = app.test_client().post('/_heavy')
+    assert response.status_code == 503 and time.perf_counter() - started >= 0.1
+    assert pool.get_stats()['timeout'] == 1
+
+    app.release.set()
+    running.join(5)
+
+
+def test_max_heavy_requests(tmp_path):
+    """所有资源池中执行和排队的请求总数达到上限时直接拒绝，页面请求返回错误页"""
+    app = _make_app(tmp_path, ADMISSION_MAX_HEAVY_REQUESTS=2)
+    state = admission.get_admission(app)
+    results = []
+
+    threads = [_start(app, 'POST', '/_heavy', results), _start(app, 'GET', '/_heavy_page', results)]
+    _wait_for(lambda: state.occupied == 2)
+
+    response = app.test_client().post('/_heavy')
+    assert response.status_code == 503
+    response = app.test_client().get('/_heavy_page')
+    assert response.status_code == 503 and response.mimetype == 'text/html'
+    assert 'app_admission_rejected_total{pool="path",reason="busy"} 1' in metrics.render()
+
+    app.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert state.occupied == 0
+
+
+def test_disabled(tmp_path):
+    """ADMISSION_ENABLED 关闭时不限制"""
+    app = _make_app(tmp_path, ADMISSION_ENABLED=False, ADMISSION_MAX_HEAVY_REQUESTS=0)
+    app.release.set()
+    assert app.test_client().post('/_heavy').status_code == 200
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_pool_limit_and_queue, test_queue_timeout, test_max_heavy_requests, test_disabled]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 准入控制测试全部通过")
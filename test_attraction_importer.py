@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试景点批量导入：向量化清洗、按 (城市, 景点名称) upsert、内容哈希跳过未变化景点
+"""
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction
+from app.utils import attraction_importer
+from app.utils.attraction_importer import import_attractions, normalize_attractions, read_poi_files
+
+
+CSV_HEADER = "城市,景点名称,类型,最佳季节,评分,门票价格,推荐游玩时长,简介,经度,纬度,电话\n"
+
+
+def _write_poi(poi_dir, rows):
+    poi_dir.mkdir(exist_ok=True)
+    (poi_dir / "沈阳_attractions.csv").write_text(CSV_HEADER + "\n".join(rows) + "\n", encoding="utf-8")
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    return create_app(TestConfig)
+
+
+def test_normalize(tmp_path):
+    """价格、评分、经纬度向量化清洗，缺名称和重复景点被丢弃"""
+    poi_dir = tmp_path / "poi"
+    _write_poi(poi_dir, [
+        "沈阳, 北陵公园 ,公园,全年,4.8,免费,2-3小时,昭陵,123.4,41.8,024-1",
+        "沈阳,沈阳故宫,博物馆,全年,abc,60,3小时,,，,,",
+        "沈阳,,公园,全年,4.0,0,1小时,,,,",
+        "沈阳,北陵公园,公园,全年,1.0,10,1小时,重复,,,",
+    ])
+    df = normalize_attractions(read_poi_files(str(poi_dir)))
+
+    assert list(df['name']) == ['北陵公园', '沈阳故宫']
+    assert list(df['price']) == [0.0, 60.0]
+    assert list(df['rating']) == [4.8, 0.0]
+    assert df['longitude'].iloc[0] == 123.4 and df['longitude'].isna().iloc[1]
+    assert df['description'].iloc[1] == ''
+
+
+def test_upsert_is_idempotent(tmp_path):
+    """重复导入不产生重复数据，只更新内容变化的景点，保留已有坐标"""
+    poi_dir = tmp_path / "poi"
+    _write_poi(poi_dir, [
+        "沈阳,北陵公园,公园,全年,4.8,免费,2-3小时,昭陵,123.4315,41.8057,",
+        "沈阳,沈阳故宫,博物馆,全年,4.9,60,3小时,皇宫,123.4315,41.8057,",
+    ])
+    app = _make_app(tmp_path)
+    with app.app_context():
+        assert import_attractions(str(poi_dir))['inserted'] == 2
+
+        stats = import_attractions(str(poi_dir))
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 0, 2)
+
+        # 模拟坐标修复脚本分散了景点坐标
+        palace = Attraction.query.filter_by(name='沈阳故宫').first()
+        palace_id = palace.id
+        palace.longitude = 123.45
+        db.session.commit()
+
+        _write_poi(poi_dir, [
+            "沈阳,北陵公园,公园,全年,4.8,免费,2-3小时,昭陵,123.4315,41.8057,",
+            "沈阳,沈阳故宫,博物馆,全年,4.9,50,3小时,皇宫,123.4315,41.8057,",
+            "沈阳,中街,商业街,全年,4.5,免费,2小时,步行街,,,",
+        ])
+        stats = import_attractions(str(poi_dir))
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (1, 1, 1)
+
+        assert Attraction.query.count() == 3
+        palace = db.session.get(Attraction, palace_id)
+        assert palace.price == 50.0
+        assert palace.longitude == 123.45
+        assert Attraction.query.filter_by(name='中街').first().latitude is None
+
+
+def test_concurrent_import_retries(tmp_path):
+    """读取现有景点后其他导入插入了相同景点：违反唯一约束，回滚后重新比较，不产生重复景点"""
+    poi_dir = tmp_path / "poi"
+    _write_poi(poi_dir, [
+        "沈阳,北陵公园,公园,全年,4.8,免费,2-3小时,昭陵,123.4315,41.8057,",
+        "沈阳,沈阳故宫,博物馆,全年,4.9,60,3小时,皇宫,123.4315,41.8057,",
+    ])
+    app = _make_app(tmp_path)
+    load_existing = attraction_importer._load_existing
+    calls = []
+
+    def racing_load_existing():
+        existing = load_existing()
+        if not calls:
+            # 第一次读取之后，另一个导入插入了同一景点并提交
+            db.session.execute(Attraction.__table__.insert(), [{'city': '沈阳', 'name': '北陵公园', 'type': '公园'}])
+            db.session.commit()
+        calls.append(1)
+        return existing
+
+    with app.app_context():
+        attraction_importer._load_existing = racing_load_existing
+        try:
+            stats = import_attractions(str(poi_dir))
+        finally:
+            attraction_importer._load_existing = load_existing
+
+        assert len(calls) == 2
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (1, 1, 0)
+        assert Attraction.query.filter_by(name='北陵公园').count() == 1
+        assert Attraction.query.count() == 2
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_normalize, test_upsert_is_idempotent, test_concurrent_import_retries]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 景点批量导入测试全部通过")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+测试景点查询的执行计划：路径优化中按城市筛选的查询必须使用复合索引，不能全表扫描；
+以及数据库迁移能为旧结构的数据库补齐字段和索引
+"""
+
+import sqlite3
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction
+from app.utils import migrations
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    return create_app(TestConfig)
+
+
+def _query_plan(query):
+    """获取ORM查询在SQLite上的执行计划"""
+    sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _assert_uses_index(query, index_name=None):
+    plan = _query_plan(query)
+    print(plan)
+    assert not any(step.startswith('SCAN attraction') for step in plan), plan
+    expected = index_name or '_attraction_city_'
+    assert any(expected in step for step in plan), plan
+
+
+def test_attraction_queries_use_indexes(tmp_path):
+    """路径优化中的景点查询都通过 (城市, ...) 复合索引定位"""
+    app = _make_app(tmp_path)
+    with app.app_context():
+        # _filter_attractions：按城市和最低评分筛选
+        _assert_uses_index(
+            Attraction.query.filter(Attraction.city == '沈阳', Attraction.rating >= 4.0),
+            'ix_attraction_city_rating'
+        )
+        # _filter_attractions：按城市和类型模糊匹配
+        _assert_uses_index(
+            Attraction.query.filter(Attraction.city == '沈阳', Attraction.type.like('%公园%'))
+        )
+        # generate_closed_loop_path：起点城市景点
+        _assert_uses_index(Attraction.query.filter(Attraction.city == '沈阳市').limit(5))
+        # _resolve_selected_attractions：按城市和名称批量精确匹配
+        _assert_uses_index(
+            Attraction.query.filter(Attraction.name.in_(['北陵公园', '沈阳故宫']), Attraction.city.in_(['沈阳'])),
+            'ux_attraction_city_name'
+        )
+        # optimize_path_for_weather / _get_suitable_replacements：城市内所有景点
+        _assert_uses_index(Attraction.query.filter(Attraction.city == '沈阳'))
+
+
+def test_upgrade_legacy_database(tmp_path):
+    """旧结构数据库执行迁移后补齐字段和索引，合并重复景点，重复执行不做任何修改"""
+    db_path = tmp_path / 'test.db'
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE user (id INTEGER PRIMARY KEY, username VARCHAR(64), email VARCHAR(120), password_hash VARCHAR(255));
+        CREATE TABLE attraction (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, city VARCHAR(50) NOT NULL,
+                                 type VARCHAR(50) NOT NULL, rating FLOAT);
+        CREATE TABLE itinerary (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, created_at DATETIME,
+                                days INTEGER NOT NULL, start_date DATE NOT NULL, start_city VARCHAR(50) NOT NULL,
+                                is_closed_loop BOOLEAN, preferences JSON, status VARCHAR(20));
+        CREATE TABLE traffic_record (id INTEGER PRIMARY KEY, attraction_id INTEGER NOT NULL, date DATE NOT NULL,
+                                     traffic INTEGER NOT NULL, weather VARCHAR(50), temperature FLOAT,
+                                     is_holiday BOOLEAN, created_at DATETIME);
+        CREATE INDEX ix_attraction_city_name ON attraction (city, name);
+        INSERT INTO attraction (id, name, city, type) VALUES (1, '北陵公园', '沈阳', '公园'), (2, '北陵公园', '沈阳', '公园'),
+                                                             (3, '沈阳故宫', '沈阳', '博物馆');
+        INSERT INTO traffic_record (attraction_id, date, traffic) VALUES (2, '2024-05-01', 100);
+    """)
+    conn.close()
+
+    # 启动时自动执行迁移
+    app = _make_app(tmp_path)
+    with app.app_context():
+        assert migrations.pending_migrations(db.engine) == []
+        assert migrations.upgrade(db.engine) == []
+
+    conn = sqlite3.connect(db_path)
+    user_columns = {row[1] for row in conn.execute("PRAGMA table_info(user)")}
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='attraction'")}
+    itinerary_columns = {row[1] for row in conn.execute("PRAGMA table_info(itinerary)")}
+    itinerary_indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='itinerary'")}
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_migration ORDER BY version")]
+    attraction_ids = [row[0] for row in conn.execute("SELECT id FROM attraction ORDER BY id")]
+    traffic_attraction_ids = [row[0] for row in conn.execute("SELECT attraction_id FROM traffic_record")]
+    conn.close()
+
+    assert {'role', 'nickname', 'avatar'} <= user_columns
+    assert {'ix_attraction_city_rating', 'ux_attraction_city_name', 'ix_attraction_city_type'} <= indexes
+    assert 'ix_attraction_city_name' not in indexes
+    assert attraction_ids == [1, 3] and traffic_attraction_ids == [1]
+    assert 'idempotency_key' in itinerary_columns
+    assert {'ix_itinerary_user_created', 'ux_itinerary_user_idempotency'} <= itinerary_indexes
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]
+
+
+def test_failed_migration_stops_startup(tmp_path):
+    """迁移失败时不在半迁移的数据库上继续启动，失败的迁移不记录为已执行"""
+    @migrations.migration('9999', '测试用：执行失败的迁移')
+    def _broken(conn):
+        raise RuntimeError("迁移出错")
+
+    try:
+        try:
+            _make_app(tmp_path)
+        except RuntimeError as e:
+            assert str(e) == "迁移出错"
+        else:
+            raise AssertionError("迁移失败时应停止启动")
+    finally:
+        migrations.MIGRATIONS.remove(('9999', '测试用：执行失败的迁移', _broken))
+
+    conn = sqlite3.connect(tmp_path / 'test.db')
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_migration ORDER BY version")]
+    conn.close()
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_attraction_queries_use_indexes, test_upgrade_legacy_database, test_failed_migration_stops_startup]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 景点查询执行计划测试全部通过")
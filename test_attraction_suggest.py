@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+测试路径规划景点补全：名称索引、补全接口和按主键解析用户选择的景点
+"""
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction
+from app.utils import attraction_suggest
+from app.utils.attraction_suggest import AttractionNameIndex
+
+
+rows = [
+    (1, '沈阳故宫博物院', '沈阳', '风景名胜', 4.9),
+    (2, '沈阳故宫广场', '沈阳', '广场', 4.2),
+    (3, '北陵公园', '沈阳', '公园', 4.8),
+    (4, '大连圣亚海洋世界', '大连', '风景名胜', 4.7),
+    (5, '圣亚极地世界', '大连', '风景名胜', 4.5),
+]
+
+
+def test_name_index_suggest():
+    """前缀匹配优先，不足时补充包含匹配，支持拼音首字母和城市筛选"""
+    index = AttractionNameIndex(rows)
+
+    assert [s['id'] for s in index.suggest('沈阳故宫')] == [1, 2]
+    assert [s['id'] for s in index.suggest('bl', city='沈阳市')] == [3]
+    assert [s['id'] for s in index.suggest('圣亚', city='大连')] == [5, 4]
+    assert [s['id'] for s in index.suggest('故宫', limit=1)] == [1]
+    assert index.suggest('故宫', city='大连') == []
+    assert index.suggest('') == []
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        for attraction_id, name, city, attraction_type, rating in rows:
+            db.session.add(Attraction(id=attraction_id, name=name, city=city, type=attraction_type, rating=rating))
+        db.session.commit()
+    attraction_suggest.clear()
+    return app
+
+
+def test_suggest_endpoint_and_resolve(tmp_path):
+    """补全接口返回景点ID，路径优化按ID、名称精确匹配和包含匹配解析选择的景点"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+
+    response = client.get('/path/api/suggest?q=sygg&city=沈阳')
+    assert response.status_code == 200
+    assert [s['id'] for s in response.get_json()['suggestions']] == [1, 2]
+
+    with app.app_context():
+        from app.services.path_optimization_service import PathOptimizationService
+        service = PathOptimizationService.__new__(PathOptimizationService)
+        resolved = service._resolve_selected_attractions([
+            {'attraction_id': 3, 'name': '北陵公园', 'city': '沈阳'},
+            {'id': '大连-大连圣亚海洋世界', 'name': '大连圣亚海洋世界', 'city': '大连市'},
+            {'name': '极地世界', 'city': '大连'},
+            {'name': '不存在的景点', 'city': '沈阳'},
+        ])
+        assert [attr.id for attr in resolved] == [3, 4, 5]
+
+        # 新增景点后索引自动重建
+        db.session.add(Attraction(id=6, name='沈阳故宫夜游', city='沈阳', type='风景名胜', rating=4.0))
+        db.session.commit()
+        assert [s['id'] for s in attraction_suggest.suggest('沈阳故宫')] == [1, 2, 6]
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_name_index_suggest()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_suggest_endpoint_and_resolve(Path(tmp_dir))
+    print("✓ 景点补全测试全部通过")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试审计记录异步写入队列：批量写入、队列满时同步写入、停止时写完剩余记录，以及登录记录不在请求中提交
+"""
+
+import time
+from datetime import datetime
+
+from app import create_app, db
+from app.config import Config
+from app.models import LoginHistory, User
+from app.utils.audit_queue import AuditQueue
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def _record(audit_queue, i=0):
+    audit_queue.enqueue(LoginHistory, user_id=1, login_time=datetime(2025, 5, 1, 8, 0, i),
+                        ip_address='127.0.0.1', login_result=True)
+
+
+def _count(app):
+    with app.app_context():
+        return LoginHistory.query.count()
+
+
+def test_batches_records(tmp_path):
+    """记录按批次写入，入队时的登录时间被保留"""
+    app = _make_app(tmp_path)
+    audit_queue = AuditQueue(app, flush_interval_ms=50, batch_size=10)
+    for i in range(25):
+        _record(audit_queue, i)
+    assert audit_queue.flush(timeout=5)
+
+    assert _count(app) == 25
+    stats = audit_queue.get_stats()
+    assert stats['written'] == 25 and stats['failed'] == 0
+    assert 3 <= stats['batches'] < 25
+    with app.app_context():
+        assert LoginHistory.query.order_by(LoginHistory.id).first().login_time == datetime(2025, 5, 1, 8, 0, 0)
+    audit_queue.stop()
+
+
+def test_bounded_queue_and_drain_on_stop(tmp_path):
+    """队列满时在调用线程同步写入，停止时写完队列中剩余的记录"""
+
+    class PausedQueue(AuditQueue):
+        """不启动后台线程，模拟写入线程跟不上的情况"""
+
+        def _ensure_thread(self):
+            pass
+
+    app = _make_app(tmp_path)
+    audit_queue = PausedQueue(app, maxsize=2)
+    for i in range(3):
+        _record(audit_queue, i)
+    assert audit_queue.get_stats()['sync_writes'] == 1
+    assert _count(app) == 1
+
+    audit_queue.stop()
+    assert _count(app) == 3
+
+
+def test_stop_wakes_worker(tmp_path):
+    """停止时不等待攒批时间，立即写完剩余记录"""
+    app = _make_app(tmp_path)
+    audit_queue = AuditQueue(app, flush_interval_ms=60000, batch_size=1000)
+    for i in range(5):
+        _record(audit_queue, i)
+
+    started = time.monotonic()
+    audit_queue.stop()
+    assert time.monotonic() - started < 5
+    assert _count(app) == 5
+    assert not audit_queue._thread.is_alive()
+
+    # 停止后入队的记录同步写入
+    _record(audit_queue, 6)
+    assert _count(app) == 6
+
+
+def test_login_records_history_asynchronously(tmp_path):
+    """登录成功和失败都通过队列记录登录历史"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    client.post('/login', data={'email': 'tester@example.com', 'password': 'wrong'})
+    client.post('/login', data={'email': 'tester@example.com', 'password': 'password'})
+    client.post('/login', data={'email': 'nobody@example.com', 'password': 'password'})
+
+    assert app.extensions['audit_queue'].flush(timeout=5)
+    with app.app_context():
+        history = LoginHistory.query.order_by(LoginHistory.id).all()
+        assert [h.login_result for h in history] == [False, True]
+        assert history[0].fail_reason == '用户密码错误'
+    app.extensions['audit_queue'].stop()
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_batches_records, test_bounded_queue_and_drain_on_stop, test_stop_wakes_worker,
+                 test_login_records_history_asynchronously]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 审计记录写入队列测试全部通过")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+测试天气预测结果缓存：命中、跨午夜失效、模型版本变化失效
+"""
+
+from datetime import date, timedelta
+import pandas as pd
+
+from app.utils import forecast_cache
+
+
+class FakePredictionService:
+    """模拟预测服务，记录预测调用次数"""
+
+    def __init__(self):
+        self.all_calls = 0
+        self.single_calls = 0
+
+    def _frame(self, city, days):
+        return pd.DataFrame({
+            '日期': [date.today() + timedelta(days=i + 1) for i in range(days)],
+            '最高气温': [20.0] * days,
+            '城市': [city] * days,
+        })
+
+    def predict_all_cities(self, weather_df, days=7):
+        self.all_calls += 1
+        return {city: self._frame(city, days) for city in weather_df['城市'].unique()}
+
+    def predict_future(self, weather_df, city_name, days=7):
+        self.single_calls += 1
+        return self._frame(city_name, days)
+
+
+weather_df = pd.DataFrame({'城市': ['沈阳市', '大连市']})
+
+
+def test_city_forecast_hits_cache():
+    """同一天内重复访问只预测一次，且一次预热覆盖所有城市"""
+    forecast_cache.clear()
+    service = FakePredictionService()
+
+    first = forecast_cache.get_city_forecast(service, weather_df, '沈阳', 7)
+    second = forecast_cache.get_city_forecast(service, weather_df, '沈阳', 7)
+    other = forecast_cache.get_city_forecast(service, weather_df, '大连市', 7)
+
+    print(f"预热次数: {service.all_calls}, 单城市预测次数: {service.single_calls}")
+    assert service.all_calls == 1
+    assert service.single_calls == 0
+    assert len(first) == 7 and first.equals(second)
+    assert first['城市'].iloc[0] == '沈阳'
+    assert other['城市'].iloc[0] == '大连市'
+
+    # 调用方修改返回结果不影响缓存
+    first['最高气温'] = 0
+    assert forecast_cache.get_city_forecast(service, weather_df, '沈阳', 7)['最高气温'].iloc[0] == 20.0
+
+
+def test_all_forecasts_share_cache():
+    """所有城市预测与单城市预测共享同一份缓存"""
+    forecast_cache.clear()
+    service = FakePredictionService()
+
+    forecast_cache.get_city_forecast(service, weather_df, '沈阳', 3)
+    all_predictions = forecast_cache.get_all_forecasts(service, weather_df, 3)
+
+    assert service.all_calls == 1
+    assert set(all_predictions) == {'沈阳市', '大连市'}
+
+
+def test_cache_expires_at_midnight():
+    """跨过午夜后缓存失效并重新预热"""
+    forecast_cache.clear()
+    service = FakePredictionService()
+    original_today = forecast_cache._today
+    try:
+        forecast_cache._today = lambda: date(2024, 1, 1)
+        forecast_cache.get_all_forecasts(service, weather_df, 7)
+        forecast_cache.get_all_forecasts(service, weather_df, 7)
+        assert service.all_calls == 1
+
+        forecast_cache._today = lambda: date(2024, 1, 2)
+        forecast_cache.get_all_forecasts(service, weather_df, 7)
+        assert service.all_calls == 2
+    finally:
+        forecast_cache._today = original_today
+
+
+def test_model_version_invalidates(tmp_path):
+    """模型文件变化后缓存失效"""
+    forecast_cache.clear()
+    service = FakePredictionService()
+    service.model_dir = tmp_path
+
+    forecast_cache.get_all_forecasts(service, weather_df, 7)
+    (tmp_path / '沈阳市_最高气温_model.joblib').write_bytes(b'model')
+    forecast_cache.get_all_forecasts(service, weather_df, 7)
+
+    assert service.all_calls == 2
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_city_forecast_hits_cache()
+    test_all_forecasts_share_cache()
+    test_cache_expires_at_midnight()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_model_version_invalidates(Path(tmp_dir))
+    print("✓ 预测缓存测试全部通过")
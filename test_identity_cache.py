@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+测试登录用户身份缓存：已登录请求不再查询用户表、快照只读、过期和各修改操作后失效
+"""
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import Config
+from app.models import Admin, User
+from app.utils import identity_cache
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    identity_cache.clear()
+    app = create_app(TestConfig)
+    with app.app_context():
+        admin = Admin(username='admin', email='admin@example.com')
+        admin.set_password('password')
+        user = User(username='tester', email='tester@example.com', nickname='旧昵称')
+        user.set_password('password')
+        db.session.add_all([admin, user])
+        db.session.commit()
+    return app
+
+
+def _login(app, login_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = login_id
+        sess['_fresh'] = True
+    return client
+
+
+def _count_user_queries(app, func):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM user' in statement or 'FROM admin' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+    return len(statements)
+
+
+def test_loader_hits_cache(tmp_path):
+    """同一用户的后续请求不再查询用户表，快照不可修改"""
+    app = _make_app(tmp_path)
+    client = _login(app, 'user_1')
+
+    assert _count_user_queries(app, lambda: client.get('/user/profile')) == 1
+    assert _count_user_queries(app, lambda: client.get('/user/profile')) == 0
+
+    snapshot = identity_cache.get('user_1')
+    assert snapshot.get_id() == 'user_1' and not snapshot.is_admin()
+    assert snapshot.check_password('password')
+    try:
+        snapshot.nickname = '新昵称'
+        assert False, '快照应当不可修改'
+    except AttributeError:
+        pass
+
+
+def test_ttl_expiry():
+    """缓存过期后重新加载"""
+    identity_cache.clear()
+
+    class Account:
+        id, username, email, password_hash, nickname, avatar, created_at, is_active = (
+            1, 'tester', 'tester@example.com', '', '', '', None, True)
+
+        def is_admin(self):
+            return False
+
+    identity_cache.put('user_1', Account(), ttl=10, now=100)
+    assert identity_cache.get('user_1', now=105) is not None
+    assert identity_cache.get('user_1', now=111) is None
+    assert identity_cache.get_stats()['expired'] == 1
+
+
+def test_profile_edit_invalidates(tmp_path):
+    """修改个人资料后缓存失效，页面显示新资料"""
+    app = _make_app(tmp_path)
+    client = _login(app, 'user_1')
+    client.get('/user/profile')
+    assert identity_cache.get('user_1').nickname == '旧昵称'
+
+    client.post('/user/profile/edit', data={'nickname': '新昵称', 'email': 'tester@example.com'})
+    assert identity_cache.get('user_1') is None
+    client.get('/user/profile')
+    assert identity_cache.get('user_1').nickname == '新昵称'
+    with app.app_context():
+        assert db.session.get(User, 1).nickname == '新昵称'
+
+    client.post('/user/change_password', data={'old_password': 'password', 'new_password': 'secret',
+                                               'confirm_password': 'secret'})
+    client.get('/user/profile')
+    assert identity_cache.get('user_1').check_password('secret')
+
+
+def test_admin_actions_invalidate(tmp_path):
+    """管理员停用、激活、删除用户后该用户的缓存失效"""
+    app = _make_app(tmp_path)
+    user_client = _login(app, 'user_1')
+    admin_client = _login(app, 'admin_1')
+
+    user_client.get('/user/profile')
+    admin_client.get('/admin/users/deactivate/1')
+    assert identity_cache.get('user_1') is None
+    user_client.get('/user/profile')
+    assert identity_cache.get('user_1').is_active is False
+
+    admin_client.get('/admin/users/activate/1')
+    assert identity_cache.get('user_1') is None
+
+    user_client.get('/user/profile')
+    admin_client.get('/admin/users/delete/1')
+    assert identity_cache.get('user_1') is None
+    # 被删除的用户不再能通过登录态访问
+    assert user_client.get('/user/profile').status_code == 302
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_ttl_expiry()
+    for test in [test_loader_hits_cache, test_profile_edit_invalidates, test_admin_actions_invalidate]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 登录用户身份缓存测试全部通过")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+测试历史行程接口：列表分页、详情预加载（查询次数固定）、响应缓存及保存/删除后的缓存失效，
+以及其他工作进程修改行程后按版本丢弃缓存
+"""
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction, Itinerary, User
+from app.utils import itinerary_cache
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    return create_app(TestConfig)
+
+
+def _setup(app):
+    """创建测试用户和景点，返回已登录的测试客户端和景点ID列表"""
+    itinerary_cache.clear()
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        attractions = [
+            Attraction(name=f'景点{i}', city='沈阳', type='公园', rating=4.0 + i / 10, price=0, duration='2小时')
+            for i in range(4)
+        ]
+        db.session.add_all(attractions)
+        db.session.commit()
+        user_id = user.id
+        attraction_ids = [attraction.id for attraction in attractions]
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = f'user_{user_id}'
+        sess['_fresh'] = True
+    return client, attraction_ids
+
+
+def _save(client, attraction_ids, start_date='2025-05-01'):
+    response = client.post('/path/save', json={
+        'start_city': '沈阳',
+        'days': 2,
+        'start_date': start_date,
+        'itinerary': [
+            {'day': 1, 'weather': '晴', 'attractions': [{'id': attraction_ids[1]}, {'id': attraction_ids[0]}]},
+            {'day': 2, 'weather': '多云', 'attractions': [{'id': attraction_ids[2]}]},
+        ]
+    })
+    assert response.get_json()['success'], response.get_json()
+    return response.get_json()['itinerary_id']
+
+
+class _QueryCounter:
+    """统计执行的SELECT语句数量"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def test_history_pagination(tmp_path):
+    """历史行程按创建时间倒序分页返回"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+    saved = [_save(client, attraction_ids, f'2025-05-0{i + 1}') for i in range(3)]
+
+    data = client.get('/path/history?page=1&per_page=2').get_json()
+    assert data['pagination'] == {'page': 1, 'per_page': 2, 'total': 3, 'pages': 2}
+    assert [item['id'] for item in data['itineraries']] == saved[::-1][:2]
+
+    data = client.get('/path/history?page=2&per_page=2').get_json()
+    assert [item['id'] for item in data['itineraries']] == saved[:1]
+
+    # 超出范围的页返回空列表，per_page 有上限
+    assert client.get('/path/history?page=9').get_json()['itineraries'] == []
+    assert client.get('/path/history?per_page=1000').get_json()['pagination']['per_page'] == 100
+
+
+def test_detail_eager_loading_and_cache(tmp_path):
+    """行程详情用固定次数的查询加载，重复请求命中缓存，保存和删除后缓存失效"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+    itinerary_id = _save(client, attraction_ids)
+
+    with app.app_context():
+        with _QueryCounter(db.engine) as counter:
+            data = client.get(f'/path/history/{itinerary_id}').get_json()
+        # 用户加载1次，缓存版本1次，行程1次，每日行程连同景点1次
+        assert counter.count <= 4, counter.count
+
+        assert [day['day'] for day in data['itinerary']] == [1, 2]
+        assert [a['id'] for a in data['itinerary'][0]['attractions']] == [attraction_ids[1], attraction_ids[0]]
+        assert data['itinerary'][1]['weather'] == '多云'
+
+        hits = itinerary_cache.get_stats()['hits']
+        with _QueryCounter(db.engine) as counter:
+            assert client.get(f'/path/history/{itinerary_id}').get_json() == data
+        assert itinerary_cache.get_stats()['hits'] == hits + 1
+        # 只剩用户加载和缓存版本的查询
+        assert counter.count <= 2, counter.count
+
+    assert client.get('/path/history').get_json()['pagination']['total'] == 1
+    _save(client, attraction_ids)
+    assert client.get('/path/history').get_json()['pagination']['total'] == 2
+
+    assert client.delete(f'/path/history/{itinerary_id}').get_json()['success']
+    assert client.get(f'/path/history/{itinerary_id}').status_code == 404
+    assert client.get('/path/history').get_json()['pagination']['total'] == 1
+
+
+class _OtherWorker:
+    """模拟另一个工作进程：请求照常修改数据库，但不清空本进程的缓存"""
+
+    def __enter__(self):
+        self._invalidate = itinerary_cache.invalidate
+        itinerary_cache.invalidate = lambda user_id: None
+
+    def __exit__(self, *exc):
+        itinerary_cache.invalidate = self._invalidate
+
+
+def test_cache_dropped_after_change_in_other_worker(tmp_path):
+    """其他工作进程保存或删除行程时本进程的缓存没有被清空，读取时按版本发现变化"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+    first = _save(client, attraction_ids)
+    second = _save(client, attraction_ids)
+
+    assert client.get(f'/path/history/{first}').status_code == 200
+    assert client.get('/path/history').get_json()['pagination']['total'] == 2
+
+    with _OtherWorker():
+        assert client.delete(f'/path/history/{first}').get_json()['success']
+
+    stale = itinerary_cache.get_stats()['stale']
+    assert client.get(f'/path/history/{first}').status_code == 404
+    assert itinerary_cache.get_stats()['stale'] == stale + 1
+    data = client.get('/path/history').get_json()
+    assert data['pagination']['total'] == 1 and [item['id'] for item in data['itineraries']] == [second]
+
+
+def test_cache_dropped_when_itinerary_id_reused(tmp_path):
+    """删除最大ID的行程后再保存会复用该ID，行程数和最大ID都与之前相同，缓存仍须失效"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+    _save(client, attraction_ids, '2025-05-01')
+    last = _save(client, attraction_ids, '2025-05-02')
+    assert client.get('/path/history').get_json()['itineraries'][0]['start_date'] == '2025-05-02'
+
+    with _OtherWorker():
+        assert client.delete(f'/path/history/{last}').get_json()['success']
+        assert _save(client, attraction_ids, '2025-06-01') == last
+
+    data = client.get('/path/history').get_json()
+    assert [(item['id'], item['start_date']) for item in data['itineraries']][0] == (last, '2025-06-01')
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_history_pagination, test_detail_eager_loading_and_cache,
+                 test_cache_dropped_after_change_in_other_worker, test_cache_dropped_when_itinerary_id_reused]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 历史行程接口测试全部通过")
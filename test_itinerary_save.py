@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+测试行程批量保存：整个行程用固定条数的批量INSERT写入、景点ID一次IN查询校验、幂等键防止重复保存
+"""
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction, Itinerary, ItineraryAttraction, ItineraryDay, User
+from app.utils import itinerary_cache
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    return create_app(TestConfig)
+
+
+def _setup(app):
+    """创建测试用户和景点，返回已登录的测试客户端和景点ID列表"""
+    itinerary_cache.clear()
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        attractions = [Attraction(name=f'景点{i}', city='沈阳', type='公园', rating=4.5) for i in range(6)]
+        db.session.add_all(attractions)
+        db.session.commit()
+        user_id = user.id
+        attraction_ids = [attraction.id for attraction in attractions]
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = f'user_{user_id}'
+        sess['_fresh'] = True
+    return client, attraction_ids
+
+
+def _payload(attraction_ids, days=3):
+    return {
+        'start_city': '沈阳',
+        'days': days,
+        'start_date': '2025-05-01',
+        'itinerary': [
+            {'day': day, 'weather': '晴', 'attractions': [{'id': attraction_ids[2 * (day - 1)]},
+                                                          {'id': attraction_ids[2 * (day - 1) + 1]}]}
+            for day in range(1, days + 1)
+        ]
+    }
+
+
+def test_save_uses_constant_statements(tmp_path):
+    """保存的SQL语句数与天数无关：每张表一条INSERT，一次景点ID校验查询，一次每日行程ID查询"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            data = client.post('/path/save', json=_payload(attraction_ids)).get_json()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+        assert data['success'], data
+        assert statements.count('INSERT') == 3, statements
+        # 用户加载1次，景点ID校验1次，取回每日行程ID 1次
+        assert statements.count('SELECT') <= 3, statements
+
+        itinerary = db.session.get(Itinerary, data['itinerary_id'])
+        assert [day.day_number for day in sorted(itinerary.itinerary_days, key=lambda d: d.day_number)] == [1, 2, 3]
+        assert ItineraryDay.query.count() == 3
+        assert ItineraryAttraction.query.count() == 6
+        assert str(sorted(itinerary.itinerary_days, key=lambda d: d.day_number)[1].date) == '2025-05-02'
+
+
+def test_save_rejects_unknown_attractions(tmp_path):
+    """存在未知景点ID时整个行程都不保存"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+
+    payload = _payload(attraction_ids, days=1)
+    payload['itinerary'][0]['attractions'].append({'id': 9999})
+    response = client.post('/path/save', json=payload)
+
+    assert response.status_code == 400
+    assert '9999' in response.get_json()['message']
+    with app.app_context():
+        assert Itinerary.query.count() == 0
+        assert ItineraryAttraction.query.count() == 0
+
+
+def test_save_is_idempotent(tmp_path):
+    """同一幂等键重复提交只保存一次，返回同一个行程ID"""
+    app = _make_app(tmp_path)
+    client, attraction_ids = _setup(app)
+
+    headers = {'Idempotency-Key': 'save-1'}
+    first = client.post('/path/save', json=_payload(attraction_ids), headers=headers).get_json()
+    second = client.post('/path/save', json=_payload(attraction_ids), headers=headers).get_json()
+    assert first['success'] and second['success']
+    assert second['itinerary_id'] == first['itinerary_id']
+    assert second['duplicate'] is True
+
+    # 请求体中的幂等键同样有效，不同的键保存为新行程
+    payload = dict(_payload(attraction_ids), idempotency_key='save-2')
+    third = client.post('/path/save', json=payload).get_json()
+    assert third['itinerary_id'] != first['itinerary_id']
+    assert client.post('/path/save', json=payload).get_json()['itinerary_id'] == third['itinerary_id']
+
+    # 不提供幂等键时每次都保存
+    client.post('/path/save', json=_payload(attraction_ids))
+    client.post('/path/save', json=_payload(attraction_ids))
+    with app.app_context():
+        assert Itinerary.query.count() == 4
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_save_uses_constant_statements, test_save_rejects_unknown_attractions, test_save_is_idempotent]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 行程批量保存测试全部通过")
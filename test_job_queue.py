@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+测试后台任务队列：提交、轮询、SSE、失败、队列满、结果过期，以及多个进程共享的 Redis 后端
+"""
+
+import json
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.utils import job_queue
+
+
+def _make_app(tmp_path, **overrides):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        JOB_SSE_POLL_INTERVAL = 0.02
+
+    for key, value in overrides.items():
+        setattr(TestConfig, key, value)
+    return create_app(TestConfig)
+
+
+def _add(params):
+    return {'sum': params['a'] + params['b']}
+
+
+def _fail(params):
+    raise ValueError("参数错误")
+
+
+job_queue.register('test_add', _add)
+job_queue.register('test_fail', _fail)
+
+
+class FakeRedis:
+    """进程内的 Redis 替身，实现 RedisJobStore 用到的命令"""
+
+    def __init__(self):
+        self._values = {}
+        self._lists = {}
+        self._cond = threading.Condition()
+
+    def set(self, key, value, ex=None):
+        with self._cond:
+            self._values[key] = (value.encode(), None if ex is None else time.time() + ex)
+
+    def get(self, key):
+        with self._cond:
+            value, expires_at = self._values.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.time():
+                del self._values[key]
+                return None
+            return value
+
+    def delete(self, key):
+        with self._cond:
+            self._values.pop(key, None)
+
+    def llen(self, key):
+        with self._cond:
+            return len(self._lists.get(key, []))
+
+    def rpush(self, key, value):
+        with self._cond:
+            self._lists.setdefault(key, []).append(value.encode())
+            self._cond.notify_all()
+
+    def blpop(self, keys, timeout=0):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for key in keys:
+                    if self._lists.get(key):
+                        return key.encode(), self._lists[key].pop(0)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+def test_submit_and_poll(tmp_path):
+    """提交后返回202和任务ID，完成后读取结果；执行失败返回500"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+
+    response = client.post('/jobs/test_add', json={'a': 1, 'b': 2})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued' and response.headers['Location'] == f"/jobs/{job['id']}"
+    assert 'params' not in job
+
+    finished = job_queue.get_queue(app).wait(job['id'], timeout=5)
+    assert finished['status'] == 'succeeded'
+    response = client.get(job['result_url'])
+    assert response.status_code == 200 and response.get_json()['result'] == {'sum': 3}
+    assert client.get(job['status_url']).get_json()['status'] == 'succeeded'
+
+    job = client.post('/jobs/test_fail', json={}).get_json()
+    job_queue.get_queue(app).wait(job['id'], timeout=5)
+    response = client.get(job['result_url'])
+    assert response.status_code == 500 and response.get_json()['error'] == "参数错误"
+
+    assert client.post('/jobs/missing', json={}).status_code == 404
+    assert client.get('/jobs/0123456789abcdef').status_code == 404
+    job_queue.get_queue(app).stop()
+
+
+def test_queue_full_and_expiry(tmp_path):
+    """排队任务数达到上限时返回503，结果在保留时间后过期"""
+    release = threading.Event()
+    job_queue.register('test_block', lambda params: release.wait(5))
+    app = _make_app(tmp_path, JOB_WORKERS=1, JOB_QUEUE_MAXSIZE=1, JOB_RESULT_TTL=0.5)
+    client = app.test_client()
+    queue = job_queue.get_queue(app)
+
+    running = client.post('/jobs/test_block').get_json()
+    deadline = time.monotonic() + 5
+    while queue.get(running['id'])['status'] != 'running' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queued = client.post('/jobs/test_block').get_json()
+    assert queue.depth() == 1
+
+    response = client.post('/jobs/test_block')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '5'
+    response = client.get(f"/jobs/{queued['id']}/result")
+    assert response.status_code == 202 and response.get_json()['status'] == 'queued'
+
+    release.set()
+    assert queue.wait(queued['id'], timeout=5)['status'] == 'succeeded'
+    time.sleep(0.6)
+    assert client.get(f"/jobs/{queued['id']}").status_code == 404
+    queue.stop()
+
+
+def test_events(tmp_path):
+    """SSE 推送状态变化，任务结束时推送 result 事件"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    job = client.post('/jobs/test_add', json={'a': 2, 'b': 5}).get_json()
+
+    response = client.get(job['events_url'])
+    assert response.mimetype == 'text/event-stream'
+    events = [block.split('\n') for block in response.get_data(as_text=True).strip().split('\n\n')]
+    name, data = events[-1][0], json.loads(events[-1][1][len('data: '):])
+    assert name == 'event: result' and data['result'] == {'sum': 7}
+    job_queue.get_queue(app).stop()
+
+
+def test_redis_backend_shared_between_processes(tmp_path):
+    """两个应用实例（模拟两个工作进程）共享 Redis：一个提交，另一个执行，双方都能查询结果"""
+    redis = FakeRedis()
+    submitter = _make_app(tmp_path)
+    runner = _make_app(tmp_path)
+    # 提交的进程没有工作线程，任务只能由另一个进程执行
+    for app, workers in ((submitter, 0), (runner, 1)):
+        app.extensions['job_queue'] = job_queue.JobQueue(app, job_queue.RedisJobStore(redis, ttl=60),
+                                                         workers=workers, poll_interval=0.05)
+
+    job = submitter.test_client().post('/jobs/test_add', json={'a': 3, 'b': 4}).get_json()
+    job_queue.get_queue(runner)._ensure_workers()
+
+    finished = job_queue.get_queue(submitter).wait(job['id'], timeout=5)
+    assert finished['status'] == 'succeeded' and finished['result'] == {'sum': 7}
+    assert runner.test_client().get(f"/jobs/{job['id']}/result").get_json()['result'] == {'sum': 7}
+    job_queue.get_queue(runner).stop()
+
+
+def test_path_optimize_job(tmp_path):
+    """路径优化任务的结果与同步接口一致"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    params = {'start_city': '沈阳', 'days': 1, 'preferences': {}}
+
+    expected = client.post('/path/optimize', json=params).get_json()
+    job = client.post('/jobs/path_optimize', json=params).get_json()
+    finished = job_queue.get_queue(app).wait(job['id'], timeout=60)
+    assert finished['status'] == 'succeeded'
+    assert finished['result']['success'] == expected['success']
+    assert finished['result'].get('message') == expected.get('message')
+    job_queue.get_queue(app).stop()
+
+
+def test_path_optimize_job_bad_budget(tmp_path):
+    """同步接口返回400的参数错误，后台任务记为失败，error 为接口返回的 message"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    params = {'start_city': '沈阳', 'days': 1, 'time_budget_ms': 'abc'}
+
+    message = client.post('/path/optimize', json=params).get_json()['message']
+    job = client.post('/jobs/path_optimize', json=params).get_json()
+    finished = job_queue.get_queue(app).wait(job['id'], timeout=60)
+    assert finished['status'] == 'failed' and finished['error'] == message
+    response = client.get(job['result_url'])
+    assert response.status_code == 500 and response.get_json()['error'] == message
+    job_queue.get_queue(app).stop()
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_submit_and_poll, test_queue_full_and_expiry, test_events,
+                 test_redis_backend_shared_between_processes, test_path_optimize_job,
+                 test_path_optimize_job_bad_budget]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 后台任务队列测试全部通过")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+测试日志查询：从末尾按块读取、跨轮转文件查询、按级别和时间使用块索引筛选、索引增量更新
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from app.utils import log_reader
+
+LEVELS = log_reader.LEVELS
+
+
+def _make_records(count, seed=0, start=datetime(2025, 5, 1, 8, 0, 0)):
+    """生成日志记录，部分ERROR记录带异常堆栈续行，返回 [(时间字符串, 级别, [行])]"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        moment = (start + timedelta(seconds=30 * i)).strftime('%Y-%m-%d %H:%M:%S')
+        level = rng.choice(LEVELS)
+        lines = [f"{moment},{i % 1000:03d} - app - {level} - 消息{i} Token{i % 7}"]
+        if level == 'ERROR' and rng.random() < 0.5:
+            lines += ["Traceback (most recent call last):", f"ValueError: 错误{i}"]
+        records.append((moment, level, lines))
+    return records
+
+
+def _write(path, records, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding) as f:
+        for _, _, lines in records:
+            f.write("\n".join(lines) + "\n")
+
+
+def _naive(records, lines, search=None, level=None, since=None):
+    """参照实现：读取全部日志后筛选"""
+    result = []
+    for moment, record_level, record_lines in records:
+        if since is not None and moment < since:
+            continue
+        if level is not None and LEVELS.index(record_level) < LEVELS.index(level):
+            continue
+        result += [line for line in record_lines if not search or search.casefold() in line.casefold()]
+    return result[-lines:]
+
+
+def test_tail_matches_full_scan(tmp_path):
+    """各种查询条件下与读取全部日志的结果一致，跨越轮转文件"""
+    log_reader.clear()
+    records = _make_records(600)
+    log_file = tmp_path / 'app.log'
+    # app.log.2 最旧，app.log 最新
+    _write(f"{log_file}.2", records[:200])
+    _write(f"{log_file}.1", records[200:400])
+    _write(log_file, records[400:])
+
+    cases = [
+        dict(lines=10),
+        dict(lines=450),
+        dict(lines=50, search='token3'),
+        dict(lines=1000, level='ERROR'),
+        dict(lines=30, level='WARNING', search='消息1'),
+        dict(lines=1000, since=records[350][0]),
+        dict(lines=20, since=records[100][0], level='CRITICAL'),
+        dict(lines=5, search='不存在的内容'),
+    ]
+    for case in cases:
+        assert log_reader.tail(log_file, block_size=512, **case) == _naive(records, **case), case
+
+
+def test_index_skips_blocks(tmp_path):
+    """最近一段时间的查询只读取最后几个块"""
+    log_reader.clear()
+    records = _make_records(2000)
+    log_file = tmp_path / 'app.log'
+    _write(log_file, records)
+
+    since = records[-20][0]
+    before = log_reader.get_stats()['blocks_read']
+    result = log_reader.tail(log_file, lines=100, level='ERROR', since=since, block_size=1024)
+    assert result == _naive(records, lines=100, level='ERROR', since=since)
+
+    blocks = len(log_reader.get_index(log_file, block_size=1024).blocks)
+    assert blocks > 50
+    assert log_reader.get_stats()['blocks_read'] - before <= 3
+
+
+def test_index_follows_appends_and_rotation(tmp_path):
+    """日志追加后增量扩展索引，轮转后重建索引"""
+    log_reader.clear()
+    records = _make_records(300)
+    log_file = tmp_path / 'app.log'
+    _write(log_file, records[:100])
+    assert log_reader.tail(log_file, lines=1000, level='DEBUG') == _naive(records[:100], lines=1000)
+
+    with open(log_file, 'a', encoding='utf-8') as f:
+        for _, _, lines in records[100:200]:
+            f.write("\n".join(lines) + "\n")
+        # 未写完的最后一行
+        f.write("2025-05-01 10:00:00,000 - app - ERROR - 未写完")
+    stats = log_reader.get_stats()
+    assert log_reader.tail(log_file, lines=1000, level='DEBUG') == _naive(records[:200], lines=1000)
+    assert log_reader.get_stats()['index_extends'] == stats['index_extends'] + 1
+
+    # 模拟 RotatingFileHandler 轮转：当前文件改名为 .1，新建当前文件
+    log_file.rename(f"{log_file}.1")
+    _write(f"{log_file}.1", records[:200])
+    _write(log_file, records[200:])
+    assert log_reader.tail(log_file, lines=1000, since=records[150][0]) == _naive(records, lines=1000, since=records[150][0])
+
+
+def test_gbk_log(tmp_path):
+    """兼容Windows下以GBK编码写入的日志"""
+    log_reader.clear()
+    records = _make_records(50)
+    log_file = tmp_path / 'app.log'
+    _write(log_file, records, encoding='gbk')
+    assert log_reader.tail(log_file, lines=5, search='消息4') == _naive(records, lines=5, search='消息4')
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_tail_matches_full_scan, test_index_skips_blocks, test_index_follows_appends_and_rotation,
+                 test_gbk_log]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 日志查询测试全部通过")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+测试日志配置：经队列写入日志文件、按模块设置级别、循环日志采样、耗时字段、JSON格式，
+以及服务模块不再直接 print
+"""
+
+import ast
+import json
+import logging
+from pathlib import Path
+
+from app import create_app
+from app.config import Config
+from app.utils import log_reader, log_setup
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _make_logger(name):
+    logger = logging.getLogger(name)
+    logger.handlers = []
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    return logger, handler.records
+
+
+def test_queue_pipeline_and_module_levels(tmp_path):
+    """日志经队列写入文件，DEBUG 默认被过滤，单独设置级别的模块输出 DEBUG"""
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        LOG_FILE = tmp_path / 'app.log'
+        LOG_CONSOLE = False
+        LOG_LEVEL = None
+        LOG_MODULE_LEVELS = 'app.services.demo_debug=DEBUG'
+
+    try:
+        create_app(TestConfig)
+        logging.getLogger('app.services.demo').debug("不应输出")
+        logging.getLogger('app.services.demo').info("普通信息 %s", 1, extra={'city': '沈阳'})
+        logging.getLogger('app.services.demo_debug').debug("调试信息")
+        log_setup.shutdown()
+    finally:
+        logging.getLogger('app.services.demo_debug').setLevel(logging.NOTSET)
+
+    lines = log_reader.tail(TestConfig.LOG_FILE, lines=100)
+    text = "\n".join(lines)
+    assert 'Application startup' in text
+    assert '不应输出' not in text
+    assert ' - app.services.demo - INFO - 普通信息 1 | city=沈阳' in text
+    assert ' - app.services.demo_debug - DEBUG - 调试信息' in text
+    # 日志查看页面仍能按级别筛选
+    assert log_reader.tail(TestConfig.LOG_FILE, lines=100, level='DEBUG', use_index=False)[-1].endswith('调试信息')
+
+
+def test_worker_restarts_queue_after_fork(tmp_path):
+    """预派生工作进程：fork 后先直接写处理器，post_fork 中重新启动后台线程；日志文件不在进程内轮转"""
+    from logging.handlers import WatchedFileHandler
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        LOG_FILE = tmp_path / 'app.log'
+        LOG_CONSOLE = False
+        LOG_ROTATE = False
+
+    create_app(TestConfig)
+    app_logger = logging.getLogger('app')
+    parent_listener = log_setup._listener
+    assert [type(handler) for handler in parent_listener.handlers] == [WatchedFileHandler]
+
+    # 模拟 fork 后的子进程：主进程的后台线程不会被继承
+    log_setup._after_fork_in_child()
+    parent_listener.stop()
+    assert log_setup._listener is None
+    assert any(isinstance(handler, WatchedFileHandler) for handler in app_logger.handlers)
+
+    log_setup.start_in_worker()
+    assert log_setup._listener is not None
+    assert not any(isinstance(handler, WatchedFileHandler) for handler in app_logger.handlers)
+    logging.getLogger('app.services.demo').info("工作进程日志")
+    log_setup.shutdown()
+
+    assert log_reader.tail(TestConfig.LOG_FILE, lines=10)[-1].endswith('工作进程日志')
+
+
+def test_sampled_logger():
+    """每个调用位置只输出第一次和此后每N次中的一次，未启用的级别不计数"""
+    logger, records = _make_logger('test_log_setup.sampled')
+    sampled = log_setup.SampledLogger(logger, every=100)
+    for i in range(250):
+        sampled.warning("跳过 %s", i)
+        if i < 5:
+            sampled.warning("另一位置 %s", i)
+    logger.setLevel(logging.INFO)
+    for i in range(10):
+        sampled.debug("未启用 %s", i)
+
+    messages = [record.getMessage() for record in records]
+    assert messages == ["跳过 0", "另一位置 0", "跳过 100", "跳过 200"]
+    assert [record.suppressed for record in records] == [0, 0, 99, 99]
+    assert all(record.sampled_every == 100 for record in records)
+    # 记录的位置是调用处，而不是采样日志器内部
+    assert all(record.filename == 'test_log_setup.py' for record in records)
+    assert len(sampled._counts) == 2
+
+
+def test_timed():
+    """timed() 输出 duration_ms 等结构化字段"""
+    logger, records = _make_logger('test_log_setup.timed')
+    with log_setup.timed(logger, "路径生成", city='沈阳') as fields:
+        fields['attractions'] = 5
+
+    record, = records
+    assert record.getMessage() == "路径生成"
+    assert record.event == "路径生成" and record.city == '沈阳' and record.attractions == 5
+    assert record.duration_ms >= 0
+
+
+def test_json_formatter():
+    """JSON 格式每行一个对象，包含 extra 字段和异常堆栈"""
+    logger, records = _make_logger('test_log_setup.json')
+    try:
+        raise ValueError("坏数据")
+    except ValueError:
+        logger.exception("处理失败 %s", '沈阳', extra={'duration_ms': 1.5})
+
+    data = json.loads(log_setup.JsonFormatter().format(records[0]))
+    assert data['level'] == 'ERROR' and data['logger'] == 'test_log_setup.json'
+    assert data['message'] == "处理失败 沈阳" and data['duration_ms'] == 1.5
+    assert 'ValueError: 坏数据' in data['exception']
+
+
+def test_parse_module_levels():
+    assert log_setup.parse_module_levels('app.services=debug, app.routes.api=WARNING') == {
+        'app.services': 'DEBUG', 'app.routes.api': 'WARNING'}
+    assert log_setup.parse_module_levels('') == {}
+
+
+def test_no_print_in_app_modules():
+    """服务、路由和工具模块统一使用日志，不再直接 print"""
+    root = Path(__file__).parent / 'app'
+    offenders = []
+    for package in ('services', 'routes', 'utils'):
+        for path in sorted((root / package).glob('*.py')):
+            tree = ast.parse(path.read_text(encoding='utf-8'))
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'print':
+                    offenders.append(f"{path.name}:{node.lineno}")
+    assert offenders == []
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_queue_pipeline_and_module_levels(Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_worker_restarts_queue_after_fork(Path(tmp_dir))
+    for test in [test_sampled_logger, test_timed, test_json_formatter, test_parse_module_levels,
+                 test_no_print_in_app_modules]:
+        test()
+    print("✓ 日志配置测试全部通过")
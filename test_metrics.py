@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+测试性能指标：Prometheus 文本格式、请求和SQL计时、代码段耗时、Server-Timing 头、缓存命中统计
+"""
+
+import re
+
+from app import create_app, db
+from app.config import Config
+from app.models import User
+from app.utils import identity_cache, metrics
+
+
+def _make_app(tmp_path, **options):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        METRICS_SERVER_TIMING = True
+
+    for key, value in options.items():
+        setattr(TestConfig, key, value)
+    metrics.clear()
+    identity_cache.clear()
+    app = create_app(TestConfig)
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+
+    @app.route('/_metrics_demo')
+    def demo():
+        with metrics.span('demo_step'):
+            pass
+        return 'ok'
+
+    return app
+
+
+def _sample(text, name, **labels):
+    """读取指标样本值，标签按给定顺序匹配"""
+    label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(name + ('{' + label_text + '}' if labels else '')) + r' (\S+)'
+    match = re.search('^' + pattern + '$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_render_format():
+    """直方图分桶累计、总和与次数，计数器带标签"""
+    metrics.clear()
+    metrics.describe('test_duration_seconds', 'histogram', "测试耗时", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3):
+        metrics.observe('test_duration_seconds', seconds, step='a')
+    metrics.inc('app_model_trainings_total', model='weather')
+    metrics.inc('app_model_trainings_total', 2, model='weather')
+
+    text = metrics.render()
+    assert "# TYPE test_duration_seconds histogram" in text
+    assert _sample(text, 'test_duration_seconds_bucket', step='a', le='0.1') == 2
+    assert _sample(text, 'test_duration_seconds_bucket', step='a', le='1.0') == 3
+    assert _sample(text, 'test_duration_seconds_bucket', step='a', le='+Inf') == 4
+    assert _sample(text, 'test_duration_seconds_sum', step='a') == 3.65
+    assert _sample(text, 'test_duration_seconds_count', step='a') == 4
+    assert _sample(text, 'app_model_trainings_total', model='weather') == 3
+
+
+def test_request_timing_and_server_timing(tmp_path):
+    """请求耗时按路由规则统计，Server-Timing 列出代码段和数据库耗时"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = 'user_1'
+        sess['_fresh'] = True
+
+    response = client.get('/user/profile')
+    assert response.status_code == 200
+    header = response.headers['Server-Timing']
+    assert re.search(r'\bdb;dur=\d+\.\d', header) and re.search(r'total;dur=\d+\.\d', header)
+
+    response = client.get('/_metrics_demo')
+    assert 'demo_step;dur=' in response.headers['Server-Timing']
+    client.get('/user/profile')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert _sample(text, 'app_request_duration_seconds_count',
+                   endpoint='/user/profile', method='GET', status='200') == 2
+    assert _sample(text, 'app_span_duration_seconds_count', span='demo_step') == 1
+    assert _sample(text, 'app_db_query_duration_seconds_count', operation='SELECT') > 0
+    # 第二次请求命中登录用户身份缓存
+    assert _sample(text, 'app_cache_hits_total', cache='identity') >= 1
+    assert _sample(text, 'app_cache_misses_total', cache='identity') >= 1
+
+
+def test_disabled(tmp_path):
+    """关闭后不输出指标，也不加 Server-Timing 头"""
+    app = _make_app(tmp_path, METRICS_ENABLED=False)
+    client = app.test_client()
+    response = client.get('/_metrics_demo')
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/metrics').status_code == 404
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_render_format()
+    for test in [test_request_timing_and_server_timing, test_disabled]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 性能指标测试全部通过")
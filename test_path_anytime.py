@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试限时（anytime）路径优化：时间用完时返回目前为止的最优路径，记录迭代代数和适应度；
+未指定时间预算时仍固定迭代 8 代；接口校验请求中的时间预算并限制上限
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+from app import create_app
+from app.config import Config
+from app.services import path_optimization_service
+from app.services.path_optimization_service import PathOptimizationService, parse_time_budget_ms
+
+
+def _make_population(size=20, length=6):
+    rng = random.Random(42)
+    attractions = [
+        SimpleNamespace(id=i, name=f'景点{i}', city='沈阳', rating=rng.uniform(3, 5),
+                        latitude=41.7 + rng.random() * 0.3, longitude=123.3 + rng.random() * 0.3)
+        for i in range(30)
+    ]
+    return [rng.sample(attractions, length) for _ in range(size)]
+
+
+class SlowFitnessService(PathOptimizationService):
+    """适应度计算较慢（如考虑客流量的 _fitness），一代的耗时超过时间预算"""
+
+    def _fitness_simple(self, path, target_city=None):
+        time.sleep(0.005)
+        return super()._fitness_simple(path, target_city)
+
+
+def test_fixed_generations_without_budget():
+    service = PathOptimizationService()
+    best = service._genetic_algorithm(_make_population(), 3, target_city='沈阳')
+    assert best and service.last_search['generations'] == 8
+    assert service.last_search['stopped'] == 'generations'
+    assert service.last_search['fitness'] == round(service._fitness_simple(best, '沈阳'), 6)
+
+
+def test_deadline_returns_best_so_far():
+    """一代需要约100毫秒，时间预算为30毫秒：在第一代中途停止，返回已评估个体中的最优路径"""
+    service = SlowFitnessService()
+    started = time.perf_counter()
+    best = service._genetic_algorithm(_make_population(), 3, target_city='沈阳', time_budget_ms=30)
+    elapsed = time.perf_counter() - started
+    assert best and elapsed < 0.1
+    search = service.last_search
+    assert search['stopped'] == 'deadline' and search['generations'] == 0
+    assert search['time_budget_ms'] == 30
+
+
+def test_budget_runs_until_converged():
+    """时间充足时迭代超过固定的 8 代，直到最优适应度不再提高"""
+    service = PathOptimizationService()
+    population = _make_population()
+    initial_best = max(service._fitness_simple(path, '沈阳') for path in population)
+    best = service._genetic_algorithm(population, 3, target_city='沈阳', time_budget_ms=5000)
+    search = service.last_search
+    assert search['stopped'] == 'converged' and search['generations'] > 8
+    assert search['elapsed_ms'] < 5000
+    assert search['fitness'] >= round(initial_best, 6) and len(best) == 6
+
+
+def test_parse_time_budget_ms():
+    """时间预算须为非负整数，超过上限时按上限处理"""
+    assert parse_time_budget_ms(None, 2000) == 0
+    assert parse_time_budget_ms('300', 2000) == 300
+    assert parse_time_budget_ms(300.0, 2000) == 300
+    assert parse_time_budget_ms(10 ** 9, 2000) == 2000
+    assert parse_time_budget_ms(10 ** 9, 0) == 10 ** 9
+    for value in ('abc', -1, 1.5, True, [], {}):
+        try:
+            parse_time_budget_ms(value, 2000)
+        except ValueError as e:
+            assert 'time_budget_ms' in str(e)
+        else:
+            raise AssertionError(f"应拒绝 {value!r}")
+
+
+def test_routes_validate_and_clamp_budget(tmp_path):
+    """两个路径优化接口对格式错误的时间预算返回400，过大的预算（包括默认值）按上限传给服务"""
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        LOG_FILE = tmp_path / 'app.log'
+        LOG_CONSOLE = False
+        ADMISSION_ENABLED = False
+        PATH_TIME_BUDGET_MS = 60000
+        PATH_TIME_BUDGET_MAX_MS = 1500
+
+    app = create_app(TestConfig)
+    client = app.test_client()
+    budgets = []
+    original = path_optimization_service.PathOptimizationService.generate_closed_loop_path
+
+    def record_budget(self, *args, time_budget_ms=None, **kwargs):
+        budgets.append(time_budget_ms)
+        raise RuntimeError("只检查时间预算")
+
+    path_optimization_service.PathOptimizationService.generate_closed_loop_path = record_budget
+    try:
+        for url in ('/path/optimize', '/api/path/optimize'):
+            response = client.post(url, json={'start_city': '沈阳', 'days': 1, 'time_budget_ms': 'abc'})
+            assert response.status_code == 400
+            assert 'time_budget_ms' in response.get_json()['message']
+            assert client.post(url, json={'days': 1, 'time_budget_ms': -5}).status_code == 400
+
+            client.post(url, json={'start_city': '沈阳', 'days': 1, 'time_budget_ms': 10 ** 9})
+            client.post(url, json={'start_city': '沈阳', 'days': 1})
+            client.post(url, json={'start_city': '沈阳', 'days': 1, 'time_budget_ms': 200})
+    finally:
+        path_optimization_service.PathOptimizationService.generate_closed_loop_path = original
+    assert budgets == [1500, 1500, 200] * 2
+
+
+if __name__ == '__main__':
+    test_fixed_generations_without_budget()
+    test_deadline_returns_best_so_far()
+    test_budget_runs_until_converged()
+    test_parse_time_budget_ms()
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_routes_validate_and_clamp_budget(Path(tmp_dir))
+    print("✓ 限时路径优化测试全部通过")
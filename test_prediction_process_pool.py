@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+测试进程池天气预测服务：按城市分片训练，训练指标和预测结果与单进程实现一致
+"""
+
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+from app.services.prediction_service import (
+    WeatherPredictionService,
+    ProcessPoolWeatherPredictionService,
+)
+
+
+def _make_weather_df(days=120):
+    """构造两个城市的模拟历史天气数据"""
+    rng = np.random.RandomState(0)
+    start = date.today() - timedelta(days=days)
+    frames = []
+    for city, base in [('沈阳市', 10.0), ('大连市', 14.0)]:
+        dates = [start + timedelta(days=i) for i in range(days)]
+        high = base + 10 * np.sin(np.arange(days) / 20.0) + rng.randn(days)
+        frames.append(pd.DataFrame({
+            '日期': pd.to_datetime(dates),
+            '城市': city,
+            '最高气温': high,
+            '最低气温': high - 8 + rng.randn(days),
+            '天气状况': rng.choice(['晴', '多云', '小雨'], days),
+            '风向': rng.choice(['北风', '南风'], days),
+            '风力': rng.choice(['1-2级', '3-4级'], days),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_process_pool_matches_sklearn(tmp_path):
+    """进程池实现与单进程实现的训练指标和预测结果一致"""
+    weather_df = _make_weather_df()
+    (tmp_path / 'pool').mkdir()
+    (tmp_path / 'serial').mkdir()
+
+    pool_service = ProcessPoolWeatherPredictionService(str(tmp_path / 'pool'), max_workers=2)
+    pool_results = pool_service.train_all_models(weather_df)
+    pool_predictions = pool_service.predict_all_cities(weather_df, days=3)
+
+    serial_service = WeatherPredictionService(str(tmp_path / 'serial'))
+    serial_results = serial_service.train_all_models(weather_df)
+    serial_predictions = serial_service.predict_all_cities(weather_df, days=3)
+
+    assert set(pool_results) == set(serial_results) == {'沈阳市', '大连市'}
+    for city, city_results in serial_results.items():
+        for target_var, metrics in city_results.items():
+            assert pool_results[city][target_var]['model'] is not None
+            assert abs(pool_results[city][target_var]['mae'] - metrics['mae']) < 1e-9
+            assert (city, target_var) in pool_service.models
+
+    assert set(pool_predictions) == set(serial_predictions)
+    for city, frame in serial_predictions.items():
+        print(f"{city} 预测结果:\n{pool_predictions[city]}")
+        pd.testing.assert_frame_equal(pool_predictions[city], frame)
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_process_pool_matches_sklearn(Path(tmp_dir))
+    print("✓ 进程池预测服务测试通过")
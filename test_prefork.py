@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试预派生部署：景点数据和预测模型在进程内共享、模型文件更新后失效、进程内存读取
+"""
+
+import os
+import random
+
+import joblib
+
+from app.services import prediction_service
+from app.services.recommendation_service import RecommendationService
+from app.utils import prefork
+
+
+def test_shared_attractions_data():
+    """同一数据目录的多个推荐服务实例共享同一份清洗后的景点数据"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    first = RecommendationService(data_dir)
+    second = RecommendationService(data_dir)
+    assert first.attractions_df is second.attractions_df
+
+
+def test_attractions_data_keeps_global_random_state():
+    """加载和共享景点数据不重置全局随机数，门票价格仍按固定种子生成"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    service = RecommendationService(data_dir)
+    random.seed(7)
+    expected = random.random()
+    random.seed(7)
+    RecommendationService(data_dir)
+    assert random.random() == expected
+
+    reloaded = service._load_attractions_data()
+    assert reloaded['门票价格'].tolist() == service.attractions_df['门票价格'].tolist()
+
+
+def test_loaded_models_shared_until_modified(tmp_path):
+    """开启共享后同一模型文件只加载一次，文件被覆盖后重新加载；关闭时每次都从磁盘加载"""
+    service = prediction_service.WeatherPredictionService(tmp_path)
+    model_path = service.model_dir / service._generate_model_id('沈阳市', '最高气温')
+    joblib.dump({'version': 1}, model_path)
+
+    try:
+        prediction_service.share_loaded_models()
+        first = service._load_model('沈阳市', '最高气温')
+        assert prediction_service.WeatherPredictionService(tmp_path)._load_model('沈阳市', '最高气温') is first
+
+        joblib.dump({'version': 2}, model_path)
+        stat = model_path.stat()
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert service._load_model('沈阳市', '最高气温') == {'version': 2}
+        assert service._load_model('沈阳市', '汇总') is None
+    finally:
+        prediction_service.share_loaded_models(False)
+
+    assert prediction_service._loaded_models == {}
+    assert service._load_model('沈阳市', '最高气温') is not service._load_model('沈阳市', '最高气温')
+
+
+def test_prepare_rejects_memory_job_backend(tmp_path):
+    """多个工作进程时内存任务队列不能共享，prepare 在预热之前拒绝启动"""
+    from app import create_app
+    from app.config import Config
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        LOG_FILE = tmp_path / 'app.log'
+        LOG_CONSOLE = False
+        JOB_BACKEND = 'memory'
+
+    app = create_app(TestConfig)
+    try:
+        prefork.prepare(app, workers=2)
+    except RuntimeError as e:
+        assert 'JOB_BACKEND=redis' in str(e)
+    else:
+        raise AssertionError("内存任务队列应拒绝预派生启动")
+    assert not prefork.is_prepared()
+
+
+def test_memory_usage():
+    """Linux 上读取当前进程的 RSS、PSS、USS"""
+    usage = prefork.memory_usage()
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        assert usage is None
+        return
+    assert set(usage) == {'rss', 'pss', 'uss', 'shared'}
+    assert 0 < usage['uss'] <= usage['rss']
+    assert prefork.memory_usage(-1) is None
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_shared_attractions_data()
+    test_attractions_data_keeps_global_random_state()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_loaded_models_shared_until_modified(Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_prepare_rejects_memory_job_backend(Path(tmp_dir))
+    test_memory_usage()
+    print("✓ 预派生部署测试全部通过")
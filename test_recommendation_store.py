@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试预计算推荐结果存储：原子写入、按城市和日期读取、缺失时回退实时计算
+"""
+
+from datetime import date
+import pandas as pd
+
+from app.utils import recommendation_store
+from app.services.recommendation_service import RecommendationService
+
+
+def _make_precomputed():
+    rows = []
+    for city in ['沈阳市', '大连市']:
+        for day in ['2024-05-01', '2024-05-02']:
+            for rank in range(1, 4):
+                rows.append({
+                    '城市': city.replace('市', ''),
+                    '景点名称': f"{city}-{day}-{rank}",
+                    '评分': 4.5,
+                    recommendation_store.CITY_COLUMN: city,
+                    recommendation_store.DATE_COLUMN: day,
+                    recommendation_store.RANK_COLUMN: rank,
+                })
+    return pd.DataFrame(rows)
+
+
+class LiveRecommendationService(RecommendationService):
+    """不加载景点数据，记录实时计算次数的推荐服务"""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.live_calls = 0
+
+    def recommend_by_weather(self, weather_df, city=None, date=None, top_n=5, **kwargs):
+        self.live_calls += 1
+        return pd.DataFrame({'景点名称': [f"实时-{city}-{date}"] * top_n})
+
+
+def test_write_and_read(tmp_path):
+    """写入后按城市和日期读取，城市名称带不带"市"都能命中"""
+    recommendation_store.clear()
+    path = recommendation_store.write_recommendations(tmp_path, _make_precomputed(), date(2024, 4, 30))
+
+    assert path.exists()
+    assert recommendation_store.find_latest_store(tmp_path) == path
+    # 没有遗留临时文件
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+    records = recommendation_store.get_recommendations(tmp_path, '沈阳', '2024-05-02', top_n=2)
+    assert [r['景点名称'] for r in records] == ['沈阳市-2024-05-02-1', '沈阳市-2024-05-02-2']
+    assert recommendation_store.CITY_COLUMN not in records[0]
+
+    assert recommendation_store.get_recommendations(tmp_path, '沈阳市', '2024-05-03') is None
+    assert recommendation_store.get_recommendations(tmp_path, '沈阳市', '2024-05-01', top_n=5) is None
+
+
+def test_service_falls_back_to_live(tmp_path):
+    """预计算结果命中时不实时计算，缺失时回退实时计算"""
+    recommendation_store.clear()
+    recommendation_store.write_recommendations(tmp_path, _make_precomputed(), date(2024, 4, 30))
+    service = LiveRecommendationService(tmp_path)
+    weather_df = pd.DataFrame()
+
+    hit = service.get_daily_recommendations(weather_df, '大连市', '2024-05-01', top_n=3)
+    assert len(hit) == 3 and service.live_calls == 0
+
+    miss = service.get_daily_recommendations(weather_df, '大连市', date(2024, 5, 9), top_n=3)
+    assert miss[0]['景点名称'] == '实时-大连市-2024-05-09'
+    assert service.live_calls == 1
+
+
+def test_latest_store_rechecked_per_interval(tmp_path):
+    """连续读取时不重复查找最新文件，超过 RECHECK_INTERVAL 后才发现其他进程新生成的文件"""
+    recommendation_store.clear()
+    recommendation_store.write_recommendations(tmp_path, _make_precomputed(), date(2024, 4, 30))
+    lookups = []
+    find_latest_store = recommendation_store.find_latest_store
+
+    def counting_find(data_dir):
+        lookups.append(data_dir)
+        return find_latest_store(data_dir)
+
+    recommendation_store.find_latest_store = counting_find
+    try:
+        for _ in range(50):
+            assert recommendation_store.get_recommendations(tmp_path, '沈阳', '2024-05-02') is not None
+        assert len(lookups) == 1
+
+        # 模拟其他进程写入新一天的结果：本进程在检查间隔内仍使用已加载的文件
+        newer = _make_precomputed()
+        newer[recommendation_store.DATE_COLUMN] = newer[recommendation_store.DATE_COLUMN].str.replace('2024-05', '2024-06')
+        recommendation_store._write_frame(newer, recommendation_store.get_store_path(tmp_path, date(2024, 5, 30)))
+        assert recommendation_store.get_recommendations(tmp_path, '沈阳', '2024-06-02') is None
+
+        recommendation_store._cache['checked_at'] -= recommendation_store.RECHECK_INTERVAL
+        assert recommendation_store.get_recommendations(tmp_path, '沈阳', '2024-06-02') is not None
+        assert len(lookups) == 2
+    finally:
+        recommendation_store.find_latest_store = find_latest_store
+
+
+def test_missing_columns_rejected(tmp_path):
+    """缺少推荐城市、日期、排名列时拒绝写入"""
+    try:
+        recommendation_store.write_recommendations(tmp_path, pd.DataFrame({'景点名称': ['a']}), date(2024, 4, 30))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("缺少列时应抛出ValueError")
+    assert recommendation_store.find_latest_store(tmp_path) is None
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_write_and_read, test_service_falls_back_to_live, test_latest_store_rechecked_per_interval,
+                 test_missing_columns_rejected]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 预计算推荐结果存储测试全部通过")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+测试客流量和风险评估数据批量导入：按 (城市, 景点名称) 解析景点、按 (景点ID, 日期) upsert、
+内容哈希跳过未变化记录，以及旧数据库中重复记录的迁移
+"""
+
+from datetime import date
+
+from sqlalchemy import create_engine, inspect, text
+
+from app import create_app, db
+from app.config import Config
+from app.models import Attraction, RiskAssessment, TrafficRecord
+from app.utils import migrations, record_importer
+from app.utils.record_importer import city_from_filename, import_risks, import_traffic
+
+
+TRAFFIC_HEADER = "日期,景点名称,客流量,是否节假日,天气\n"
+RISK_HEADER = "日期,景点名称,风险等级,天气,建议\n"
+
+
+def _write(path, header, rows):
+    path.parent.mkdir(exist_ok=True)
+    # 与 data 目录中的文件一样带 BOM
+    path.write_text(header + "\n".join(rows) + "\n", encoding="utf-8-sig")
+    return str(path)
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        # 两个城市都有名为"中山公园"的景点
+        db.session.add_all([
+            Attraction(name='中山公园', city='沈阳', type='公园'),
+            Attraction(name='中山公园', city='大连', type='公园'),
+            Attraction(name='沈阳故宫', city='沈阳', type='博物馆'),
+        ])
+        db.session.commit()
+    return app
+
+
+def _attraction_id(city, name):
+    return Attraction.query.filter_by(city=city, name=name).one().id
+
+
+def test_city_from_filename():
+    assert city_from_filename('data/traffic/沈阳_traffic_data.csv') == '沈阳'
+    assert city_from_filename('data/traffic/大连_2013-2023_traffic_data.csv') == '大连'
+    assert city_from_filename('data/risk/锦州2013-2023年风险评估数据.csv') == '锦州'
+
+
+def test_traffic_upsert_is_idempotent(tmp_path):
+    """重复导入不产生重复记录，同名景点按城市区分，只更新内容变化的记录"""
+    app = _make_app(tmp_path)
+    shenyang = tmp_path / 'traffic' / '沈阳_traffic_data.csv'
+    dalian = tmp_path / 'traffic' / '大连_traffic_data.csv'
+    _write(shenyang, TRAFFIC_HEADER, [
+        "2024-12-26,中山公园,100,0,晴",
+        "2024-12-26,沈阳故宫,2311,1,晴",
+        "2024-12-27,沈阳故宫,abc,0,晴",
+        "2024-12-28,不存在的景点,5,0,晴",
+        "2024-12-26,沈阳故宫,9999,0,重复",
+    ])
+    _write(dalian, TRAFFIC_HEADER, ["2024-12-26,中山公园,300,0,雨"])
+    paths = [str(shenyang), str(dalian)]
+
+    with app.app_context():
+        stats = import_traffic(paths)
+        assert (stats['inserted'], stats['updated'], stats['unchanged'], stats['skipped']) == (3, 0, 0, 1)
+
+        stats = import_traffic(paths)
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 0, 3)
+        assert TrafficRecord.query.count() == 3
+
+        park_dalian = TrafficRecord.query.filter_by(attraction_id=_attraction_id('大连', '中山公园')).one()
+        assert park_dalian.traffic == 300 and park_dalian.weather == '雨'
+        palace = TrafficRecord.query.filter_by(attraction_id=_attraction_id('沈阳', '沈阳故宫')).one()
+        assert palace.traffic == 2311 and palace.is_holiday is True
+
+        _write(shenyang, TRAFFIC_HEADER, [
+            "2024-12-26,中山公园,150,0,晴",
+            "2024-12-26,沈阳故宫,2311,1,晴",
+            "2024-12-27,沈阳故宫,2400,0,阴",
+        ])
+        stats = import_traffic(paths)
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (1, 1, 2)
+        assert TrafficRecord.query.filter_by(attraction_id=_attraction_id('沈阳', '中山公园')).one().traffic == 150
+        assert TrafficRecord.query.count() == 4
+
+
+def test_risk_upsert_is_idempotent(tmp_path):
+    """风险评估同样按 (景点ID, 日期) upsert，天气保存在 weather_forecast 中"""
+    app = _make_app(tmp_path)
+    path = _write(tmp_path / 'risk' / '沈阳2013-2023年风险评估数据.csv', RISK_HEADER, [
+        "2025-12-25,沈阳故宫,低,多云,注意安全",
+        "2025-12-25,中山公园,中,小雨,携带雨具",
+        "2025-12-26,沈阳故宫,,晴,缺少风险等级",
+    ])
+
+    with app.app_context():
+        stats = import_risks([path])
+        assert (stats['inserted'], stats['updated'], stats['unchanged'], stats['skipped']) == (2, 0, 0, 0)
+        assert import_risks([path])['unchanged'] == 2
+
+        risk = RiskAssessment.query.filter_by(attraction_id=_attraction_id('沈阳', '中山公园')).one()
+        assert risk.risk_level == '中' and risk.weather_forecast == {'weather': '小雨'}
+        assert RiskAssessment.query.count() == 2
+
+
+def test_concurrent_import_retries(tmp_path):
+    """读取现有记录后其他导入插入了相同记录：违反唯一约束，回滚后重新比较，不产生重复记录"""
+    app = _make_app(tmp_path)
+    path = _write(tmp_path / 'traffic' / '沈阳_traffic_data.csv', TRAFFIC_HEADER, [
+        "2024-12-26,沈阳故宫,2311,0,晴",
+        "2024-12-27,沈阳故宫,2499,0,中雨",
+    ])
+    load_existing = record_importer._load_existing
+    calls = []
+
+    def racing_load_existing(*args):
+        existing = load_existing(*args)
+        if not calls:
+            # 第一次读取之后，另一个导入插入了同一条记录并提交
+            db.session.add(TrafficRecord(attraction_id=_attraction_id('沈阳', '沈阳故宫'),
+                                         date=date(2024, 12, 26), traffic=1))
+            db.session.commit()
+        calls.append(1)
+        return existing
+
+    with app.app_context():
+        record_importer._load_existing = racing_load_existing
+        try:
+            stats = import_traffic([path])
+        finally:
+            record_importer._load_existing = load_existing
+
+        assert len(calls) == 2
+        assert (stats['inserted'], stats['updated'], stats['unchanged']) == (1, 1, 0)
+        assert TrafficRecord.query.count() == 2
+
+
+def test_legacy_duplicates_removed_by_migration(tmp_path):
+    """旧数据库中重复导入的记录：迁移保留每个 (景点, 日期) ID最小的一条并添加唯一索引"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE traffic_record (id INTEGER PRIMARY KEY, attraction_id INTEGER NOT NULL, '
+                          'date DATE NOT NULL, traffic INTEGER NOT NULL, weather VARCHAR(50), temperature FLOAT, '
+                          'is_holiday BOOLEAN, created_at DATETIME)'))
+        conn.execute(text("INSERT INTO traffic_record (id, attraction_id, date, traffic) VALUES "
+                          "(1, 1, '2024-12-26', 10), (2, 1, '2024-12-26', 10), (3, 1, '2024-12-27', 20)"))
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        assert [row[0] for row in conn.execute(text('SELECT id FROM traffic_record ORDER BY id'))] == [1, 3]
+    indexes = {index['name']: index['unique'] for index in inspect(engine).get_indexes('traffic_record')}
+    assert indexes['ux_traffic_record_attraction_date']
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_city_from_filename()
+    for test in [test_traffic_upsert_is_idempotent, test_risk_upsert_is_idempotent,
+                 test_concurrent_import_retries, test_legacy_duplicates_removed_by_migration]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 客流量和风险评估数据导入测试全部通过")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+测试慢请求剖析：折叠调用栈、超过阈值才保存、保留份数、日志查看页面列出和下载
+"""
+
+import cProfile
+import time
+
+from app import create_app, db
+from app.config import Config
+from app.models import Admin
+from app.utils import identity_cache, request_profiler
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _inner():
+    _busy(0.02)
+
+
+def _outer():
+    _inner()
+    _busy(0.01)
+
+
+def test_collapse():
+    """调用栈按调用关系展开，各函数的自身耗时归到对应的栈上"""
+    profile = cProfile.Profile()
+    profile.enable()
+    _outer()
+    profile.disable()
+    profile.create_stats()
+
+    folded = request_profiler.collapse(profile.stats)
+    stacks = {stack.split(';')[-1].split(' (')[0]: stack for stack in folded}
+    inner_stack = [frame.split(' (')[0] for frame in stacks['_busy'].split(';')]
+    assert inner_stack[-3:] in (['_outer', '_inner', '_busy'], ['_outer', '_busy'])
+    assert 'test_request_profiler.py:' in stacks['_busy']
+
+    text = request_profiler.format_folded(folded)
+    total_us = sum(int(line.rsplit(' ', 1)[1]) for line in text.splitlines())
+    assert 25000 <= total_us <= 200000
+    assert any(line.split(';')[-1].startswith('_busy') and '_inner' in line for line in text.splitlines())
+
+
+def _make_app(tmp_path, **options):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        PROFILE_ENABLED = True
+        PROFILE_SAMPLE_RATE = 1.0
+        PROFILE_MIN_DURATION_MS = 50
+        PROFILE_DIR = tmp_path / 'profiles'
+        PROFILE_MAX_FILES = 2
+
+    for key, value in options.items():
+        setattr(TestConfig, key, value)
+    identity_cache.clear()
+    request_profiler.clear()
+    app = create_app(TestConfig)
+    with app.app_context():
+        admin = Admin(username='admin', email='admin@example.com')
+        admin.set_password('password')
+        db.session.add(admin)
+        db.session.commit()
+
+    @app.route('/_slow')
+    def slow_view():
+        _busy(0.06)
+        return 'slow'
+
+    @app.route('/_fast')
+    def fast_view():
+        return 'fast'
+
+    return app
+
+
+def test_slow_requests_saved_and_listed(tmp_path):
+    """只保存超过阈值的请求，超出保留份数删除最旧的，管理员可在日志页面下载"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/_slow').status_code == 200
+    client.get('/_fast')
+
+    stats = request_profiler.get_stats()
+    assert stats['sampled'] == 4 and stats['saved'] == 3 and stats['pruned'] == 1
+    assert stats['discarded'] == 1
+    profiles = request_profiler.list_profiles(tmp_path / 'profiles')
+    assert len(profiles) == 2 and len(list((tmp_path / 'profiles').iterdir())) == 4
+    assert profiles[0]['created'] >= profiles[1]['created']
+    profile = profiles[0]
+    assert profile['method'] == 'GET' and profile['endpoint'] == '_slow' and profile['duration_ms'] >= 50
+    assert profile['files'] == ['folded', 'prof']
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = 'admin_1'
+        sess['_fresh'] = True
+    page = client.get('/logs/').get_data(as_text=True)
+    assert profile['name'] in page
+
+    response = client.get(f"/logs/profiles/{profile['name']}.folded")
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert any('slow_view (test_request_profiler.py:' in line and '_busy' in line for line in text.splitlines())
+    assert client.get(f"/logs/profiles/{profile['name']}.prof").status_code == 200
+    assert client.get('/logs/profiles/..%2Fapp.log').status_code == 404
+    assert client.get('/logs/profiles/20000101-000000-000000_GET_x_1ms.folded').status_code == 404
+
+
+def test_disabled(tmp_path):
+    """未开启时不挂剖析器"""
+    app = _make_app(tmp_path, PROFILE_ENABLED=False)
+    app.test_client().get('/_slow')
+    assert request_profiler.get_stats()['sampled'] == 0
+    assert not (tmp_path / 'profiles').exists()
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_collapse()
+    for test in [test_slow_requests_saved_and_listed, test_disabled]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 慢请求剖析测试全部通过")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试景点搜索倒排索引：关键词检索、拼音首字母、城市筛选和前缀补全
+"""
+
+import pandas as pd
+
+from app.utils.search_index import AttractionSearchIndex, pinyin_initials, tokenize
+
+
+attractions_df = pd.DataFrame([
+    {'城市': '沈阳', '景点名称': '沈阳故宫博物院', '景点类型': '博物馆', '简介': '清朝皇宫', '评分': 4.8},
+    {'城市': '沈阳', '景点名称': '辽宁省博物馆', '景点类型': '博物馆', '简介': '省级综合博物馆', '评分': 4.6},
+    {'城市': '沈阳', '景点名称': '北陵公园', '景点类型': '公园', '简介': '昭陵所在地', '评分': 4.5},
+    {'城市': '大连', '景点名称': '大连自然博物馆', '景点类型': '博物馆', '简介': '海边的博物馆', '评分': 4.7},
+    {'城市': '大连', '景点名称': '星海公园', '景点类型': '公园', '简介': '海滨公园', '评分': 4.4},
+    {'城市': '大连', '景点名称': '博物广场', '景点类型': '广场', '简介': '馆前广场', '评分': 4.9},
+], index=[10, 11, 12, 13, 14, 15])
+
+index = AttractionSearchIndex(attractions_df)
+
+
+def names(doc_ids):
+    return [index.names[doc_id] for doc_id in doc_ids]
+
+
+def test_tokenize_and_initials():
+    """中文切分为单字和bigram，拼音首字母正确"""
+    assert tokenize('故宫A1') == ['故', '宫', '故宫', 'a1']
+    assert pinyin_initials('沈阳故宫') == 'sygg'
+    assert pinyin_initials('星海公园5A') == 'xhgy5a'
+
+
+def test_search_matches_substring():
+    """只返回包含完整关键词的景点，bigram都命中但不连续的不返回"""
+    results = names(index.search('博物馆'))
+    assert set(results) == {'沈阳故宫博物院', '辽宁省博物馆', '大连自然博物馆'}
+    # "博物广场" 含 "博物" 但不含 "博物馆"，"沈阳故宫博物院" 通过类型字段命中
+    assert '博物广场' not in results
+    # 名称命中排在仅类型命中之前
+    assert results.index('辽宁省博物馆') < results.index('沈阳故宫博物院')
+
+
+def test_search_city_filter_and_pinyin():
+    """城市筛选（带不带"市"均可）和拼音首字母检索"""
+    assert names(index.search('公园', city='大连市')) == ['星海公园']
+    assert names(index.search('sygg')) == ['沈阳故宫博物院']
+    assert index.search('不存在的景点') == []
+    assert index.search('') == []
+
+
+def test_suggest_prefix():
+    """名称前缀和拼音首字母前缀补全，按评分排序"""
+    assert names(index.suggest('大连')) == ['大连自然博物馆']
+    assert names(index.suggest('b')) == ['博物广场', '北陵公园']
+    assert names(index.suggest('b', city='沈阳')) == ['北陵公园']
+    records = index.suggest_records('xh')
+    assert records == [{'城市': '大连', '景点名称': '星海公园', '景点类型': '公园', '评分': 4.4}]
+
+
+if __name__ == '__main__':
+    test_tokenize_and_initials()
+    test_search_matches_substring()
+    test_search_city_filter_and_pinyin()
+    test_suggest_prefix()
+    print("✓ 景点搜索索引测试全部通过")
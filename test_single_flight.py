@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试合并并发计算：相同键只执行一次并共享结果或异常，等待方得到副本，并发训练同一模型只训练一次
+"""
+
+import threading
+import time
+
+from app.services.prediction_service import WeatherPredictionService
+from app.utils import metrics, single_flight
+from test_prediction_process_pool import _make_weather_df
+
+
+def _run_concurrently(func, count):
+    """count 个线程同时调用 func，返回各线程的结果或异常"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    """并发的相同调用只执行一次，结果共享；执行结束后键释放"""
+    flight = single_flight.Group('test_share')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'value': 42}
+
+    results = _run_concurrently(lambda: flight.do('key', compute), 8)
+    assert len(calls) == 1
+    assert all(result == {'value': 42} for result in results)
+    assert flight.get_stats() == {'leaders': 1, 'followers': 7, 'errors': 0, 'in_flight': 0}
+
+    # 不同的键各自执行，执行结束后再次调用重新执行
+    _run_concurrently(lambda: flight.do(threading.get_ident(), compute), 2)
+    flight.do('key', compute)
+    assert len(calls) == 4
+
+
+def test_errors_shared_and_copies():
+    """执行失败时等待方收到同一异常；指定 copy 时等待方得到副本"""
+    flight = single_flight.Group('test_errors')
+
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("模型文件损坏")
+
+    results = _run_concurrently(lambda: flight.do('key', fail), 4)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.get_stats()['errors'] == 1
+
+    shared = ['a']
+
+    def compute():
+        time.sleep(0.2)
+        return shared
+
+    results = _run_concurrently(lambda: flight.do('key', compute, copy=list), 4)
+    assert sum(result is shared for result in results) == 1
+    assert all(result == ['a'] for result in results)
+
+
+def _trainings():
+    return metrics._counters.get(('app_model_trainings_total', (('model', 'weather'),)), 0)
+
+
+def test_concurrent_training_runs_once(tmp_path):
+    """多个请求同时训练（各自持有一份天气数据的副本），每个模型只训练一次"""
+    weather_df = _make_weather_df()
+    before = _trainings()
+
+    results = _run_concurrently(
+        lambda: WeatherPredictionService(tmp_path).train_all_models(weather_df.copy()), 3
+    )
+    assert not any(isinstance(result, Exception) for result in results)
+    # 2 个城市 x 5 个目标变量（样例数据中存在的目标变量）
+    trained = sum(len(city_results) for city_results in results[0].values())
+    assert trained > 0 and _trainings() - before == trained
+
+    # 相同数据对象的并发预测只执行一次，等待方得到各自的副本
+    service = WeatherPredictionService(tmp_path)
+    stats = single_flight.group('predict_all_cities').get_stats()
+    predictions = _run_concurrently(lambda: service.predict_all_cities(weather_df, 3), 3)
+    after = single_flight.group('predict_all_cities').get_stats()
+    assert after['leaders'] + after['followers'] - stats['leaders'] - stats['followers'] == 3
+    frames = [result['沈阳市'] for result in predictions]
+    assert frames[0] is not frames[1] and frames[0].equals(frames[1])
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    test_concurrent_calls_share_one_execution()
+    test_errors_shared_and_copies()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_concurrent_training_runs_once(Path(tmp_dir))
+    print("✓ 合并并发计算测试全部通过")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试应用启动：create_app 不导入 pandas、scikit-learn 等重量级库，导入耗时在预算内；数据目录检查
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.config import Config
+
+PROJECT_DIR = Path(__file__).parent
+
+# 启动时不应导入的库，只在用到它们的请求中导入
+HEAVY_MODULES = ('pandas', 'numpy', 'sklearn', 'scipy', 'networkx', 'folium', 'pyecharts', 'joblib', 'requests')
+
+# create_app 的导入耗时预算（毫秒），-X importtime 自身有额外开销，预算留有余量
+IMPORT_BUDGET_MS = 1500
+
+_BOOT = """
+from app import create_app
+from app.config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    LOG_CONSOLE = False
+    SQLALCHEMY_DATABASE_URI = {uri!r}
+
+app = create_app(TestConfig)
+assert 'path_optimization.optimize_path' in app.view_functions
+"""
+
+
+def _import_times(tmp_path):
+    """在子进程中以 -X importtime 启动应用，返回 {模块: 累计耗时(微秒)} 和顶层模块的总耗时"""
+    code = _BOOT.format(uri=f"sqlite:///{tmp_path / 'test.db'}")
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_DIR))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=PROJECT_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    modules, total = {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return modules, total
+
+
+def test_create_app_import_budget(tmp_path):
+    """create_app 只导入 Flask 和 SQLAlchemy 等基础库，服务模块在首次请求时才导入"""
+    modules, total = _import_times(tmp_path)
+    heavy = sorted(name for name in modules if name.split('.')[0] in HEAVY_MODULES)
+    assert heavy == []
+    assert not any(name.startswith('app.services') for name in modules)
+    assert total / 1000 < IMPORT_BUDGET_MS, f"导入耗时 {total / 1000:.0f}ms 超出预算"
+
+
+def test_validate(tmp_path):
+    """数据目录不存在时报错，没有天气数据文件时只警告"""
+    assert Config.validate() == []
+
+    class EmptyConfig(Config):
+        DATA_DIR = tmp_path
+
+    assert EmptyConfig.validate() == [f"数据目录中没有找到天气数据文件: {tmp_path}"]
+
+    class MissingConfig(Config):
+        DATA_DIR = tmp_path / 'missing'
+
+    try:
+        MissingConfig.validate()
+    except RuntimeError as e:
+        assert '数据目录不存在' in str(e)
+    else:
+        raise AssertionError("数据目录不存在时应报错")
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    for test in [test_create_app_import_budget, test_validate]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 应用启动测试全部通过")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+测试启动预热：任务并行执行、依赖失败跳过、时间预算、/healthz 和 /readyz
+"""
+
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.utils import warmup
+
+
+def _make_app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    return create_app(TestConfig)
+
+
+def _sleep_task(seconds, details=None):
+    def task(app):
+        time.sleep(seconds)
+        return details
+    return task
+
+
+def _failing_task(app):
+    raise ValueError("数据文件损坏")
+
+
+def test_parallel_and_dependencies(tmp_path):
+    """无依赖的任务并行执行，依赖失败的任务跳过"""
+    tasks = [
+        ('a', _sleep_task(0.2, {'rows': 3}), ()),
+        ('b', _sleep_task(0.2), ()),
+        ('broken', _failing_task, ()),
+        ('after_a', _sleep_task(0.01), ('a',)),
+        ('after_broken', _sleep_task(0.01), ('broken',)),
+    ]
+    state = warmup.Warmup(_make_app(tmp_path), tasks=tasks, timeout=5, workers=4)
+    started = time.perf_counter()
+    state.run()
+    elapsed = time.perf_counter() - started
+
+    assert state.is_ready() and elapsed < 0.35
+    status = state.get_status()
+    assert status['tasks']['a'] == {'status': 'done', 'duration_ms': status['tasks']['a']['duration_ms'], 'rows': 3}
+    assert status['tasks']['after_a']['status'] == 'done'
+    assert status['tasks']['broken'] == {'status': 'failed', 'error': "数据文件损坏",
+                                         'duration_ms': status['tasks']['broken']['duration_ms']}
+    assert status['tasks']['after_broken'] == {'status': 'skipped'}
+    assert status['timed_out'] is False
+
+
+def test_time_budget(tmp_path):
+    """超出时间预算后直接就绪，未完成的任务在后台继续执行"""
+    state = warmup.Warmup(_make_app(tmp_path), tasks=[('slow', _sleep_task(0.5), ())], timeout=0.05)
+    started = time.perf_counter()
+    state.run()
+    assert time.perf_counter() - started < 0.3
+    status = state.get_status()
+    assert status['ready'] and status['timed_out'] and status['tasks']['slow']['status'] == 'timeout'
+
+    time.sleep(0.6)
+    assert state.get_status()['tasks']['slow']['status'] == 'done'
+
+
+def test_wait_all_ignores_time_budget(tmp_path):
+    """预派生模式 fork 之前不限时间：等待全部任务完成且预热线程退出"""
+    state = warmup.Warmup(_make_app(tmp_path), tasks=[('slow', _sleep_task(0.3), ())], timeout=0.05)
+    state.run(wait_all=True)
+    status = state.get_status()
+    assert status['ready'] and not status['timed_out'] and status['tasks']['slow']['status'] == 'done'
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('warmup')]
+
+
+def test_health_and_readiness(tmp_path):
+    """预热完成前 /readyz 返回503，/healthz 始终返回200"""
+    app = _make_app(tmp_path)
+    client = app.test_client()
+    # 测试模式下不预热，直接就绪
+    assert client.get('/readyz').status_code == 200
+
+    release = threading.Event()
+    state = warmup.Warmup(app, tasks=[('blocked', lambda app: release.wait(5), ())], timeout=5)
+    app.extensions['warmup'] = state
+    state.start()
+
+    response = client.get('/readyz')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '5'
+    data = response.get_json()
+    assert data['status'] == 'warming_up' and data['database'] == 'ok'
+    assert data['tasks']['blocked']['status'] in ('pending', 'running')
+    assert client.get('/healthz').get_json() == {'status': 'ok'}
+
+    release.set()
+    assert state.wait(5)
+    response = client.get('/readyz')
+    assert response.status_code == 200 and response.get_json()['status'] == 'ready'
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+
+    for test in [test_parallel_and_dependencies, test_time_budget, test_wait_all_ignores_time_budget,
+                 test_health_and_readiness]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test(Path(tmp_dir))
+    print("✓ 启动预热测试全部通过")